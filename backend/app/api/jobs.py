@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from pathlib import Path
-import shutil
 import uuid
 from typing import List
 from app.db.session import get_db
@@ -12,8 +11,9 @@ from app.models.audit import AuditLog
 from app.schemas.schemas import JobCreate, JobResponse, DocumentResponse
 from app.core.security import get_current_user
 from app.core.config import settings
-from app.services.document_processor import DocumentProcessingService, calculate_file_checksum
-import asyncio
+from app.services.document_processor import DocumentProcessingService, save_file_with_checksum
+from app.services.job_notifier import notify_jobs_available
+from app.services.http_clients import run_sync
 from concurrent.futures import ThreadPoolExecutor
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
@@ -40,6 +40,9 @@ def create_job(
     db.commit()
     db.refresh(new_job)
     
+    # Wake idle queue workers
+    notify_jobs_available(new_job.queue_name, db)
+    
     # Log audit event
     audit_log = AuditLog(
         actor_user_id=current_user.user_id,
@@ -94,12 +97,8 @@ async def upload_documents(
         storage_filename = f"{file_id}{file_extension}"
         storage_path = upload_dir / storage_filename
         
-        # Save file
-        with storage_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Calculate checksum
-        checksum = calculate_file_checksum(str(storage_path))
+        # Save file and calculate checksum in a single pass
+        checksum = save_file_with_checksum(file.file, storage_path)
         
         # Check for duplicates
         existing_doc = db.query(Document).filter(
@@ -164,7 +163,7 @@ def process_document_background(document_id: str, user_id: str):
         document = db.query(Document).filter(Document.document_id == document_id).first()
         if document:
             processor = DocumentProcessingService(db)
-            processor.process_document(document, user_id)
+            run_sync(processor.process_document(document, user_id))
     except Exception as e:
         print(f"Error processing document {document_id}: {e}")
     finally:
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.core.security import get_current_user
@@ -78,12 +79,13 @@ async def create_batch_job(
         )
     
     # Verify all jobs belong to the current tenant
-    jobs = db.query(Job).filter(
+    job_ids = list(dict.fromkeys(job_ids))
+    matched_jobs = db.query(func.count(Job.job_id)).filter(
         Job.tenant_id == current_user.tenant_id,
         Job.job_id.in_(job_ids)
-    ).all()
+    ).scalar()
     
-    if len(jobs) != len(job_ids):
+    if matched_jobs != len(job_ids):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Some job IDs are invalid or belong to different tenant"
@@ -107,13 +109,12 @@ async def get_batch_status(
     queue_manager: QueueManager = Depends(get_queue_manager)
 ):
     """Get status of a batch processing job"""
-    # This would need to be enhanced to check batch ownership
     status_result = queue_manager.get_batch_status(batch_id)
     
-    if "error" in status_result:
+    if "error" in status_result or status_result["tenant_id"] != current_user.tenant_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=status_result["error"]
+            detail="Batch not found"
         )
     
     return status_result
@@ -61,6 +61,8 @@ class RedisConnectionConfig(BaseSettings):
     REDIS_CONNECTION_TIMEOUT: int = 30
     REDIS_SOCKET_TIMEOUT: int = 30
     REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_RECONNECT_BACKOFF: float = 1.0  # first retry delay after a failed connect (seconds)
+    REDIS_RECONNECT_MAX_BACKOFF: float = 30.0
     
     # SSL & Security
     REDIS_SSL: bool = False
@@ -81,7 +83,7 @@ class RedisConnectionConfig(BaseSettings):
     # Fallback & Testing
     REDIS_URL: Optional[str] = None
     REDIS_ENABLED: bool = True
-    REDIS_MOCK_MODE: bool = False  # Use in-memory mock for testing
+    REDIS_MOCK_MODE: bool = False  # Use fakeredis for testing
     
     class Config:
         env_prefix = "REDIS_"
@@ -146,6 +148,12 @@ class CacheSettings(BaseSettings):
     CONNECTION_CONFIG: ClassVar[RedisConnectionConfig] = RedisConnectionConfig()
     PERFORMANCE_CONFIG: ClassVar[CachePerformanceConfig] = CachePerformanceConfig()
     
+    # In-process L1 tier (in front of Redis)
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_ENTRIES: int = 4096
+    CACHE_L1_MAX_BYTES: int = 64 * 1024 * 1024  # 64 MB per process
+    CACHE_L1_TTL: int = 60  # Max seconds L1 may serve mutable cache types
+    
     # Multi-tenant Settings
     CACHE_MULTI_TENANT: bool = True
     CACHE_TENANT_ISOLATION: str = "namespace"  # "namespace", "database", "key"
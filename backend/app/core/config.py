@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 import json
 
 
@@ -68,6 +68,13 @@ class Settings(BaseSettings):
     PARALLEL_PROCESSING_ENABLED: bool = True
     MAX_CONCURRENT_PROCESSES: int = 4
     BACKGROUND_PROCESSING_ENABLED: bool = True
+    OCR_PROCESS_POOL_SIZE: int = 2  # PaddleOCR worker processes for page-parallel OCR
+    
+    # Job Queue Workers
+    QUEUE_NOTIFY_BACKEND: str = "local"  # local, postgres (LISTEN/NOTIFY)
+    QUEUE_IDLE_POLL_MIN_SECONDS: float = 0.5
+    QUEUE_IDLE_POLL_MAX_SECONDS: float = 30.0
+    QUEUE_RETRY_MAX_DELAY_SECONDS: int = 3600
     
     # Quality vs Speed Trade-offs
     FAST_QUALITY_DPI: int = 150
@@ -80,6 +87,21 @@ class Settings(BaseSettings):
     BLOCK_DANGEROUS_FILES: bool = True
     VALIDATION_LEVEL: str = "standard"  # basic, standard, comprehensive
     
+    # HTTP Middleware
+    ALLOWED_HOSTS: List[str] = ["*"]
+    CORS_ORIGINS: List[str] = ["*"]
+    CACHE_PATTERNS: List[str] = []  # GET path prefixes whose responses may be cached
+    
+    # Rate Limiting (HTTP middleware)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_CALLS_PER_MINUTE: int = 100  # per client IP
+    RATE_LIMIT_API_KEY_CALLS_PER_MINUTE: int = 600  # per API key
+    
+    # Usage Metering (write-behind)
+    USAGE_METER_FLUSH_INTERVAL: float = 5.0  # seconds between batch writes
+    USAGE_METER_MAX_PENDING: int = 1000  # buffered keys that trigger an early flush
+    USAGE_METER_RECONCILE_INTERVAL: float = 60.0  # seconds between quota reloads
+    
     # Mock Services (set to True to use real APIs when available)
     USE_REAL_OCR: bool = False
     USE_REAL_LLM: bool = False
@@ -164,7 +186,9 @@ class Settings(BaseSettings):
     DISTRIBUTED_TRACING_ENABLED: bool = True
     TRACING_MAX_TRACES: int = 10000
     TRACING_MAX_SPANS_PER_TRACE: int = 1000
-    TRACING_SAMPLING_RATE: float = 1.0  # Sample all traces by default
+    TRACING_SAMPLING_RATE: float = 1.0  # Head sampling: fraction of new traces recorded
+    TRACING_TAIL_LATENCY_MS: Optional[float] = 500.0  # Tail sampling: keep only errored or slower traces (None keeps all)
+    TRACING_MAX_SPANS: int = 100000  # Span arena size
     TRACING_SERVICE_NAME: str = "fernando"
     
     # Alert Management
@@ -202,6 +226,12 @@ class Settings(BaseSettings):
     PROXY_TIMEOUT: int = 30
     PROXY_MAX_RETRIES: int = 3
     
+    # Shared outbound HTTP clients (per backend)
+    HTTP_CLIENT_TIMEOUT: float = 60.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    
     # LLM Proxy Configuration
     LLM_PROXY_ENDPOINT: str = "http://localhost:8000"
     LLM_PROXY_ENABLED: bool = True
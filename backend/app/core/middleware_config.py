@@ -6,19 +6,36 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 
-from app.middleware.usage_tracking import UsageTrackingMiddleware
-from app.middleware.cache_decorators import CacheMiddleware
-from app.middleware.rate_limiting import RateLimitMiddleware
+from app.middleware.pipeline import MiddlewarePipeline, TenantResolutionStage
+from app.middleware.rate_limiting import RateLimitStage
+from app.middleware.cache_decorators import CacheLookupStage
+from app.middleware.telemetry_middleware import TelemetryStage
+from app.middleware.usage_tracking import UsageMeteringStage
 from app.core.config import settings
+from app.core.security import ApiKeyUserResolver
+
+
+def build_request_stages() -> list:
+    """Request pipeline stages, in execution order"""
+    stages = [TenantResolutionStage()]
+    if settings.RATE_LIMIT_ENABLED:
+        stages.append(RateLimitStage(api_key_resolver=ApiKeyUserResolver()))
+    stages.append(CacheLookupStage(cache_patterns=settings.CACHE_PATTERNS))
+    if settings.TELEMETRY_ENABLED:
+        stages.append(TelemetryStage())
+    stages.append(UsageMeteringStage())
+    return stages
+
 
 def setup_middleware(app: FastAPI):
     """Configure all middleware for the application"""
     
-    # Security middleware
-    app.add_middleware(
-        TrustedHostMiddleware, 
-        allowed_hosts=settings.ALLOWED_HOSTS
-    )
+    # Platform request pipeline (innermost): tenant resolution, rate limit,
+    # cache lookup, telemetry, usage metering in one pure-ASGI layer
+    app.add_middleware(MiddlewarePipeline, stages=build_request_stages())
+    
+    # Compression
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
     
     # CORS middleware
     app.add_middleware(
@@ -29,30 +46,8 @@ def setup_middleware(app: FastAPI):
         allow_headers=["*"],
     )
     
-    # Compression
-    app.add_middleware(GZipMiddleware, minimum_size=1000)
-    
-    # Custom middleware
-    app.add_middleware(UsageTrackingMiddleware)
-    app.add_middleware(CacheMiddleware, cache_patterns=settings.CACHE_PATTERNS)
-    app.add_middleware(RateLimitMiddleware, calls_per_minute=settings.RATE_LIMIT_CALLS_PER_MINUTE)
-    
-    # Enterprise feature activation middleware
-    class EnterpriseFeatureMiddleware:
-        def __init__(self, app):
-            self.app = app
-        
-        async def __call__(self, request: Request, call_next):
-            # Add enterprise feature flags to request state
-            request.state.enterprise_enabled = True
-            request.state.tenant_id = None
-            
-            # Extract tenant from headers or JWT token
-            if "X-Tenant-ID" in request.headers:
-                request.state.tenant_id = request.headers["X-Tenant-ID"]
-            
-            response = await call_next(request)
-            return response
-
-    from fastapi import Request
-    app.add_middleware(EnterpriseFeatureMiddleware)
\ No newline at end of file
+    # Security middleware (outermost)
+    app.add_middleware(
+        TrustedHostMiddleware, 
+        allowed_hosts=settings.ALLOWED_HOSTS
+    )
@@ -1,12 +1,16 @@
+import asyncio
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.models.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -84,3 +88,54 @@ def require_role(required_role: str):
             )
         return current_user
     return role_checker
+
+
+def get_api_key_user_id(api_key: str, db: Session) -> Optional[str]:
+    """Id of the active user owning an unexpired ``api_key``, or None"""
+    users = User.__table__
+    row = db.execute(
+        select(users.c.user_id, users.c.status, users.c.api_key_expires_at)
+        .where(users.c.api_key == api_key)
+    ).first()
+    if row is None or row.status != "active":
+        return None
+    if row.api_key_expires_at is not None and row.api_key_expires_at <= datetime.utcnow():
+        return None
+    return row.user_id
+
+
+class ApiKeyUserResolver:
+    """
+    Async ``X-API-Key`` -> user id lookup for the request pipeline.
+
+    Lookups run in a worker thread; results, including rejections, are kept
+    for ``ttl_seconds`` in a bounded LRU so a keyed client costs one query
+    per window rather than one per request.
+    """
+
+    def __init__(self, session_factory=None, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        self.session_factory = session_factory or SessionLocal
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+
+    def _lookup(self, api_key: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            return get_api_key_user_id(api_key, db)
+        finally:
+            db.close()
+
+    async def __call__(self, api_key: str) -> Optional[str]:
+        now = time.monotonic()
+        cached = self._cache.get(api_key)
+        if cached is not None and cached[1] > now:
+            self._cache.move_to_end(api_key)
+            return cached[0]
+
+        user_id = await asyncio.to_thread(self._lookup, api_key)
+        self._cache[api_key] = (user_id, now + self.ttl_seconds)
+        self._cache.move_to_end(api_key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return user_id
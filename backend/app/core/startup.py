@@ -1,6 +1,7 @@
 """
 Application startup and initialization logic
 """
+import asyncio
 import logging
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal, init_db
@@ -8,6 +9,9 @@ from app.services.enterprise_service import EnterpriseService
 from app.services.queue_manager import QueueManager
 from app.services.licensing_service import initialize_default_tiers
 from app.services.cache.redis_cache import init_cache_service
+from app.services.ocr_pool import get_ocr_pool
+from app.services.usage_meter import get_usage_meter
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,12 @@ class ApplicationStartup:
         # Initialize cache service
         await self._initialize_cache()
         
+        # Warm up OCR worker processes
+        await self._initialize_ocr_pool()
+        
+        # Start the write-behind usage meter flush loop
+        get_usage_meter().start()
+        
         self._print_startup_banner()
     
     async def _initialize_enterprise_features(self):
@@ -59,6 +69,21 @@ class ApplicationStartup:
             self.logger.error(f"Error initializing cache service: {e}")
             raise
     
+    async def _initialize_ocr_pool(self):
+        """Start OCR worker processes so models are loaded before the first upload"""
+        if not settings.USE_REAL_OCR:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+            warmed = await loop.run_in_executor(None, get_ocr_pool().warm_up)
+            if warmed:
+                self.logger.info(f"OCR process pool ready ({settings.OCR_PROCESS_POOL_SIZE} workers)")
+            else:
+                self.logger.warning("OCR process pool started without PaddleOCR; falling back per request")
+        except Exception as e:
+            self.logger.error(f"Error warming up OCR process pool: {e}")
+    
     def _print_startup_banner(self):
         """Print application startup banner"""
         banner = """
@@ -8,6 +8,10 @@ from app.core.middleware_config import setup_middleware
 from app.core.exception_handlers import setup_exception_handlers
 from app.core.router_config import setup_routes
 from app.core.startup import ApplicationStartup
+from app.services.ocr_pool import shutdown_ocr_pool
+from app.services.http_clients import close_async_clients
+from app.services.cache.redis_cache import close_cache_service
+from app.services.usage_meter import get_usage_meter
 
 # Create application
 app = create_app()
@@ -79,6 +83,15 @@ async def startup_event():
     startup = ApplicationStartup()
     await startup.initialize_application()
 
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Flush buffered usage before anything it depends on goes away
+    await get_usage_meter().stop()
+    shutdown_ocr_pool()
+    await close_async_clients()
+    await close_cache_service()
+
 if __name__ == "__main__":
     import uvicorn
     from app.core.config import settings
@@ -9,20 +9,27 @@ import asyncio
 import hashlib
 import json
 import logging
+import struct
 import time
 from datetime import datetime, timedelta
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional, Union
+from urllib.parse import parse_qsl
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message
 
 from app.services.cache.redis_cache import cache_service, cache_result, cache_result_sync
 from app.core.cache_config import cache_settings, namespace_manager
 from app.services.telemetry.event_tracker import event_tracker, EventCategory, EventLevel
+from app.middleware.pipeline import PipelineStage, RequestContext, StageMiddleware
 
 
 logger = logging.getLogger(__name__)
 
+# Cached middleware entries: 4-byte header length, JSON header, body
+_ENTRY_HEADER = struct.Struct(">I")
+
 
 def cache_api_response(cache_key_func: Callable = None, ttl: int = None, 
                       cache_type: str = "api", tenant_key: str = "tenant_id"):
@@ -251,124 +258,111 @@ def cache_database_query(ttl: int = 1800, key_prefix: str = "query"):
     return decorator
 
 
-class CacheMiddleware:
-    """FastAPI middleware for automatic response caching."""
-    
-    def __init__(self, app, cache_patterns: List[str] = None):
-        self.app = app
-        self.cache_patterns = cache_patterns or []
-        self.exclude_paths = [
-            "/health", "/metrics", "/docs", "/redoc", 
+class CacheLookupStage(PipelineStage):
+    """
+    Pipeline stage serving cached GET responses.
+
+    Responses are stored as raw bytes (JSON header + body) under a key built
+    from the path and sorted query string, in the resolved tenant's namespace.
+    Misses stream through untouched while the body is captured; bodies larger
+    than ``max_body_bytes`` are not cached.
+    """
+
+    name = "cache"
+
+    # Recomputed by whoever serves the cached body
+    _SKIPPED_HEADERS = frozenset((b"content-length", b"transfer-encoding", b"connection", b"set-cookie"))
+
+    def __init__(self, cache_patterns: List[str] = None, exclude_paths: List[str] = None,
+                 max_body_bytes: int = 1024 * 1024):
+        super().__init__(exclude_paths if exclude_paths is not None else [
+            "/health", "/metrics", "/docs", "/redoc",
             "/openapi.json", "/favicon.ico"
-        ]
-    
-    async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
-        
-        request = Request(scope)
-        
-        # Skip caching for certain paths
-        if request.url.path in self.exclude_paths:
-            await self.app(scope, receive, send)
+        ])
+        self.cache_patterns = tuple(cache_patterns or ())
+        self.max_body_bytes = max_body_bytes
+
+    def applies(self, ctx: RequestContext) -> bool:
+        # Only GET requests under a configured prefix are cached
+        return (
+            ctx.method == "GET"
+            and bool(self.cache_patterns)
+            and ctx.path.startswith(self.cache_patterns)
+            and super().applies(ctx)
+        )
+
+    @staticmethod
+    def _cache_key(ctx: RequestContext) -> str:
+        query = sorted(parse_qsl(ctx.query_string, keep_blank_values=True))
+        key_data = f"{ctx.method}:{ctx.path}:{json.dumps(query)}"
+        return hashlib.md5(key_data.encode()).hexdigest()
+
+    async def on_request(self, ctx: RequestContext) -> Optional[ASGIApp]:
+        ctx.cache_key = self._cache_key(ctx)
+        try:
+            payload = await cache_service.get_raw(ctx.cache_key, "api", ctx.tenant_id)
+        except Exception as e:
+            logger.warning(f"Cache middleware retrieval failed: {e}")
+            return None
+        if payload is None:
+            return None
+
+        view = memoryview(payload)
+        (header_length,) = _ENTRY_HEADER.unpack_from(view)
+        header_end = _ENTRY_HEADER.size + header_length
+        entry = json.loads(bytes(view[_ENTRY_HEADER.size:header_end]))
+        ctx.cache_key = None
+
+        event_tracker.track_api_event(
+            ctx.method, ctx.path, entry["status_code"], 0.0,
+            {"cache_hit": True, "middleware": True}
+        )
+
+        response = Response(content=bytes(view[header_end:]), status_code=entry["status_code"])
+        response.raw_headers.extend(
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in entry["headers"]
+        )
+        return response
+
+    async def on_response_start(self, ctx: RequestContext, message: Message):
+        if ctx.cache_key is None or not 200 <= message["status"] < 300:
+            ctx.cache_key = None
             return
-        
-        # Only cache GET requests
-        if request.method != "GET":
-            await self.app(scope, receive, send)
+        ctx.cache_entry = {
+            "status_code": message["status"],
+            "headers": [
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in message.get("headers", ())
+                if name.lower() not in self._SKIPPED_HEADERS
+            ],
+            "body": bytearray()
+        }
+
+    async def on_response_body(self, ctx: RequestContext, message: Message):
+        if ctx.cache_entry is None:
             return
-        
-        # Check if path matches cache patterns
-        should_cache = any(
-            request.url.path.startswith(pattern) for pattern in self.cache_patterns
-        )
-        
-        if not should_cache:
-            await self.app(scope, receive, send)
+        body = ctx.cache_entry["body"]
+        body += message.get("body", b"")
+        if len(body) > self.max_body_bytes:
+            ctx.cache_entry = None
+
+    async def on_complete(self, ctx: RequestContext):
+        entry = ctx.cache_entry
+        if ctx.cache_key is None or entry is None or ctx.error is not None or not entry["body"]:
             return
-        
-        # Generate cache key
-        query_params = dict(request.query_params)
-        key_data = f"{request.method}:{request.url.path}:{json.dumps(query_params, sort_keys=True)}"
-        cache_key = hashlib.md5(key_data.encode()).hexdigest()
-        
-        # Try to get from cache
+
+        header = json.dumps(
+            {"status_code": entry["status_code"], "headers": entry["headers"]}, separators=(",", ":")
+        ).encode()
+        payload = b"".join((_ENTRY_HEADER.pack(len(header)), header, entry["body"]))
         try:
-            cached_response = await cache_service.get(cache_key, "api")
-            if cached_response:
-                # Return cached response
-                headers = cached_response.get("headers", {})
-                content = cached_response.get("content")
-                status_code = cached_response.get("status_code", 200)
-                
-                response = Response(
-                    content=content,
-                    status_code=status_code,
-                    headers=headers,
-                    media_type=cached_response.get("media_type")
-                )
-                
-                event_tracker.track_api_event(
-                    request.method, request.url.path, status_code, 0.0,
-                    {"cache_hit": True, "middleware": True}
-                )
-                
-                await response(scope, receive, send)
-                return
+            await cache_service.set_raw(
+                ctx.cache_key, payload, "api", ctx.tenant_id, self._get_ttl_for_path(ctx.path)
+            )
+            logger.debug(f"Cached response for {ctx.method} {ctx.path}")
         except Exception as e:
-            logger.warning(f"Cache middleware retrieval failed: {e}")
-        
-        # Process request normally and cache response
-        response_started = False
-        response_data = {}
-        
-        async def send_wrapper(message):
-            nonlocal response_started, response_data
-            
-            if message["type"] == "http.response.start":
-                response_started = True
-                response_data["status_code"] = message["status"]
-                response_data["headers"] = dict(message.get("headers", []))
-            elif message["type"] == "http.response.body":
-                if not response_data.get("content"):
-                    response_data["content"] = b""
-                response_data["content"] += message.get("body", b"")
-            
-            await send(message)
-        
-        # Process the request
-        await self.app(scope, receive, send_wrapper)
-        
-        # Cache the response if successful
-        if (response_started and 
-            200 <= response_data.get("status_code", 500) < 300 and 
-            response_data.get("content")):
-            
-            try:
-                # Determine media type from headers
-                content_type = response_data.get("headers", {}).get("content-type", "application/json")
-                
-                cache_data = {
-                    "status_code": response_data["status_code"],
-                    "headers": response_data["headers"],
-                    "content": response_data["content"],
-                    "media_type": content_type
-                }
-                
-                # Use appropriate TTL based on endpoint
-                ttl = self._get_ttl_for_path(request.url.path)
-                tenant_id = getattr(request.state, 'tenant_id', None)
-                
-                await cache_service.set(
-                    cache_key, cache_data, "api", tenant_id, ttl
-                )
-                
-                logger.debug(f"Cached response for {request.method} {request.url.path}")
-                
-            except Exception as e:
-                logger.warning(f"Cache middleware storage failed: {e}")
-    
+            logger.warning(f"Cache middleware storage failed: {e}")
+
     def _get_ttl_for_path(self, path: str) -> int:
         """Get appropriate TTL for a specific path."""
         # Customize TTL based on endpoint type
@@ -382,6 +376,13 @@ class CacheMiddleware:
             return cache_settings.TTL_CONFIG.API_RESPONSE_CACHE
 
 
+class CacheMiddleware(StageMiddleware):
+    """FastAPI middleware for automatic response caching."""
+
+    def __init__(self, app, cache_patterns: List[str] = None):
+        super().__init__(app, CacheLookupStage(cache_patterns))
+
+
 def generate_cache_key_from_params(*params, **kwargs) -> str:
     """Generate a cache key from function parameters."""
     # Create a stable string representation
@@ -0,0 +1,216 @@
+"""
+Middleware Pipeline
+
+One pure-ASGI middleware that runs the platform's request stages in an
+explicit order instead of stacking a middleware layer (and, for
+BaseHTTPMiddleware, a task and a stream wrapper) per concern.
+
+Stages share one ``RequestContext`` per request. Each stage can:
+
+- ``on_request``: inspect the request before the application runs; returning
+  an ASGI app (e.g. a Response) short-circuits the request, and only the
+  stages entered so far see the response, as with nested middleware,
+- ``on_response_start`` / ``on_response_body``: observe or adjust the
+  response as it is sent, innermost stage first; bodies stream through
+  untouched,
+- ``on_complete``: run once the response is finished or the request failed.
+
+Only hooks a stage actually overrides are called. Headers a stage appends to
+``ctx.response_headers`` are added to the response after all hooks ran.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestContext:
+    """Per-request state shared by all pipeline stages"""
+    scope: Scope
+    method: str
+    path: str
+    start_time: float
+    state: Dict[str, Any]  # scope["state"], i.e. request.state of the endpoint
+    client_ip: str = "unknown"
+    request_id: Optional[str] = None
+    span_context: Optional[Any] = None
+    tenant_id: Optional[str] = None
+    status_code: int = 0
+    response_bytes: int = 0
+    response_headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    error: Optional[BaseException] = None
+    cache_key: Optional[str] = None
+    cache_entry: Optional[Dict[str, Any]] = None
+    stage_ns: Optional[Dict[str, int]] = None  # per-stage time when the pipeline records timings
+    _headers: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_scope(cls, scope: Scope) -> "RequestContext":
+        client = scope.get("client")
+        return cls(
+            scope=scope,
+            method=scope["method"],
+            path=scope["path"],
+            start_time=time.time(),
+            state=scope.setdefault("state", {}),
+            client_ip=client[0] if client else "unknown"
+        )
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Request headers, decoded once on first use"""
+        if self._headers is None:
+            self._headers = {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in self.scope.get("headers", ())
+            }
+        return self._headers
+
+    @property
+    def query_string(self) -> str:
+        return self.scope.get("query_string", b"").decode("latin-1")
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.time() - self.start_time) * 1000
+
+
+class PipelineStage:
+    """Base class for pipeline stages; override only the hooks you need"""
+
+    name = "stage"
+
+    def __init__(self, exclude_paths: Optional[Sequence[str]] = None):
+        self.exclude_paths = tuple(exclude_paths or ())
+
+    def applies(self, ctx: RequestContext) -> bool:
+        return not (self.exclude_paths and ctx.path.startswith(self.exclude_paths))
+
+    async def on_request(self, ctx: RequestContext) -> Optional[ASGIApp]:
+        return None
+
+    async def on_response_start(self, ctx: RequestContext, message: Message):
+        pass
+
+    async def on_response_body(self, ctx: RequestContext, message: Message):
+        pass
+
+    async def on_complete(self, ctx: RequestContext):
+        pass
+
+
+def _overrides(stage: PipelineStage, hook: str) -> bool:
+    return getattr(type(stage), hook) is not getattr(PipelineStage, hook)
+
+
+class MiddlewarePipeline:
+    """Pure ASGI middleware running ``stages`` in order around ``app``"""
+
+    def __init__(self, app: ASGIApp, stages: Sequence[PipelineStage], record_timings: bool = False):
+        self.app = app
+        self.stages = list(stages)
+        self.record_timings = record_timings
+        self._request_hooks = {id(s) for s in self.stages if _overrides(s, "on_request")}
+        self._start_hooks = {id(s) for s in self.stages if _overrides(s, "on_response_start")}
+        self._body_hooks = {id(s) for s in self.stages if _overrides(s, "on_response_body")}
+        self._complete_hooks = {id(s) for s in self.stages if _overrides(s, "on_complete")}
+
+    def _timed(self, ctx: RequestContext, stage: PipelineStage, started: int):
+        ctx.stage_ns[stage.name] = ctx.stage_ns.get(stage.name, 0) + time.perf_counter_ns() - started
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext.from_scope(scope)
+        timed = self.record_timings
+        if timed:
+            ctx.stage_ns = {}
+
+        entered: List[PipelineStage] = []
+        endpoint = self.app
+        try:
+            for stage in self.stages:
+                if not stage.applies(ctx):
+                    continue
+                entered.append(stage)
+                if id(stage) not in self._request_hooks:
+                    continue
+                started = time.perf_counter_ns() if timed else 0
+                short_circuit = await stage.on_request(ctx)
+                if timed:
+                    self._timed(ctx, stage, started)
+                if short_circuit is not None:
+                    endpoint = short_circuit
+                    break
+
+            # Response hooks run innermost first, like nested middleware
+            inner_first = entered[::-1]
+            start_hooks = [s for s in inner_first if id(s) in self._start_hooks]
+            body_hooks = [s for s in inner_first if id(s) in self._body_hooks]
+
+            async def send_wrapper(message: Message):
+                if message["type"] == "http.response.start":
+                    ctx.status_code = message["status"]
+                    for stage in start_hooks:
+                        started = time.perf_counter_ns() if timed else 0
+                        await stage.on_response_start(ctx, message)
+                        if timed:
+                            self._timed(ctx, stage, started)
+                    if ctx.response_headers:
+                        message["headers"] = list(message.get("headers", ())) + ctx.response_headers
+                elif message["type"] == "http.response.body":
+                    ctx.response_bytes += len(message.get("body", b""))
+                    for stage in body_hooks:
+                        started = time.perf_counter_ns() if timed else 0
+                        await stage.on_response_body(ctx, message)
+                        if timed:
+                            self._timed(ctx, stage, started)
+                await send(message)
+
+            await endpoint(scope, receive, send_wrapper)
+        except BaseException as e:
+            ctx.error = e
+            raise
+        finally:
+            for stage in reversed(entered):
+                if id(stage) not in self._complete_hooks:
+                    continue
+                started = time.perf_counter_ns() if timed else 0
+                try:
+                    await stage.on_complete(ctx)
+                except Exception as e:
+                    logger.error(f"Pipeline stage {stage.name} failed to complete: {e}")
+                if timed:
+                    self._timed(ctx, stage, started)
+
+
+class StageMiddleware:
+    """Runs one stage on its own, for apps that do not use the full pipeline"""
+
+    def __init__(self, app: ASGIApp, stage: PipelineStage):
+        self.app = app
+        self.stage = stage
+        self.pipeline = MiddlewarePipeline(app, [stage])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.pipeline(scope, receive, send)
+
+
+class TenantResolutionStage(PipelineStage):
+    """Resolves the tenant from the ``X-Tenant-ID`` header"""
+
+    name = "tenant"
+
+    async def on_request(self, ctx: RequestContext) -> Optional[ASGIApp]:
+        ctx.tenant_id = ctx.headers.get("x-tenant-id") or None
+        ctx.state["enterprise_enabled"] = True
+        ctx.state["tenant_id"] = ctx.tenant_id
+        return None
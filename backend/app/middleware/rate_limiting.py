@@ -1,53 +1,119 @@
 """
 Rate limiting middleware
+
+Pipeline stage that checks every HTTP request against the shared
+RateLimiter. Every request is limited per client IP; a request whose
+``X-API-Key`` is accepted by the configured ``api_key_resolver`` is
+additionally limited per resolved key id. Unvalidated keys are ignored, so
+sending random keys cannot escape the IP limit. Route-specific limits are
+RateLimiter rules with ``endpoint_patterns``. Responses carry the standard
+``RateLimit-*`` headers of the most restrictive check.
+``RateLimitMiddleware`` runs the stage as standalone middleware.
 """
-import time
-from fastapi import Request, Response, JSONResponse
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp
+
 from app.core.config import settings
+from app.middleware.pipeline import PipelineStage, RequestContext, StageMiddleware
+from app.services.rate_limiting.rate_limiter import (
+    RateLimitAlgorithm, RateLimiter, RateLimitResult, RateLimitRule, RateLimitScope, get_rate_limiter
+)
+
+logger = logging.getLogger(__name__)
 
-class RateLimitMiddleware:
-    def __init__(self, app, calls_per_minute: int = None):
-        self.app = app
+# Maps a raw X-API-Key to the id of a valid key, or None if the key is not valid
+ApiKeyResolver = Callable[[str], Awaitable[Optional[str]]]
+
+
+class RateLimitStage(PipelineStage):
+    name = "rate_limit"
+
+    def __init__(
+        self,
+        calls_per_minute: int = None,
+        api_key_calls_per_minute: int = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        api_key_resolver: Optional[ApiKeyResolver] = None,
+        exclude_paths: Optional[List[str]] = None
+    ):
+        super().__init__(exclude_paths if exclude_paths is not None else ["/health", "/docs", "/openapi.json"])
         self.calls_per_minute = calls_per_minute or settings.RATE_LIMIT_CALLS_PER_MINUTE
-        self.call_history = {}
-    
-    async def __call__(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/docs", "/openapi.json"]:
-            return await call_next(request)
-        
-        # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-        current_time = int(time.time())
-        
-        # Clean old entries (older than 1 minute)
-        if client_ip in self.call_history:
-            self.call_history[client_ip] = [
-                timestamp for timestamp in self.call_history[client_ip] 
-                if current_time - timestamp < 60
-            ]
-        
-        # Check rate limit
-        if client_ip not in self.call_history:
-            self.call_history[client_ip] = []
-        
-        if len(self.call_history[client_ip]) >= self.calls_per_minute:
+        self.api_key_calls_per_minute = api_key_calls_per_minute or settings.RATE_LIMIT_API_KEY_CALLS_PER_MINUTE
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.api_key_resolver = api_key_resolver
+        self._default_rules_installed = False
+
+    async def _install_default_rules(self):
+        """Register the default per-IP and per-API-key rules (once)"""
+        self._default_rules_installed = True
+        await self.rate_limiter.add_rule(RateLimitRule(
+            id="http_default_ip",
+            name="Default per-IP limit",
+            algorithm=RateLimitAlgorithm.SLIDING_WINDOW,
+            scope=RateLimitScope.IP,
+            scope_value="*",
+            max_requests=self.calls_per_minute,
+            window_seconds=60
+        ))
+        await self.rate_limiter.add_rule(RateLimitRule(
+            id="http_default_api_key",
+            name="Default per-API-key limit",
+            algorithm=RateLimitAlgorithm.SLIDING_WINDOW,
+            scope=RateLimitScope.API_KEY,
+            scope_value="*",
+            max_requests=self.api_key_calls_per_minute,
+            window_seconds=60
+        ))
+
+    async def _api_key_id(self, ctx: RequestContext) -> Optional[str]:
+        """Id of the request's API key if the resolver accepts it"""
+        api_key = ctx.headers.get("x-api-key")
+        if not api_key or self.api_key_resolver is None:
+            return None
+        try:
+            return await self.api_key_resolver(api_key)
+        except Exception as e:
+            logger.warning(f"API key resolution failed, limiting by IP only: {e}")
+            return None
+
+    @staticmethod
+    def _rate_limit_headers(result: RateLimitResult) -> List[Tuple[bytes, bytes]]:
+        reset_seconds = max(0, math.ceil((result.reset_time - datetime.now(timezone.utc)).total_seconds()))
+        headers = [
+            (b"ratelimit-limit", str(result.limit).encode()),
+            (b"ratelimit-remaining", str(result.remaining_requests).encode()),
+            (b"ratelimit-reset", str(reset_seconds).encode()),
+        ]
+        if not result.allowed and result.retry_after_seconds:
+            headers.append((b"retry-after", str(result.retry_after_seconds).encode()))
+        return headers
+
+    async def on_request(self, ctx: RequestContext) -> Optional[ASGIApp]:
+        if not self._default_rules_installed:
+            await self._install_default_rules()
+
+        subjects = [(ctx.client_ip, RateLimitScope.IP)]
+        api_key_id = await self._api_key_id(ctx)
+        if api_key_id is not None:
+            subjects.append((api_key_id, RateLimitScope.API_KEY))
+        # One atomic evaluation: a request denied by either limit consumes neither
+        results = await self.rate_limiter.check_rate_limits(subjects, ctx.path)
+        result = next((r for r in results if not r.allowed), None) or min(results, key=lambda r: r.remaining_requests)
+        ctx.response_headers.extend(self._rate_limit_headers(result))
+
+        if not result.allowed:
             return JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded. Please try again later."}
             )
-        
-        # Add current request
-        self.call_history[client_ip].append(current_time)
-        
-        # Process request
-        start_time = time.time()
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(self.calls_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(
-            self.calls_per_minute - len(self.call_history[client_ip])
-        )
-        
-        return response
\ No newline at end of file
+        return None
+
+
+class RateLimitMiddleware(StageMiddleware):
+    def __init__(self, app: ASGIApp, **kwargs):
+        super().__init__(app, RateLimitStage(**kwargs))
@@ -21,16 +21,14 @@ import time
 import json
 import uuid
 from typing import Dict, Any, Optional
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 import logging
 
+from app.middleware.pipeline import PipelineStage, RequestContext, StageMiddleware
 from app.services.telemetry import (
     event_tracker, performance_monitor, distributed_tracer,
-    metrics_collector, alert_manager,
-    EventContext, EventCategory, EventLevel, SpanType,
+    metrics_collector, alert_manager, AlertSeverity,
+    EventContext, EventCategory, EventLevel, SpanType, TraceStatus,
     inject_trace_context, extract_trace_context,
     track_api_call, track_response_time, increment_metric
 )
@@ -39,9 +37,9 @@ from app.services.telemetry import (
 logger = logging.getLogger(__name__)
 
 
-class TelemetryMiddleware(BaseHTTPMiddleware):
+class TelemetryStage(PipelineStage):
     """
-    Comprehensive telemetry middleware for FastAPI applications.
+    Comprehensive telemetry pipeline stage.
     
     Automatically tracks:
     - Request/response metrics
@@ -52,18 +50,18 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
     - Security events
     """
     
-    def __init__(self, app: ASGIApp, exclude_paths: Optional[list] = None):
-        """Initialize the telemetry middleware.
+    name = "telemetry"
+    
+    def __init__(self, exclude_paths: Optional[list] = None):
+        """Initialize the telemetry stage.
         
         Args:
-            app: ASGI application
             exclude_paths: Paths to exclude from telemetry tracking
         """
-        super().__init__(app)
-        self.exclude_paths = exclude_paths or [
+        super().__init__(exclude_paths or [
             "/health", "/docs", "/redoc", "/openapi.json",
             "/favicon.ico", "/metrics"
-        ]
+        ])
         
         # Track request statistics
         self.request_counts = {
@@ -75,23 +73,18 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
         
         logger.info("Telemetry middleware initialized")
     
-    async def dispatch(self, request: Request, call_next) -> Response:
-        """Process the request and track telemetry data."""
-        # Check if path should be excluded
-        if self._should_exclude_path(request.url.path):
-            return await call_next(request)
-        
+    async def on_request(self, ctx: RequestContext) -> Optional[ASGIApp]:
+        """Set up correlation and tracing context before the request runs."""
         # Generate request ID for correlation
-        request_id = str(uuid.uuid4())
-        correlation_id = request.headers.get("x-correlation-id", request_id)
+        ctx.request_id = str(uuid.uuid4())
+        correlation_id = ctx.headers.get("x-correlation-id", ctx.request_id)
         
         # Extract or create trace context
-        headers = dict(request.headers)
-        trace_context = extract_trace_context(headers)
+        trace_context = extract_trace_context(ctx.headers)
         
         # Create event context
         event_context = EventContext(
-            request_id=request_id,
+            request_id=ctx.request_id,
             correlation_id=correlation_id,
             source="http_request",
             environment="development"  # TODO: Get from config
@@ -102,179 +95,167 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
         distributed_tracer.set_trace_context(trace_context)
         
         # Start distributed tracing span
-        span_context = distributed_tracer.start_span(
-            name=f"HTTP {request.method} {request.url.path}",
+        ctx.span_context = distributed_tracer.start_span(
+            name=f"HTTP {ctx.method} {ctx.path}",
             span_type=SpanType.HTTP_REQUEST,
             service_name="fernando",
-            operation_name=f"{request.method} {request.url.path}",
+            operation_name=f"{ctx.method} {ctx.path}",
             parent_context=trace_context
         )
         
-        # Add request attributes to span
-        self._add_request_attributes(request, request_id, correlation_id)
+        # Add request attributes to span (unsampled spans are never stored)
+        if ctx.span_context.sampled:
+            self._add_request_attributes(ctx, correlation_id)
         
         # Track request start
-        start_time = time.time()
-        self._track_request_start(request)
-        
+        self._track_request_start(ctx)
+        return None
+    
+    async def on_complete(self, ctx: RequestContext):
+        """Track the outcome and close the span."""
         try:
-            # Process the request
-            response = await call_next(request)
-            
-            # Calculate response time
-            response_time = (time.time() - start_time) * 1000
-            
-            # Track successful response
-            await self._track_success_response(
-                request, response, response_time, request_id
-            )
-            
-            return response
-            
-        except Exception as e:
-            # Track error response
-            response_time = (time.time() - start_time) * 1000
-            await self._track_error_response(
-                request, e, response_time, request_id
-            )
-            raise
-            
+            response_time = ctx.elapsed_ms
+            if ctx.error is None:
+                await self._track_success_response(ctx, response_time)
+            elif isinstance(ctx.error, Exception):
+                await self._track_error_response(ctx, ctx.error, response_time)
         finally:
             # End the tracing span
-            if span_context:
-                distributed_tracer.end_span()
+            if ctx.span_context:
+                failed = ctx.error is not None or ctx.status_code >= 500
+                distributed_tracer.end_span(TraceStatus.ERROR if failed else TraceStatus.OK)
             
             # Clear contexts
             event_tracker.set_request_context(None)
             distributed_tracer.set_trace_context(None)
     
-    def _should_exclude_path(self, path: str) -> bool:
-        """Check if path should be excluded from tracking."""
-        return any(path.startswith(excluded) for excluded in self.exclude_paths)
-    
-    def _add_request_attributes(self, request: Request, request_id: str, correlation_id: str):
+    def _add_request_attributes(self, ctx: RequestContext, correlation_id: str):
         """Add request attributes to the current span."""
-        distributed_tracer.add_span_attribute("http.request_id", request_id)
+        client = ctx.scope.get("client")
+        query = ctx.query_string
+        distributed_tracer.add_span_attribute("http.request_id", ctx.request_id)
         distributed_tracer.add_span_attribute("http.correlation_id", correlation_id)
-        distributed_tracer.add_span_attribute("http.method", request.method)
-        distributed_tracer.add_span_attribute("http.url", str(request.url))
-        distributed_tracer.add_span_attribute("http.user_agent", request.headers.get("user-agent", ""))
-        distributed_tracer.add_span_attribute("http.content_length", request.headers.get("content-length", "0"))
+        distributed_tracer.add_span_attribute("http.method", ctx.method)
+        distributed_tracer.add_span_attribute("http.url", f"{ctx.path}?{query}" if query else ctx.path)
+        distributed_tracer.add_span_attribute("http.user_agent", ctx.headers.get("user-agent", ""))
+        distributed_tracer.add_span_attribute("http.content_length", ctx.headers.get("content-length", "0"))
         
         # Add client information
-        client_host = request.client.host if request.client else "unknown"
-        client_port = request.client.port if request.client else 0
-        distributed_tracer.add_span_attribute("http.client_ip", client_host)
-        distributed_tracer.add_span_attribute("http.client_port", client_port)
+        distributed_tracer.add_span_attribute("http.client_ip", ctx.client_ip)
+        distributed_tracer.add_span_attribute("http.client_port", client[1] if client else 0)
     
-    def _track_request_start(self, request: Request):
+    def _track_request_start(self, ctx: RequestContext):
         """Track request start event."""
         event_tracker.track_api_event(
-            method=request.method,
-            endpoint=request.url.path,
+            method=ctx.method,
+            endpoint=ctx.path,
             status_code=0,  # Not yet available
             response_time_ms=0,
             data={
-                "request_id": getattr(request.state, 'request_id', 'unknown'),
-                "client_ip": request.client.host if request.client else "unknown"
+                "request_id": ctx.request_id,
+                "client_ip": ctx.client_ip
             }
         )
         
         # Increment request counter
-        increment_metric("http.requests.total", 1.0, {
-            "method": request.method,
-            "endpoint": request.url.path
-        })
+        increment_metric(
+            "http.requests.total", 1.0,
+            method=ctx.method,
+            endpoint=ctx.path
+        )
         
         # Update request statistics
         self.request_counts["total"] += 1
-        method_key = request.method
+        method_key = ctx.method
         self.request_counts["by_method"][method_key] = self.request_counts["by_method"].get(method_key, 0) + 1
     
-    async def _track_success_response(self, request: Request, response: Response,
-                                    response_time: float, request_id: str):
+    async def _track_success_response(self, ctx: RequestContext, response_time: float):
         """Track successful response."""
+        status_code = ctx.status_code
+        
         # Track API event
         event_tracker.track_api_event(
-            method=request.method,
-            endpoint=request.url.path,
-            status_code=response.status_code,
+            method=ctx.method,
+            endpoint=ctx.path,
+            status_code=status_code,
             response_time_ms=response_time,
             data={
-                "request_id": request_id,
-                "response_size": len(response.body) if hasattr(response, 'body') else 0
+                "request_id": ctx.request_id,
+                "response_size": ctx.response_bytes
             }
         )
         
         # Track performance metrics
         performance_monitor.track_request_performance(
-            method=request.method,
-            endpoint=request.url.path,
+            method=ctx.method,
+            endpoint=ctx.path,
             response_time_ms=response_time,
-            status_code=response.status_code,
+            status_code=status_code,
             context={
-                "request_id": request_id,
-                "user_agent": request.headers.get("user-agent", "")
+                "request_id": ctx.request_id,
+                "user_agent": ctx.headers.get("user-agent", "")
             }
         )
         
         # Track response metrics
-        increment_metric("http.responses.total", 1.0, {
-            "method": request.method,
-            "endpoint": request.url.path,
-            "status_code": response.status_code,
-            "success": "true" if response.status_code < 400 else "false"
-        })
+        increment_metric(
+            "http.responses.total", 1.0,
+            method=ctx.method,
+            endpoint=ctx.path,
+            status_code=status_code,
+            success="true" if status_code < 400 else "false"
+        )
         
         # Track response time histogram
         metrics_collector.record_histogram(
             "http.response_time_ms",
             response_time,
             labels={
-                "method": request.method,
-                "endpoint": request.url.path,
-                "status_code": response.status_code
+                "method": ctx.method,
+                "endpoint": ctx.path,
+                "status_code": status_code
             },
             tags=["http", "response_time"]
         )
         
         # Update statistics
-        status_key = f"{response.status_code // 100}xx"
+        status_key = f"{status_code // 100}xx"
         self.request_counts["by_status"][status_key] = self.request_counts["by_status"].get(status_key, 0) + 1
         
         # Add span attributes
-        distributed_tracer.add_span_attribute("http.status_code", response.status_code)
-        distributed_tracer.add_span_attribute("http.response_time_ms", response_time)
-        distributed_tracer.add_span_attribute("http.response_size", len(response.body) if hasattr(response, 'body') else 0)
+        if ctx.span_context and ctx.span_context.sampled:
+            distributed_tracer.add_span_attribute("http.status_code", status_code)
+            distributed_tracer.add_span_attribute("http.response_time_ms", response_time)
+            distributed_tracer.add_span_attribute("http.response_size", ctx.response_bytes)
         
         # Track specific business events
-        await self._track_business_events(request, response, response_time)
+        await self._track_business_events(ctx, response_time)
     
-    async def _track_error_response(self, request: Request, error: Exception,
-                                  response_time: float, request_id: str):
+    async def _track_error_response(self, ctx: RequestContext, error: Exception, response_time: float):
         """Track error response."""
         # Track error event
         event_tracker.track_error(error, context=event_tracker.get_current_context())
         
         # Track API event with error status
         event_tracker.track_api_event(
-            method=request.method,
-            endpoint=request.url.path,
+            method=ctx.method,
+            endpoint=ctx.path,
             status_code=500,  # Generic error status
             response_time_ms=response_time,
             data={
-                "request_id": request_id,
+                "request_id": ctx.request_id,
                 "error_type": type(error).__name__,
                 "error_message": str(error)
             }
         )
         
         # Track error metrics
-        increment_metric("http.errors.total", 1.0, {
-            "method": request.method,
-            "endpoint": request.url.path,
-            "error_type": type(error).__name__
-        })
+        increment_metric(
+            "http.errors.total", 1.0,
+            method=ctx.method,
+            endpoint=ctx.path,
+            error_type=type(error).__name__
+        )
         
         self.request_counts["errors"] += 1
         
@@ -289,37 +270,38 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
         if response_time > 5000:  # 5 seconds
             alert_manager.check_custom_condition(
                 lambda: True,  # Always trigger
-                f"Slow Response: {request.method} {request.url.path}",
+                f"Slow Response: {ctx.method} {ctx.path}",
                 f"Response time {response_time:.2f}ms exceeds 5s threshold",
                 AlertSeverity.HIGH
             )
     
-    async def _track_business_events(self, request: Request, response: Response, response_time: float):
+    async def _track_business_events(self, ctx: RequestContext, response_time: float):
         """Track business-specific events based on endpoint patterns."""
-        path = request.url.path
+        path = ctx.path
+        status_code = ctx.status_code
         
         # Authentication endpoints
         if "/auth/" in path:
-            if response.status_code == 200:
+            if status_code == 200:
                 event_tracker.track_event(
                     name="auth.success",
                     category=EventCategory.SECURITY,
                     level=EventLevel.INFO,
                     data={
-                        "method": request.method,
+                        "method": ctx.method,
                         "endpoint": path,
-                        "user_agent": request.headers.get("user-agent", "")
+                        "user_agent": ctx.headers.get("user-agent", "")
                     }
                 )
-            elif response.status_code == 401:
+            elif status_code == 401:
                 event_tracker.track_event(
                     name="auth.failure",
                     category=EventCategory.SECURITY,
                     level=EventLevel.WARNING,
                     data={
-                        "method": request.method,
+                        "method": ctx.method,
                         "endpoint": path,
-                        "client_ip": request.client.host if request.client else "unknown"
+                        "client_ip": ctx.client_ip
                     }
                 )
         
@@ -328,22 +310,22 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
             event_tracker.track_billing_event(
                 event_name="api_request",
                 data={
-                    "method": request.method,
+                    "method": ctx.method,
                     "endpoint": path,
-                    "status_code": response.status_code,
+                    "status_code": status_code,
                     "response_time_ms": response_time
                 }
             )
         
         # Payment endpoints
         elif "/payments/" in path:
-            if response.status_code == 200:
+            if status_code == 200:
                 event_tracker.track_event(
                     name="payment.api_success",
                     category=EventCategory.PAYMENT,
                     level=EventLevel.INFO,
                     data={
-                        "method": request.method,
+                        "method": ctx.method,
                         "endpoint": path,
                         "response_time_ms": response_time
                     }
@@ -354,9 +336,9 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
                     category=EventCategory.PAYMENT,
                     level=EventLevel.ERROR,
                     data={
-                        "method": request.method,
+                        "method": ctx.method,
                         "endpoint": path,
-                        "status_code": response.status_code,
+                        "status_code": status_code,
                         "response_time_ms": response_time
                     }
                 )
@@ -368,9 +350,9 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
                 category=EventCategory.DOCUMENT,
                 level=EventLevel.INFO,
                 data={
-                    "method": request.method,
+                    "method": ctx.method,
                     "endpoint": path,
-                    "status_code": response.status_code,
+                    "status_code": status_code,
                     "response_time_ms": response_time
                 }
             )
@@ -382,9 +364,9 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
                 category=EventCategory.LICENSE,
                 level=EventLevel.INFO,
                 data={
-                    "method": request.method,
+                    "method": ctx.method,
                     "endpoint": path,
-                    "status_code": response.status_code,
+                    "status_code": status_code,
                     "response_time_ms": response_time
                 }
             )
@@ -400,6 +382,17 @@ class TelemetryMiddleware(BaseHTTPMiddleware):
         }
 
 
+class TelemetryMiddleware(StageMiddleware):
+    """Runs the telemetry stage as standalone pure-ASGI middleware."""
+    
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[list] = None):
+        super().__init__(app, TelemetryStage(exclude_paths))
+    
+    def get_request_statistics(self) -> Dict[str, Any]:
+        """Get request statistics."""
+        return self.stage.get_request_statistics()
+
+
 # Helper function to create telemetry middleware
 def create_telemetry_middleware(app: ASGIApp, exclude_paths: Optional[list] = None) -> TelemetryMiddleware:
     """Create and configure telemetry middleware."""
@@ -481,16 +474,19 @@ def track_function_execution(service_name: str = "unknown"):
 
 
 # Integration helper for existing FastAPI applications
-def setup_telemetry_for_app(app, exclude_paths: Optional[list] = None):
+def setup_telemetry_for_app(app, exclude_paths: Optional[list] = None, add_middleware: bool = True):
     """
     Setup comprehensive telemetry for a FastAPI application.
     
     Args:
         app: FastAPI application instance
         exclude_paths: Paths to exclude from telemetry tracking
+        add_middleware: Add TelemetryMiddleware; pass False when the request
+            pipeline already runs a TelemetryStage
     """
     # Add telemetry middleware
-    app.add_middleware(TelemetryMiddleware, exclude_paths=exclude_paths)
+    if add_middleware:
+        app.add_middleware(TelemetryMiddleware, exclude_paths=exclude_paths)
     
     # Add health check endpoint for telemetry services
     @app.get("/health/telemetry")
@@ -522,9 +518,10 @@ def setup_telemetry_for_app(app, exclude_paths: Optional[list] = None):
     
     # Add events endpoint for debugging
     @app.get("/debug/events")
-    async def debug_events(limit: int = 100):
-        """Debug endpoint for recent events."""
-        events = event_tracker.get_events(limit=limit)
+    async def debug_events(limit: int = 100, cursor: Optional[int] = None):
+        """Debug endpoint for recent events, newest first; pass ``next_cursor`` to page back."""
+        page = event_tracker.query_events(limit=limit, cursor=cursor)
+        events = page.events
         return {
             "events": [
                 {
@@ -537,7 +534,8 @@ def setup_telemetry_for_app(app, exclude_paths: Optional[list] = None):
                 }
                 for event in events
             ],
-            "total": len(events)
+            "total": len(events),
+            "next_cursor": page.next_cursor
         }
     
     # Add traces endpoint for debugging
@@ -600,8 +598,12 @@ async def initialize_telemetry_services():
     
     if settings.DISTRIBUTED_TRACING_ENABLED:
         distributed_tracer.max_traces = settings.TRACING_MAX_TRACES
+        distributed_tracer.max_spans_per_trace = settings.TRACING_MAX_SPANS_PER_TRACE
+        distributed_tracer.resize_span_arena(settings.TRACING_MAX_SPANS)
         distributed_tracer.set_sampling_rate(settings.TRACING_SAMPLING_RATE)
-        logger.info(f"Distributed tracing configured: {settings.TRACING_SAMPLING_RATE} sampling rate")
+        distributed_tracer.set_tail_sampling(settings.TRACING_TAIL_LATENCY_MS)
+        logger.info(f"Distributed tracing configured: {settings.TRACING_SAMPLING_RATE} sampling rate, "
+                    f"{settings.TRACING_TAIL_LATENCY_MS} ms tail latency threshold")
     
     if settings.ALERTS_ENABLED:
         alert_manager.max_alerts = settings.ALERTS_MAX_ALERTS
@@ -5,108 +5,81 @@ Automatically tracks API usage, response times, and errors for all endpoints.
 """
 
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 from datetime import datetime
-from typing import Callable
+from typing import Callable, List, Optional
 import time
 import logging
 
+from app.middleware.pipeline import PipelineStage, RequestContext, StageMiddleware
 from app.services.usage_tracking_service import UsageTrackingService
+from app.services.usage_meter import get_usage_meter
 from app.models.usage import UsageMetricType
 from app.db.session import get_db
 
 logger = logging.getLogger(__name__)
 
 
-class UsageTrackingMiddleware(BaseHTTPMiddleware):
+class UsageMeteringStage(PipelineStage):
     """
-    Middleware to automatically track API usage metrics
+    Pipeline stage to automatically track API usage metrics
     """
     
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-        self.excluded_paths = [
+    name = "usage"
+    
+    def __init__(self, exclude_paths: Optional[List[str]] = None):
+        super().__init__(exclude_paths or [
             "/docs",
             "/redoc",
             "/openapi.json",
             "/favicon.ico",
             "/health",
             "/metrics"
-        ]
+        ])
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip tracking for excluded paths
-        if any(request.url.path.startswith(path) for path in self.excluded_paths):
-            return await call_next(request)
-        
-        # Record start time
-        start_time = time.time()
-        
-        # Get user ID from request state (set by auth middleware)
-        user_id = getattr(request.state, "user_id", None)
-        subscription_id = getattr(request.state, "subscription_id", None)
+    async def on_complete(self, ctx: RequestContext):
+        # Get user ID from request state (set by auth dependencies while the request ran)
+        user_id = ctx.state.get("user_id")
+        if not user_id or ctx.error is not None:
+            return
+        subscription_id = ctx.state.get("subscription_id")
+        response_time_ms = int(ctx.elapsed_ms)
         
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate response time
-        response_time_ms = int((time.time() - start_time) * 1000)
-        
-        # Track usage if user is authenticated
-        if user_id:
-            try:
-                # Determine metric type based on endpoint
-                metric_type = self._get_metric_type(request.url.path, request.method)
+        try:
+            # Determine metric type based on endpoint
+            metric_type = self._get_metric_type(ctx.path, ctx.method)
+            
+            if metric_type:
+                # Buffered; written in batches by the usage meter
+                meter = get_usage_meter()
+                error_occurred = ctx.status_code >= 400
                 
-                if metric_type:
-                    # Get database session
-                    db = next(get_db())
-                    tracking_service = UsageTrackingService(db)
-                    
-                    # Track API call
-                    await tracking_service.track_usage(
+                # Track API call
+                meter.record(
+                    user_id=user_id,
+                    metric_type=UsageMetricType.API_CALLS,
+                    subscription_id=subscription_id,
+                    endpoint=ctx.path,
+                    operation=ctx.method,
+                    response_time_ms=response_time_ms,
+                    error_occurred=error_occurred
+                )
+                
+                # Track specific resource usage
+                if metric_type != UsageMetricType.API_CALLS:
+                    meter.record(
                         user_id=user_id,
-                        metric_type=UsageMetricType.API_CALLS,
-                        metric_value=1,
+                        metric_type=metric_type,
                         subscription_id=subscription_id,
-                        endpoint=request.url.path,
-                        operation=request.method,
+                        endpoint=ctx.path,
+                        operation=ctx.method,
                         response_time_ms=response_time_ms,
-                        error_occurred=response.status_code >= 400,
-                        error_code=str(response.status_code) if response.status_code >= 400 else None,
-                        metadata={
-                            "method": request.method,
-                            "path": request.url.path,
-                            "status_code": response.status_code,
-                            "user_agent": request.headers.get("user-agent", "")
-                        }
+                        error_occurred=error_occurred
                     )
-                    
-                    # Track specific resource usage
-                    if metric_type != UsageMetricType.API_CALLS:
-                        await tracking_service.track_usage(
-                            user_id=user_id,
-                            metric_type=metric_type,
-                            metric_value=1,
-                            subscription_id=subscription_id,
-                            endpoint=request.url.path,
-                            operation=request.method,
-                            response_time_ms=response_time_ms,
-                            error_occurred=response.status_code >= 400,
-                            metadata={
-                                "method": request.method,
-                                "path": request.url.path
-                            }
-                        )
-                    
-                    db.close()
-                    
-            except Exception as e:
-                logger.error(f"Error tracking usage: {str(e)}")
-                # Don't fail the request if tracking fails
-        
-        return response
+                
+        except Exception as e:
+            logger.error(f"Error tracking usage: {str(e)}")
+            # Don't fail the request if tracking fails
     
     def _get_metric_type(self, path: str, method: str) -> str:
         """
@@ -139,6 +112,15 @@ class UsageTrackingMiddleware(BaseHTTPMiddleware):
             return UsageMetricType.API_CALLS
 
 
+class UsageTrackingMiddleware(StageMiddleware):
+    """
+    Middleware to automatically track API usage metrics
+    """
+    
+    def __init__(self, app: ASGIApp):
+        super().__init__(app, UsageMeteringStage())
+
+
 def track_document_processing(func):
     """
     Decorator to track document processing usage
@@ -240,6 +222,12 @@ def check_quota_before_processing(metric_type: str, required_quantity: float = 1
             subscription_id = kwargs.get("subscription_id")
             
             if user_id and subscription_id:
+                # Quotas mirrored by the usage meter (including unflushed usage) with
+                # enough headroom need no query; overage is decided by the database check
+                mirrored = get_usage_meter().quota_usage(user_id, subscription_id, metric_type)
+                if mirrored is not None and mirrored[1] - mirrored[0] >= required_quantity:
+                    return await func(*args, **kwargs)
+                
                 try:
                     db = next(get_db())
                     tracking_service = UsageTrackingService(db)
@@ -1,22 +1,41 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON, Index
 from app.db.session import Base
 
 
+class JobBatch(Base):
+    """Named group of jobs submitted together for batch processing"""
+    __tablename__ = "job_batches"
+    
+    batch_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=False)
+    created_by = Column(String, ForeignKey("users.user_id"), nullable=True)
+    job_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Covers the worker claim query: queued jobs per queue that are due, by priority
+        Index('idx_jobs_queue_status_not_before_priority', 'queue_name', 'status', 'not_before', 'priority'),
+        Index('idx_jobs_batch_status', 'batch_id', 'status'),
+    )
     
     job_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id = Column(String, nullable=False, index=True)  # Multi-tenant support
     status = Column(String, default="queued")  # queued, processing, needs_review, posted, failed, canceled
     priority = Column(Integer, default=0)
     queue_name = Column(String, default="default")
+    batch_id = Column(String, ForeignKey("job_batches.batch_id"), nullable=True)
     uploaded_by = Column(String, ForeignKey("users.user_id"), nullable=False)
     assigned_to = Column(String, ForeignKey("users.user_id"), nullable=True)
     estimated_duration = Column(Integer, nullable=True)  # seconds
     actual_duration = Column(Integer, nullable=True)    # seconds
     retry_count = Column(Integer, default=0)
+    not_before = Column(DateTime, nullable=True)  # Earliest time a retried job may be claimed again
     job_metadata = Column(JSON, default={})  # Additional job metadata
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -8,7 +8,7 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from sqlalchemy import (
-    Column, String, DateTime, Text, Boolean, Integer, Float, 
+    Column, String, DateTime, Text, Boolean, Integer, BigInteger, Float, 
     ForeignKey, JSON, Index, UniqueConstraint, CheckConstraint,
     LargeBinary, Binary
 )
@@ -122,6 +122,7 @@ class AuditTrail(Base):
     audit_event_id = Column(UUID(as_uuid=True), ForeignKey("audit_events.event_id"), unique=True)
     
     # Chain of custody
+    sequence = Column(BigInteger, unique=True, index=True)  # Position in the chain (null for unsequenced legacy entries)
     previous_hash = Column(String(64))  # Hash of previous trail entry
     chain_hash = Column(String(64), nullable=False)  # Current chain hash
     
@@ -145,6 +146,27 @@ class AuditTrail(Base):
     )
 
 
+class AuditCheckpoint(Base):
+    """Merkle root over a contiguous range of the audit trail chain"""
+    __tablename__ = "audit_checkpoints"
+    
+    checkpoint_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    
+    # Covered chain range (AuditTrail.sequence, inclusive)
+    first_sequence = Column(BigInteger, nullable=False)
+    last_sequence = Column(BigInteger, nullable=False, unique=True, index=True)
+    entry_count = Column(Integer, nullable=False)
+    
+    # Merkle root over the chain hashes in the range, and the chain head at last_sequence
+    merkle_root = Column(String(64), nullable=False)
+    chain_hash = Column(String(64), nullable=False)
+    
+    # Verification
+    verified_at = Column(DateTime, index=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class ForensicLog(Base):
     """Forensic investigation logs with tamper-evidence"""
     __tablename__ = "forensic_logs"
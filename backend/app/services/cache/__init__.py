@@ -0,0 +1,30 @@
+"""
+Cache services
+
+Two-tier (in-process LRU + Redis) cache used by document processing,
+API response caching and the rate limiting / analytics services.
+"""
+
+from app.services.cache.redis_cache import (
+    LRUCache,
+    RedisCache,
+    RedisCacheService,
+    RedisUnavailableError,
+    cache_service,
+    cache_result,
+    cache_result_sync,
+    init_cache_service,
+    close_cache_service,
+)
+
+__all__ = [
+    "LRUCache",
+    "RedisCache",
+    "RedisCacheService",
+    "RedisUnavailableError",
+    "cache_service",
+    "cache_result",
+    "cache_result_sync",
+    "init_cache_service",
+    "close_cache_service",
+]
@@ -0,0 +1,671 @@
+"""
+Redis Cache Service
+
+Two-tier cache for the Fernando platform:
+
+- L1: a bounded in-process LRU (entry and byte limits, per-entry expiry) so
+  hot entries are served without a network round trip or decompression.
+- L2: Redis, shared by all API processes and workers. When Redis is disabled
+  or unreachable, L2 operations fail with ``RedisUnavailableError`` and reads
+  miss; a failed connection is retried with exponential backoff, so a process
+  rejoins the shared state as soon as Redis is back. In ``REDIS_MOCK_MODE``
+  (tests) L2 is a per-process fakeredis server.
+
+Document processing results are content-addressed: OCR output is keyed by the
+document SHA-256 plus the OCR engine version, and LLM output by the SHA-256
+plus the model version, so a re-submitted document skips both stages and a
+model upgrade naturally misses the cache.
+"""
+
+import asyncio
+import base64
+import fnmatch
+import gzip
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.cache_config import cache_settings, namespace_manager, get_cache_ttl
+
+logger = logging.getLogger(__name__)
+
+# Frame markers for values written by the cache service
+_RAW_JSON = b"j"
+_GZIP_JSON = b"z"
+_BINARY = b"b"
+
+# Cache types whose entries never change once written (keyed by content hash
+# and engine/model version), so L1 may keep them for their full TTL
+CONTENT_ADDRESSED_TYPES = frozenset({"document", "ocr", "llm"})
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and total bytes, with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def delete_matching(self, pattern: str) -> int:
+        """Delete keys matching a Redis-style glob pattern"""
+        with self._lock:
+            matched = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in matched:
+                self._remove(key)
+            return len(matched)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class RedisUnavailableError(ConnectionError):
+    """Redis is disabled, or unreachable and waiting out its reconnect backoff"""
+
+
+# Shared connections: one Redis client (and connection pool) per event loop,
+# since redis.asyncio connections cannot be used across loops
+_redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_fake_server = None
+
+# Reconnect backoff after a failed connection attempt
+_reconnect_at = 0.0
+_reconnect_delay = 0.0
+
+
+def _mock_client():
+    """fakeredis client on a per-process fake server (``REDIS_MOCK_MODE``, for tests)"""
+    global _fake_server
+    from fakeredis import FakeServer
+    from fakeredis import aioredis as fake_aioredis
+
+    if _fake_server is None:
+        _fake_server = FakeServer()
+    return fake_aioredis.FakeRedis(server=_fake_server)
+
+
+async def get_redis_client():
+    """
+    Get the Redis client for the running loop.
+
+    Raises ``RedisUnavailableError`` if Redis is disabled or cannot be reached.
+    After a failed connection no new attempt is made for
+    ``REDIS_RECONNECT_BACKOFF`` seconds, doubling per consecutive failure up to
+    ``REDIS_RECONNECT_MAX_BACKOFF``.
+    """
+    global _reconnect_at, _reconnect_delay
+    connection = cache_settings.CONNECTION_CONFIG
+    if not connection.REDIS_ENABLED:
+        raise RedisUnavailableError("Redis is disabled")
+
+    loop = asyncio.get_running_loop()
+    client = _redis_clients.get(loop)
+    if client is not None:
+        return client
+
+    if connection.REDIS_MOCK_MODE:
+        client = _redis_clients[loop] = _mock_client()
+        return client
+
+    if time.monotonic() < _reconnect_at:
+        raise RedisUnavailableError("Redis unreachable, waiting to reconnect")
+
+    try:
+        import redis.asyncio as aioredis
+
+        options = {
+            "max_connections": connection.REDIS_MAX_CONNECTIONS,
+            "socket_timeout": connection.REDIS_SOCKET_TIMEOUT,
+            "socket_connect_timeout": connection.REDIS_CONNECTION_TIMEOUT,
+            "health_check_interval": connection.REDIS_HEALTH_CHECK_INTERVAL,
+        }
+        if connection.REDIS_URL:
+            client = aioredis.from_url(connection.REDIS_URL, **options)
+        else:
+            client = aioredis.Redis(
+                host=connection.REDIS_HOST,
+                port=connection.REDIS_PORT,
+                db=connection.REDIS_DB,
+                password=connection.REDIS_PASSWORD,
+                ssl=connection.REDIS_SSL,
+                **options
+            )
+        await client.ping()
+    except Exception as e:
+        _reconnect_delay = min(
+            connection.REDIS_RECONNECT_MAX_BACKOFF,
+            _reconnect_delay * 2 if _reconnect_delay else connection.REDIS_RECONNECT_BACKOFF
+        )
+        _reconnect_at = time.monotonic() + _reconnect_delay
+        logger.warning(f"Redis unavailable ({e}); retrying in {_reconnect_delay:.1f}s")
+        raise RedisUnavailableError(str(e)) from e
+
+    _reconnect_delay = 0.0
+    _redis_clients[loop] = client
+    return client
+
+
+async def close_redis_client():
+    """Close the Redis client bound to the running loop"""
+    client = _redis_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def _to_jsonable(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, dict):
+        return {
+            (k.decode("latin-1") if isinstance(k, bytes) else k): _to_jsonable(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+def _from_json_object(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def serialize(value: Any) -> bytes:
+    return json.dumps(_to_jsonable(value), separators=(",", ":"), default=str).encode()
+
+
+def deserialize(payload: bytes) -> Any:
+    return json.loads(payload, object_hook=_from_json_object)
+
+
+def _frame(payload: bytes) -> bytes:
+    performance = cache_settings.PERFORMANCE_CONFIG
+    if performance.CACHE_COMPRESSION_ENABLED and len(payload) > performance.CACHE_COMPRESSION_THRESHOLD:
+        return _GZIP_JSON + gzip.compress(payload, compresslevel=5)
+    return _RAW_JSON + payload
+
+
+def _unframe(raw: bytes) -> bytes:
+    """Strip the frame marker; values written by plain Redis commands pass through"""
+    if raw[:1] == _GZIP_JSON:
+        return gzip.decompress(raw[1:])
+    if raw[:1] in (_RAW_JSON, _BINARY):
+        return raw[1:]
+    return raw
+
+
+def _decode_value(raw: Any) -> Any:
+    if raw is None:
+        return None
+    if isinstance(raw, str):
+        raw = raw.encode()
+    payload = _unframe(raw)
+    try:
+        return deserialize(payload)
+    except ValueError:
+        return payload.decode("utf-8", errors="replace")
+
+
+def _text(value: Any) -> Any:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisCache:
+    """
+    Thin async Redis wrapper for counters, lists and JSON values.
+
+    Keys are prefixed with the platform namespace; values set through ``set``
+    are JSON-serialized (and compressed above the configured threshold).
+    """
+
+    def __init__(self, namespace: Optional[str] = None):
+        self.namespace = namespace or namespace_manager.get_base_namespace()
+
+    def _raw_key(self, key: str) -> str:
+        return namespace_manager.get_cache_key(self.namespace, key)
+
+    async def client(self):
+        return await get_redis_client()
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        try:
+            client = await self.client()
+            value = _decode_value(await client.get(self._raw_key(key)))
+            return default if value is None else value
+        except Exception as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return default
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, expire: Optional[int] = None) -> bool:
+        try:
+            client = await self.client()
+            await client.set(self._raw_key(key), _frame(serialize(value)), ex=ttl or expire)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        try:
+            client = await self.client()
+            return bool(await client.delete(self._raw_key(key)))
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        client = await self.client()
+        return bool(await client.exists(self._raw_key(key)))
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        client = await self.client()
+        return bool(await client.expire(self._raw_key(key), seconds))
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        client = await self.client()
+        return await client.incrby(self._raw_key(key), amount)
+
+    async def incrbyfloat(self, key: str, amount: float) -> float:
+        client = await self.client()
+        return float(await client.incrbyfloat(self._raw_key(key), amount))
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        client = await self.client()
+        return await client.hincrby(self._raw_key(key), field, amount)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        client = await self.client()
+        return {_text(k): _text(v) for k, v in (await client.hgetall(self._raw_key(key))).items()}
+
+    async def lpush(self, key: str, *values: Any) -> int:
+        client = await self.client()
+        return await client.lpush(self._raw_key(key), *values)
+
+    async def lpush_capped(self, key: str, value: Any, max_length: int, ttl: Optional[int] = None) -> None:
+        """LPUSH, LTRIM to ``max_length`` and EXPIRE in one round trip"""
+        client = await self.client()
+        raw_key = self._raw_key(key)
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.lpush(raw_key, value)
+            pipe.ltrim(raw_key, 0, max_length - 1)
+            if ttl:
+                pipe.expire(raw_key, ttl)
+            await pipe.execute()
+
+    async def lrange(self, key: str, start: int = 0, end: int = -1) -> List[str]:
+        client = await self.client()
+        return [_text(v) for v in await client.lrange(self._raw_key(key), start, end)]
+
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
+        client = await self.client()
+        return bool(await client.ltrim(self._raw_key(key), start, end))
+
+    async def add_to_list(self, key: str, value: Any, expire: Optional[int] = None) -> int:
+        client = await self.client()
+        raw_key = self._raw_key(key)
+        length = await client.rpush(raw_key, value)
+        if expire:
+            await client.expire(raw_key, expire)
+        return length
+
+    async def remove_from_list(self, key: str, value: Any) -> int:
+        client = await self.client()
+        return await client.lrem(self._raw_key(key), 0, value)
+
+    async def info(self) -> Dict[str, Any]:
+        client = await self.client()
+        return await client.info()
+
+    async def ping(self) -> bool:
+        try:
+            client = await self.client()
+            return bool(await client.ping())
+        except Exception:
+            return False
+
+
+class RedisCacheService(RedisCache):
+    """
+    Two-tier cache with typed, tenant-scoped keys.
+
+    Keys are ``<namespace>[:tenant_<id>]:<cache_type>:<key>``. Reads check the
+    in-process LRU first and fill it from Redis on a miss. L1 entries of
+    mutable cache types are held for at most ``CACHE_L1_TTL`` seconds so
+    deletes made by other processes become visible quickly; content-addressed
+    entries (document, OCR, LLM) are immutable and kept for their full TTL.
+    """
+
+    def __init__(self, namespace: Optional[str] = None):
+        super().__init__(namespace)
+        self.l1_enabled = cache_settings.CACHE_L1_ENABLED
+        self.l1 = LRUCache(
+            max_entries=cache_settings.CACHE_L1_MAX_ENTRIES,
+            max_bytes=cache_settings.CACHE_L1_MAX_BYTES
+        )
+        self.l1_ttl = cache_settings.CACHE_L1_TTL
+        self.stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "sets": 0, "errors": 0}
+
+    async def initialize(self) -> bool:
+        l1 = "on" if self.l1_enabled else "off"
+        try:
+            await self.client()
+        except RedisUnavailableError as e:
+            logger.warning(f"Cache service starting without Redis ({e}); L1 {l1}")
+            return False
+        logger.info(f"Cache service connected to Redis (L1 {l1})")
+        return True
+
+    async def close(self):
+        self.l1.clear()
+        await close_redis_client()
+
+    def _tenant_namespace(self, tenant_id: Optional[str]) -> str:
+        if tenant_id is None:
+            return self.namespace
+        return namespace_manager.get_tenant_namespace(tenant_id)
+
+    def _key(self, key: str, cache_type: str, tenant_id: Optional[str]) -> str:
+        return namespace_manager.get_cache_key(self._tenant_namespace(tenant_id), f"{cache_type}:{key}")
+
+    def _l1_ttl_for(self, cache_type: str, ttl: Optional[int]) -> Optional[int]:
+        if cache_type in CONTENT_ADDRESSED_TYPES:
+            return ttl
+        return min(ttl, self.l1_ttl) if ttl else self.l1_ttl
+
+    async def get(self, key: str, cache_type: str = "default", tenant_id: Optional[str] = None) -> Any:
+        full_key = self._key(key, cache_type, tenant_id)
+
+        if self.l1_enabled:
+            payload = self.l1.get(full_key)
+            if payload is not None:
+                self.stats["l1_hits"] += 1
+                return deserialize(payload)
+
+        try:
+            client = await self.client()
+            raw = await client.get(full_key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache get failed for {full_key}: {e}")
+            return None
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["l2_hits"] += 1
+        payload = _unframe(raw)
+        if self.l1_enabled:
+            self.l1.set(full_key, payload, self._l1_ttl_for(cache_type, get_cache_ttl(cache_type)))
+        return deserialize(payload)
+
+    async def set(self, key: str, value: Any, cache_type: str = "default", tenant_id: Optional[str] = None,
+                  ttl: Optional[int] = None, expire: Optional[int] = None) -> bool:
+        full_key = self._key(key, cache_type, tenant_id)
+        ttl = ttl or expire or get_cache_ttl(cache_type)
+        payload = serialize(value)
+
+        if self.l1_enabled:
+            self.l1.set(full_key, payload, self._l1_ttl_for(cache_type, ttl))
+
+        try:
+            client = await self.client()
+            await client.set(full_key, _frame(payload), ex=ttl)
+            self.stats["sets"] += 1
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache set failed for {full_key}: {e}")
+            return False
+
+    async def get_raw(self, key: str, cache_type: str = "default", tenant_id: Optional[str] = None) -> Optional[bytes]:
+        """Read an opaque byte payload written by ``set_raw`` (no JSON decoding)"""
+        full_key = self._key(key, cache_type, tenant_id)
+
+        if self.l1_enabled:
+            payload = self.l1.get(full_key)
+            if payload is not None:
+                self.stats["l1_hits"] += 1
+                return payload
+
+        try:
+            client = await self.client()
+            raw = await client.get(full_key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache get failed for {full_key}: {e}")
+            return None
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["l2_hits"] += 1
+        payload = _unframe(raw)
+        if self.l1_enabled:
+            self.l1.set(full_key, payload, self._l1_ttl_for(cache_type, get_cache_ttl(cache_type)))
+        return payload
+
+    async def set_raw(self, key: str, payload: bytes, cache_type: str = "default", tenant_id: Optional[str] = None,
+                      ttl: Optional[int] = None) -> bool:
+        """Store an opaque byte payload as-is; the caller owns its encoding and compression"""
+        full_key = self._key(key, cache_type, tenant_id)
+        ttl = ttl or get_cache_ttl(cache_type)
+        payload = bytes(payload)
+
+        if self.l1_enabled:
+            self.l1.set(full_key, payload, self._l1_ttl_for(cache_type, ttl))
+
+        try:
+            client = await self.client()
+            await client.set(full_key, _BINARY + payload, ex=ttl)
+            self.stats["sets"] += 1
+            return True
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache set failed for {full_key}: {e}")
+            return False
+
+    async def delete(self, key: str, cache_type: str = "default", tenant_id: Optional[str] = None) -> bool:
+        full_key = self._key(key, cache_type, tenant_id)
+        self.l1.delete(full_key)
+        try:
+            client = await self.client()
+            return bool(await client.delete(full_key))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache delete failed for {full_key}: {e}")
+            return False
+
+    async def delete_pattern(self, pattern: str, tenant_id: Optional[str] = None) -> int:
+        """Delete entries whose key (after the namespace) matches a glob pattern"""
+        match = namespace_manager.get_cache_key(self._tenant_namespace(tenant_id), f"*{pattern}")
+        self.l1.delete_matching(match)
+
+        deleted = 0
+        try:
+            client = await self.client()
+            batch = []
+            async for raw_key in client.scan_iter(match=match, count=500):
+                batch.append(raw_key)
+                if len(batch) >= 500:
+                    deleted += await client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += await client.delete(*batch)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Cache pattern delete failed for {match}: {e}")
+        return deleted
+
+    async def clear_cache(self, cache_type: str, tenant_id: Optional[str] = None) -> int:
+        """Delete every entry of a cache type"""
+        return await self.delete_pattern(f"{cache_type}:*", tenant_id)
+
+    # Document processing (content-addressed)
+
+    @staticmethod
+    def _content_key(document_hash: str, version: Optional[str]) -> str:
+        return f"{document_hash}:{version or 'unversioned'}"
+
+    async def get_cached_document(self, document_hash: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await self.get(document_hash, "document", tenant_id)
+
+    async def cache_document_hash(self, document_hash: str, data: Dict[str, Any],
+                                  tenant_id: Optional[str] = None) -> bool:
+        return await self.set(document_hash, data, "document", tenant_id,
+                              cache_settings.TTL_CONFIG.DOCUMENT_HASH_CACHE)
+
+    async def get_cached_ocr(self, document_hash: str, tenant_id: Optional[str] = None,
+                             engine_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await self.get(self._content_key(document_hash, engine_version), "ocr", tenant_id)
+
+    async def cache_ocr_result(self, document_hash: str, result: Dict[str, Any], tenant_id: Optional[str] = None,
+                               engine_version: Optional[str] = None) -> bool:
+        return await self.set(self._content_key(document_hash, engine_version), result, "ocr", tenant_id,
+                              cache_settings.TTL_CONFIG.OCR_RESULT_CACHE)
+
+    async def get_cached_llm_extraction(self, document_hash: str, tenant_id: Optional[str] = None,
+                                        model_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return await self.get(self._content_key(document_hash, model_version), "llm", tenant_id)
+
+    async def cache_llm_extraction(self, document_hash: str, result: Dict[str, Any], tenant_id: Optional[str] = None,
+                                   model_version: Optional[str] = None) -> bool:
+        return await self.set(self._content_key(document_hash, model_version), result, "llm", tenant_id,
+                              cache_settings.TTL_CONFIG.LLM_EXTRACTION_CACHE)
+
+    async def cache_user_session(self, session_id: str, data: Dict[str, Any], tenant_id: Optional[str] = None) -> bool:
+        return await self.set(session_id, data, "session", tenant_id, cache_settings.TTL_CONFIG.SESSION_CACHE)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "l1_entries": len(self.l1),
+            "l1_bytes": self.l1.size_bytes
+        }
+
+
+# Global cache service
+cache_service = RedisCacheService()
+
+
+async def init_cache_service() -> RedisCacheService:
+    """Connect the global cache service (application startup)"""
+    await cache_service.initialize()
+    return cache_service
+
+
+async def close_cache_service():
+    """Release the global cache service's connections (application shutdown)"""
+    await cache_service.close()
+
+
+def _result_key(func: Callable, args: tuple, kwargs: dict, key_func: Optional[Callable]) -> str:
+    if key_func:
+        return key_func(*args, **kwargs)
+    return f"{func.__module__}.{func.__qualname__}:{serialize([args, kwargs]).decode()}"
+
+
+def cache_result(cache_type: str = "default", ttl: Optional[int] = None,
+                 key_func: Optional[Callable] = None, tenant_key: str = "tenant_id"):
+    """Cache an async function's result in the two-tier cache"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _result_key(func, args, kwargs, key_func)
+            tenant_id = kwargs.get(tenant_key)
+
+            cached = await cache_service.get(key, cache_type, tenant_id)
+            if cached is not None:
+                return cached
+
+            result = await func(*args, **kwargs)
+            if result is not None:
+                await cache_service.set(key, result, cache_type, tenant_id, ttl)
+            return result
+
+        return wrapper
+    return decorator
+
+
+def cache_result_sync(cache_type: str = "default", ttl: Optional[int] = None,
+                      key_func: Optional[Callable] = None):
+    """
+    Cache a sync function's result in the in-process L1 tier only.
+
+    Redis is async-only here, so sync callers get a per-process memo with
+    the same TTL rules instead of blocking on the network.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_service._key(_result_key(func, args, kwargs, key_func), cache_type, None)
+
+            payload = cache_service.l1.get(key)
+            if payload is not None:
+                return deserialize(payload)
+
+            result = func(*args, **kwargs)
+            if result is not None:
+                cache_service.l1.set(key, serialize(result), ttl or get_cache_ttl(cache_type))
+            return result
+
+        return wrapper
+    return decorator
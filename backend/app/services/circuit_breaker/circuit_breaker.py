@@ -18,6 +18,7 @@ import json
 import statistics
 
 from app.services.cache.redis_cache import RedisCache
+from app.services.circuit_breaker.rolling_window import RollingWindow, WindowSnapshot
 from app.services.telemetry.event_tracker import EventTracker
 
 logger = logging.getLogger(__name__)
@@ -56,6 +57,9 @@ class CircuitBreakerConfig:
     max_concurrent_requests: int = 100  # Maximum concurrent requests
     failure_rate_threshold: float = 0.5  # Failure rate threshold (50%)
     avg_response_time_threshold: float = 5000.0  # Average response time threshold (ms)
+    slow_call_threshold_ms: float = 5000.0  # Calls at least this slow count as slow calls
+    slow_call_rate_threshold: float = 1.0  # Slow call rate threshold (100%: every call in the window slow)
+    minimum_window_requests: int = 5     # Minimum calls in the window before rates are judged
     recovery_strategy: RecoveryStrategy = RecoveryStrategy.EXPONENTIAL_BACKOFF
     min_recovery_timeout: float = 10.0   # Minimum recovery timeout
     max_recovery_timeout: float = 300.0  # Maximum recovery timeout
@@ -112,8 +116,11 @@ class ServiceEndpoint:
         # Metrics tracking
         self.metrics = RequestMetrics()
         
-        # Request tracking for sliding window
-        self.request_history = deque(maxlen=1000)  # Keep last 1000 requests
+        # Per-second call buckets over the rolling window
+        self.window = RollingWindow(
+            window_seconds=config.rolling_window_seconds,
+            slow_call_threshold_ms=config.slow_call_threshold_ms
+        )
         
         # Recent failures for analysis
         self.recent_failures = deque(maxlen=100)  # Keep last 100 failures
@@ -312,7 +319,8 @@ class CircuitBreaker:
                 
             except asyncio.TimeoutError:
                 # Handle timeout
-                await self._record_failure(endpoint, FailureType.TIMEOUT, f"Request timeout after {request_timeout}s")
+                await self._record_failure(endpoint, FailureType.TIMEOUT, f"Request timeout after {request_timeout}s",
+                                           time.time() - start_time)
                 
                 if fallback:
                     return await self._execute_fallback(fallback, args, kwargs)
@@ -322,7 +330,7 @@ class CircuitBreaker:
             except Exception as e:
                 # Determine failure type
                 failure_type = await self._classify_failure(e, endpoint)
-                await self._record_failure(endpoint, failure_type, str(e))
+                await self._record_failure(endpoint, failure_type, str(e), time.time() - start_time)
                 
                 if fallback:
                     return await self._execute_fallback(fallback, args, kwargs)
@@ -437,20 +445,20 @@ class CircuitBreaker:
         endpoint.success_count += 1
         endpoint.failure_count = 0  # Reset failure count on success
         
-        # Add to request history
-        endpoint.request_history.append({
-            'timestamp': current_time,
-            'success': True,
-            'response_time': response_time
-        })
+        # Count in the rolling window
+        endpoint.window.record(True, response_time * 1000)
         
         # Check state transitions
         if endpoint.state == CircuitBreakerState.HALF_OPEN:
             if endpoint.success_count >= endpoint.config.success_threshold:
                 await self._transition_to_closed(endpoint)
         elif endpoint.state == CircuitBreakerState.CLOSED:
-            # In closed state, reset failure tracking based on rolling window
-            await self._update_failure_window(endpoint, current_time)
+            # Slow successes can open the circuit too
+            if await self._should_open_for_latency(endpoint, endpoint.window.snapshot()):
+                await self._transition_to_open(endpoint, FailureType.TIMEOUT, "Slow call threshold exceeded")
+            else:
+                # In closed state, reset failure tracking based on rolling window
+                await self._update_failure_window(endpoint, current_time)
         
         # Track success
         await self.event_tracker.track_event(
@@ -466,7 +474,8 @@ class CircuitBreaker:
         self,
         endpoint: ServiceEndpoint,
         failure_type: FailureType,
-        error_message: str
+        error_message: str,
+        response_time: Optional[float] = None
     ) -> None:
         """Record failed request"""
         current_time = datetime.now(timezone.utc)
@@ -483,13 +492,8 @@ class CircuitBreaker:
         endpoint.failure_count += 1
         endpoint.success_count = 0  # Reset success count on failure
         
-        # Add to request history and failure tracking
-        endpoint.request_history.append({
-            'timestamp': current_time,
-            'success': False,
-            'failure_type': failure_type.value,
-            'error_message': error_message[:200]  # Truncate long error messages
-        })
+        # Count in the rolling window and keep for failure analysis
+        endpoint.window.record(False, response_time * 1000 if response_time is not None else None)
         
         endpoint.recent_failures.append({
             'timestamp': current_time,
@@ -523,21 +527,27 @@ class CircuitBreaker:
             return True
         
         # Check failure rate in rolling window
-        failures_in_window = await self._count_failures_in_window(endpoint, current_time)
-        requests_in_window = await self._count_requests_in_window(endpoint, current_time)
-        
-        if requests_in_window >= 5:  # Need minimum sample size
-            failure_rate = failures_in_window / requests_in_window
+        window = endpoint.window.snapshot()
+        if window.requests >= endpoint.config.minimum_window_requests:
+            failure_rate = window.failure_rate
             if failure_rate >= endpoint.config.failure_rate_threshold:
                 logger.info(f"Opening circuit for {endpoint.name} due to high failure rate: {failure_rate:.2%}")
                 return True
         
-        # Check average response time threshold
-        if endpoint.metrics.total_requests > 0:
-            avg_response_time = endpoint.metrics.total_response_time / endpoint.metrics.total_requests
-            if avg_response_time >= endpoint.config.avg_response_time_threshold:
-                logger.info(f"Opening circuit for {endpoint.name} due to slow response time: {avg_response_time:.2f}ms")
-                return True
+        return await self._should_open_for_latency(endpoint, window)
+    
+    async def _should_open_for_latency(self, endpoint: ServiceEndpoint, window: WindowSnapshot) -> bool:
+        """Check slow-call rate and average latency over the rolling window"""
+        if window.latency_samples < endpoint.config.minimum_window_requests:
+            return False
+        
+        if window.slow_call_rate >= endpoint.config.slow_call_rate_threshold:
+            logger.info(f"Opening circuit for {endpoint.name} due to high slow call rate: {window.slow_call_rate:.2%}")
+            return True
+        
+        if window.avg_latency_ms >= endpoint.config.avg_response_time_threshold:
+            logger.info(f"Opening circuit for {endpoint.name} due to slow response time: {window.avg_latency_ms:.2f}ms")
+            return True
         
         return False
     
@@ -631,22 +641,14 @@ class CircuitBreaker:
     async def _calculate_service_health(self, endpoint: ServiceEndpoint) -> float:
         """Calculate service health score (0.0 to 1.0)"""
         try:
-            # Check recent performance
-            recent_requests = list(endpoint.request_history)[-20:]  # Last 20 requests
-            if not recent_requests:
+            # Check performance over the rolling window
+            window = endpoint.window.snapshot()
+            if not window.requests:
                 return 0.5
             
-            # Calculate success rate
-            recent_successes = sum(1 for req in recent_requests if req.get('success', False))
-            success_rate = recent_successes / len(recent_requests)
-            
-            # Calculate average response time
-            response_times = [req.get('response_time', 0) for req in recent_requests if req.get('response_time')]
-            avg_response_time = statistics.mean(response_times) if response_times else 0
-            
             # Health score components
-            success_score = success_rate
-            response_time_score = max(0, 1 - (avg_response_time / (endpoint.config.avg_response_time_threshold * 2)))
+            success_score = window.success_rate
+            response_time_score = max(0, 1 - (window.avg_latency_ms / (endpoint.config.avg_response_time_threshold * 2)))
             
             # Weighted health score
             health_score = (success_score * 0.7) + (response_time_score * 0.3)
@@ -663,16 +665,7 @@ class CircuitBreaker:
         current_time: datetime
     ) -> int:
         """Count failures within the rolling window"""
-        window_start = current_time - timedelta(seconds=endpoint.config.rolling_window_seconds)
-        
-        failures = 0
-        for req in endpoint.request_history:
-            req_time = req.get('timestamp')
-            if req_time and req_time >= window_start:
-                if not req.get('success', True):  # Default to True for backward compatibility
-                    failures += 1
-        
-        return failures
+        return endpoint.window.snapshot(current_time.timestamp()).failures
     
     async def _count_requests_in_window(
         self,
@@ -680,15 +673,7 @@ class CircuitBreaker:
         current_time: datetime
     ) -> int:
         """Count total requests within the rolling window"""
-        window_start = current_time - timedelta(seconds=endpoint.config.rolling_window_seconds)
-        
-        count = 0
-        for req in endpoint.request_history:
-            req_time = req.get('timestamp')
-            if req_time and req_time >= window_start:
-                count += 1
-        
-        return count
+        return endpoint.window.snapshot(current_time.timestamp()).requests
     
     async def _update_failure_window(
         self,
@@ -696,27 +681,12 @@ class CircuitBreaker:
         current_time: datetime
     ) -> None:
         """Update failure tracking for closed state"""
-        # Remove old requests outside the rolling window
-        window_start = current_time - timedelta(seconds=endpoint.config.rolling_window_seconds)
-        
-        # Keep only recent requests
-        recent_requests = [
-            req for req in endpoint.request_history
-            if req.get('timestamp', current_time) >= window_start
-        ]
-        
-        # Update request history
-        endpoint.request_history.clear()
-        endpoint.request_history.extend(recent_requests)
-        
-        # Update failure metrics based on window
-        failures_in_window = await self._count_failures_in_window(endpoint, current_time)
-        requests_in_window = await self._count_requests_in_window(endpoint, current_time)
+        # Buckets outside the window are recycled as time moves on; nothing to prune
+        window = endpoint.window.snapshot(current_time.timestamp())
         
         # Reset failure count if within threshold
-        if requests_in_window > 0:
-            failure_rate = failures_in_window / requests_in_window
-            if failure_rate < endpoint.config.failure_rate_threshold * 0.5:  # Recovery threshold
+        if window.requests > 0:
+            if window.failure_rate < endpoint.config.failure_rate_threshold * 0.5:  # Recovery threshold
                 endpoint.metrics.consecutive_failures = max(0, endpoint.metrics.consecutive_failures - 1)
     
     async def _classify_failure(self, error: Exception, endpoint: ServiceEndpoint) -> FailureType:
@@ -774,6 +744,7 @@ class CircuitBreaker:
         
         # Get health score
         health_score = await self._calculate_service_health(endpoint)
+        window = endpoint.window.snapshot()
         
         # Calculate state duration
         state_duration = (current_time - endpoint.state_change_time).total_seconds()
@@ -805,6 +776,15 @@ class CircuitBreaker:
                 'consecutive_failures': endpoint.metrics.consecutive_failures,
                 'consecutive_successes': endpoint.metrics.consecutive_successes
             },
+            'rolling_window': {
+                'window_seconds': window.window_seconds,
+                'requests': window.requests,
+                'failures': window.failures,
+                'failure_rate_percent': round(window.failure_rate * 100, 2),
+                'slow_calls': window.slow_calls,
+                'slow_call_rate_percent': round(window.slow_call_rate * 100, 2),
+                'avg_response_time_ms': round(window.avg_latency_ms, 2)
+            },
             'health': {
                 'health_score': round(health_score, 3),
                 'health_status': 'healthy' if health_score > 0.7 else 'degraded' if health_score > 0.4 else 'unhealthy',
@@ -951,7 +931,7 @@ class CircuitBreaker:
         
         # Reset metrics
         endpoint.metrics = RequestMetrics()
-        endpoint.request_history.clear()
+        endpoint.window.reset()
         endpoint.recent_failures.clear()
         endpoint.current_concurrent = 0
         endpoint.max_concurrent_reached = 0
@@ -1053,13 +1033,6 @@ class CircuitBreaker:
                     endpoint.metrics.state_changes = endpoint.metrics.state_changes[-self.config['max_state_history']:]
                     cleanup_count += 1
                 
-                # Clean up old request history (keep recent)
-                cutoff_time = current_time - timedelta(hours=24)  # Keep 24 hours
-                endpoint.request_history = deque([
-                    req for req in endpoint.request_history
-                    if req.get('timestamp', current_time) >= cutoff_time
-                ], maxlen=1000)
-                
                 # Clean up old failure records
                 if len(endpoint.recent_failures) > 50:
                     endpoint.recent_failures = deque(
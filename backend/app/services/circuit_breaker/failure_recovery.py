@@ -19,6 +19,7 @@ import random
 import statistics
 
 from app.services.cache.redis_cache import RedisCache
+from app.services.circuit_breaker.rolling_window import RollingWindow
 from app.services.telemetry.event_tracker import EventTracker
 
 logger = logging.getLogger(__name__)
@@ -70,6 +71,7 @@ class RecoveryConfig:
     health_check_interval: float = 5.0
     max_concurrent_recoveries: int = 5
     retry_backoff_factor: float = 2.0
+    health_window_seconds: int = 300  # Rolling window adaptive recovery is tuned from
     enable_canary_recovery: bool = True
     enable_gradual_recovery: bool = True
     enable_fallback: bool = True
@@ -387,6 +389,7 @@ class RecoveryManager:
             'recovery_attempts': 0,
             'recovery_successes': 0
         }
+        self.window = RollingWindow(window_seconds=config.health_window_seconds)
         
         logger.info(f"Created recovery manager for service: {service_name}")
     
@@ -813,6 +816,7 @@ class RecoveryManager:
             # Record metrics
             execution_time = time.time() - start_time
             self.health_metrics['total_operations'] += 1
+            self.window.record(bool(result), execution_time * 1000)
             
             if result:
                 self.health_metrics['successful_operations'] += 1
@@ -822,6 +826,8 @@ class RecoveryManager:
             return result
             
         except asyncio.TimeoutError:
+            # A timed-out check is a failed sample that took the whole timeout
+            self.window.record(False, timeout * 1000)
             logger.warning(f"Adaptive health check timeout for {self.service_name}")
             return False
         except Exception as e:
@@ -830,6 +836,7 @@ class RecoveryManager:
     
     async def _test_operation(self, operation_function: Callable, *args, **kwargs) -> bool:
         """Test if operation can be executed successfully"""
+        start_time = time.time()
         try:
             if asyncio.iscoroutinefunction(operation_function):
                 result = await operation_function(*args, **kwargs)
@@ -838,11 +845,13 @@ class RecoveryManager:
             
             self.health_metrics['total_operations'] += 1
             self.health_metrics['successful_operations'] += 1
+            self.window.record(True, (time.time() - start_time) * 1000)
             
             return bool(result)
             
         except Exception as e:
             self.health_metrics['failed_operations'] += 1
+            self.window.record(False, (time.time() - start_time) * 1000)
             logger.debug(f"Test operation failed for {self.service_name}: {e}")
             return False
     
@@ -887,18 +896,17 @@ class RecoveryManager:
     
     async def _get_adaptive_parameters(self) -> Dict[str, Any]:
         """Get adaptive recovery parameters based on service history"""
-        # Calculate adaptive parameters based on service performance history
-        total_ops = self.health_metrics['total_operations']
+        # Calculate adaptive parameters based on recent service performance
+        window = self.window.snapshot()
         
-        if total_ops == 0:
+        if window.requests == 0:
             return {
                 'timeout': 5.0,
                 'success_threshold': 0.8,
                 'traffic_percentage': 0.1
             }
         
-        success_rate = self.health_metrics['successful_operations'] / total_ops
-        failure_rate = self.health_metrics['failed_operations'] / total_ops
+        success_rate = window.success_rate
         
         # Adjust parameters based on success rate
         adaptive_params = {
@@ -20,6 +20,7 @@ import aiohttp
 import ssl
 
 from app.services.cache.redis_cache import RedisCache
+from app.services.circuit_breaker.rolling_window import RollingWindow
 from app.services.telemetry.event_tracker import EventTracker
 
 logger = logging.getLogger(__name__)
@@ -61,6 +62,7 @@ class HealthCheckConfig:
     response_time_threshold_ms: float = 1000.0
     error_rate_threshold: float = 0.05  # 5% error rate
     availability_threshold: float = 0.99  # 99% availability
+    sla_window_seconds: int = 600  # Rolling window the SLA check is judged over
     enabled: bool = True
     custom_headers: Dict[str, str] = field(default_factory=dict)
     expected_status_codes: List[int] = field(default_factory=lambda: [200, 201, 202])
@@ -129,6 +131,10 @@ class ServiceHealthMonitor:
         
         # Health tracking
         self.check_history = deque(maxlen=1000)
+        self.window = RollingWindow(
+            window_seconds=config.sla_window_seconds,
+            slow_call_threshold_ms=config.response_time_threshold_ms
+        )
         self.consecutive_failures = 0
         self.consecutive_successes = 0
         self.last_check_time: Optional[datetime] = None
@@ -397,10 +403,10 @@ class ServiceHealthMonitor:
     async def _perform_sla_check(self, **kwargs) -> HealthCheckResult:
         """Perform SLA-based health check"""
         try:
-            # Get recent check results
-            recent_results = list(self.check_history)[-20:]  # Last 20 checks
+            # Checks in the rolling SLA window
+            window = self.window.snapshot()
             
-            if len(recent_results) < 5:
+            if window.requests < 5:
                 return HealthCheckResult(
                     service_name=self.service_name,
                     check_type=HealthCheckType.SLA,
@@ -411,12 +417,8 @@ class ServiceHealthMonitor:
                 )
             
             # Calculate SLA metrics
-            successful_checks = sum(1 for result in recent_results if result.status == HealthCheckStatus.HEALTHY)
-            availability = successful_checks / len(recent_results)
-            
-            # Check response times
-            response_times = [result.response_time_ms for result in recent_results if result.response_time_ms > 0]
-            avg_response_time = statistics.mean(response_times) if response_times else 0
+            availability = window.success_rate
+            avg_response_time = window.avg_latency_ms
             
             # Determine SLA compliance
             sla_compliant = (
@@ -436,7 +438,9 @@ class ServiceHealthMonitor:
                 metadata={
                     'availability': availability,
                     'avg_response_time': avg_response_time,
-                    'checks_sample_size': len(recent_results)
+                    'slow_check_rate': window.slow_call_rate,
+                    'checks_sample_size': window.requests,
+                    'window_seconds': window.window_seconds
                 }
             )
             
@@ -458,6 +462,13 @@ class ServiceHealthMonitor:
         # Add to history
         self.check_history.append(result)
         
+        # SLA results are derived from the window, so only direct checks feed it
+        if result.check_type != HealthCheckType.SLA:
+            self.window.record(
+                result.status == HealthCheckStatus.HEALTHY,
+                result.response_time_ms if result.response_time_ms > 0 else None
+            )
+        
         # Update counters
         self.total_checks += 1
         
@@ -1276,16 +1287,10 @@ class HealthChecker:
             cutoff_time = current_time - timedelta(hours=self.config['health_history_retention_hours'])
             
             for monitor in self._monitors.values():
-                # Clean up old check history
-                old_results = [
-                    result for result in monitor.check_history
-                    if result.timestamp < cutoff_time
-                ]
-                
-                for old_result in old_results:
-                    if old_result in monitor.check_history:
-                        monitor.check_history.remove(old_result)
-                        cleanup_count += 1
+                # Clean up old check history (oldest first)
+                while monitor.check_history and monitor.check_history[0].timestamp < cutoff_time:
+                    monitor.check_history.popleft()
+                    cleanup_count += 1
             
             logger.info(f"Cleaned up {cleanup_count} expired health check results")
             
@@ -0,0 +1,113 @@
+"""
+Rolling Window Counters
+
+Bucketed rolling-window call accounting shared by the circuit breaker,
+health checker and failure recovery services. The window is a ring of fixed
+time buckets (one second by default), each holding success, failure and
+slow-call counts plus a latency sum. Recording a call is O(1); querying the
+window is O(buckets) regardless of call volume, and memory is fixed.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class WindowSnapshot:
+    """Call counts over a rolling window"""
+    window_seconds: float
+    successes: int = 0
+    failures: int = 0
+    slow_calls: int = 0
+    latency_total_ms: float = 0.0
+    latency_samples: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.successes + self.failures
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.requests if self.requests else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.requests if self.requests else 0.0
+
+    @property
+    def slow_call_rate(self) -> float:
+        return self.slow_calls / self.latency_samples if self.latency_samples else 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.latency_total_ms / self.latency_samples if self.latency_samples else 0.0
+
+
+class RollingWindow:
+    """
+    Ring of per-bucket call counters covering the last ``window_seconds``.
+
+    Buckets are stored column-wise in parallel lists; a bucket is recycled
+    lazily when a call lands in its slot for a newer time period, so stale
+    buckets never need sweeping. Calls slower than ``slow_call_threshold_ms``
+    count as slow calls (only calls recorded with a latency are judged).
+    """
+
+    __slots__ = ("window_seconds", "bucket_seconds", "slow_call_threshold_ms",
+                 "_size", "_periods", "_successes", "_failures", "_slow", "_latency_ms", "_samples")
+
+    def __init__(self, window_seconds: float = 60, bucket_seconds: float = 1.0,
+                 slow_call_threshold_ms: Optional[float] = None):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.slow_call_threshold_ms = slow_call_threshold_ms
+        self._size = max(1, math.ceil(window_seconds / bucket_seconds))
+        self.reset()
+
+    def reset(self):
+        size = self._size
+        self._periods: List[int] = [-1] * size  # time period each bucket currently holds
+        self._successes: List[int] = [0] * size
+        self._failures: List[int] = [0] * size
+        self._slow: List[int] = [0] * size
+        self._latency_ms: List[float] = [0.0] * size
+        self._samples: List[int] = [0] * size
+
+    def record(self, success: bool, latency_ms: Optional[float] = None, now: Optional[float] = None):
+        """Count one call in the bucket for ``now`` (epoch seconds, defaults to the current time)"""
+        period = int((time.time() if now is None else now) // self.bucket_seconds)
+        slot = period % self._size
+        if self._periods[slot] != period:
+            self._periods[slot] = period
+            self._successes[slot] = 0
+            self._failures[slot] = 0
+            self._slow[slot] = 0
+            self._latency_ms[slot] = 0.0
+            self._samples[slot] = 0
+
+        if success:
+            self._successes[slot] += 1
+        else:
+            self._failures[slot] += 1
+
+        if latency_ms is not None:
+            self._latency_ms[slot] += latency_ms
+            self._samples[slot] += 1
+            if self.slow_call_threshold_ms is not None and latency_ms >= self.slow_call_threshold_ms:
+                self._slow[slot] += 1
+
+    def snapshot(self, now: Optional[float] = None) -> WindowSnapshot:
+        """Totals over the buckets still inside the window"""
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        oldest = current - self._size
+        snapshot = WindowSnapshot(window_seconds=self.window_seconds)
+        for slot, period in enumerate(self._periods):
+            if oldest < period <= current:
+                snapshot.successes += self._successes[slot]
+                snapshot.failures += self._failures[slot]
+                snapshot.slow_calls += self._slow[slot]
+                snapshot.latency_total_ms += self._latency_ms[slot]
+                snapshot.latency_samples += self._samples[slot]
+        return snapshot
@@ -9,16 +9,68 @@ import os
 import tempfile
 import logging
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 from PIL import Image
 
-from .format_detector import DocumentFormat
-from .pdf_processor import PDFProcessor
-from .tiff_processor import TIFFProcessor
-from .image_processor import ImageProcessor
+from .document_formats.format_detector import DocumentFormat
+from .document_formats.pdf_processor import PDFProcessor
+from .document_formats.tiff_processor import TIFFProcessor
+from .document_formats.image_processor import ImageProcessor
 
 logger = logging.getLogger(__name__)
 
+
+def _is_pdf(file_path: str) -> bool:
+    with open(file_path, 'rb') as f:
+        return f.read(4) == b'%PDF'
+
+
+def count_document_pages(file_path: str) -> int:
+    """Count pages without rendering them (PDF page tree or TIFF frames)"""
+    if _is_pdf(file_path):
+        from pypdf import PdfReader
+        return len(PdfReader(file_path).pages)
+    
+    with Image.open(file_path) as img:
+        return getattr(img, 'n_frames', 1)
+
+
+def render_document_page(file_path: str, page_number: int, dpi: int = 300) -> Image.Image:
+    """
+    Render a single 1-based page of a PDF, TIFF or image file
+    
+    Only the requested page is rasterized, so callers can walk large
+    documents one page at a time or render pages in separate processes.
+    """
+    if _is_pdf(file_path):
+        import pdf2image
+        images = pdf2image.convert_from_path(
+            file_path, dpi=dpi, first_page=page_number, last_page=page_number
+        )
+        if not images:
+            raise ValueError(f"Page {page_number} not found in {file_path}")
+        return images[0]
+    
+    with Image.open(file_path) as img:
+        if page_number > 1:
+            img.seek(page_number - 1)
+        page = img.copy()
+    
+    if page.mode not in ('RGB', 'RGBA', 'L'):
+        page = page.convert('RGB')
+    return page
+
+
+def iter_document_pages(file_path: str, dpi: int = 300, first_page: int = 1,
+                        last_page: Optional[int] = None) -> Iterator[Tuple[int, Image.Image]]:
+    """Lazily yield (page_number, image) pairs, rendering one page at a time"""
+    page_count = count_document_pages(file_path)
+    last_page = min(last_page or page_count, page_count)
+    
+    for page_number in range(first_page, last_page + 1):
+        yield page_number, render_document_page(file_path, page_number, dpi)
+
+
 class DocumentConverter:
     """Service to convert documents between formats"""
     
@@ -123,37 +175,34 @@ class DocumentConverter:
         
         return options
     
+    def _page_bounds(self, options: Dict[str, Any]) -> Tuple[int, int]:
+        """First and last 1-based page to convert"""
+        if options['page_range']:
+            return options['page_range'][0], options['page_range'][1]
+        return 1, options['max_pages']
+    
     def _convert_pdf_to_png(self, file_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
         """Convert PDF to PNG"""
         try:
             if not self.pdf_processor:
                 return {'success': False, 'error': 'PDF processor not available'}
             
-            import pdf2image
             dpi = options['dpi']
-            quality_settings = self.quality_settings[options['quality']]
-            
-            # Convert PDF pages to images
-            images = pdf2image.convert_from_path(
-                file_path,
-                dpi=dpi,
-                fmt='PNG',
-                first_page=options['page_range'][0] if options['page_range'] else 1,
-                last_page=options['page_range'][1] if options['page_range'] else options['max_pages']
-            )
+            first_page, last_page = self._page_bounds(options)
             
-            # Save images and collect paths
+            # Render pages one at a time into a single output directory
+            temp_dir = tempfile.mkdtemp()
             converted_files = []
-            for i, image in enumerate(images):
-                temp_dir = tempfile.mkdtemp()
-                output_path = os.path.join(temp_dir, f'page_{i + 1}.png')
+            for page_number, image in iter_document_pages(file_path, dpi, first_page, last_page):
+                output_path = os.path.join(temp_dir, f'page_{page_number}.png')
                 image.save(output_path, 'PNG')
+                image.close()
                 converted_files.append(output_path)
             
             return {
                 'success': True,
                 'converted_files': converted_files,
-                'page_count': len(images),
+                'page_count': len(converted_files),
                 'conversion_type': 'pdf_to_png',
                 'settings': {
                     'dpi': dpi,
@@ -171,25 +220,15 @@ class DocumentConverter:
             if not self.pdf_processor:
                 return {'success': False, 'error': 'PDF processor not available'}
             
-            import pdf2image
             dpi = options['dpi']
             quality_settings = self.quality_settings[options['quality']]
+            first_page, last_page = self._page_bounds(options)
             
-            # Convert PDF pages to images
-            images = pdf2image.convert_from_path(
-                file_path,
-                dpi=dpi,
-                fmt='JPEG',
-                quality=quality_settings['quality'],
-                first_page=options['page_range'][0] if options['page_range'] else 1,
-                last_page=options['page_range'][1] if options['page_range'] else options['max_pages']
-            )
-            
-            # Save images and collect paths
+            # Render pages one at a time into a single output directory
+            temp_dir = tempfile.mkdtemp()
             converted_files = []
-            for i, image in enumerate(images):
-                temp_dir = tempfile.mkdtemp()
-                output_path = os.path.join(temp_dir, f'page_{i + 1}.jpg')
+            for page_number, image in iter_document_pages(file_path, dpi, first_page, last_page):
+                output_path = os.path.join(temp_dir, f'page_{page_number}.jpg')
                 
                 # Convert RGBA to RGB if needed for JPEG
                 if image.mode == 'RGBA':
@@ -200,12 +239,13 @@ class DocumentConverter:
                     image = image.convert('RGB')
                 
                 image.save(output_path, 'JPEG', quality=quality_settings['quality'], optimize=options['optimize_size'])
+                image.close()
                 converted_files.append(output_path)
             
             return {
                 'success': True,
                 'converted_files': converted_files,
-                'page_count': len(images),
+                'page_count': len(converted_files),
                 'conversion_type': 'pdf_to_jpeg',
                 'settings': {
                     'dpi': dpi,
@@ -221,6 +261,7 @@ class DocumentConverter:
         """Convert TIFF to PNG"""
         try:
             converted_files = []
+            temp_dir = tempfile.mkdtemp()
             
             with Image.open(file_path) as img:
                 max_pages = options['max_pages']
@@ -238,7 +279,6 @@ class DocumentConverter:
                             processed_img = processed_img.convert('RGB')
                         
                         # Save as PNG
-                        temp_dir = tempfile.mkdtemp()
                         output_path = os.path.join(temp_dir, f'page_{page_num + 1}.png')
                         processed_img.save(output_path, 'PNG')
                         converted_files.append(output_path)
@@ -268,6 +308,7 @@ class DocumentConverter:
         try:
             converted_files = []
             quality_settings = self.quality_settings[options['quality']]
+            temp_dir = tempfile.mkdtemp()
             
             with Image.open(file_path) as img:
                 max_pages = options['max_pages']
@@ -289,7 +330,6 @@ class DocumentConverter:
                             processed_img = processed_img.convert('RGB')
                         
                         # Save as JPEG
-                        temp_dir = tempfile.mkdtemp()
                         output_path = os.path.join(temp_dir, f'page_{page_num + 1}.jpg')
                         processed_img.save(output_path, 'JPEG', quality=quality_settings['quality'], optimize=options['optimize_size'])
                         converted_files.append(output_path)
@@ -0,0 +1,143 @@
+"""
+Single-Pass Document Content Scanner
+
+Reads an uploaded document once, in fixed-size chunks, and in that one pass:
+
+- computes its SHA-256 (the processing cache key),
+- captures the leading bytes for magic-byte format detection and entropy
+  sampling,
+- scans the whole file for suspicious byte patterns with a multi-pattern
+  matcher, carrying the tail of each chunk into the next so matches that
+  straddle a chunk boundary are still found.
+
+The matcher is a pyahocorasick automaton when that package is installed and a
+compiled alternation of the literal patterns otherwise; both scan each byte
+once per pass regardless of how many patterns there are.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 1 MB reads: large enough to amortize syscalls, small enough to keep memory flat
+CHUNK_SIZE = 1024 * 1024
+
+# Bytes kept for magic-byte detection and content sampling
+HEAD_SIZE = 10000
+
+
+class PatternMatcher:
+    """Multi-pattern literal matcher over byte strings"""
+
+    def __init__(self, patterns: Iterable[bytes]):
+        self.patterns = sorted(set(patterns), key=len, reverse=True)
+        self.max_length = max((len(p) for p in self.patterns), default=0)
+
+        if AHOCORASICK_AVAILABLE and self.patterns:
+            # pyahocorasick works on str; latin-1 maps bytes 1:1 to code points
+            self._automaton = ahocorasick.Automaton()
+            for pattern in self.patterns:
+                self._automaton.add_word(pattern.decode('latin-1'), pattern)
+            self._automaton.make_automaton()
+            self._regex = None
+        else:
+            self._automaton = None
+            self._regex = re.compile(b'|'.join(re.escape(p) for p in self.patterns)) if self.patterns else None
+
+    def find_all(self, data) -> Set[bytes]:
+        """Return the set of patterns occurring in ``data`` (bytes-like)"""
+        if self._automaton is not None:
+            text = bytes(data).decode('latin-1')
+            return {pattern for _, pattern in self._automaton.iter(text)}
+        if self._regex is not None:
+            # Overlapping patterns (one a prefix of another) are all reported
+            # because every pattern is also checked at each match position
+            found = set()
+            for match in self._regex.finditer(data):
+                start = match.start()
+                for pattern in self.patterns:
+                    if pattern not in found and data[start:start + len(pattern)] == pattern:
+                        found.add(pattern)
+                if len(found) == len(self.patterns):
+                    break
+            return found
+        return set()
+
+
+@dataclass
+class ContentScanResult:
+    """Outcome of a single streaming pass over a file"""
+    sha256: str
+    size_bytes: int
+    head: bytes
+    patterns_found: List[bytes] = field(default_factory=list)
+    chunks_read: int = 0
+    scan_method: str = "pattern_matching"
+
+
+def scan_file(file_path: str, matcher: Optional[PatternMatcher] = None,
+              chunk_size: int = CHUNK_SIZE) -> ContentScanResult:
+    """
+    Hash, sample and pattern-scan a file in one sequential read.
+
+    Args:
+        file_path: Path to the file
+        matcher: Patterns to look for (no scanning if omitted)
+        chunk_size: Bytes read per iteration
+
+    Returns:
+        ContentScanResult
+    """
+    sha256 = hashlib.sha256()
+    overlap = max(matcher.max_length - 1, 0) if matcher else 0
+
+    # One reusable buffer: [carried tail | new chunk]
+    buffer = bytearray(overlap + chunk_size)
+    view = memoryview(buffer)
+    carried = 0
+    size = 0
+    chunks = 0
+    head = b''
+    found: Set[bytes] = set()
+
+    with open(file_path, 'rb') as f:
+        while True:
+            read = f.readinto(view[carried:carried + chunk_size])
+            if not read:
+                break
+
+            chunk = view[carried:carried + read]
+            sha256.update(chunk)
+            if len(head) < HEAD_SIZE:
+                head += bytes(chunk[:HEAD_SIZE - len(head)])
+            size += read
+            chunks += 1
+
+            if matcher is not None and len(found) < len(matcher.patterns):
+                window = view[:carried + read]
+                found |= matcher.find_all(window)
+
+                # Carry the last (longest pattern - 1) bytes into the next window
+                keep = min(overlap, carried + read)
+                if keep:
+                    buffer[:keep] = bytes(window[carried + read - keep:carried + read])
+                carried = keep
+
+    return ContentScanResult(
+        sha256=sha256.hexdigest(),
+        size_bytes=size,
+        head=head,
+        patterns_found=sorted(found),
+        chunks_read=chunks,
+        scan_method="aho_corasick" if matcher is not None and AHOCORASICK_AVAILABLE else "pattern_matching"
+    )
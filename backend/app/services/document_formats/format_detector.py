@@ -54,12 +54,14 @@ class FormatDetector:
             '.jpg': DocumentFormat.JPEG,
         }
     
-    def detect_format(self, file_path: str) -> Tuple[DocumentFormat, Dict[str, Any]]:
+    def detect_format(self, file_path: str, header: Optional[bytes] = None) -> Tuple[DocumentFormat, Dict[str, Any]]:
         """
         Detect document format using multiple methods
         
         Args:
             file_path: Path to the file
+            header: Leading bytes of the file if already read (e.g. by the
+                content scanner); avoids reopening the file
             
         Returns:
             Tuple of (detected_format, metadata)
@@ -81,12 +83,12 @@ class FormatDetector:
         metadata['size_bytes'] = os.path.getsize(file_path)
         
         # Method 1: Magic bytes detection
-        detected_by_magic, magic_confidence = self._detect_by_magic_bytes(file_path)
+        detected_by_magic, magic_confidence = self._detect_by_magic_bytes(file_path, header)
         metadata['magic_bytes_match'] = detected_by_magic != DocumentFormat.UNKNOWN
         metadata['magic_confidence'] = magic_confidence
         
         # Method 2: MIME type detection
-        mime_type = self._detect_mime_type(file_path)
+        mime_type = self._detect_mime_type(file_path, header)
         detected_by_mime = self._detect_by_mime_type(mime_type)
         metadata['mime_type'] = mime_type
         
@@ -108,12 +110,13 @@ class FormatDetector:
         
         return final_format, metadata
     
-    def _detect_by_magic_bytes(self, file_path: str) -> Tuple[DocumentFormat, float]:
+    def _detect_by_magic_bytes(self, file_path: str, header: Optional[bytes] = None) -> Tuple[DocumentFormat, float]:
         """Detect format using magic bytes"""
         try:
-            with open(file_path, 'rb') as f:
-                # Read first 16 bytes for detection
-                header = f.read(16)
+            if header is None:
+                with open(file_path, 'rb') as f:
+                    # Read first 16 bytes for detection
+                    header = f.read(16)
                 
             for format_type, signatures in self.format_signatures.items():
                 for signature in signatures:
@@ -127,10 +130,12 @@ class FormatDetector:
             logger.error(f"Error detecting magic bytes: {e}")
             return DocumentFormat.UNKNOWN, 0.0
     
-    def _detect_mime_type(self, file_path: str) -> Optional[str]:
+    def _detect_mime_type(self, file_path: str, header: Optional[bytes] = None) -> Optional[str]:
         """Detect MIME type using python-magic or fallback methods"""
         try:
             # Use python-magic for accurate detection
+            if header:
+                return magic.from_buffer(header, mime=True)
             mime_type = magic.from_file(file_path, mime=True)
             return mime_type
         except Exception:
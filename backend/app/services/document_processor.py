@@ -11,7 +11,7 @@ import hashlib
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, List
 from sqlalchemy.orm import Session
 from app.models.job import Job
 from app.models.document import Document
@@ -22,6 +22,7 @@ from app.models.audit import AuditLog
 from app.services.ocr_service import get_ocr_service
 from app.services.llm_service import get_llm_service
 from app.services.cache.redis_cache import cache_service, cache_result
+from app.services.document_formats.content_scanner import CHUNK_SIZE
 from app.middleware.telemetry_decorators import (
     document_telemetry, extraction_telemetry, business_telemetry,
     record_business_metric, increment_metric
@@ -67,8 +68,16 @@ class DocumentProcessingService:
         if document.checksum_sha256:
             return document.checksum_sha256
         
-        # Calculate hash from file path if checksum not available
-        return calculate_file_checksum(document.storage_url)
+        # Calculate hash from file path if checksum not available, and persist
+        # it so the file is hashed only once
+        document.checksum_sha256 = calculate_file_checksum(document.storage_url)
+        self.db.commit()
+        return document.checksum_sha256
+    
+    def _service_version(self, service) -> str:
+        """Engine/model identity used in content-addressed cache keys."""
+        return getattr(service, "cache_version", None) or \
+            f"{type(service).__name__}:{getattr(service, 'version', 'unknown')}"
     
     def _cache_key_doc_hash(self, document_hash: str) -> str:
         """Generate cache key for document hash."""
@@ -100,22 +109,8 @@ class DocumentProcessingService:
             if self.cache_enabled and self.tenant_id:
                 cached_result = await cache_service.get_cached_document(document_hash, self.tenant_id)
                 if cached_result:
-                    # Return cached result - create new ExtractionRun from cached data
-                    validation_run = ExtractionRun(
-                        document_id=document.document_id,
-                        stage="cached",
-                        status="success",
-                        engine_name=cached_result.get("engine", "cache"),
-                        model_version=cached_result.get("version", "1.0"),
-                        confidence_avg=cached_result.get("confidence_avg", 0.0),
-                        started_at=datetime.utcnow(),
-                        finished_at=datetime.utcnow()
-                    )
-                    self.db.add(validation_run)
-                    self.db.commit()
-                    self.db.refresh(validation_run)
-                    
-                    # Log cache hit
+                    # Identical content was processed before; the OCR and LLM
+                    # stages below are served from their content-addressed caches
                     self._log_audit_event(
                         user_id=user_id,
                         action="document.cached_processing",
@@ -123,21 +118,12 @@ class DocumentProcessingService:
                         target_id=document.document_id,
                         metadata={"document_hash": document_hash, "cache_hit": True}
                     )
-                    
-                    # Update job status
-                    if job:
-                        job.status = "needs_review"
-                        job.updated_at = datetime.utcnow()
-                        self.db.commit()
-                    
-                    return validation_run
             
-            # Process document normally if not cached
             # Stage 1: OCR Processing
-            ocr_run = await self._run_ocr_stage(document, user_id)
+            ocr_run = await self._run_ocr_stage(document, document_hash, user_id)
             
             # Stage 2: LLM Extraction
-            llm_run = await self._run_llm_stage(document, ocr_run, user_id)
+            llm_run = await self._run_llm_stage(document, document_hash, ocr_run, user_id)
             
             # Stage 3: Validation
             validation_run = self._run_validation_stage(llm_run, user_id)
@@ -185,28 +171,32 @@ class DocumentProcessingService:
             raise
     
     @extraction_telemetry("run_ocr_stage")
-    async def _run_ocr_stage(self, document: Document, user_id: str) -> ExtractionRun:
+    async def _run_ocr_stage(self, document: Document, document_hash: str, user_id: str) -> ExtractionRun:
         """Run OCR stage with caching and create extraction run"""
         started_at = datetime.utcnow()
+        engine_version = self._service_version(self.ocr_service)
         
-        # Check cache for OCR results
+        # Check cache for OCR results (by content hash and engine version)
         cached_ocr = None
         if self.cache_enabled and self.tenant_id:
-            cached_ocr = await cache_service.get_cached_ocr(document.document_id, self.tenant_id)
+            cached_ocr = await cache_service.get_cached_ocr(document_hash, self.tenant_id, engine_version)
         
         if cached_ocr:
             # Use cached OCR result
             ocr_result = cached_ocr
             source = "cache"
         else:
-            # Run OCR
-            ocr_result = self.ocr_service.process_document(document.storage_url)
+            # Run OCR (page-parallel and off the event loop when supported)
+            if hasattr(self.ocr_service, "process_document_async"):
+                ocr_result = await self.ocr_service.process_document_async(document.storage_url)
+            else:
+                ocr_result = self.ocr_service.process_document(document.storage_url)
             source = "processing"
             
-            # Cache the OCR result
-            if self.cache_enabled and self.tenant_id:
+            # Cache the OCR result (fallback output is not a real result)
+            if self.cache_enabled and self.tenant_id and ocr_result.get("backend") != "fallback":
                 await cache_service.cache_ocr_result(
-                    document.document_id, ocr_result, self.tenant_id
+                    document_hash, ocr_result, self.tenant_id, engine_version
                 )
         
         # Create extraction run
@@ -250,14 +240,16 @@ class DocumentProcessingService:
         return ocr_run
     
     @extraction_telemetry("run_llm_stage")
-    async def _run_llm_stage(self, document: Document, ocr_run: ExtractionRun, user_id: str) -> ExtractionRun:
+    async def _run_llm_stage(self, document: Document, document_hash: str,
+                             ocr_run: ExtractionRun, user_id: str) -> ExtractionRun:
         """Run LLM extraction stage with caching"""
         started_at = datetime.utcnow()
+        model_version = self._service_version(self.llm_service)
         
-        # Check cache for LLM extraction results
+        # Check cache for LLM extraction results (by content hash and model version)
         cached_llm = None
         if self.cache_enabled and self.tenant_id:
-            cached_llm = await cache_service.get_cached_llm_extraction(document.document_id, self.tenant_id)
+            cached_llm = await cache_service.get_cached_llm_extraction(document_hash, self.tenant_id, model_version)
         
         if cached_llm:
             # Use cached LLM result
@@ -272,14 +264,17 @@ class DocumentProcessingService:
             
             ocr_text = ocr_text_field.value if ocr_text_field else ""
             
-            # Run LLM extraction
-            llm_result = self.llm_service.extract_fields(ocr_text)
+            # Run LLM extraction (over pooled async clients when supported)
+            if hasattr(self.llm_service, "extract_fields_async"):
+                llm_result = await self.llm_service.extract_fields_async(ocr_text)
+            else:
+                llm_result = self.llm_service.extract_fields(ocr_text)
             source = "processing"
             
-            # Cache the LLM result
-            if self.cache_enabled and self.tenant_id:
+            # Cache the LLM result (fallback output is not a real result)
+            if self.cache_enabled and self.tenant_id and llm_result.get("backend") != "fallback":
                 await cache_service.cache_llm_extraction(
-                    document.document_id, llm_result, self.tenant_id
+                    document_hash, llm_result, self.tenant_id, model_version
                 )
         
         # Calculate average confidence
@@ -292,7 +287,7 @@ class DocumentProcessingService:
             stage="llm",
             status="success",
             engine_name=llm_result["model"],
-            model_version=llm_result["version"],
+            model_version=llm_result.get("version", model_version),
             confidence_avg=avg_confidence,
             started_at=started_at,
             finished_at=datetime.utcnow()
@@ -390,6 +385,16 @@ def calculate_file_checksum(file_path: str) -> str:
     """Calculate SHA256 checksum of a file"""
     sha256_hash = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
+        for byte_block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def save_file_with_checksum(source: BinaryIO, destination: Path) -> str:
+    """Copy an upload stream to disk, computing its SHA256 checksum in the same pass"""
+    sha256_hash = hashlib.sha256()
+    with destination.open("wb") as buffer:
+        for byte_block in iter(lambda: source.read(CHUNK_SIZE), b""):
             sha256_hash.update(byte_block)
+            buffer.write(byte_block)
     return sha256_hash.hexdigest()
@@ -12,7 +12,8 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 import logging
 
-from .format_detector import DocumentFormat, get_format_detector
+from .document_formats.format_detector import DocumentFormat, get_format_detector
+from .document_formats.content_scanner import ContentScanResult, PatternMatcher, scan_file
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +53,7 @@ class DocumentValidator:
             b'shell_exec', b'passthru', b'file_get_contents', b'fopen(',
             b'<iframe', b'<object', b'<embed', b'<applet'
         ]
+        self.pattern_matcher = PatternMatcher(self.suspicious_patterns)
         
         # MIME type validation
         self.allowed_mime_types = {
@@ -107,19 +109,23 @@ class DocumentValidator:
         try:
             # Step 1: Basic file validation
             basic_validation = self._perform_basic_validation(file_path)
-            validation_result.update(basic_validation)
+            self._merge_step_result(validation_result, basic_validation)
             
             # Step 2: Format detection and validation
             if validation_result['is_file_valid']:
-                format_validation = self._perform_format_validation(file_path)
-                validation_result.update(format_validation)
+                # One streaming pass: checksum, header sample and pattern scan
+                content_scan = scan_file(file_path, self.pattern_matcher)
+                validation_result['file_info']['checksum_sha256'] = content_scan.sha256
+                
+                format_validation = self._perform_format_validation(file_path, content_scan)
+                self._merge_step_result(validation_result, format_validation)
                 
                 # Step 3: Security scanning
-                security_scan = self._perform_security_scan(file_path)
+                security_scan = self._perform_security_scan(file_path, content_scan)
                 validation_result['security_scan'] = security_scan
                 
                 # Step 4: Content analysis
-                content_analysis = self._perform_content_analysis(file_path)
+                content_analysis = self._perform_content_analysis(file_path, content_scan)
                 validation_result['content_analysis'] = content_analysis
                 
                 # Step 5: Processing readiness check
@@ -145,11 +151,25 @@ class DocumentValidator:
             validation_result['validation_metadata']['validation_error'] = str(e)
             return validation_result
     
+    def _merge_step_result(self, validation_result: Dict[str, Any], step_result: Dict[str, Any]):
+        """Merge a validation step into the overall result, accumulating lists"""
+        for key, value in step_result.items():
+            current = validation_result.get(key)
+            if isinstance(current, list) and isinstance(value, list):
+                current.extend(value)
+            elif isinstance(current, dict) and isinstance(value, dict):
+                current.update(value)
+            else:
+                validation_result[key] = value
+    
     def _perform_basic_validation(self, file_path: str) -> Dict[str, Any]:
         """Perform basic file validation"""
         basic_validation = {
             'is_file_valid': False,
             'checks_performed': ['basic_file_check'],
+            'checks_passed': [],
+            'warnings': [],
+            'errors': [],
             'file_info': {}
         }
         
@@ -205,19 +225,26 @@ class DocumentValidator:
         
         return basic_validation
     
-    def _perform_format_validation(self, file_path: str) -> Dict[str, Any]:
+    def _perform_format_validation(self, file_path: str,
+                                   content_scan: Optional[ContentScanResult] = None) -> Dict[str, Any]:
         """Perform format detection and validation"""
         format_validation = {
             'detected_format': DocumentFormat.UNKNOWN,
             'format_confidence': 0.0,
             'is_format_supported': False,
             'format_metadata': {},
-            'checks_performed': ['format_detection']
+            'file_info': {},
+            'checks_performed': ['format_detection'],
+            'checks_passed': [],
+            'warnings': [],
+            'errors': []
         }
         
         try:
             # Detect format
-            detected_format, metadata = self.format_detector.detect_format(file_path)
+            header = content_scan.head if content_scan else None
+            detected_format, metadata = self.format_detector.detect_format(file_path, header)
+            format_validation['file_info']['file_size_bytes'] = metadata['size_bytes']
             format_validation['detected_format'] = detected_format
             format_validation['format_confidence'] = metadata['confidence']
             format_validation['format_metadata'] = metadata
@@ -228,7 +255,7 @@ class DocumentValidator:
             format_validation['is_format_supported'] = detected_format in supported_formats
             
             if not format_validation['is_format_supported']:
-                format_validation['errors'] = [f"Unsupported format: {detected_format.value}"]
+                format_validation['errors'].append(f"Unsupported format: {detected_format.value}")
                 return format_validation
             
             # Validate format-specific requirements
@@ -239,7 +266,7 @@ class DocumentValidator:
             format_validation['checks_passed'].append('magic_bytes_validation')
             
         except Exception as e:
-            format_validation['errors'] = [f"Error in format validation: {str(e)}"]
+            format_validation['errors'].append(f"Error in format validation: {str(e)}")
         
         return format_validation
     
@@ -408,7 +435,8 @@ class DocumentValidator:
         
         return validation_result
     
-    def _perform_security_scan(self, file_path: str) -> Dict[str, Any]:
+    def _perform_security_scan(self, file_path: str,
+                               content_scan: Optional[ContentScanResult] = None) -> Dict[str, Any]:
         """Perform security scanning"""
         security_scan = {
             'status': 'passed',
@@ -418,34 +446,30 @@ class DocumentValidator:
         }
         
         try:
-            # Magic bytes validation
-            with open(file_path, 'rb') as f:
-                header = f.read(100)  # Read first 100 bytes
-                
-                # Check against trusted signatures
-                is_trusted = False
-                for format_type, signatures in self.trusted_signatures.items():
-                    if isinstance(signatures, list):
-                        for signature in signatures:
-                            if header.startswith(signature):
-                                is_trusted = True
-                                break
-                    else:
-                        if header.startswith(signatures):
-                            is_trusted = True
-                            break
-                
-                if not is_trusted:
-                    security_scan['threats_detected'].append('untrusted_file_signature')
-                    security_scan['status'] = 'failed'
-                
-                # Content pattern scanning
-                content_scan_result = self._scan_content_patterns(file_path)
-                if content_scan_result['threats_found']:
-                    security_scan['threats_detected'].extend(content_scan_result['threats_found'])
-                    security_scan['status'] = 'failed'
-                
-                security_scan['scan_metadata'] = content_scan_result
+            if content_scan is None:
+                content_scan = scan_file(file_path, self.pattern_matcher)
+            
+            # Magic bytes validation against trusted signatures
+            header = content_scan.head[:100]
+            is_trusted = False
+            for format_type, signatures in self.trusted_signatures.items():
+                if not isinstance(signatures, list):
+                    signatures = [signatures]
+                if any(header.startswith(signature) for signature in signatures):
+                    is_trusted = True
+                    break
+            
+            if not is_trusted:
+                security_scan['threats_detected'].append('untrusted_file_signature')
+                security_scan['status'] = 'failed'
+            
+            # Content pattern scanning (whole file)
+            content_scan_result = self._scan_content_patterns(file_path, content_scan)
+            if content_scan_result['threats_found']:
+                security_scan['threats_detected'].extend(content_scan_result['threats_found'])
+                security_scan['status'] = 'failed'
+            
+            security_scan['scan_metadata'] = content_scan_result
             
         except Exception as e:
             security_scan['status'] = 'error'
@@ -453,8 +477,9 @@ class DocumentValidator:
         
         return security_scan
     
-    def _scan_content_patterns(self, file_path: str) -> Dict[str, Any]:
-        """Scan file content for suspicious patterns"""
+    def _scan_content_patterns(self, file_path: str,
+                               content_scan: Optional[ContentScanResult] = None) -> Dict[str, Any]:
+        """Scan the whole file for suspicious patterns"""
         result = {
             'threats_found': [],
             'patterns_checked': len(self.suspicious_patterns),
@@ -462,22 +487,22 @@ class DocumentValidator:
         }
         
         try:
-            with open(file_path, 'rb') as f:
-                # Read content in chunks to handle large files
-                chunk_size = 8192
-                content = f.read(chunk_size)
-                
-                # Check for suspicious patterns
-                for pattern in self.suspicious_patterns:
-                    if pattern in content:
-                        result['threats_found'].append(f'suspicious_pattern: {pattern.decode("ascii", errors="ignore")}')
-                
+            if content_scan is None:
+                content_scan = scan_file(file_path, self.pattern_matcher)
+            
+            for pattern in content_scan.patterns_found:
+                result['threats_found'].append(f'suspicious_pattern: {pattern.decode("ascii", errors="ignore")}')
+            
+            result['scan_method'] = content_scan.scan_method
+            result['bytes_scanned'] = content_scan.size_bytes
+            
         except Exception as e:
             result['threats_found'].append(f'content_scan_error: {str(e)}')
         
         return result
     
-    def _perform_content_analysis(self, file_path: str) -> Dict[str, Any]:
+    def _perform_content_analysis(self, file_path: str,
+                                  content_scan: Optional[ContentScanResult] = None) -> Dict[str, Any]:
         """Perform content analysis"""
         content_analysis = {
             'analyzers_used': [],
@@ -488,7 +513,7 @@ class DocumentValidator:
         
         try:
             # File analysis
-            file_analysis = self._analyze_file_content(file_path)
+            file_analysis = self._analyze_file_content(file_path, content_scan)
             content_analysis.update(file_analysis)
             content_analysis['analyzers_used'].append('file_content_analysis')
             
@@ -502,7 +527,8 @@ class DocumentValidator:
         
         return content_analysis
     
-    def _analyze_file_content(self, file_path: str) -> Dict[str, Any]:
+    def _analyze_file_content(self, file_path: str,
+                              content_scan: Optional[ContentScanResult] = None) -> Dict[str, Any]:
         """Analyze file content"""
         analysis = {
             'file_entropy': 0.0,
@@ -512,33 +538,36 @@ class DocumentValidator:
         
         try:
             # Calculate file entropy (measure of randomness/complexity)
-            with open(file_path, 'rb') as f:
-                content = f.read(10000)  # Sample first 10KB
+            if content_scan is not None:
+                content = content_scan.head  # First 10KB, already read
+            else:
+                with open(file_path, 'rb') as f:
+                    content = f.read(10000)  # Sample first 10KB
+            
+            if content:
+                # Calculate Shannon entropy
+                byte_counts = [0] * 256
+                for byte in content:
+                    byte_counts[byte] += 1
+                
+                entropy = 0.0
+                content_len = len(content)
+                for count in byte_counts:
+                    if count > 0:
+                        probability = count / content_len
+                        entropy -= probability * (probability.bit_length() - 1)
+                
+                analysis['file_entropy'] = entropy
+                
+                # Determine content type based on entropy and patterns
+                if entropy < 3.0:
+                    analysis['content_type'] = 'text_like'
+                    analysis['has_structured_content'] = True
+                elif entropy < 6.0:
+                    analysis['content_type'] = 'mixed'
+                else:
+                    analysis['content_type'] = 'binary'
                 
-                if content:
-                    # Calculate Shannon entropy
-                    byte_counts = [0] * 256
-                    for byte in content:
-                        byte_counts[byte] += 1
-                    
-                    entropy = 0.0
-                    content_len = len(content)
-                    for count in byte_counts:
-                        if count > 0:
-                            probability = count / content_len
-                            entropy -= probability * (probability.bit_length() - 1)
-                    
-                    analysis['file_entropy'] = entropy
-                    
-                    # Determine content type based on entropy and patterns
-                    if entropy < 3.0:
-                        analysis['content_type'] = 'text_like'
-                        analysis['has_structured_content'] = True
-                    elif entropy < 6.0:
-                        analysis['content_type'] = 'mixed'
-                    else:
-                        analysis['content_type'] = 'binary'
-                    
         except Exception as e:
             analysis['analysis_error'] = str(e)
         
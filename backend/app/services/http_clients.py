@@ -0,0 +1,94 @@
+"""
+Shared async HTTP clients
+
+One long-lived ``httpx.AsyncClient`` per backend (OpenAI, Anthropic, Ollama,
+OCR proxy, ...) so requests reuse keep-alive connections and each backend is
+bounded by its own connection limits, instead of opening a fresh client and
+TLS handshake per call.
+
+Clients are kept per event loop, since their connections cannot be used
+from another loop. Sync code that drives async work with ``asyncio.run``
+(background jobs, blocking service entry points) should use ``run_sync``,
+which closes the clients the run created before its loop goes away.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Awaitable, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_client(backend: str, base_url: Optional[str] = None,
+                     headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """
+    Get the running loop's shared client for ``backend``, creating it on first use.
+
+    ``base_url``, ``headers`` and ``timeout`` only apply when the client is
+    created; per-request values can still be passed to ``client.request``.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _clients.get(loop)
+        if loop_clients is None:
+            # Drop clients of loops that were closed without run_sync
+            for closed in [other for other in _clients if other.is_closed()]:
+                del _clients[closed]
+            loop_clients = _clients[loop] = {}
+
+        client = loop_clients.get(backend)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url or "",
+                headers=headers,
+                timeout=httpx.Timeout(timeout or settings.HTTP_CLIENT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY
+                )
+            )
+            loop_clients[backend] = client
+    return client
+
+
+async def close_async_clients():
+    """Close the running loop's shared clients (application shutdown, end of run_sync)"""
+    with _clients_lock:
+        loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for backend, client in loop_clients.items():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client for {backend}: {e}")
+
+
+def in_event_loop() -> bool:
+    """True if an event loop is running in this thread (``run_sync`` cannot be used)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def run_sync(awaitable: Awaitable[Any]) -> Any:
+    """``asyncio.run`` for sync callers; closes the shared clients the run created"""
+    async def runner():
+        try:
+            return await awaitable
+        finally:
+            await close_async_clients()
+
+    return asyncio.run(runner())
@@ -0,0 +1,156 @@
+"""
+Job availability notifications for queue workers.
+
+Queue workers block on a per-queue event instead of sleep-polling the jobs
+table. Producers (job submission, batch creation) call ``notify_jobs_available``
+after the job rows are committed, which wakes idle workers in this process
+immediately and, with the ``postgres`` backend, workers in other processes via
+LISTEN/NOTIFY.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "fernando_job_queue"
+
+
+class JobNotifier:
+    """In-process wakeup channel keyed by queue name"""
+
+    def __init__(self):
+        self._events: Dict[str, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener = None
+
+    def _event_for(self, queue_name: str) -> asyncio.Event:
+        event = self._events.get(queue_name)
+        if event is None:
+            event = asyncio.Event()
+            self._events[queue_name] = event
+        return event
+
+    async def start(self, engine=None):
+        """Bind to the running loop and start the cross-process listener if configured"""
+        self._loop = asyncio.get_running_loop()
+
+        if self._listener is None and engine is not None and settings.QUEUE_NOTIFY_BACKEND == "postgres":
+            if engine.dialect.name != "postgresql":
+                logger.warning("QUEUE_NOTIFY_BACKEND=postgres requires a PostgreSQL database; using local notifications")
+                return
+            try:
+                self._listener = _PostgresListener(engine, self)
+                self._listener.start(self._loop)
+            except Exception as e:
+                logger.warning(f"Could not start LISTEN/NOTIFY listener, using local notifications: {e}")
+                self._listener = None
+
+    def stop(self):
+        """Stop the cross-process listener, if any"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def notify(self, queue_name: str):
+        """Wake workers waiting on ``queue_name``. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._event_for(queue_name).set()
+        else:
+            loop.call_soon_threadsafe(lambda: self._event_for(queue_name).set())
+
+    async def wait(self, queue_name: str, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a notification; returns True if woken"""
+        event = self._event_for(queue_name)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            # Clear before the caller claims so a job submitted after the
+            # claim query still produces a fresh wakeup.
+            event.clear()
+
+
+class _PostgresListener:
+    """Forwards PostgreSQL NOTIFY payloads to the local notifier (psycopg2 only)"""
+
+    def __init__(self, engine, notifier: JobNotifier):
+        self.engine = engine
+        self.notifier = notifier
+        self._raw = None
+        self._conn = None
+        self._loop = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._raw = self.engine.raw_connection()
+        self._conn = self._raw.driver_connection
+        self._conn.autocommit = True
+
+        cursor = self._conn.cursor()
+        cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+        cursor.close()
+
+        self._loop = loop
+        loop.add_reader(self._conn.fileno(), self._on_readable)
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception as e:
+            logger.error(f"LISTEN/NOTIFY connection error: {e}")
+            self.stop()
+            return
+
+        while self._conn.notifies:
+            message = self._conn.notifies.pop(0)
+            if message.payload:
+                self.notifier._event_for(message.payload).set()
+
+    def stop(self):
+        if self._loop is not None and self._conn is not None:
+            try:
+                self._loop.remove_reader(self._conn.fileno())
+            except Exception:
+                pass
+        if self._raw is not None:
+            self._raw.close()
+        self._raw = None
+        self._conn = None
+
+
+job_notifier = JobNotifier()
+
+
+def notify_jobs_available(queue_name: str, db: Optional[Session] = None):
+    """Signal that jobs were queued on ``queue_name``.
+
+    Call after the job rows are committed. When a PostgreSQL session is passed
+    and the postgres backend is enabled, a NOTIFY is issued and committed so
+    workers in other processes wake as well.
+    """
+    if (db is not None and settings.QUEUE_NOTIFY_BACKEND == "postgres"
+            and db.get_bind().dialect.name == "postgresql"):
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": NOTIFY_CHANNEL, "payload": queue_name}
+        )
+        db.commit()
+
+    job_notifier.notify(queue_name)
@@ -8,6 +8,7 @@ field extraction using OpenAI API, Azure OpenAI, or local models.
 import os
 import json
 import asyncio
+import logging
 from typing import Optional, Dict, Any, List
 import requests
 import time
@@ -21,6 +22,11 @@ from app.services.credit_service import CreditService
 from app.services.usage_tracking.llm_usage_tracker import LLMUsageTracker
 from app.middleware.credit_validation import validate_credits, CreditValidationError
 from app.models.credit import LLMModelType
+from app.services.http_clients import get_async_client, in_event_loop, run_sync
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_SYSTEM_PROMPT = "You are an expert at extracting structured data from Portuguese invoices and financial documents."
 
 
 class LLMService(TelemetryMixin):
@@ -132,7 +138,10 @@ class LLMService(TelemetryMixin):
         session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Extract structured fields from text using LLM.
+        Extract structured fields from text using LLM (blocking).
+        
+        Prefer extract_fields_async from async code so backend calls do not
+        block the event loop.
         
         Args:
             text: OCR-extracted text
@@ -145,72 +154,17 @@ class LLMService(TelemetryMixin):
         """
         start_time = time.time()
         
-        # Validate credits before proceeding
-        if self.credit_service and user_id:
-            try:
-                # Estimate tokens and cost for validation
-                model_type = self._get_llm_model_type()
-                prompt = self._get_extraction_prompt(text, document_type)
-                estimated_prompt_tokens = self.usage_tracker.estimate_tokens(prompt, model_type)
-                estimated_completion_tokens = self.usage_tracker.estimate_tokens("{}", model_type)
-                
-                estimated_cost, _ = self.credit_service.calculate_llm_cost(
-                    model_type=model_type,
-                    prompt_tokens=estimated_prompt_tokens,
-                    completion_tokens=estimated_completion_tokens
-                )
-                
-                # Validate credits
-                validation_result = self.credit_service.validate_credit_balance(
-                    user_id=user_id,
-                    estimated_cost=estimated_cost,
-                    operation_type="extract_fields",
-                    service_type="llm",
-                    model_type=model_type.value,
-                    estimated_tokens=estimated_prompt_tokens + estimated_completion_tokens
-                )
-                
-                if not validation_result.get("sufficient_credits", False):
-                    raise CreditValidationError(
-                        "Insufficient credits for LLM extraction",
-                        validation_result.get("available_balance", 0),
-                        estimated_cost
-                    )
-                
-            except Exception as e:
-                if isinstance(e, CreditValidationError):
-                    raise
-                else:
-                    # Log credit validation error but continue
-                    self.log_telemetry_event(
-                        "llm.credit_validation_error",
-                        TelemetryEvent.SYSTEM_EVENT,
-                        level=TelemetryLevel.ERROR,
-                        metadata={"error": str(e), "user_id": user_id}
-                    )
-        
-        # Initialize usage tracking session
-        if self.usage_tracker and session_id and user_id:
-            self.usage_tracker.start_usage_session(
-                session_id=session_id,
-                user_id=user_id,
-                model_type=self._get_llm_model_type().value,
-                operation_type="extract_fields",
-                context={"document_type": document_type, "text_length": len(text)}
-            )
+        self._validate_credits(text, document_type, user_id)
+        self._begin_usage_session(text, document_type, user_id, session_id)
         
         if not hasattr(self, 'available') or not self.available:
-            self.log_telemetry_event(
-                "llm.extraction_failed", 
-                TelemetryEvent.EXTRACTION_FAILED,
-                level=TelemetryLevel.WARNING,
-                metadata={"reason": "service_unavailable", "backend": self.backend}
-            )
-            return self._fallback_extraction(text, document_type)
+            return self._unavailable_extraction(text, document_type)
         
         try:
-            # Try using proxy client first
-            result = asyncio.run(self._extract_via_proxy(text, document_type))
+            # Try using proxy client first (not possible from inside a running loop)
+            result = {"success": False}
+            if not in_event_loop():
+                result = run_sync(self._extract_via_proxy(text, document_type))
             
             # Fallback to direct API calls if proxy fails
             if not result.get("success", False):
@@ -223,82 +177,214 @@ class LLMService(TelemetryMixin):
                 else:
                     result = self._fallback_extraction(text, document_type)
             
-            # Record success metrics
-            processing_time = time.time() - start_time
+            return self._record_extraction_success(result, document_type, start_time, user_id, session_id)
             
-            self.record_business_kpi(
-                "llm.extraction.success.count", 
-                1.0,
-                {
-                    "backend": self.backend,
-                    "model": self.model,
-                    "document_type": document_type,
-                    "processing_time": processing_time
-                }
-            )
+        except Exception as e:
+            return self._record_extraction_error(e, text, document_type, start_time, user_id, session_id)
+    
+    @llm_telemetry("extract_fields_async")
+    async def extract_fields_async(
+        self, 
+        text: str, 
+        document_type: str = "invoice",
+        user_id: Optional[int] = None,
+        session_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract structured fields from text using LLM without blocking the event loop.
+        
+        Backends are called over shared, pooled httpx.AsyncClient instances, so
+        many extractions can be in flight at once from one API process.
+        
+        Args:
+            text: OCR-extracted text
+            document_type: Type of document (invoice, receipt, etc.)
+            user_id: User ID for credit tracking (optional)
+            session_id: Session ID for usage tracking (optional)
             
-            self.log_telemetry_event(
-                "llm.extraction_completed", 
-                TelemetryEvent.EXTRACTION_COMPLETED,
-                level=TelemetryLevel.INFO,
-                metadata={
-                    "backend": self.backend,
-                    "model": self.model,
-                    "document_type": document_type,
-                    "processing_time": processing_time,
-                    "confidence": result.get("confidence", 0.0),
-                    "user_id": user_id,
-                    "session_id": session_id
-                }
-            )
+        Returns:
+            Dict containing extracted fields
+        """
+        start_time = time.time()
+        
+        self._validate_credits(text, document_type, user_id)
+        self._begin_usage_session(text, document_type, user_id, session_id)
+        
+        if not hasattr(self, 'available') or not self.available:
+            return self._unavailable_extraction(text, document_type)
+        
+        try:
+            # Try using proxy client first
+            result = await self._extract_via_proxy(text, document_type)
             
-            # Track usage and deduct credits
-            if self.usage_tracker and session_id and user_id:
-                self._track_extraction_usage(
-                    session_id, user_id, processing_time, 
-                    result.get("total_tokens", 0), result.get("total_cost", 0)
-                )
+            # Fallback to direct API calls if proxy fails
+            if not result.get("success", False):
+                if self.backend == "openai" or self.backend == "azure":
+                    result = await self._extract_openai_async(text, document_type)
+                elif self.backend == "anthropic":
+                    result = await self._extract_anthropic_async(text, document_type)
+                elif self.backend == "ollama":
+                    result = await self._extract_ollama_async(text, document_type)
+                else:
+                    result = self._fallback_extraction(text, document_type)
             
-            return result
+            return self._record_extraction_success(result, document_type, start_time, user_id, session_id)
             
         except Exception as e:
-            # Record error metrics
-            processing_time = time.time() - start_time
-            
-            self.record_business_kpi(
-                "llm.extraction.error.count", 
-                1.0,
-                {
-                    "backend": self.backend,
-                    "model": self.model,
-                    "document_type": document_type,
-                    "error_type": type(e).__name__
-                }
+            return self._record_extraction_error(e, text, document_type, start_time, user_id, session_id)
+    
+    def _validate_credits(self, text: str, document_type: str, user_id: Optional[int]):
+        """Validate credits before proceeding; raises CreditValidationError if insufficient"""
+        if not (self.credit_service and user_id):
+            return
+        
+        try:
+            # Estimate tokens and cost for validation
+            model_type = self._get_llm_model_type()
+            prompt = self._get_extraction_prompt(text, document_type)
+            estimated_prompt_tokens = self.usage_tracker.estimate_tokens(prompt, model_type)
+            estimated_completion_tokens = self.usage_tracker.estimate_tokens("{}", model_type)
+            
+            estimated_cost, _ = self.credit_service.calculate_llm_cost(
+                model_type=model_type,
+                prompt_tokens=estimated_prompt_tokens,
+                completion_tokens=estimated_completion_tokens
             )
             
-            self.log_telemetry_event(
-                "llm.extraction_error", 
-                TelemetryEvent.EXTRACTION_FAILED,
-                level=TelemetryLevel.ERROR,
-                metadata={
-                    "backend": self.backend,
-                    "model": self.model,
-                    "document_type": document_type,
-                    "processing_time": processing_time,
-                    "error_message": str(e),
-                    "user_id": user_id,
-                    "session_id": session_id
-                }
+            # Validate credits
+            validation_result = self.credit_service.validate_credit_balance(
+                user_id=user_id,
+                estimated_cost=estimated_cost,
+                operation_type="extract_fields",
+                service_type="llm",
+                model_type=model_type.value,
+                estimated_tokens=estimated_prompt_tokens + estimated_completion_tokens
             )
             
-            # Track failed usage (partial credit for attempt)
-            if self.usage_tracker and session_id and user_id:
-                self._track_extraction_usage(
-                    session_id, user_id, processing_time, 
-                    0, 0, success=False, error_message=str(e)
+            if not validation_result.get("sufficient_credits", False):
+                raise CreditValidationError(
+                    "Insufficient credits for LLM extraction",
+                    validation_result.get("available_balance", 0),
+                    estimated_cost
                 )
             
-            return self._fallback_extraction(text, document_type)
+        except Exception as e:
+            if isinstance(e, CreditValidationError):
+                raise
+            else:
+                # Log credit validation error but continue
+                self.log_telemetry_event(
+                    "llm.credit_validation_error",
+                    TelemetryEvent.SYSTEM_EVENT,
+                    level=TelemetryLevel.ERROR,
+                    metadata={"error": str(e), "user_id": user_id}
+                )
+    
+    def _begin_usage_session(self, text: str, document_type: str,
+                             user_id: Optional[int], session_id: Optional[str]):
+        """Initialize usage tracking session"""
+        if self.usage_tracker and session_id and user_id:
+            self.usage_tracker.start_usage_session(
+                session_id=session_id,
+                user_id=user_id,
+                model_type=self._get_llm_model_type().value,
+                operation_type="extract_fields",
+                context={"document_type": document_type, "text_length": len(text)}
+            )
+    
+    def _unavailable_extraction(self, text: str, document_type: str) -> Dict[str, Any]:
+        self.log_telemetry_event(
+            "llm.extraction_failed", 
+            TelemetryEvent.EXTRACTION_FAILED,
+            level=TelemetryLevel.WARNING,
+            metadata={"reason": "service_unavailable", "backend": self.backend}
+        )
+        return self._fallback_extraction(text, document_type)
+    
+    def _record_extraction_success(self, result: Dict[str, Any], document_type: str, start_time: float,
+                                   user_id: Optional[int], session_id: Optional[str]) -> Dict[str, Any]:
+        """Record success metrics and usage for a completed extraction"""
+        processing_time = time.time() - start_time
+        
+        self.record_business_kpi(
+            "llm.extraction.success.count", 
+            1.0,
+            {
+                "backend": self.backend,
+                "model": self.model,
+                "document_type": document_type,
+                "processing_time": processing_time
+            }
+        )
+        
+        self.log_telemetry_event(
+            "llm.extraction_completed", 
+            TelemetryEvent.EXTRACTION_COMPLETED,
+            level=TelemetryLevel.INFO,
+            metadata={
+                "backend": self.backend,
+                "model": self.model,
+                "document_type": document_type,
+                "processing_time": processing_time,
+                "confidence": result.get("confidence", 0.0),
+                "user_id": user_id,
+                "session_id": session_id
+            }
+        )
+        
+        # Track usage and deduct credits
+        if self.usage_tracker and session_id and user_id:
+            self._track_extraction_usage(
+                session_id, user_id, processing_time, 
+                result.get("total_tokens", 0), result.get("total_cost", 0)
+            )
+        
+        return result
+    
+    def _record_extraction_error(self, error: Exception, text: str, document_type: str, start_time: float,
+                                 user_id: Optional[int], session_id: Optional[str]) -> Dict[str, Any]:
+        """Record error metrics for a failed extraction and return the fallback result"""
+        processing_time = time.time() - start_time
+        
+        self.record_business_kpi(
+            "llm.extraction.error.count", 
+            1.0,
+            {
+                "backend": self.backend,
+                "model": self.model,
+                "document_type": document_type,
+                "error_type": type(error).__name__
+            }
+        )
+        
+        self.log_telemetry_event(
+            "llm.extraction_error", 
+            TelemetryEvent.EXTRACTION_FAILED,
+            level=TelemetryLevel.ERROR,
+            metadata={
+                "backend": self.backend,
+                "model": self.model,
+                "document_type": document_type,
+                "processing_time": processing_time,
+                "error_message": str(error),
+                "user_id": user_id,
+                "session_id": session_id
+            }
+        )
+        
+        # Track failed usage (partial credit for attempt)
+        if self.usage_tracker and session_id and user_id:
+            self._track_extraction_usage(
+                session_id, user_id, processing_time, 
+                0, 0, success=False, error_message=str(error)
+            )
+        
+        return self._fallback_extraction(text, document_type)
+    
+    @property
+    def cache_version(self) -> str:
+        """Model identity for content-addressed result caching"""
+        return f"{self.backend}:{self.model}"
     
     def _get_llm_model_type(self) -> LLMModelType:
         """Convert backend/model string to LLMModelType enum"""
@@ -473,6 +559,109 @@ class LLMService(TelemetryMixin):
             print(f"Ollama extraction error: {e}")
             return self._fallback_extraction(text, document_type)
     
+    async def _extract_openai_async(self, text: str, document_type: str) -> Dict[str, Any]:
+        """Extract fields using the OpenAI (or Azure OpenAI) REST API over the shared client"""
+        try:
+            prompt = self._get_extraction_prompt(text, document_type)
+            payload = {
+                "messages": [
+                    {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.1,
+                "max_tokens": 1000
+            }
+            
+            if self.backend == "azure":
+                client = get_async_client("azure_openai")
+                response = await client.post(
+                    f"{self.api_endpoint.rstrip('/')}/openai/deployments/{self.model}/chat/completions",
+                    params={"api-version": "2023-05-15"},
+                    headers={"api-key": self.api_key},
+                    json=payload
+                )
+            else:
+                client = get_async_client("openai", base_url="https://api.openai.com/v1")
+                response = await client.post(
+                    "/chat/completions",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json={"model": self.model, **payload}
+                )
+            response.raise_for_status()
+            
+            result_text = response.json()["choices"][0]["message"]["content"]
+            return self._finalize_extraction(self._parse_llm_json(result_text), "openai", 0.95)
+            
+        except Exception as e:
+            logger.exception(f"OpenAI extraction error: {e}")
+            return self._fallback_extraction(text, document_type)
+    
+    async def _extract_anthropic_async(self, text: str, document_type: str) -> Dict[str, Any]:
+        """Extract fields using the Anthropic Messages API over the shared client"""
+        try:
+            prompt = self._get_extraction_prompt(text, document_type)
+            
+            client = get_async_client("anthropic", base_url="https://api.anthropic.com/v1")
+            response = await client.post(
+                "/messages",
+                headers={"x-api-key": self.api_key, "anthropic-version": "2023-06-01"},
+                json={
+                    "model": self.model,
+                    "max_tokens": 1000,
+                    "temperature": 0.1,
+                    "system": EXTRACTION_SYSTEM_PROMPT,
+                    "messages": [{"role": "user", "content": prompt}]
+                }
+            )
+            response.raise_for_status()
+            
+            result_text = response.json()["content"][0]["text"]
+            return self._finalize_extraction(self._parse_llm_json(result_text), "anthropic", 0.95)
+            
+        except Exception as e:
+            logger.exception(f"Anthropic extraction error: {e}")
+            return self._fallback_extraction(text, document_type)
+    
+    async def _extract_ollama_async(self, text: str, document_type: str) -> Dict[str, Any]:
+        """Extract fields using Ollama (local) over the shared client"""
+        try:
+            prompt = self._get_extraction_prompt(text, document_type)
+            
+            client = get_async_client("ollama", base_url=self.api_endpoint)
+            response = await client.post(
+                "/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "temperature": 0.1
+                }
+            )
+            response.raise_for_status()
+            
+            result_text = response.json()["response"]
+            return self._finalize_extraction(self._parse_llm_json(result_text), "ollama", 0.85)
+            
+        except Exception as e:
+            logger.exception(f"Ollama extraction error: {e}")
+            return self._fallback_extraction(text, document_type)
+    
+    def _parse_llm_json(self, result_text: str) -> Dict[str, Any]:
+        """Parse a JSON object from an LLM reply, allowing a ```json fenced block"""
+        try:
+            return json.loads(result_text)
+        except json.JSONDecodeError:
+            if "```json" in result_text:
+                json_str = result_text.split("```json")[1].split("```")[0].strip()
+                return json.loads(json_str)
+            raise
+    
+    def _finalize_extraction(self, extracted_data: Dict[str, Any], backend: str, confidence: float) -> Dict[str, Any]:
+        extracted_data["backend"] = backend
+        extracted_data["model"] = self.model
+        extracted_data["confidence"] = confidence
+        return extracted_data
+    
     async def _extract_via_proxy(self, text: str, document_type: str) -> Dict[str, Any]:
         """Extract fields using proxy client"""
         try:
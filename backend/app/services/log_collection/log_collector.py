@@ -2,24 +2,40 @@
 Multi-output Log Collection System
 
 Collects logs from various sources and routes them to appropriate destinations.
+
+Every destination has its own bounded queue and worker thread, with
+independent batching and retry, so a slow or failing sink never holds up the
+others. When a destination's queue is full its overflow policy applies:
+block the caller, drop the oldest queued event, or spill to an append-only
+on-disk spool that is replayed once the destination catches up.
 """
 
+import csv
+import io
 import json
+import os
 import threading
 import time
+import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Deque, Dict, List, Optional, Callable, Tuple, Union
 from enum import Enum
-from queue import Queue, Empty
 from dataclasses import dataclass, field
 import asyncio
 import aiohttp
 import redis
 from sqlalchemy.orm import Session
-from app.models.logging import LogEntry, LogDestination, LogBatch
+from app.models.logging import LogEntry, LogDestination
 from app.db.session import SessionLocal
 from app.services.logging.structured_logger import structured_logger, LogCategory
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 class LogSource(Enum):
     """Sources of log data"""
@@ -58,6 +74,13 @@ class DestinationType(Enum):
     SPLUNK = "splunk"
 
 
+class OverflowPolicy(Enum):
+    """What happens when a destination queue is full"""
+    BLOCK = "block"              # Caller waits for room (backpressure)
+    DROP_OLDEST = "drop_oldest"  # Oldest queued event is discarded
+    SPILL = "spill"              # Event is appended to the on-disk spool
+
+
 @dataclass
 class LogEvent:
     """Individual log event structure"""
@@ -110,25 +133,490 @@ class LogEvent:
         )
 
 
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+_JSON_ENCODER = json.JSONEncoder(default=_json_default)
+
+
+def encode_json(value: Any) -> bytes:
+    """Serialize to UTF-8 JSON, with orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return _JSON_ENCODER.encode(value).encode('utf-8')
+
+
+def decode_json(data: Union[bytes, str]) -> Any:
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Field order of serialized log records (LogEvent.to_dict) and batch columns
+LOG_FIELDS = ('timestamp', 'level', 'category', 'message', 'source', 'data',
+              'correlation_id', 'user_id', 'request_id', 'session_id', 'tenant_id', 'tags')
+
+
+def _event_row(event: LogEvent) -> tuple:
+    return (event.timestamp, event.level.value, event.category, event.message, event.source.value,
+            event.data, event.correlation_id, event.user_id, event.request_id,
+            event.session_id, event.tenant_id, event.tags)
+
+
+class ColumnarLogBatch:
+    """
+    A batch of log events held as one list per field (see ``LOG_FIELDS``).
+    
+    Timestamps stay ``datetime`` objects, so sinks never format and re-parse
+    them. JSON sinks share one set of encoded rows, produced at most once per
+    batch; batches replayed from the spool reuse the spooled lines as is.
+    """
+    
+    __slots__ = ('batch_id', 'timestamp', 'source', 'batch_size', 'columns', '_encoded')
+    
+    def __init__(self, batch_id: str, columns: Dict[str, List[Any]], source: str,
+                 encoded: Optional[List[bytes]] = None):
+        self.batch_id = batch_id
+        self.timestamp = datetime.utcnow()
+        self.source = source
+        self.columns = columns
+        self.batch_size = len(columns['timestamp'])
+        self._encoded = encoded
+    
+    @classmethod
+    def from_events(cls, batch_id: str, events: List[LogEvent]) -> 'ColumnarLogBatch':
+        columns = dict(zip(LOG_FIELDS, map(list, zip(*map(_event_row, events)))))
+        return cls(batch_id, columns, columns['source'][0])
+    
+    @classmethod
+    def from_ndjson(cls, batch_id: str, lines: List[bytes], source: str) -> Optional['ColumnarLogBatch']:
+        """Rebuild a batch from encoded rows; None if no line is a valid record"""
+        rows = []
+        kept = []
+        for line in lines:
+            try:
+                record = decode_json(line)
+                rows.append((
+                    datetime.fromisoformat(record['timestamp']), record['level'], record['category'],
+                    record['message'], record['source'], record.get('data', {}),
+                    record.get('correlation_id'), record.get('user_id'), record.get('request_id'),
+                    record.get('session_id'), record.get('tenant_id'), record.get('tags', [])
+                ))
+            except (ValueError, KeyError, TypeError):
+                structured_logger.warning(f"Skipping malformed log record in batch {batch_id}")
+                continue
+            kept.append(line)
+        if not rows:
+            return None
+        return cls(batch_id, dict(zip(LOG_FIELDS, map(list, zip(*rows)))), source, kept)
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        """Records as dicts keyed by ``LOG_FIELDS``"""
+        return [dict(zip(LOG_FIELDS, row)) for row in zip(*(self.columns[name] for name in LOG_FIELDS))]
+    
+    def encoded_rows(self) -> List[bytes]:
+        """One JSON document per record, encoded once and cached"""
+        if self._encoded is None:
+            columns = self.columns
+            timestamps = columns['timestamp']
+            if not ORJSON_AVAILABLE:
+                # ISO strings up front keep the stdlib encoder off its slow ``default`` path
+                timestamps = [timestamp.isoformat() for timestamp in timestamps]
+            self._encoded = [
+                encode_json(dict(zip(LOG_FIELDS, row)))
+                for row in zip(timestamps, *(columns[name] for name in LOG_FIELDS[1:]))
+            ]
+        return self._encoded
+    
+    def ndjson(self) -> bytes:
+        """The whole batch as newline-delimited JSON"""
+        return b"\n".join(self.encoded_rows()) + b"\n"
+
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_text(value: Optional[str]) -> str:
+    """A value in PostgreSQL COPY text format"""
+    return '\\N' if value is None else str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_json(value: Any) -> str:
+    return '\\N' if value is None else encode_json(value).decode('utf-8').translate(_COPY_ESCAPES)
+
+
+class LogSpool:
+    """
+    Append-only on-disk overflow segments for one destination.
+    
+    Encoded records are written as JSON lines to numbered segment files; a segment is
+    closed once it reaches ``segment_max_bytes`` or when it is taken for
+    replay. Segments left behind by a previous process are replayed too.
+    """
+    
+    SUFFIX = ".ndjson"
+    
+    def __init__(self, directory: str, segment_max_bytes: int = 16 * 1024 * 1024):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        segments = self._segments()
+        self._next_seq = int(os.path.basename(segments[-1])[:-len(self.SUFFIX)]) + 1 if segments else 0
+    
+    def _segments(self) -> List[str]:
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(self.SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+    
+    def _close_current(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_path = None
+            self._file_bytes = 0
+    
+    def append(self, data: bytes) -> None:
+        """Append NDJSON lines, rotating to a new segment when the current one is full"""
+        with self._lock:
+            if self._file is None:
+                self._file_path = os.path.join(self.directory, f"{self._next_seq:012d}{self.SUFFIX}")
+                self._next_seq += 1
+                self._file = open(self._file_path, "ab")
+            self._file.write(data)
+            self._file.flush()
+            self._file_bytes += len(data)
+            if self._file_bytes >= self.segment_max_bytes:
+                self._close_current()
+    
+    def has_data(self) -> bool:
+        with self._lock:
+            return self._file_bytes > 0 or any(path != self._file_path for path in self._segments())
+    
+    def take_segment(self) -> Optional[str]:
+        """Close the open segment if needed and return the oldest one to replay"""
+        with self._lock:
+            if self._file is not None and self._file_bytes > 0:
+                self._close_current()
+            segments = [path for path in self._segments() if path != self._file_path]
+            return segments[0] if segments else None
+    
+    def read(self, path: str) -> List[bytes]:
+        """Encoded records of a segment (a torn last line from a crash is parsed, and skipped, on replay)"""
+        with open(path, "rb") as f:
+            return [line for line in f.read().split(b"\n") if line]
+    
+    def complete(self, path: str) -> None:
+        os.remove(path)
+    
+    def rewrite(self, path: str, lines: List[bytes]) -> None:
+        """Replace a segment with the records not yet delivered"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"\n".join(lines) + b"\n")
+        os.replace(tmp_path, path)
+
+
+class _DestinationWorker:
+    """Bounded queue, batching, retry and metrics for one destination"""
+    
+    THROUGHPUT_INTERVAL = 10.0  # seconds per throughput sample
+    
+    def __init__(self,
+                 name: str,
+                 info: Dict[str, Any],
+                 handler: Callable[[ColumnarLogBatch], None],
+                 on_delivered: Callable[[int, float], None],
+                 queue_size: int,
+                 batch_size: int,
+                 batch_timeout: float,
+                 overflow_policy: OverflowPolicy,
+                 max_retries: int,
+                 retry_backoff: float,
+                 spool: Optional[LogSpool] = None,
+                 block_timeout: Optional[float] = None):
+        self.name = name
+        self.info = info
+        self.handler = handler
+        self.on_delivered = on_delivered
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.overflow_policy = overflow_policy
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spool = spool
+        self.block_timeout = block_timeout
+        
+        self._queue: Deque[Tuple[float, LogEvent]] = deque()  # (enqueued at, event)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._batch_seq = 0
+        self._interval_start = time.time()
+        self._interval_count = 0
+        
+        self.metrics = {
+            'enqueued': 0,
+            'delivered': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'retries': 0,
+            'failed_batches': 0,
+            'last_delivery_ms': 0.0,
+            'throughput_per_second': 0.0
+        }
+    
+    # Producer side
+    
+    def offer(self, log_event: LogEvent) -> bool:
+        """Queue one event, applying the overflow policy when full"""
+        spill = False
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.metrics['dropped'] += 1
+                elif self.overflow_policy == OverflowPolicy.BLOCK:
+                    deadline = None if self.block_timeout is None else time.time() + self.block_timeout
+                    while len(self._queue) >= self.queue_size and not self._stop.is_set():
+                        remaining = 1.0 if deadline is None else min(1.0, deadline - time.time())
+                        if remaining <= 0:
+                            self.metrics['dropped'] += 1
+                            return False
+                        self._cond.wait(remaining)
+                else:
+                    spill = True
+            
+            if not spill:
+                self._queue.append((time.time(), log_event))
+                self.metrics['enqueued'] += 1
+                if len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+                return True
+        
+        # Spill outside the queue lock so the disk write does not stall the worker
+        self._spill(encode_json(dict(zip(LOG_FIELDS, _event_row(log_event)))) + b"\n", 1)
+        return self.spool is not None
+    
+    # Worker side
+    
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"LogCollector-{self.name}",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self, timeout: float) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def _take_batch(self) -> List[Tuple[float, LogEvent]]:
+        """Wait until a full batch is queued, the oldest event is due, or the worker stops"""
+        with self._cond:
+            while not self._stop.is_set():
+                if len(self._queue) >= self.batch_size:
+                    break
+                if self._queue:
+                    due = self._queue[0][0] + self.batch_timeout - time.time()
+                    if due <= 0:
+                        break
+                    self._cond.wait(min(due, 1.0))
+                else:
+                    if self.spool is not None and self.spool.has_data():
+                        return []
+                    self._cond.wait(1.0)
+            
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            if batch:
+                self._cond.notify_all()  # wake producers blocked on a full queue
+            return batch
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                queued = self._take_batch()
+                if queued:
+                    batch = ColumnarLogBatch.from_events(self._next_batch_id(), [event for _, event in queued])
+                    if not self._deliver(batch):
+                        self._spill(batch.ndjson(), batch.batch_size)
+                elif self.spool is not None and not self._stop.is_set():
+                    self._replay_spool()
+            except Exception as e:
+                structured_logger.error(
+                    f"Error in log destination worker {self.name}: {str(e)}",
+                    destination=self.name,
+                    error=str(e)
+                )
+                time.sleep(1)  # Avoid tight error loops
+        
+        self._drain()
+    
+    def _drain(self) -> None:
+        """Final delivery on shutdown: one attempt per batch, spill what fails"""
+        while True:
+            with self._cond:
+                count = min(len(self._queue), self.batch_size)
+                events = [self._queue.popleft()[1] for _ in range(count)]
+            if not events:
+                return
+            batch = ColumnarLogBatch.from_events(self._next_batch_id(), events)
+            if not self._deliver(batch, retry=False):
+                self._spill(batch.ndjson(), batch.batch_size)
+    
+    def _spill(self, data: bytes, count: int) -> None:
+        if self.spool is None:
+            self.metrics['dropped'] += count
+            return
+        try:
+            self.spool.append(data)
+            self.metrics['spilled'] += count
+        except OSError as e:
+            self.metrics['dropped'] += count
+            structured_logger.error(
+                f"Failed to spill log batch for destination {self.name}: {str(e)}",
+                destination=self.name,
+                error=str(e)
+            )
+    
+    def _replay_spool(self) -> None:
+        """Deliver spooled segments oldest first while the live queue is idle"""
+        path = self.spool.take_segment()
+        if path is None:
+            return
+        lines = self.spool.read(path)
+        for offset in range(0, len(lines), self.batch_size):
+            if self._stop.is_set() or self._queue:
+                # Live traffic or shutdown takes precedence; resume later
+                self.spool.rewrite(path, lines[offset:])
+                return
+            batch = ColumnarLogBatch.from_ndjson(
+                self._next_batch_id(), lines[offset:offset + self.batch_size], source="spool_replay"
+            )
+            if batch is None:
+                continue
+            if not self._deliver(batch):
+                self.spool.rewrite(path, lines[offset:])
+                return
+            self.metrics['replayed'] += batch.batch_size
+        self.spool.complete(path)
+    
+    def _next_batch_id(self) -> str:
+        self._batch_seq += 1
+        return f"{self.name}_{int(time.time() * 1000)}_{self._batch_seq}"
+    
+    def _deliver(self, batch: ColumnarLogBatch, retry: bool = True) -> bool:
+        """Send one batch, retrying with exponential backoff"""
+        attempts = 1 + (self.max_retries if retry else 0)
+        for attempt in range(attempts):
+            start_time = time.time()
+            try:
+                self.handler(batch)
+            except Exception as e:
+                self.info['last_error'] = str(e)
+                self.info['error_count'] += 1
+                structured_logger.error(
+                    f"Failed to send logs to destination {self.name}: {str(e)}",
+                    destination=self.name,
+                    error=str(e),
+                    attempt=attempt + 1
+                )
+                if attempt + 1 < attempts:
+                    self.metrics['retries'] += 1
+                    if self._stop.wait(self.retry_backoff * (2 ** attempt)):
+                        break
+                continue
+            
+            latency_ms = (time.time() - start_time) * 1000
+            self.info['last_success'] = datetime.utcnow()
+            self.info['success_count'] += 1
+            self.metrics['delivered'] += batch.batch_size
+            self.metrics['last_delivery_ms'] = latency_ms
+            self._count_throughput(batch.batch_size)
+            self.on_delivered(batch.batch_size, latency_ms)
+            return True
+        
+        self.metrics['failed_batches'] += 1
+        return False
+    
+    def _count_throughput(self, delivered: int) -> None:
+        now = time.time()
+        self._interval_count += delivered
+        elapsed = now - self._interval_start
+        if elapsed >= self.THROUGHPUT_INTERVAL:
+            self.metrics['throughput_per_second'] = self._interval_count / elapsed
+            self._interval_start = now
+            self._interval_count = 0
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, lag and delivery counters"""
+        with self._cond:
+            depth = len(self._queue)
+            lag_ms = (time.time() - self._queue[0][0]) * 1000 if self._queue else 0.0
+        return {
+            **self.metrics,
+            'queue_size': depth,
+            'queue_capacity': self.queue_size,
+            'lag_ms': round(lag_ms, 2),
+            'overflow_policy': self.overflow_policy.value,
+            'spool_pending': self.spool.has_data() if self.spool is not None else False
+        }
+
+
 class LogCollector:
-    """Multi-output log collector with buffering and batching"""
+    """Multi-output log collector with per-destination queues and batching"""
     
     def __init__(self, 
                  buffer_size: int = 10000,
                  batch_size: int = 100,
                  batch_timeout: int = 30,
-                 redis_url: Optional[str] = None):
+                 redis_url: Optional[str] = None,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.SPILL,
+                 spool_dir: str = "logs/spool",
+                 max_retries: int = 3,
+                 retry_backoff: float = 1.0):
+        """
+        Args:
+            buffer_size: Queue capacity per destination
+            batch_size: Events per delivered batch
+            batch_timeout: Seconds an event may wait for its batch to fill
+            redis_url: Redis for the Redis destination
+            overflow_policy: Default policy when a destination queue is full
+            spool_dir: Root directory for spilled events, one subdirectory per destination
+            max_retries: Retries per batch before it is spilled (or dropped)
+            retry_backoff: Initial retry delay in seconds, doubled per retry
+        
+        Each of these except ``redis_url`` can be overridden per destination
+        through the same-named key in the destination config
+        (``queue_size`` for ``buffer_size``).
+        """
         
         self.buffer_size = buffer_size
         self.batch_size = batch_size
         self.batch_timeout = batch_timeout
         self.redis_url = redis_url
+        self.overflow_policy = overflow_policy
+        self.spool_dir = spool_dir
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
         
-        # Threading components
-        self._log_queue = Queue(maxsize=buffer_size)
-        self._batch_queue = Queue()
         self._running = False
-        self._threads = []
         
         # Redis connection for distributed logging
         self.redis_client = None
@@ -144,6 +632,7 @@ class LogCollector:
         # Log destinations
         self.destinations: Dict[str, Dict[str, Any]] = {}
         self.destination_handlers: Dict[str, Callable] = {}
+        self._workers: Dict[str, _DestinationWorker] = {}
         
         # Statistics
         self.stats = {
@@ -164,6 +653,9 @@ class LogCollector:
         """Add a log destination"""
         
         with self._lock:
+            if name in self._workers:
+                self._workers[name].stop(timeout=self.batch_timeout)
+            
             self.destinations[name] = {
                 'type': destination_type,
                 'config': config,
@@ -178,26 +670,55 @@ class LogCollector:
             handler = self._create_destination_handler(destination_type, config)
             self.destination_handlers[name] = handler
             
+            overflow_policy = OverflowPolicy(config.get('overflow_policy', self.overflow_policy))
+            spool = None
+            if overflow_policy == OverflowPolicy.SPILL:
+                spool = LogSpool(os.path.join(config.get('spool_dir', self.spool_dir), name))
+            
+            worker = _DestinationWorker(
+                name=name,
+                info=self.destinations[name],
+                handler=handler,
+                on_delivered=self._record_delivery,
+                queue_size=config.get('queue_size', self.buffer_size),
+                batch_size=config.get('batch_size', self.batch_size),
+                batch_timeout=config.get('batch_timeout', self.batch_timeout),
+                overflow_policy=overflow_policy,
+                max_retries=config.get('max_retries', self.max_retries),
+                retry_backoff=config.get('retry_backoff', self.retry_backoff),
+                spool=spool,
+                block_timeout=config.get('block_timeout')
+            )
+            self._workers[name] = worker
+            if self._running:
+                worker.start()
+            
             structured_logger.info(
                 f"Added log destination: {name}",
                 destination_type=destination_type.value,
-                name=name
+                name=name,
+                overflow_policy=overflow_policy.value
             )
     
     def remove_destination(self, name: str) -> None:
-        """Remove a log destination"""
+        """Remove a log destination, delivering what it has queued first"""
         
         with self._lock:
+            worker = self._workers.pop(name, None)
+            
             if name in self.destinations:
                 del self.destinations[name]
             
             if name in self.destination_handlers:
                 del self.destination_handlers[name]
-            
-            structured_logger.info(
-                f"Removed log destination: {name}",
-                name=name
-            )
+        
+        if worker is not None:
+            worker.stop(timeout=self.batch_timeout)
+        
+        structured_logger.info(
+            f"Removed log destination: {name}",
+            name=name
+        )
     
     def start(self) -> None:
         """Start the log collector"""
@@ -206,33 +727,10 @@ class LogCollector:
             structured_logger.warning("Log collector is already running")
             return
         
-        self._running = True
-        
-        # Start collector threads
-        self._threads.append(threading.Thread(
-            target=self._log_collector_worker,
-            name="LogCollector-Collector",
-            daemon=True
-        ))
-        
-        self._threads.append(threading.Thread(
-            target=self._batch_processor_worker,
-            name="LogCollector-BatchProcessor",
-            daemon=True
-        ))
-        
-        # Start batch distribution threads
-        for name in self.destinations:
-            self._threads.append(threading.Thread(
-                target=self._batch_distributor_worker,
-                name=f"LogCollector-Distributor-{name}",
-                args=(name,),
-                daemon=True
-            ))
-        
-        # Start all threads
-        for thread in self._threads:
-            thread.start()
+        with self._lock:
+            self._running = True
+            for worker in self._workers.values():
+                worker.start()
         
         structured_logger.info(
             "Log collector started",
@@ -242,30 +740,38 @@ class LogCollector:
         )
     
     def stop(self, timeout: int = 30) -> None:
-        """Stop the log collector"""
+        """Stop the log collector; workers deliver (or spill) what is still queued"""
         
         if not self._running:
             return
         
-        self._running = False
-        
-        # Wait for threads to finish
-        for thread in self._threads:
-            thread.join(timeout=timeout)
+        with self._lock:
+            self._running = False
+            workers = list(self._workers.values())
         
-        # Process remaining logs in queue
-        self._process_remaining_logs()
+        for worker in workers:
+            worker.stop(timeout=timeout)
         
         structured_logger.info("Log collector stopped")
     
     def collect_log(self, log_event: LogEvent) -> bool:
-        """Collect a log event"""
+        """
+        Collect a log event, queueing it for every enabled destination.
+        
+        Returns False if any destination had to drop it. With the BLOCK
+        overflow policy this waits for room, so do not call it from the
+        event loop for such destinations.
+        """
         
         try:
-            self._log_queue.put(log_event, block=False)
+            accepted = True
+            for name, worker in list(self._workers.items()):
+                if worker.info['enabled']:
+                    accepted = worker.offer(log_event) and accepted
+            
             with self._lock:
                 self.stats['total_logs_collected'] += 1
-            return True
+            return accepted
             
         except Exception as e:
             structured_logger.error(
@@ -285,9 +791,17 @@ class LogCollector:
         
         return collected
     
+    def _record_delivery(self, delivered: int, latency_ms: float) -> None:
+        """Collector-wide totals, updated by the destination workers"""
+        with self._lock:
+            self.stats['total_logs_processed'] += delivered
+            self.stats['total_batches_processed'] += 1
+            self.stats['last_processed_time'] = datetime.utcnow()
+            self.stats['processing_latency_ms'] = latency_ms
+    
     def _create_destination_handler(self, 
                                   destination_type: DestinationType,
-                                  config: Dict[str, Any]) -> Callable:
+                                  config: Dict[str, Any]) -> Callable[[ColumnarLogBatch], None]:
         """Create handler for specific destination type"""
         
         handlers = {
@@ -307,119 +821,7 @@ class LogCollector:
         
         return lambda batch: handlers[destination_type](batch, config)
     
-    def _log_collector_worker(self) -> None:
-        """Worker thread for collecting logs into batches"""
-        
-        batch = []
-        last_batch_time = time.time()
-        
-        while self._running:
-            try:
-                # Get log event with timeout
-                try:
-                    log_event = self._log_queue.get(timeout=1.0)
-                    batch.append(log_event)
-                except Empty:
-                    # Check if batch timeout reached
-                    if batch and (time.time() - last_batch_time) >= self.batch_timeout:
-                        self._submit_batch(batch)
-                        batch = []
-                        last_batch_time = time.time()
-                    continue
-                
-                # Submit batch if size limit reached
-                if len(batch) >= self.batch_size:
-                    self._submit_batch(batch)
-                    batch = []
-                    last_batch_time = time.time()
-                    
-            except Exception as e:
-                structured_logger.error(
-                    f"Error in log collector worker: {str(e)}",
-                    error=str(e)
-                )
-                time.sleep(1)  # Avoid tight error loops
-        
-        # Process remaining logs
-        if batch:
-            self._submit_batch(batch)
-    
-    def _submit_batch(self, batch: List[LogEvent]) -> None:
-        """Submit batch to batch processor"""
-        
-        try:
-            log_batch = LogBatch(
-                batch_id=f"batch_{int(time.time() * 1000)}",
-                logs=[event.to_dict() for event in batch],
-                timestamp=datetime.utcnow(),
-                source=batch[0].source.value if batch else "unknown",
-                batch_size=len(batch)
-            )
-            
-            self._batch_queue.put(log_batch, block=False)
-            
-        except Exception as e:
-            structured_logger.error(
-                f"Failed to submit log batch: {str(e)}",
-                error=str(e),
-                batch_size=len(batch)
-            )
-    
-    def _batch_processor_worker(self) -> None:
-        """Worker thread for processing log batches"""
-        
-        while self._running:
-            try:
-                # Get batch with timeout
-                log_batch = self._batch_queue.get(timeout=1.0)
-                start_time = time.time()
-                
-                # Distribute to all enabled destinations
-                with self._lock:
-                    active_destinations = {
-                        name: info for name, info in self.destinations.items() 
-                        if info['enabled']
-                    }
-                
-                for name, dest_info in active_destinations.items():
-                    try:
-                        if name in self.destination_handlers:
-                            self.destination_handlers[name](log_batch)
-                            dest_info['last_success'] = datetime.utcnow()
-                            dest_info['success_count'] += 1
-                    except Exception as e:
-                        dest_info['last_error'] = str(e)
-                        dest_info['error_count'] += 1
-                        structured_logger.error(
-                            f"Failed to send logs to destination {name}: {str(e)}",
-                            destination=name,
-                            error=str(e)
-                        )
-                
-                # Update statistics
-                processing_time = (time.time() - start_time) * 1000
-                with self._lock:
-                    self.stats['total_logs_processed'] += log_batch.batch_size
-                    self.stats['total_batches_processed'] += 1
-                    self.stats['last_processed_time'] = datetime.utcnow()
-                    self.stats['processing_latency_ms'] = processing_time
-                
-            except Empty:
-                continue
-            except Exception as e:
-                structured_logger.error(
-                    f"Error in batch processor worker: {str(e)}",
-                    error=str(e)
-                )
-                time.sleep(1)
-    
-    def _batch_distributor_worker(self, destination_name: str) -> None:
-        """Worker thread for distributing batches to specific destination"""
-        # This is a placeholder for more complex distributed processing
-        # In a real implementation, this would handle load balancing and failover
-        pass
-    
-    def _file_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _file_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to file destination"""
         
         file_path = config.get('file_path', 'logs/collector.log')
@@ -428,48 +830,42 @@ class LogCollector:
         
         mode = 'a' if append_mode else 'w'
         
-        with open(file_path, mode) as f:
-            if format_type == 'json':
-                for log_dict in batch.logs:
-                    f.write(json.dumps(log_dict) + '\n')
-            elif format_type == 'line':
-                for log_dict in batch.logs:
-                    f.write(f"{log_dict['timestamp']} [{log_dict['level']}] {log_dict['message']}\n")
+        if format_type == 'json':
+            with open(file_path, mode + 'b') as f:
+                f.write(batch.ndjson())
+            return
+        
+        columns = batch.columns
+        with open(file_path, mode, newline='') as f:
+            if format_type == 'line':
+                f.write("".join(
+                    f"{timestamp.isoformat()} [{level}] {message}\n"
+                    for timestamp, level, message in zip(columns['timestamp'], columns['level'], columns['message'])
+                ))
             elif format_type == 'csv':
+                writer = csv.writer(f)
                 # CSV format - write header once
                 if not append_mode or f.tell() == 0:
-                    import csv
-                    writer = csv.DictWriter(f, fieldnames=log_dict.keys())
-                    writer.writeheader()
-                
-                import csv
-                writer = csv.DictWriter(f, fieldnames=batch.logs[0].keys())
-                writer.writerows(batch.logs)
+                    writer.writerow(LOG_FIELDS)
+                values = [columns[name] for name in LOG_FIELDS]
+                values[0] = [timestamp.isoformat() for timestamp in columns['timestamp']]
+                writer.writerows(zip(*values))
     
-    def _database_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
-        """Handle logs to database destination"""
+    def _database_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
+        """
+        Handle logs to database destination.
+        
+        Rows go in as one Core executemany (no ORM objects), or through COPY
+        when the database is PostgreSQL on psycopg2 and ``use_copy`` is on.
+        """
         
         db: Session = SessionLocal()
         try:
-            log_entries = []
-            for log_dict in batch.logs:
-                log_entry = LogEntry(
-                    timestamp=datetime.fromisoformat(log_dict['timestamp']),
-                    level=log_dict['level'],
-                    category=log_dict['category'],
-                    message=log_dict['message'],
-                    source=log_dict['source'],
-                    data=log_dict.get('data', {}),
-                    correlation_id=log_dict.get('correlation_id'),
-                    user_id=log_dict.get('user_id'),
-                    request_id=log_dict.get('request_id'),
-                    session_id=log_dict.get('session_id'),
-                    tenant_id=log_dict.get('tenant_id'),
-                    tags=log_dict.get('tags', [])
-                )
-                log_entries.append(log_entry)
-            
-            db.add_all(log_entries)
+            table = LogEntry.__table__
+            if config.get('use_copy', True) and db.get_bind().dialect.name == "postgresql":
+                self._copy_log_entries(db, table, batch)
+            else:
+                db.execute(table.insert(), batch.rows())
             db.commit()
             
         except Exception as e:
@@ -478,7 +874,38 @@ class LogCollector:
         finally:
             db.close()
     
-    def _elasticsearch_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _copy_log_entries(self, db: Session, table, batch: ColumnarLogBatch) -> None:
+        """COPY a batch into log_entries (PostgreSQL text format)"""
+        
+        driver_connection = db.connection().connection.driver_connection
+        cursor = driver_connection.cursor()
+        if not hasattr(cursor, 'copy_expert'):
+            # Not psycopg2; executemany still avoids per-row ORM work
+            cursor.close()
+            db.execute(table.insert(), batch.rows())
+            return
+        
+        columns = batch.columns
+        created_at = batch.timestamp.isoformat()
+        fields = [
+            [str(uuid.uuid4()) for _ in range(batch.batch_size)],
+            [timestamp.isoformat() for timestamp in columns['timestamp']],
+        ]
+        for name in LOG_FIELDS[1:]:
+            if name in ('data', 'tags'):
+                fields.append([_copy_json(value) for value in columns[name]])
+            else:
+                fields.append([_copy_text(value) for value in columns[name]])
+        fields.append([created_at] * batch.batch_size)
+        
+        buffer = io.StringIO("".join("\t".join(row) + "\n" for row in zip(*fields)))
+        column_list = ", ".join(('log_id',) + LOG_FIELDS + ('created_at',))
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN", buffer)
+        finally:
+            cursor.close()
+    
+    def _elasticsearch_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to Elasticsearch destination"""
         
         import requests
@@ -486,20 +913,30 @@ class LogCollector:
         es_url = config.get('elasticsearch_url', 'http://localhost:9200')
         index_pattern = config.get('index_pattern', 'fernando-logs-{YYYY.MM.dd}')
         
-        # Prepare bulk request
-        bulk_body = ""
-        for log_dict in batch.logs:
-            # Add index action
-            index_name = index_pattern.replace('{YYYY.MM.dd}', 
-                                             datetime.fromisoformat(log_dict['timestamp']).strftime('%Y.%m.%d'))
-            bulk_body += f'{{"index": {{"_index": "{index_name}", "_id": "{log_dict.get("correlation_id", "")}"}}}}\n'
-            bulk_body += json.dumps(log_dict) + '\n'
+        # Prepare bulk request: one action line per pre-encoded document
+        actions: Dict[Any, bytes] = {}
+        parts = []
+        for timestamp, correlation_id, document in zip(batch.columns['timestamp'],
+                                                       batch.columns['correlation_id'],
+                                                       batch.encoded_rows()):
+            day = timestamp.date()
+            action = actions.get(day)
+            if action is None:
+                action = actions[day] = encode_json(
+                    {'_index': index_pattern.replace('{YYYY.MM.dd}', timestamp.strftime('%Y.%m.%d'))}
+                )
+            if correlation_id:
+                parts.append(b'{"index":' + action[:-1] + b',"_id":' + encode_json(correlation_id) + b'}}')
+            else:
+                parts.append(b'{"index":' + action + b'}')
+            parts.append(document)
+        bulk_body = b"\n".join(parts) + b"\n"
         
         try:
             response = requests.post(
                 f"{es_url}/_bulk",
-                data=bulk_body.encode(),
-                headers={'Content-Type': 'application/json'},
+                data=bulk_body,
+                headers={'Content-Type': 'application/x-ndjson'},
                 timeout=30
             )
             
@@ -514,7 +951,7 @@ class LogCollector:
             )
             raise
     
-    def _kafka_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _kafka_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to Kafka destination"""
         
         try:
@@ -523,13 +960,10 @@ class LogCollector:
             bootstrap_servers = config.get('bootstrap_servers', ['localhost:9092'])
             topic = config.get('topic', 'fernando-logs')
             
-            producer = KafkaProducer(
-                bootstrap_servers=bootstrap_servers,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8')
-            )
+            producer = KafkaProducer(bootstrap_servers=bootstrap_servers)
             
-            for log_dict in batch.logs:
-                producer.send(topic, log_dict)
+            for document in batch.encoded_rows():
+                producer.send(topic, document)
             
             producer.flush()
             
@@ -542,7 +976,7 @@ class LogCollector:
             )
             raise
     
-    def _redis_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _redis_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to Redis destination"""
         
         if not self.redis_client:
@@ -551,40 +985,50 @@ class LogCollector:
         redis_key = config.get('redis_key', 'fernando:logs')
         list_name = config.get('list_name', 'logs')
         
-        # Store logs in Redis list
-        for log_dict in batch.logs:
-            self.redis_client.lpush(
-                f"{redis_key}:{list_name}",
-                json.dumps(log_dict)
-            )
+        # Store logs in Redis list, one round trip per batch
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.lpush(f"{redis_key}:{list_name}", *batch.encoded_rows())
         
         # Set expiration
         if config.get('expire_seconds'):
-            self.redis_client.expire(
+            pipe.expire(
                 f"{redis_key}:{list_name}",
                 config['expire_seconds']
             )
+        pipe.execute()
     
-    def _http_endpoint_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
-        """Handle logs to HTTP endpoint destination"""
+    def _http_endpoint_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
+        """
+        Handle logs to HTTP endpoint destination.
+        
+        ``format`` 'json' (default) posts ``{"batch_id", "timestamp", "logs"}``;
+        'ndjson' posts the records as newline-delimited JSON. Both are assembled
+        from the batch's encoded rows.
+        """
         
         endpoint_url = config.get('url')
         if not endpoint_url:
             raise Exception("HTTP endpoint URL not configured")
         
+        if config.get('format', 'json') == 'ndjson':
+            body = batch.ndjson()
+            content_type = 'application/x-ndjson'
+        else:
+            body = (
+                b'{"batch_id":' + encode_json(batch.batch_id)
+                + b',"timestamp":' + encode_json(batch.timestamp.isoformat())
+                + b',"logs":[' + b",".join(batch.encoded_rows()) + b']}'
+            )
+            content_type = 'application/json'
+        
         # Use asyncio for async HTTP requests
         async def send_http_batch():
             async with aiohttp.ClientSession() as session:
-                payload = {
-                    'batch_id': batch.batch_id,
-                    'timestamp': batch.timestamp.isoformat(),
-                    'logs': batch.logs
-                }
-                
                 try:
                     async with session.post(
                         endpoint_url,
-                        json=payload,
+                        data=body,
+                        headers={'Content-Type': content_type},
                         timeout=aiohttp.ClientTimeout(total=30)
                     ) as response:
                         if response.status >= 400:
@@ -598,7 +1042,6 @@ class LogCollector:
                     raise
         
         # Run async function in executor to avoid blocking
-        import asyncio
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
@@ -606,7 +1049,7 @@ class LogCollector:
         finally:
             loop.close()
     
-    def _cloud_watch_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _cloud_watch_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to AWS CloudWatch"""
         
         try:
@@ -616,12 +1059,13 @@ class LogCollector:
             log_stream = config.get('log_stream', 'default')
             
             # Convert logs to CloudWatch format
-            log_events = []
-            for log_dict in batch.logs:
-                log_events.append({
-                    'timestamp': int(datetime.fromisoformat(log_dict['timestamp']).timestamp() * 1000),
-                    'message': json.dumps(log_dict)
-                })
+            log_events = [
+                {
+                    'timestamp': int(timestamp.timestamp() * 1000),
+                    'message': document.decode('utf-8')
+                }
+                for timestamp, document in zip(batch.columns['timestamp'], batch.encoded_rows())
+            ]
             
             # Send to CloudWatch
             client = boto3.client('logs')
@@ -640,35 +1084,35 @@ class LogCollector:
             )
             raise
     
-    def _grafana_loki_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _grafana_loki_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to Grafana Loki"""
         
         loki_url = config.get('loki_url', 'http://localhost:3100')
         
-        # Convert logs to Loki format
-        streams = {}
-        for log_dict in batch.logs:
-            # Group logs by labels
-            labels = {
-                'level': log_dict['level'],
-                'category': log_dict['category'],
-                'source': log_dict['source']
-            }
-            
-            if log_dict.get('tenant_id'):
-                labels['tenant'] = log_dict['tenant_id']
-            
-            label_str = json.dumps(labels, sort_keys=True)
-            
-            if label_str not in streams:
-                streams[label_str] = {
+        # Convert logs to Loki format, grouping logs by labels
+        columns = batch.columns
+        streams: Dict[tuple, Dict[str, Any]] = {}
+        for timestamp, level, category, source, tenant_id, message in zip(
+                columns['timestamp'], columns['level'], columns['category'],
+                columns['source'], columns['tenant_id'], columns['message']):
+            key = (level, category, source, tenant_id)
+            stream = streams.get(key)
+            if stream is None:
+                labels = {
+                    'level': level,
+                    'category': category,
+                    'source': source
+                }
+                if tenant_id:
+                    labels['tenant'] = tenant_id
+                stream = streams[key] = {
                     'stream': labels,
                     'values': []
                 }
             
-            streams[label_str]['values'].append([
-                str(int(datetime.fromisoformat(log_dict['timestamp']).timestamp() * 1e9)),
-                log_dict['message']
+            stream['values'].append([
+                str(int(timestamp.timestamp() * 1e9)),
+                message
             ])
         
         try:
@@ -676,7 +1120,7 @@ class LogCollector:
             
             response = requests.post(
                 f"{loki_url}/loki/api/v1/push",
-                json={'streams': list(streams.values())},
+                data=encode_json({'streams': list(streams.values())}),
                 headers={'Content-Type': 'application/json'},
                 timeout=30
             )
@@ -691,7 +1135,7 @@ class LogCollector:
             )
             raise
     
-    def _splunk_handler(self, batch: LogBatch, config: Dict[str, Any]) -> None:
+    def _splunk_handler(self, batch: ColumnarLogBatch, config: Dict[str, Any]) -> None:
         """Handle logs to Splunk"""
         
         try:
@@ -708,28 +1152,25 @@ class LogCollector:
                 'Content-Type': 'application/json'
             }
             
-            # Send logs individually (Splunk HTTP Event Collector format)
-            for log_dict in batch.logs:
-                payload = {
-                    'time': datetime.fromisoformat(log_dict['timestamp']).timestamp(),
-                    'host': log_dict.get('source', 'fernando'),
-                    'source': 'fernando-logger',
-                    'sourcetype': 'json',
-                    'event': log_dict
-                }
-                
-                response = requests.post(
-                    f"{splunk_url}/services/collector",
-                    json=payload,
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code != 200:
-                    structured_logger.warning(
-                        f"Splunk send failed for event: {response.status_code}",
-                        event_id=log_dict.get('correlation_id')
-                    )
+            # HTTP Event Collector accepts concatenated events in one request
+            body = b"".join(
+                b'{"time":' + repr(timestamp.timestamp()).encode()
+                + b',"host":' + encode_json(source)
+                + b',"source":"fernando-logger","sourcetype":"json","event":' + document + b'}'
+                for timestamp, source, document in zip(batch.columns['timestamp'],
+                                                       batch.columns['source'],
+                                                       batch.encoded_rows())
+            )
+            
+            response = requests.post(
+                f"{splunk_url}/services/collector",
+                data=body,
+                headers=headers,
+                timeout=10
+            )
+            
+            if response.status_code != 200:
+                raise Exception(f"Splunk send failed: {response.status_code}")
             
         except Exception as e:
             structured_logger.error(
@@ -738,41 +1179,6 @@ class LogCollector:
             )
             raise
     
-    def _process_remaining_logs(self) -> None:
-        """Process any remaining logs in the queue"""
-        
-        remaining_logs = []
-        
-        # Get all remaining logs from queue
-        while not self._log_queue.empty():
-            try:
-                log_event = self._log_queue.get(block=False)
-                remaining_logs.append(log_event)
-            except Empty:
-                break
-        
-        if remaining_logs:
-            # Create final batch
-            final_batch = LogBatch(
-                batch_id=f"final_batch_{int(time.time() * 1000)}",
-                logs=[event.to_dict() for event in remaining_logs],
-                timestamp=datetime.utcnow(),
-                source="collector_shutdown",
-                batch_size=len(remaining_logs)
-            )
-            
-            # Process the final batch
-            try:
-                for name, dest_info in self.destinations.items():
-                    if dest_info['enabled'] and name in self.destination_handlers:
-                        self.destination_handlers[name](final_batch)
-            except Exception as e:
-                structured_logger.error(
-                    f"Error processing final logs: {str(e)}",
-                    error=str(e),
-                    remaining_logs_count=len(remaining_logs)
-                )
-    
     def get_statistics(self) -> Dict[str, Any]:
         """Get log collector statistics"""
         
@@ -790,9 +1196,14 @@ class LogCollector:
                     'error_count': info['error_count'],
                     'success_count': info['success_count']
                 }
+                worker = self._workers.get(name)
+                if worker is not None:
+                    stats['destinations'][name].update(worker.snapshot())
             
-            stats['queue_size'] = self._log_queue.qsize()
-            stats['batch_queue_size'] = self._batch_queue.qsize()
+            stats['queue_size'] = sum(
+                destination.get('queue_size', 0) for destination in stats['destinations'].values()
+            )
+            stats['errors_count'] = sum(info['error_count'] for info in self.destinations.values())
             stats['is_running'] = self._running
             
             return stats
@@ -807,22 +1218,16 @@ class LogCollector:
             'components': {}
         }
         
-        # Check queue health
-        if stats['queue_size'] > (self.buffer_size * 0.9):
-            health_status['overall_status'] = 'warning'
-            health_status['components']['log_queue'] = 'high_usage'
-        else:
-            health_status['components']['log_queue'] = 'healthy'
-        
-        # Check batch queue health
-        if stats['batch_queue_size'] > 1000:
-            health_status['overall_status'] = 'warning'
-            health_status['components']['batch_queue'] = 'high_usage'
-        else:
-            health_status['components']['batch_queue'] = 'healthy'
-        
         # Check destination health
         for name, dest_info in stats['destinations'].items():
+            # Queue pressure
+            if dest_info.get('queue_size', 0) > dest_info.get('queue_capacity', self.buffer_size) * 0.9:
+                health_status['components'][f'queue_{name}'] = 'high_usage'
+                if health_status['overall_status'] == 'healthy':
+                    health_status['overall_status'] = 'warning'
+            else:
+                health_status['components'][f'queue_{name}'] = 'healthy'
+            
             if dest_info['error_count'] > dest_info['success_count']:
                 health_status['components'][f'destination_{name}'] = 'unhealthy'
                 health_status['overall_status'] = 'critical'
@@ -7,8 +7,10 @@ Provides log enrichment, transformation, and analysis capabilities.
 import json
 import re
 import hashlib
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Deque, Dict, Iterable, List, Optional, Callable, Set, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass, field
 import threading
@@ -144,6 +146,151 @@ class ProcessingRule:
             return None
 
 
+class SensitiveDataScanner:
+    """
+    Precompiled scanner for PII and other sensitive values in log text.
+    
+    Patterns are compiled once. ``contains`` searches a single alternation of
+    the requested kinds (cached per kind set), and ``kinds_in`` only falls
+    back to per-kind searches when that alternation hits. ``mask`` runs
+    precompiled substitutions, which CPython's ``re`` does faster one by one
+    than as a combined alternation.
+    
+    Every built-in pattern needs an ``@``, four digits in a row or a
+    digit-dot-digit, so text without any of those (most log messages) is
+    rejected by one cheap search before the alternations run.
+    """
+    
+    PATTERNS = {
+        'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        'credit_card': r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+        'ssn': r'\b\d{3}[- ]?\d{2}[- ]?\d{4}\b',
+        'phone': r'\b\d{10,15}\b',
+        'ip_address': r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
+    }
+    
+    PII_KINDS = ('email', 'ssn', 'phone')
+    
+    # Every match of PATTERNS contains a match of this
+    CANDIDATES = r'@|\d(?:\d{3}|\.\d)'
+    
+    CACHE_SIZE = 256
+    
+    def __init__(self, patterns: Optional[Dict[str, str]] = None):
+        self._sources = dict(patterns or self.PATTERNS)
+        self._compiled = {kind: re.compile(pattern) for kind, pattern in self._sources.items()}
+        self._candidates = re.compile(self.CANDIDATES) if patterns is None else None
+        self._combined: Dict[Tuple[str, ...], Optional[re.Pattern]] = {}
+        self._maskers: Dict[tuple, List[Tuple[re.Pattern, str, bool]]] = {}
+    
+    def _kinds_pattern(self, kinds: Tuple[str, ...]) -> Optional[re.Pattern]:
+        """One alternation of ``kinds``; None if their patterns cannot be combined"""
+        if kinds not in self._combined:
+            if len(self._combined) >= self.CACHE_SIZE:
+                self._combined.clear()
+            try:
+                self._combined[kinds] = re.compile("|".join(f"(?:{self._sources[kind]})" for kind in kinds))
+            except re.error:
+                # e.g. numbered backreferences in custom patterns
+                self._combined[kinds] = None
+        return self._combined[kinds]
+    
+    def contains(self, text: str, kinds: Iterable[str] = PII_KINDS) -> bool:
+        """Whether any of ``kinds`` occurs in ``text``"""
+        if self._candidates is not None and not self._candidates.search(text):
+            return False
+        kinds = tuple(kinds)
+        combined = self._kinds_pattern(kinds)
+        if combined is not None:
+            return combined.search(text) is not None
+        return any(self._compiled[kind].search(text) for kind in kinds)
+    
+    def kinds_in(self, text: str) -> Set[str]:
+        """All known kinds occurring in ``text``; one pass when there are none"""
+        if not self.contains(text, self._sources):
+            return set()
+        return {kind for kind, pattern in self._compiled.items() if pattern.search(text)}
+    
+    def mask(self, text: str, replacements: Dict[str, str],
+             custom_patterns: Optional[Dict[str, str]] = None) -> str:
+        """
+        Replace each of the ``replacements`` kinds with its placeholder.
+        
+        ``custom_patterns`` maps names to (uncompiled) patterns whose
+        placeholder is also given in ``replacements``; a custom pattern takes
+        precedence over a built-in kind of the same name. Substitutions run in
+        the order of ``replacements``; built-in kinds are skipped outright when
+        the text has no candidates.
+        """
+        custom_patterns = custom_patterns or {}
+        key = (tuple(replacements.items()), tuple(sorted(custom_patterns.items())))
+        steps = self._maskers.get(key)
+        if steps is None:
+            if len(self._maskers) >= self.CACHE_SIZE:
+                self._maskers.clear()
+            steps = self._maskers[key] = [
+                (re.compile(custom_patterns[name]), placeholder, False) if name in custom_patterns
+                else (self._compiled[name], placeholder, True)
+                for name, placeholder in replacements.items()
+            ]
+        
+        skip_builtin = self._candidates is not None and not self._candidates.search(text)
+        for pattern, placeholder, builtin in steps:
+            if not (builtin and skip_builtin):
+                text = pattern.sub(placeholder, text)
+        return text
+
+
+sensitive_data_scanner = SensitiveDataScanner()
+
+
+class DeduplicationWindow:
+    """
+    Size-capped, time-bucketed set of recently seen event keys.
+    
+    Keys are 64-bit hashes grouped into buckets of ``window_seconds / buckets``
+    seconds; whole buckets expire at once, so a key counts as seen for between
+    ``window_seconds`` minus one bucket and ``window_seconds`` after it was
+    first recorded. When more than ``max_entries`` keys are held the oldest
+    buckets are dropped early, so memory stays flat on noisy sources.
+    """
+    
+    def __init__(self, window_seconds: float, max_entries: int = 100000, buckets: int = 10):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.bucket_seconds = max(window_seconds / buckets, 0.001)
+        self.bucket_count = buckets
+        self._buckets: Deque[Tuple[int, Set[int]]] = deque()
+        self._size = 0
+        self.evicted = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def seen(self, key: int, now: Optional[float] = None) -> bool:
+        """True if ``key`` was recorded within the window, otherwise record it"""
+        current = int((time.time() if now is None else now) // self.bucket_seconds)
+        buckets = self._buckets
+        
+        while buckets and buckets[0][0] <= current - self.bucket_count:
+            self._size -= len(buckets.popleft()[1])
+        
+        for _, keys in buckets:
+            if key in keys:
+                return True
+        
+        if not buckets or buckets[-1][0] != current:
+            buckets.append((current, set()))
+        buckets[-1][1].add(key)
+        self._size += 1
+        
+        while self._size > self.max_entries and len(buckets) > 1:
+            dropped = len(buckets.popleft()[1])
+            self._size -= dropped
+            self.evicted += dropped
+        return False
+
+
 class LogProcessor:
     """Enterprise log processing system with enrichment and transformation"""
     
@@ -151,7 +298,8 @@ class LogProcessor:
                  max_enrichment_workers: int = 10,
                  max_transformation_workers: int = 5,
                  geoip_db_path: Optional[str] = None,
-                 threat_intel_api_key: Optional[str] = None):
+                 threat_intel_api_key: Optional[str] = None,
+                 max_deduplication_entries: int = 100000):
         
         self.processing_rules: Dict[str, ProcessingRule] = {}
         
@@ -180,6 +328,11 @@ class LogProcessor:
         self._threat_intel_cache = {}
         self._user_context_cache = {}
         
+        # Recently seen events per deduplication window length
+        self.max_deduplication_entries = max_deduplication_entries
+        self._deduplication_windows: Dict[float, DeduplicationWindow] = {}
+        self.scanner = sensitive_data_scanner
+        
         # Statistics
         self.stats = {
             'total_logs_processed': 0,
@@ -418,11 +571,7 @@ class LogProcessor:
         
         # Anonymize IP addresses in message if configured
         if transform.get('anonymize_ips', True):
-            log_event.message = re.sub(
-                r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
-                '[ANON_IP]',
-                log_event.message
-            )
+            log_event.message = self.scanner.mask(log_event.message, {'ip_address': '[ANON_IP]'})
         
         return log_event
     
@@ -430,36 +579,18 @@ class LogProcessor:
         """Apply sensitive data masking"""
         
         sensitive_patterns = transform.get('patterns', {})
+        if not sensitive_patterns:
+            return log_event
         
-        for pattern_name, pattern in sensitive_patterns.items():
-            if pattern_name == 'credit_card':
-                # Mask credit card numbers
-                log_event.message = re.sub(
-                    r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
-                    '[CREDIT_CARD_MASKED]',
-                    log_event.message
-                )
-            elif pattern_name == 'ssn':
-                # Mask SSN numbers
-                log_event.message = re.sub(
-                    r'\b\d{3}[- ]?\d{2}[- ]?\d{4}\b',
-                    '[SSN_MASKED]',
-                    log_event.message
-                )
-            elif pattern_name == 'email':
-                # Mask email addresses
-                log_event.message = re.sub(
-                    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-                    '[EMAIL_MASKED]',
-                    log_event.message
-                )
-            else:
-                # Custom pattern
-                log_event.message = re.sub(
-                    pattern,
-                    '[SENSITIVE_DATA_MASKED]',
-                    log_event.message
-                )
+        # Credit cards, SSNs and emails use the built-in patterns; anything else is a custom pattern
+        builtin = {'credit_card': '[CREDIT_CARD_MASKED]', 'ssn': '[SSN_MASKED]', 'email': '[EMAIL_MASKED]'}
+        replacements = {
+            name: builtin.get(name, '[SENSITIVE_DATA_MASKED]') for name in sensitive_patterns
+        }
+        custom_patterns = {
+            name: pattern for name, pattern in sensitive_patterns.items() if name not in builtin
+        }
+        log_event.message = self.scanner.mask(log_event.message, replacements, custom_patterns)
         
         return log_event
     
@@ -502,24 +633,21 @@ class LogProcessor:
     async def _apply_deduplicate_transform(self, log_event: LogEvent, transform: Dict[str, Any]) -> LogEvent:
         """Apply deduplication transformation"""
         
-        # Simple hash-based deduplication within time window
-        hash_input = f"{log_event.message}{log_event.source.value}{log_event.level.value}"
-        event_hash = hashlib.sha256(hash_input.encode()).hexdigest()
-        
         time_window = transform.get('time_window_seconds', 300)  # 5 minutes default
         
+        window = self._deduplication_windows.get(time_window)
+        if window is None:
+            window = self._deduplication_windows[time_window] = DeduplicationWindow(
+                time_window, max_entries=self.max_deduplication_entries
+            )
+        
+        # In-process only, so the built-in (non-cryptographic) hash is enough
+        event_hash = hash((log_event.message, log_event.source.value, log_event.level.value))
+        
         # Check if similar event recently occurred
-        cache_key = f"{log_event.source.value}:{event_hash}"
-        if cache_key in self._deduplication_cache:
-            last_seen = self._deduplication_cache[cache_key]
-            if (datetime.utcnow() - last_seen).total_seconds() < time_window:
-                # Mark as duplicate
-                log_event._is_duplicate = True
-            else:
-                # Update cache
-                self._deduplication_cache[cache_key] = datetime.utcnow()
-        else:
-            self._deduplication_cache[cache_key] = datetime.utcnow()
+        if window.seen(event_hash):
+            # Mark as duplicate
+            log_event._is_duplicate = True
         
         return log_event
     
@@ -715,12 +843,14 @@ class LogProcessor:
         # Add compliance tags based on log content
         compliance_tags = []
         
+        found = self.scanner.kinds_in(log_event.message)
+        
         # Check for PII
-        if self._contains_pii(log_event.message):
+        if found.intersection(SensitiveDataScanner.PII_KINDS):
             compliance_tags.append('pii_present')
         
         # Check for financial data
-        if re.search(r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b', log_event.message):
+        if 'credit_card' in found:
             compliance_tags.append('financial_data')
         
         # Check for audit-relevant content
@@ -736,17 +866,7 @@ class LogProcessor:
     def _contains_pii(self, text: str) -> bool:
         """Check if text contains personally identifiable information"""
         
-        pii_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # Email
-            r'\b\d{3}[- ]?\d{2}[- ]?\d{4}\b',  # SSN
-            r'\b\d{10,15}\b',  # Phone number
-        ]
-        
-        for pattern in pii_patterns:
-            if re.search(pattern, text):
-                return True
-        
-        return False
+        return self.scanner.contains(text, SensitiveDataScanner.PII_KINDS)
     
     def _get_nested_field(self, data: Dict[str, Any], field_path: str) -> Any:
         """Get nested field value from dictionary using dot notation"""
@@ -875,6 +995,8 @@ class LogProcessor:
                 'geolocation_cache_size': len(self._geolocation_cache),
                 'threat_intel_cache_size': len(self._threat_intel_cache),
                 'user_context_cache_size': len(self._user_context_cache),
+                'deduplication_cache_size': sum(len(window) for window in self._deduplication_windows.values()),
+                'deduplication_evictions': sum(window.evicted for window in self._deduplication_windows.values()),
                 'cache_hit_rate': (self.stats['cache_hits'] / (self.stats['cache_hits'] + self.stats['cache_misses']) * 100) if (self.stats['cache_hits'] + self.stats['cache_misses']) > 0 else 0
             }
             
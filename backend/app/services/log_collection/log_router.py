@@ -8,7 +8,7 @@ import json
 import re
 import threading
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Dict, Iterable, List, Optional, Callable, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass, field
 from functools import lru_cache
@@ -86,9 +86,10 @@ class RoutingRule:
     
     def _matches_severity(self, log_event: LogEvent) -> bool:
         """Check severity-based rule"""
-        
+        return self._severity_allows(log_event.level.value)
+    
+    def _severity_allows(self, log_severity: str) -> bool:
         allowed_severities = self.conditions.get('severities', [])
-        log_severity = log_event.level.value
         
         if not allowed_severities:
             return False
@@ -103,9 +104,10 @@ class RoutingRule:
     
     def _matches_source(self, log_event: LogEvent) -> bool:
         """Check source-based rule"""
-        
+        return self._source_allows(log_event.source.value)
+    
+    def _source_allows(self, log_source: str) -> bool:
         allowed_sources = self.conditions.get('sources', [])
-        log_source = log_event.source.value
         
         if not allowed_sources:
             return False
@@ -123,9 +125,10 @@ class RoutingRule:
     
     def _matches_category(self, log_event: LogEvent) -> bool:
         """Check category-based rule"""
-        
+        return self._category_allows(log_event.category)
+    
+    def _category_allows(self, log_category: str) -> bool:
         allowed_categories = self.conditions.get('categories', [])
-        log_category = log_event.category
         
         if not allowed_categories:
             return False
@@ -219,25 +222,8 @@ class RoutingRule:
             return False
         
         try:
-            # Create safe execution environment
-            safe_globals = {
-                '__builtins__': {
-                    'len': len,
-                    'str': str,
-                    'int': int,
-                    'float': float,
-                    'bool': bool,
-                    're': re,
-                    'datetime': datetime,
-                    'timedelta': timedelta,
-                    'log_event': log_event.to_dict()
-                },
-                'log_event': log_event.to_dict()
-            }
-            
             # Execute script safely
-            result = eval(script, safe_globals)
-            return bool(result)
+            return _eval_script(script, log_event.to_dict())
             
         except Exception as e:
             structured_logger.error(
@@ -284,6 +270,273 @@ class RoutingRule:
         return datetime.utcnow() > expiry_time
 
 
+def _eval_script(script: Any, event_dict: Dict[str, Any]) -> bool:
+    """Evaluate a custom-script rule (source or compiled code) in a restricted environment"""
+    safe_globals = {
+        '__builtins__': {
+            'len': len,
+            'str': str,
+            'int': int,
+            'float': float,
+            'bool': bool,
+            're': re,
+            'datetime': datetime,
+            'timedelta': timedelta,
+            'log_event': event_dict
+        },
+        'log_event': event_dict
+    }
+    return bool(eval(script, safe_globals))
+
+
+_NUMBERED_GROUP_REF = re.compile(r'\\[1-9]|\(\?\(\d')
+
+
+def _rule_error(rule: RoutingRule, error: Exception) -> None:
+    structured_logger.error(
+        f"Error evaluating routing rule {rule.rule_id}: {str(error)}",
+        rule_id=rule.rule_id,
+        rule_type=rule.rule_type.value,
+        error=str(error)
+    )
+
+
+class CompiledRuleSet:
+    """
+    Routing rules compiled into a discrimination network.
+    
+    Severity and source rules are resolved into per-value tables up front
+    (both fields are enums); category rules are resolved once per distinct
+    category. Their combined, priority-ordered result is memoized per
+    (level, source, category), so these rules cost one dict lookup per event
+    however many there are. Content, correlation and custom-script rules
+    depend on free-form fields and are evaluated per event from precompiled
+    patterns and code, with all content rules' message patterns joined into
+    one case-insensitive alternation: an event it does not match skips every
+    rule that requires a message pattern.
+    
+    Rules' ``enabled`` flag is read at match time; any other change to a
+    rule needs a recompile (``LogRouter`` does this on add/update/remove).
+    """
+    
+    MEMO_SIZE = 4096
+    
+    def __init__(self, rules: Iterable[RoutingRule]):
+        ordered = sorted(rules, key=lambda r: r.priority, reverse=True)
+        self._order = {id(rule): position for position, rule in enumerate(ordered)}
+        
+        self._by_level: Dict[str, List[RoutingRule]] = {level.value: [] for level in LogSeverity}
+        self._by_source: Dict[str, List[RoutingRule]] = {source.value: [] for source in LogSource}
+        self._category_rules: List[RoutingRule] = []
+        self._category_memo: Dict[str, List[RoutingRule]] = {}
+        self._static_memo: Dict[Tuple[str, str, str], Tuple[RoutingRule, ...]] = {}
+        
+        # (rule, predicate) pairs evaluated per event
+        self._message_rules: List[Tuple[RoutingRule, Callable[[LogEvent], bool]]] = []
+        self._other_rules: List[Tuple[RoutingRule, Callable[[LogEvent], bool]]] = []
+        self._script_rules: List[Tuple[RoutingRule, Any]] = []
+        message_patterns: List[str] = []
+        
+        for rule in ordered:
+            if rule.rule_type == RuleType.SEVERITY_BASED:
+                self._add_to_table(rule, self._by_level, rule._severity_allows)
+            elif rule.rule_type == RuleType.SOURCE_BASED:
+                self._add_to_table(rule, self._by_source, rule._source_allows)
+            elif rule.rule_type == RuleType.CATEGORY_BASED:
+                self._category_rules.append(rule)
+            elif rule.rule_type == RuleType.CONTENT_BASED:
+                patterns = self._compile_content(rule)
+                if patterns is None:
+                    continue
+                if patterns:
+                    message_patterns.extend(patterns)
+                    self._message_rules.append((rule, self._content_predicate(rule)))
+                else:
+                    self._other_rules.append((rule, self._content_predicate(rule)))
+            elif rule.rule_type == RuleType.CORRELATION_BASED:
+                self._other_rules.append((rule, self._correlation_predicate(rule)))
+            elif rule.rule_type == RuleType.CUSTOM_SCRIPT:
+                script = rule.conditions.get('script')
+                if not script:
+                    continue
+                try:
+                    self._script_rules.append((rule, compile(script, f"<routing rule {rule.rule_id}>", 'eval')))
+                except SyntaxError as e:
+                    _rule_error(rule, e)
+        
+        self._message_gate = None
+        # Group numbers shift once patterns are joined, so numbered references would change meaning
+        if message_patterns and not any(_NUMBERED_GROUP_REF.search(pattern) for pattern in message_patterns):
+            try:
+                self._message_gate = re.compile(
+                    "|".join(f"(?:{pattern})" for pattern in dict.fromkeys(message_patterns)), re.IGNORECASE
+                )
+            except re.error:
+                # Patterns that cannot be combined (e.g. one group name in two patterns): no gate
+                self._message_gate = None
+    
+    @staticmethod
+    def _add_to_table(rule: RoutingRule, table: Dict[str, List[RoutingRule]],
+                      allows: Callable[[str], bool]) -> None:
+        try:
+            for value, rules in table.items():
+                if allows(value):
+                    rules.append(rule)
+        except Exception as e:
+            _rule_error(rule, e)
+    
+    def _compile_content(self, rule: RoutingRule) -> Optional[List[str]]:
+        """Validate a content rule's patterns; returns its message patterns, None if unusable"""
+        conditions = rule.conditions
+        try:
+            patterns = list(conditions.get('message', {}).get('patterns', []))
+            for pattern in patterns:
+                re.compile(pattern, re.IGNORECASE)
+            for field_conditions in conditions.get('data', {}).values():
+                if field_conditions.get('pattern'):
+                    re.compile(field_conditions['pattern'], re.IGNORECASE)
+            return patterns
+        except (re.error, AttributeError, TypeError) as e:
+            _rule_error(rule, e)
+            return None
+    
+    @staticmethod
+    def _content_predicate(rule: RoutingRule) -> Callable[[LogEvent], bool]:
+        conditions = rule.conditions
+        message_patterns = [
+            re.compile(pattern, re.IGNORECASE) for pattern in conditions.get('message', {}).get('patterns', [])
+        ]
+        data_checks = []
+        for field_path, field_conditions in conditions.get('data', {}).items():
+            pattern = field_conditions.get('pattern')
+            data_checks.append((
+                field_path,
+                re.compile(pattern, re.IGNORECASE) if pattern else None,
+                field_conditions.get('equals'),
+                field_conditions.get('in')
+            ))
+        get_field = rule._get_nested_field
+        
+        def predicate(log_event: LogEvent) -> bool:
+            message = log_event.message
+            for pattern in message_patterns:
+                if not pattern.search(message):
+                    return False
+            for field_path, pattern, equals, one_of in data_checks:
+                field_value = get_field(log_event.data, field_path)
+                if pattern is not None and not pattern.search(str(field_value)):
+                    return False
+                if equals is not None and field_value != equals:
+                    return False
+                if one_of is not None and field_value not in one_of:
+                    return False
+            return True
+        
+        return predicate
+    
+    @staticmethod
+    def _correlation_predicate(rule: RoutingRule) -> Callable[[LogEvent], bool]:
+        checks = []
+        try:
+            for condition, attribute in (('correlation_id_patterns', 'correlation_id'),
+                                         ('tenant_patterns', 'tenant_id'),
+                                         ('user_patterns', 'user_id')):
+                if condition in rule.conditions:
+                    checks.append((attribute, [re.compile(pattern) for pattern in rule.conditions[condition]]))
+        except (re.error, TypeError) as e:
+            # Patterns only apply to events that carry the field, so an unusable one must not
+            # reject the rule outright: fall back to the uncompiled check, which fails when it
+            # reaches the pattern
+            _rule_error(rule, e)
+            return rule._matches_correlation
+        
+        def predicate(log_event: LogEvent) -> bool:
+            for attribute, patterns in checks:
+                value = getattr(log_event, attribute)
+                if value:
+                    for pattern in patterns:
+                        if not pattern.match(value):
+                            return False
+            return True
+        
+        return predicate
+    
+    def _static_matches(self, key: Tuple[str, str, str]) -> Tuple[RoutingRule, ...]:
+        level, source, category = key
+        category_rules = self._category_memo.get(category)
+        if category_rules is None:
+            category_rules = []
+            for rule in self._category_rules:
+                try:
+                    if rule._category_allows(category):
+                        category_rules.append(rule)
+                except Exception as e:
+                    _rule_error(rule, e)
+            if len(self._category_memo) >= self.MEMO_SIZE:
+                self._category_memo.clear()
+            self._category_memo[category] = category_rules
+        
+        order = self._order
+        matched = tuple(sorted(
+            self._by_level.get(level, []) + self._by_source.get(source, []) + category_rules,
+            key=lambda rule: order[id(rule)]
+        ))
+        if len(self._static_memo) >= self.MEMO_SIZE:
+            self._static_memo.clear()
+        self._static_memo[key] = matched
+        return matched
+    
+    def match(self, log_event: LogEvent) -> List[RoutingRule]:
+        """Enabled rules matching the event, highest priority first"""
+        
+        key = (log_event.level.value, log_event.source.value, log_event.category)
+        static = self._static_memo.get(key)
+        if static is None:
+            static = self._static_matches(key)
+        matched = [rule for rule in static if rule.enabled]
+        
+        dynamic = []
+        if self._message_rules and (self._message_gate is None or self._message_gate.search(log_event.message)):
+            self._evaluate(self._message_rules, log_event, dynamic)
+        if self._other_rules:
+            self._evaluate(self._other_rules, log_event, dynamic)
+        if self._script_rules:
+            event_dict = None
+            for rule, code in self._script_rules:
+                if not rule.enabled:
+                    continue
+                if event_dict is None:
+                    event_dict = log_event.to_dict()
+                try:
+                    if _eval_script(code, event_dict):
+                        dynamic.append(rule)
+                except Exception as e:
+                    structured_logger.error(
+                        f"Error executing custom script for rule {rule.rule_id}: {str(e)}",
+                        rule_id=rule.rule_id,
+                        script=rule.conditions.get('script'),
+                        error=str(e)
+                    )
+        
+        if dynamic:
+            order = self._order
+            matched.extend(dynamic)
+            matched.sort(key=lambda rule: order[id(rule)])
+        return matched
+    
+    @staticmethod
+    def _evaluate(rules: List[Tuple[RoutingRule, Callable[[LogEvent], bool]]],
+                  log_event: LogEvent, matched: List[RoutingRule]) -> None:
+        for rule, predicate in rules:
+            if not rule.enabled:
+                continue
+            try:
+                if predicate(log_event):
+                    matched.append(rule)
+            except Exception as e:
+                _rule_error(rule, e)
+
+
 class LogRouter:
     """Enterprise log routing system with dynamic rules and load balancing"""
     
@@ -295,6 +548,9 @@ class LogRouter:
         self._round_robin_state = {}
         self._lock = threading.Lock()
         
+        # Rules compiled for matching; rebuilt on first use after any rule change
+        self._compiled: Optional[CompiledRuleSet] = None
+        
         # Statistics
         self.stats = {
             'total_logs_routed': 0,
@@ -344,6 +600,7 @@ class LogRouter:
         """Add routing rule"""
         
         self.rules[rule.rule_id] = rule
+        self._compiled = None
         
         structured_logger.info(
             f"Added routing rule: {rule.name}",
@@ -358,6 +615,7 @@ class LogRouter:
         if rule_id in self.rules:
             rule = self.rules[rule_id]
             del self.rules[rule_id]
+            self._compiled = None
             
             structured_logger.info(
                 f"Removed routing rule: {rule.name}",
@@ -376,6 +634,7 @@ class LogRouter:
         for key, value in updates.items():
             if hasattr(rule, key):
                 setattr(rule, key, value)
+        self._compiled = None
         
         structured_logger.info(
             f"Updated routing rule: {rule.name}",
@@ -385,6 +644,19 @@ class LogRouter:
         
         return True
     
+    def recompile_rules(self) -> None:
+        """Rebuild the matching network, e.g. after editing a rule's conditions in place"""
+        self._compiled = None
+    
+    def _compiled_rules(self) -> CompiledRuleSet:
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled = CompiledRuleSet(list(self.rules.values()))
+                compiled = self._compiled
+        return compiled
+    
     def route_log(self, log_event: LogEvent) -> List[str]:
         """Route log event to appropriate destinations"""
         
@@ -396,7 +668,9 @@ class LogRouter:
             
             if not matching_rules:
                 # No rules matched - use default routing
-                return self._route_to_default_destinations(log_event)
+                successful_destinations = self._route_to_default_destinations(log_event)
+                self._update_routing_stats(start_time, 0, successful_destinations)
+                return successful_destinations
             
             # Apply routing strategy
             destinations = self._apply_routing_strategy(matching_rules, log_event)
@@ -419,42 +693,41 @@ class LogRouter:
                 self.stats['routing_errors'] += 1
             return []
     
-    def batch_route_logs(self, log_events: List[LogEvent]) -> Dict[str, List[str]]:
-        """Route multiple log events efficiently"""
+    def batch_route_logs(self, log_events: List[LogEvent]) -> Dict[int, List[str]]:
+        """Route multiple log events efficiently; results are keyed by position in ``log_events``"""
         
         results = {}
-        grouped_events = {}
-        
-        # Group events by routing requirements
-        for log_event in log_events:
-            matching_rules = self._get_matching_rules(log_event)
-            
-            if not matching_rules:
-                routing_key = "default"
-            else:
-                # Create routing key based on matched rules
-                rule_ids = [rule.rule_id for rule in matching_rules]
-                routing_key = ":".join(sorted(rule_ids))
+        grouped_events: Dict[Tuple[str, ...], List[int]] = {}
+        matched_by_key: Dict[Tuple[str, ...], List[RoutingRule]] = {}
+        compiled = self._compiled_rules()
+        total_matches = 0
+        
+        # Group events by the (priority ordered) rules they match
+        for index, log_event in enumerate(log_events):
+            matching_rules = compiled.match(log_event)
+            total_matches += len(matching_rules)
+            for rule in matching_rules:
+                rule.update_match_count()
             
+            routing_key = tuple(rule.rule_id for rule in matching_rules)
             if routing_key not in grouped_events:
                 grouped_events[routing_key] = []
-            grouped_events[routing_key].append(log_event)
+                matched_by_key[routing_key] = matching_rules
+            grouped_events[routing_key].append(index)
         
         # Process grouped events
-        for routing_key, events in grouped_events.items():
-            if routing_key == "default":
+        for routing_key, indexes in grouped_events.items():
+            if not routing_key:
                 destinations = list(self.destinations.keys())
-                for event in events:
-                    results[event] = self._send_to_destinations(event, destinations)
             else:
-                # Process with specific routing
-                rule_ids = routing_key.split(":")
-                matching_rules = [self.rules[rule_id] for rule_id in rule_ids if rule_id in self.rules]
-                
-                destinations = self._apply_routing_strategy(matching_rules, events[0])
-                
-                for event in events:
-                    results[event] = self._send_to_destinations(event, destinations)
+                destinations = self._apply_routing_strategy(matched_by_key[routing_key], log_events[indexes[0]])
+            
+            for index in indexes:
+                results[index] = self._send_to_destinations(log_events[index], destinations)
+        
+        with self._lock:
+            self.stats['rule_evaluations'] += len(log_events)
+            self.stats['rule_matches'] += total_matches
         
         return results
     
@@ -536,19 +809,11 @@ class LogRouter:
     def _get_matching_rules(self, log_event: LogEvent) -> List[RoutingRule]:
         """Get rules that match the log event"""
         
-        matching_rules = []
-        
-        for rule in self.rules.values():
-            if rule.matches(log_event):
-                rule.update_match_count()
-                matching_rules.append(rule)
-        
-        # Sort by priority (higher priority first)
-        matching_rules.sort(key=lambda r: r.priority, reverse=True)
+        # Already sorted by priority (higher priority first)
+        matching_rules = self._compiled_rules().match(log_event)
         
-        with self._lock:
-            self.stats['rule_evaluations'] += 1
-            self.stats['rule_matches'] += len(matching_rules)
+        for rule in matching_rules:
+            rule.update_match_count()
         
         return matching_rules
     
@@ -658,13 +923,15 @@ class LogRouter:
         all_destinations = list(self.destinations.keys())
         return self._send_to_destinations(log_event, all_destinations)
     
-    def _update_routing_stats(self, start_time: datetime, matches_count: int, destinations_count: int) -> None:
+    def _update_routing_stats(self, start_time: datetime, matches_count: int, destinations: List[str]) -> None:
         """Update routing statistics"""
         
         routing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
         
         with self._lock:
             self.stats['total_logs_routed'] += 1
+            self.stats['rule_evaluations'] += 1
+            self.stats['rule_matches'] += matches_count
             self.stats['last_route_time'] = datetime.utcnow()
             
             # Update average routing time
@@ -717,6 +984,7 @@ class LogRouter:
             priority=80
         )
         self.rules[audit_rule.rule_id] = audit_rule
+        self._compiled = None
     
     def health_check(self) -> Dict[str, Any]:
         """Perform health check on log router"""
@@ -2,16 +2,28 @@
 Audit Logger Implementation
 
 Provides comprehensive audit trail logging for enterprise compliance and regulatory requirements.
+
+Audit events are appended to the hash chain by a single writer thread
+(``AuditChainWriter``) that keeps the chain head in memory and commits queued
+events in group batches. Every ``checkpoint_interval`` entries it persists an
+``AuditCheckpoint`` with the Merkle root of the range's chain hashes, so
+integrity verification can resume after the last verified checkpoint instead
+of rescanning the whole trail.
 """
 
+import atexit
 import json
 import hashlib
+import queue
 import secrets
+import threading
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from enum import Enum
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.logging import AuditLog, AuditEvent, AuditTrail, ComplianceLog
+from app.models.logging import AuditLog, AuditEvent, AuditTrail, AuditCheckpoint, ComplianceLog
 from app.models.user import User
 from app.db.session import SessionLocal
 from .structured_logger import structured_logger, LogCategory
@@ -56,13 +68,291 @@ class AuditOutcome(Enum):
     UNKNOWN = "unknown"
 
 
+def chain_hash(event_hash: str, previous_hash: Optional[str]) -> str:
+    """Chain hash of an audit trail entry given the previous entry's chain hash"""
+    chain_data = f"{event_hash}{previous_hash}" if previous_hash else event_hash
+    return hashlib.sha256(chain_data.encode()).hexdigest()
+
+
+def merkle_root(chain_hashes: List[str]) -> str:
+    """
+    Merkle root over chain hashes, in chain order.
+    
+    Leaves and inner nodes are domain-separated (0x00 / 0x01 prefix); an
+    unpaired node is promoted to the next level unchanged.
+    """
+    level = [hashlib.sha256(b"\x00" + (h or "").encode()).digest() for h in chain_hashes]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        paired = [
+            hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+class AuditChainWriter:
+    """
+    Single writer for the audit trail hash chain.
+    
+    Events are queued by ``submit`` and appended by one background thread:
+    each pass takes everything queued (up to ``batch_size``), chains it onto
+    the in-memory head and commits the events, trail entries, compliance logs
+    and any due checkpoints in one transaction. ``AuditTrail.sequence`` is
+    unique, so a concurrent writer in another process makes the commit fail
+    instead of forking the chain; the head is then reloaded and the batch
+    re-chained.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self,
+                 batch_size: int = 200,
+                 checkpoint_interval: int = 1000,
+                 max_queue_size: int = 10000,
+                 max_conflict_retries: int = 5):
+        self.batch_size = batch_size
+        self.checkpoint_interval = checkpoint_interval
+        self.max_conflict_retries = max_conflict_retries
+        self.structured_logger = structured_logger.with_context(category="audit")
+        
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._done = threading.Condition()
+        self._submitted = 0
+        self._processed = 0
+        
+        # Writer-thread state: (sequence, chain_hash) of the chain head and
+        # the chain hashes appended since the last checkpoint
+        self._head: Optional[Tuple[int, Optional[str]]] = None
+        self._pending_leaves: List[str] = []
+        
+        self.stats = {
+            'events_written': 0,
+            'events_failed': 0,
+            'events_dropped': 0,
+            'batches_committed': 0,
+            'checkpoints_written': 0,
+            'chain_conflicts': 0,
+        }
+    
+    def submit(self, audit_data: Dict[str, Any], add_rows: Callable[[Dict[str, Any], Session], None]) -> bool:
+        """
+        Queue an event for appending without blocking.
+        
+        ``add_rows`` adds the event's own rows (AuditEvent, ComplianceLog) to
+        the batch session; the writer adds the trail entry. Callers run on the
+        event loop, so a full queue drops the event (counted in
+        ``events_dropped`` and logged) and returns False instead of waiting.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((audit_data, add_rows))
+        except queue.Full:
+            self.stats['events_dropped'] += 1
+            self.structured_logger.error(
+                "Audit writer queue full, dropping audit event",
+                audit_event_id=audit_data['audit_event_id'],
+                queue_size=self._queue.maxsize
+            )
+            return False
+        with self._done:
+            self._submitted += 1
+        return True
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every event submitted so far is committed (or failed)"""
+        with self._done:
+            target = self._submitted
+            return self._done.wait_for(lambda: self._processed >= target, timeout)
+    
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Drain the queue and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(self._STOP)
+        thread.join(timeout)
+    
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-chain-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+    
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                self._write_batch(batch)
+            finally:
+                with self._done:
+                    self._processed += len(batch)
+                    self._done.notify_all()
+    
+    def _load_head(self, db: Session) -> None:
+        """Read the chain head and the entries since the last checkpoint"""
+        last = (
+            db.query(AuditTrail.sequence, AuditTrail.chain_hash)
+            .filter(AuditTrail.sequence.isnot(None))
+            .order_by(AuditTrail.sequence.desc())
+            .first()
+        )
+        if last:
+            self._head = (last.sequence, last.chain_hash)
+        else:
+            # Continue an unsequenced (legacy) chain from its latest entry
+            legacy = db.query(AuditTrail.chain_hash).order_by(AuditTrail.created_at.desc()).first()
+            self._head = (0, legacy.chain_hash if legacy else None)
+        
+        checkpoint = (
+            db.query(AuditCheckpoint.last_sequence)
+            .order_by(AuditCheckpoint.last_sequence.desc())
+            .first()
+        )
+        self._pending_leaves = [
+            row.chain_hash for row in
+            db.query(AuditTrail.chain_hash)
+            .filter(AuditTrail.sequence > (checkpoint.last_sequence if checkpoint else 0))
+            .order_by(AuditTrail.sequence)
+        ]
+    
+    def _write_batch(self, batch: List[Tuple[Dict[str, Any], Callable]]) -> None:
+        """
+        Append one batch; if it fails, append its events one at a time.
+        
+        Only events that fail on their own are dropped (and logged), so one
+        bad event cannot take unrelated events in its batch down with it.
+        """
+        error, conflict = self._append(batch)
+        if error is None:
+            return
+        if len(batch) > 1 and not conflict:
+            for item in batch:
+                self._write_batch([item])
+            return
+        
+        self.stats['events_failed'] += len(batch)
+        self.structured_logger.error(
+            f"Failed to store audit events: {str(error)}",
+            error=str(error),
+            audit_event_ids=[audit_data['audit_event_id'] for audit_data, _ in batch]
+        )
+    
+    @staticmethod
+    def _is_chain_conflict(error: IntegrityError) -> bool:
+        """True if the violated constraint is a chain position (another writer appended first)"""
+        return "sequence" in str(error.orig)
+    
+    def _append(self, batch: List[Tuple[Dict[str, Any], Callable]]) -> Tuple[Optional[Exception], bool]:
+        """
+        Chain and commit ``batch`` in a single transaction.
+        
+        Returns ``(None, False)`` on success, otherwise the error and whether
+        it was a chain conflict that persisted through every retry.
+        """
+        for attempt in range(self.max_conflict_retries + 1):
+            db: Session = SessionLocal()
+            try:
+                if self._head is None:
+                    self._load_head(db)
+                sequence, head_hash = self._head
+                leaves = list(self._pending_leaves)
+                checkpoints = 0
+                now = datetime.utcnow()
+                
+                for audit_data, add_rows in batch:
+                    sequence += 1
+                    entry_hash = chain_hash(audit_data['event_hash'], head_hash)
+                    add_rows(audit_data, db)
+                    db.add(AuditTrail(
+                        audit_event_id=audit_data['audit_event_id'],
+                        sequence=sequence,
+                        previous_hash=head_hash,
+                        chain_hash=entry_hash,
+                        created_at=now,
+                        compliance_metadata={
+                            'regulation_standards': audit_data.get('compliance_tags', []),
+                            'retention_period': audit_data.get('compliance_retention_period'),
+                        }
+                    ))
+                    head_hash = entry_hash
+                    
+                    leaves.append(entry_hash)
+                    if len(leaves) >= self.checkpoint_interval:
+                        db.add(AuditCheckpoint(
+                            first_sequence=sequence - len(leaves) + 1,
+                            last_sequence=sequence,
+                            entry_count=len(leaves),
+                            merkle_root=merkle_root(leaves),
+                            chain_hash=entry_hash,
+                            created_at=now
+                        ))
+                        checkpoints += 1
+                        leaves = []
+                
+                db.commit()
+                
+                self._head = (sequence, head_hash)
+                self._pending_leaves = leaves
+                self.stats['events_written'] += len(batch)
+                self.stats['batches_committed'] += 1
+                self.stats['checkpoints_written'] += checkpoints
+                return None, False
+            
+            except IntegrityError as e:
+                db.rollback()
+                self._head = None
+                if not self._is_chain_conflict(e):
+                    return e, False
+                # Another writer appended first: reload the head and re-chain
+                self.stats['chain_conflicts'] += 1
+                last_error = e
+            except Exception as e:
+                db.rollback()
+                self._head = None
+                return e, False
+            finally:
+                db.close()
+        
+        return last_error, True
+
+
+# Shared by all AuditLogger instances so each process has one chain writer
+audit_chain_writer = AuditChainWriter()
+
+
 class AuditLogger:
     """Enterprise-grade audit logger for comprehensive audit trails"""
     
-    def __init__(self):
+    def __init__(self, chain_writer: Optional[AuditChainWriter] = None):
         self.structured_logger = structured_logger.with_context(
             category="audit"
         )
+        self.chain_writer = chain_writer or audit_chain_writer
     
     def log_audit_event(self, 
                        event_type: AuditEventType,
@@ -301,76 +591,39 @@ class AuditLogger:
         return hashlib.sha256(hash_string.encode()).hexdigest()
     
     def _store_audit_event(self, audit_data: Dict[str, Any]) -> None:
-        """Store audit event in database"""
-        db: Session = SessionLocal()
-        try:
-            # Create AuditEvent record
-            audit_event = AuditEvent(
-                event_id=audit_data['audit_event_id'],
-                event_type=audit_data['event_type'],
-                resource_type=audit_data['resource_type'],
-                resource_id=audit_data['resource_id'],
-                user_id=audit_data['user_id'],
-                outcome=audit_data['outcome'],
-                severity=audit_data['severity'],
-                description=audit_data['description'],
-                details=audit_data['details'],
-                ip_address=audit_data.get('ip_address'),
-                user_agent=audit_data.get('user_agent'),
-                session_id=audit_data.get('session_id'),
-                timestamp=datetime.fromisoformat(audit_data['timestamp'].replace('Z', '+00:00')),
-                event_hash=audit_data['event_hash'],
-                compliance_tags=audit_data['compliance_tags'],
-                retention_period_days=audit_data.get('compliance_retention_period')
-            )
-            
-            db.add(audit_event)
-            
-            # Update audit trail chain
-            self._update_audit_trail(audit_data, db)
-            
-            # Store compliance log if required
-            if audit_data.get('compliance_tags'):
-                self._store_compliance_log(audit_data, db)
-            
-            db.commit()
-            
-        except Exception as e:
-            db.rollback()
-            self.structured_logger.error(
-                f"Failed to store audit event: {str(e)}",
-                error=str(e),
-                audit_event_id=audit_data['audit_event_id']
-            )
-        finally:
-            db.close()
+        """Queue audit event for the chain writer's next group commit"""
+        self.chain_writer.submit(audit_data, self._add_audit_event_rows)
     
-    def _update_audit_trail(self, audit_data: Dict[str, Any], db: Session) -> None:
-        """Update audit trail with chain of custody"""
-        # Get the most recent audit trail entry
-        last_trail = db.query(AuditTrail).order_by(AuditTrail.created_at.desc()).first()
-        
-        trail_entry = AuditTrail(
-            audit_event_id=audit_data['audit_event_id'],
-            previous_hash=last_trail.chain_hash if last_trail else None,
-            chain_hash=None,  # Will be calculated after adding to db
-            created_at=datetime.utcnow(),
-            compliance_metadata={
-                'regulation_standards': audit_data.get('compliance_tags', []),
-                'retention_period': audit_data.get('compliance_retention_period'),
-            }
+    def _add_audit_event_rows(self, audit_data: Dict[str, Any], db: Session) -> None:
+        """Add the event's AuditEvent and compliance rows to the writer's batch session"""
+        audit_event = AuditEvent(
+            event_id=audit_data['audit_event_id'],
+            event_type=audit_data['event_type'],
+            resource_type=audit_data['resource_type'],
+            resource_id=audit_data['resource_id'],
+            user_id=audit_data['user_id'],
+            outcome=audit_data['outcome'],
+            severity=audit_data['severity'],
+            description=audit_data['description'],
+            details=audit_data['details'],
+            ip_address=audit_data.get('ip_address'),
+            user_agent=audit_data.get('user_agent'),
+            session_id=audit_data.get('session_id'),
+            timestamp=datetime.fromisoformat(audit_data['timestamp'].replace('Z', '+00:00')),
+            event_hash=audit_data['event_hash'],
+            compliance_tags=audit_data['compliance_tags'],
+            retention_period_days=audit_data.get('compliance_retention_period')
         )
         
-        # Calculate chain hash
-        if last_trail:
-            chain_data = f"{audit_data['event_hash']}{last_trail.chain_hash}"
-        else:
-            chain_data = audit_data['event_hash']
-        
-        trail_entry.chain_hash = hashlib.sha256(chain_data.encode()).hexdigest()
-        trail_entry.previous_hash = last_trail.chain_hash if last_trail else None
+        db.add(audit_event)
         
-        db.add(trail_entry)
+        # Store compliance log if required
+        if audit_data.get('compliance_tags'):
+            self._store_compliance_log(audit_data, db)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all audit events logged so far are committed"""
+        return self.chain_writer.flush(timeout)
     
     def _store_compliance_log(self, audit_data: Dict[str, Any], db: Session) -> None:
         """Store compliance-specific log entry"""
@@ -391,53 +644,119 @@ class AuditLogger:
         
         db.add(compliance_log)
     
-    def verify_audit_trail_integrity(self) -> Dict[str, Any]:
-        """Verify integrity of audit trail chain"""
+    def verify_audit_trail_integrity(self, full: bool = False, batch_size: int = 1000) -> Dict[str, Any]:
+        """
+        Verify integrity of audit trail chain
+        
+        Streams the trail in chain order with the event hashes joined in, and
+        recomputes every chain hash and every checkpoint's Merkle root on the
+        way. Unless ``full`` is set, verification starts after the last
+        checkpoint a previous run verified. Checkpoints are marked verified
+        only while the chain is valid up to them.
+        """
         db: Session = SessionLocal()
         try:
-            # Get all trail entries ordered by creation time
-            trail_entries = db.query(AuditTrail).order_by(AuditTrail.created_at).all()
+            resume_from = None
+            if not full:
+                resume_from = (
+                    db.query(AuditCheckpoint)
+                    .filter(AuditCheckpoint.verified_at.isnot(None))
+                    .order_by(AuditCheckpoint.last_sequence.desc())
+                    .first()
+                )
             
             integrity_results = {
-                'total_events': len(trail_entries),
+                'total_events': 0,
                 'verified_events': 0,
                 'corrupted_events': 0,
                 'chain_valid': True,
-                'corruption_details': []
+                'corruption_details': [],
+                'resumed_from_sequence': resume_from.last_sequence if resume_from else None,
+                'checkpoints_verified': 0
             }
             
-            previous_hash = None
+            def corrupted(details: Dict[str, Any]) -> None:
+                integrity_results['chain_valid'] = False
+                integrity_results['corrupted_events'] += 1
+                integrity_results['corruption_details'].append(details)
             
-            for trail in trail_entries:
-                # Verify chain hash
-                if previous_hash:
-                    expected_hash = hashlib.sha256(
-                        f"{trail.audit_event.event_hash}{previous_hash}".encode()
-                    ).hexdigest()
-                    
-                    if trail.chain_hash != expected_hash:
-                        integrity_results['chain_valid'] = False
-                        integrity_results['corrupted_events'] += 1
-                        integrity_results['corruption_details'].append({
-                            'event_id': trail.audit_event_id,
+            rows = db.query(
+                AuditTrail.sequence,
+                AuditTrail.audit_event_id,
+                AuditTrail.chain_hash,
+                AuditEvent.event_hash
+            ).outerjoin(AuditEvent, AuditEvent.event_id == AuditTrail.audit_event_id)
+            
+            if resume_from:
+                last_sequence = resume_from.last_sequence
+                previous_hash = resume_from.chain_hash
+                rows = rows.filter(AuditTrail.sequence > last_sequence).order_by(AuditTrail.sequence)
+            else:
+                # Unsequenced legacy entries first, in creation order
+                last_sequence = 0
+                previous_hash = None
+                rows = rows.order_by(
+                    AuditTrail.sequence.isnot(None), AuditTrail.sequence, AuditTrail.created_at
+                )
+            
+            checkpoints = deque(
+                db.query(AuditCheckpoint)
+                .filter(AuditCheckpoint.last_sequence > last_sequence)
+                .order_by(AuditCheckpoint.last_sequence)
+            )
+            leaves: List[str] = []
+            verified_at = datetime.utcnow()
+            
+            for sequence, event_id, trail_hash, event_hash in rows.yield_per(batch_size):
+                integrity_results['total_events'] += 1
+                
+                if not trail_hash:
+                    corrupted({'event_id': event_id, 'corruption_type': 'missing_chain_hash'})
+                elif event_hash is None:
+                    corrupted({'event_id': event_id, 'corruption_type': 'missing_audit_event'})
+                else:
+                    expected_hash = chain_hash(event_hash, previous_hash)
+                    if trail_hash != expected_hash:
+                        corrupted({
+                            'event_id': event_id,
                             'expected_hash': expected_hash,
-                            'actual_hash': trail.chain_hash,
+                            'actual_hash': trail_hash,
                             'corruption_type': 'chain_hash_mismatch'
                         })
                     else:
                         integrity_results['verified_events'] += 1
-                else:
-                    # First entry - verify hash exists
-                    if trail.chain_hash:
-                        integrity_results['verified_events'] += 1
-                    else:
-                        integrity_results['corrupted_events'] += 1
-                        integrity_results['corruption_details'].append({
-                            'event_id': trail.audit_event_id,
-                            'corruption_type': 'missing_chain_hash'
+                
+                if sequence is not None:
+                    if sequence != last_sequence + 1:
+                        corrupted({
+                            'event_id': event_id,
+                            'expected_sequence': last_sequence + 1,
+                            'actual_sequence': sequence,
+                            'corruption_type': 'sequence_gap'
                         })
+                    last_sequence = sequence
+                    leaves.append(trail_hash)
+                    
+                    while checkpoints and checkpoints[0].last_sequence <= sequence:
+                        checkpoint = checkpoints.popleft()
+                        if (checkpoint.last_sequence != sequence
+                                or checkpoint.entry_count != len(leaves)
+                                or checkpoint.chain_hash != trail_hash
+                                or checkpoint.merkle_root != merkle_root(leaves)):
+                            corrupted({
+                                'checkpoint_id': checkpoint.checkpoint_id,
+                                'first_sequence': checkpoint.first_sequence,
+                                'last_sequence': checkpoint.last_sequence,
+                                'corruption_type': 'checkpoint_root_mismatch'
+                            })
+                        elif integrity_results['chain_valid']:
+                            checkpoint.verified_at = verified_at
+                            integrity_results['checkpoints_verified'] += 1
+                        leaves = []
                 
-                previous_hash = trail.chain_hash
+                previous_hash = trail_hash
+            
+            db.commit()
             
             # Log integrity check results
             self.structured_logger.info(
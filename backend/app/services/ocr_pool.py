@@ -0,0 +1,157 @@
+"""
+Page-parallel OCR process pool
+
+Multi-page PDFs and TIFFs are OCR'd one page per task on a bounded
+ProcessPoolExecutor. Each worker process loads PaddleOCR once in its
+initializer and keeps it warm for the life of the pool; workers also render
+their own page, so only the file path and page number cross the process
+boundary and no rendered page is held in the API process.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-process PaddleOCR instance, set by _init_worker
+_worker_engine = None
+_worker_error: Optional[str] = None
+
+
+def _init_worker(lang: str = "pt"):
+    """Load PaddleOCR once per worker process"""
+    global _worker_engine, _worker_error
+    try:
+        from paddleocr import PaddleOCR
+        _worker_engine = PaddleOCR(
+            use_angle_cls=True,
+            lang=lang,
+            use_gpu=False,
+            show_log=False
+        )
+    except Exception as e:
+        _worker_engine = None
+        _worker_error = str(e)
+
+
+def _ping() -> bool:
+    """No-op task used to force worker start-up and model loading"""
+    return _worker_engine is not None
+
+
+def ocr_page(file_path: str, page_number: int, dpi: int) -> Dict[str, Any]:
+    """Render one page and run OCR on it inside a worker process"""
+    if _worker_engine is None:
+        return {"page": page_number, "blocks": [], "error": _worker_error or "PaddleOCR not available"}
+
+    import numpy as np
+    from app.services.document_converter import render_document_page
+
+    image = render_document_page(file_path, page_number, dpi)
+    try:
+        # PaddleOCR expects BGR arrays, like cv2.imread
+        pixels = np.asarray(image.convert("RGB"))[:, :, ::-1]
+    finally:
+        image.close()
+
+    result = _worker_engine.ocr(pixels, cls=True)
+
+    blocks = []
+    for line in (result[0] if result and result[0] else []):
+        blocks.append({
+            "text": line[1][0],
+            "confidence": float(line[1][1]),
+            "bbox": [[float(x), float(y)] for x, y in line[0]],
+            "page": page_number
+        })
+
+    return {"page": page_number, "blocks": blocks}
+
+
+class OCRProcessPool:
+    """Bounded pool of warm PaddleOCR worker processes"""
+
+    def __init__(self, max_workers: int, lang: str = "pt"):
+        self.max_workers = max(1, max_workers)
+        self.lang = lang
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: PaddlePaddle is not fork-safe once its thread pools exist
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.lang,)
+            )
+        return self._executor
+
+    def warm_up(self) -> bool:
+        """Start every worker and load its model ahead of the first request"""
+        futures = [self.executor.submit(_ping) for _ in range(self.max_workers)]
+        return all(f.result() for f in futures)
+
+    def ocr_pages(self, file_path: str, page_count: int, dpi: int) -> List[Dict[str, Any]]:
+        """OCR pages 1..page_count in parallel; results are in page order"""
+        pages = range(1, page_count + 1)
+        return list(self.executor.map(ocr_page, [file_path] * page_count, pages, [dpi] * page_count))
+
+    async def ocr_pages_async(self, file_path: str, page_count: int, dpi: int) -> List[Dict[str, Any]]:
+        """Awaitable variant of ocr_pages that keeps the event loop free"""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self.executor, ocr_page, file_path, page_number, dpi)
+            for page_number in range(1, page_count + 1)
+        ])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def merge_page_results(page_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-page OCR output into one result, preserving page order"""
+    blocks = []
+    page_texts = []
+    errors = []
+
+    for page in sorted(page_results, key=lambda p: p["page"]):
+        if page.get("error"):
+            errors.append({"page": page["page"], "error": page["error"]})
+        blocks.extend(page["blocks"])
+        page_texts.append("\n".join(b["text"] for b in page["blocks"]))
+
+    return {
+        "text": "\n\n".join(page_texts),
+        "blocks": blocks,
+        "confidence": sum(b["confidence"] for b in blocks) / len(blocks) if blocks else 0,
+        "pages_processed": len(page_results),
+        "errors": errors
+    }
+
+
+# Singleton pool
+_ocr_pool: Optional[OCRProcessPool] = None
+
+
+def get_ocr_pool() -> OCRProcessPool:
+    """Get the shared OCR process pool"""
+    global _ocr_pool
+    if _ocr_pool is None:
+        from app.core.config import settings
+        _ocr_pool = OCRProcessPool(max_workers=settings.OCR_PROCESS_POOL_SIZE)
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    """Stop the shared OCR process pool, if it was started"""
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown()
+        _ocr_pool = None
@@ -5,6 +5,8 @@ This service provides production-ready OCR functionality for Portuguese document
 using PaddleOCR or other OCR APIs.
 """
 
+import asyncio
+import logging
 import os
 from typing import Optional, Dict, Any, List
 from pathlib import Path
@@ -17,6 +19,11 @@ from app.middleware.telemetry_decorators import (
     record_business_metric, increment_metric
 )
 from app.services.proxy import get_proxy_client
+from app.core.config import settings
+from app.services.ocr_pool import get_ocr_pool, merge_page_results
+from app.services.http_clients import get_async_client, in_event_loop, run_sync
+
+logger = logging.getLogger(__name__)
 
 
 class OCRService:
@@ -101,7 +108,11 @@ class OCRService:
     @document_telemetry("extract_text")
     def extract_text(self, image_path: str) -> Dict[str, Any]:
         """
-        Extract text from an image file.
+        Extract text from an image file (blocking).
+        
+        Prefer extract_text_async from async code; it keeps CPU-bound and
+        network work off the event loop. The OCR proxy is only tried here when
+        no event loop is running in this thread.
         
         Args:
             image_path: Path to image file
@@ -113,14 +124,15 @@ class OCRService:
             return self._fallback_extraction(image_path)
         
         # Try proxy first for better performance and security
-        try:
-            proxy_result = await self._extract_via_proxy(image_path)
+        if not in_event_loop():
+            proxy_result = run_sync(self._extract_via_proxy(image_path))
             if proxy_result.get("success", True):  # Proxy response has different structure
                 return proxy_result
-        except:
-            # Continue with direct methods if proxy fails
-            pass
         
+        return self._extract_direct(image_path)
+    
+    def _extract_direct(self, image_path: str) -> Dict[str, Any]:
+        """Extract text with the configured backend, without the proxy (blocking)"""
         if self.backend == "paddleocr":
             return self._extract_paddleocr(image_path)
         elif self.backend == "google":
@@ -132,6 +144,113 @@ class OCRService:
         
         return self._fallback_extraction(image_path)
     
+    @document_telemetry("extract_text_async")
+    async def extract_text_async(self, image_path: str) -> Dict[str, Any]:
+        """
+        Extract text from an image file without blocking the event loop.
+        
+        Args:
+            image_path: Path to image file
+            
+        Returns:
+            Dict containing extracted text and metadata
+        """
+        if not self.available:
+            return self._fallback_extraction(image_path)
+        
+        # Try proxy first for better performance and security
+        try:
+            proxy_result = await self._extract_via_proxy(image_path)
+            if proxy_result.get("success", True):  # Proxy response has different structure
+                return proxy_result
+        except Exception:
+            # Continue with direct methods if proxy fails
+            pass
+        
+        if self.backend == "paddleocr":
+            # CPU-bound: run on the warm OCR process pool
+            page_results = await get_ocr_pool().ocr_pages_async(image_path, 1, settings.DEFAULT_DPI)
+            return self._merged_document_result(image_path, page_results)
+        elif self.backend == "azure":
+            return await self._extract_azure_vision_async(image_path)
+        
+        # Blocking vendor SDKs (Google, AWS) run on the default thread pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._extract_direct, image_path)
+    
+    @document_telemetry("process_document")
+    def process_document(self, file_path: str) -> Dict[str, Any]:
+        """
+        OCR a whole document, fanning PDF/TIFF pages out to the OCR process pool.
+        
+        Args:
+            file_path: Path to a PDF, TIFF or image file
+            
+        Returns:
+            Dict with merged text and blocks in page order
+        """
+        page_count = self._ocr_page_count(file_path)
+        if page_count is None:
+            return self._as_document_result(self.extract_text(file_path))
+        
+        page_results = get_ocr_pool().ocr_pages(file_path, page_count, settings.DEFAULT_DPI)
+        return self._merged_document_result(file_path, page_results)
+    
+    @document_telemetry("process_document_async")
+    async def process_document_async(self, file_path: str) -> Dict[str, Any]:
+        """Async variant of process_document; OCR runs off the event loop"""
+        # Counting pages parses the whole document, so it runs on the thread pool too
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(None, self._ocr_page_count, file_path)
+        if page_count is None:
+            return self._as_document_result(await self.extract_text_async(file_path))
+        
+        page_results = await get_ocr_pool().ocr_pages_async(file_path, page_count, settings.DEFAULT_DPI)
+        return self._merged_document_result(file_path, page_results)
+    
+    def _ocr_page_count(self, file_path: str) -> Optional[int]:
+        """Pages to OCR through the pool, or None if the pool does not apply"""
+        if self.backend != "paddleocr" or not self.available:
+            return None
+        
+        from app.services.document_converter import count_document_pages
+        page_count = count_document_pages(file_path)
+        max_pages = settings.MAX_PDF_PAGES if file_path.lower().endswith(".pdf") else settings.MAX_TIFF_PAGES
+        return min(page_count, max_pages)
+    
+    def _merged_document_result(self, file_path: str, page_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = merge_page_results(page_results)
+        if not merged["blocks"] and merged["errors"]:
+            logger.error(f"PaddleOCR pool extraction failed: {merged['errors'][0]['error']}")
+            return self._as_document_result(self._fallback_extraction(file_path))
+        
+        merged.update({
+            "language": "pt",
+            "backend": "paddleocr",
+            "engine": "paddleocr",
+            "version": self._engine_version()
+        })
+        return merged
+    
+    def _as_document_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize single-image results to the process_document shape"""
+        result.setdefault("engine", result.get("backend", self.backend))
+        result.setdefault("version", self._engine_version())
+        result.setdefault("pages_processed", 1)
+        return result
+    
+    @property
+    def cache_version(self) -> str:
+        """Engine identity for content-addressed result caching"""
+        return f"{self.backend}:{self._engine_version()}"
+    
+    def _engine_version(self) -> str:
+        try:
+            import paddleocr
+            return getattr(paddleocr, "__version__", "unknown")
+        except ImportError:
+            return "unknown"
+    
     @document_telemetry("paddleocr_extraction")
     def _extract_paddleocr(self, image_path: str) -> Dict[str, Any]:
         """Extract text using PaddleOCR"""
@@ -233,28 +352,66 @@ class OCRService:
                     break
             
             if analysis["status"] == "succeeded":
-                full_text = []
-                blocks = []
-                for read_result in analysis["analyzeResult"]["readResults"]:
-                    for line in read_result["lines"]:
-                        full_text.append(line["text"])
-                        blocks.append({
-                            "text": line["text"],
-                            "confidence": 1.0,
-                            "bbox": line["boundingBox"]
-                        })
-                
-                return {
-                    "text": "\n".join(full_text),
-                    "blocks": blocks,
-                    "language": "pt",
-                    "confidence": 1.0,
-                    "backend": "azure_vision"
-                }
+                return self._azure_analysis_result(analysis)
         except Exception as e:
             print(f"Azure Vision extraction error: {e}")
             return self._fallback_extraction(image_path)
     
+    @document_telemetry("azure_vision_extraction_async")
+    async def _extract_azure_vision_async(self, image_path: str) -> Dict[str, Any]:
+        """Extract text using Azure Computer Vision over the shared async client"""
+        try:
+            with open(image_path, 'rb') as image_file:
+                image_data = image_file.read()
+            
+            client = get_async_client("azure_vision")
+            headers = {'Ocp-Apim-Subscription-Key': self.api_key}
+            
+            response = await client.post(
+                f"{self.endpoint}/vision/v3.2/read/analyze",
+                headers={**headers, 'Content-Type': 'application/octet-stream'},
+                params={'language': 'pt'},
+                content=image_data
+            )
+            response.raise_for_status()
+            
+            # Poll for results without holding the event loop
+            operation_url = response.headers["Operation-Location"]
+            analysis = {"status": "running"}
+            for _ in range(10):
+                await asyncio.sleep(1)
+                result = await client.get(operation_url, headers=headers)
+                result.raise_for_status()
+                analysis = result.json()
+                if analysis["status"] == "succeeded":
+                    break
+            
+            if analysis["status"] == "succeeded":
+                return self._azure_analysis_result(analysis)
+        except Exception as e:
+            logger.exception(f"Azure Vision extraction error: {e}")
+        return self._fallback_extraction(image_path)
+    
+    def _azure_analysis_result(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        full_text = []
+        blocks = []
+        for read_result in analysis["analyzeResult"]["readResults"]:
+            for line in read_result["lines"]:
+                full_text.append(line["text"])
+                blocks.append({
+                    "text": line["text"],
+                    "confidence": 1.0,
+                    "bbox": line["boundingBox"]
+                })
+        
+        return {
+            "text": "\n".join(full_text),
+            "blocks": blocks,
+            "language": "pt",
+            "confidence": 1.0,
+            "backend": "azure_vision"
+        }
+    
     @document_telemetry("aws_textract_extraction")
     def _extract_aws_textract(self, image_path: str) -> Dict[str, Any]:
         """Extract text using AWS Textract"""
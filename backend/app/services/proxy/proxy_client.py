@@ -15,6 +15,7 @@ import logging
 from .request_builder import RequestBuilder
 from .response_handler import ResponseHandler
 from .auth_handler import AuthHandler
+from app.services.http_clients import get_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -241,35 +242,39 @@ class ProxyClient:
         auth_headers = await self.auth_handler.get_auth_headers(service)
         request_data["headers"].update(auth_headers)
         
-        # Make request with retry logic
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            for attempt in range(self.max_retries):
-                try:
-                    response = await client.request(
-                        method=method,
-                        url=url,
-                        **request_data
-                    )
-                    
-                    # Handle response
-                    result = await self.response_handler.handle_response(
-                        response, service, endpoint
-                    )
-                    
-                    # Record success
-                    self._record_success(service)
-                    
-                    return result
-                    
-                except httpx.TimeoutException as e:
-                    if attempt == self.max_retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                    
-                except httpx.RequestError as e:
-                    if attempt == self.max_retries - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
+        # Only the transport fields are httpx arguments; method/url/metadata are descriptive
+        request_kwargs = {k: request_data[k] for k in ("headers", "json", "params") if k in request_data}
+        
+        # Make request with retry logic over the service's pooled client
+        client = get_async_client(f"proxy:{service}")
+        for attempt in range(self.max_retries):
+            try:
+                response = await client.request(
+                    method=method,
+                    url=url,
+                    timeout=timeout,
+                    **request_kwargs
+                )
+                
+                # Handle response
+                result = await self.response_handler.handle_response(
+                    response, service, endpoint
+                )
+                
+                # Record success
+                self._record_success(service)
+                
+                return result
+                
+            except httpx.TimeoutException as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                
+            except httpx.RequestError as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
     
     async def _fallback_request(
         self,
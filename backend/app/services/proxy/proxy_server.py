@@ -43,7 +43,7 @@ from app.services.proxy.load_balancer import LoadBalancer
 from app.services.proxy.failover_manager import FailoverManager
 from app.services.proxy.proxy_security import ProxySecurityMiddleware
 from app.services.api_management.api_key_manager import ApiKeyManager
-from app.services.proxy_caching.response_cache import ResponseCache
+from app.services.proxy_caching.response_cache import ResponseCache, CacheResponse
 from app.services.rate_limiting.rate_limiter import RateLimiter
 from app.services.circuit_breaker.circuit_breaker import CircuitBreaker
 from app.services.proxy_monitoring.request_logger import RequestLogger
@@ -85,6 +85,15 @@ class ProxyResponse:
     metadata: Dict[str, Any] = None
 
 
+class BufferResponse(StarletteResponse):
+    """Response whose body may be any bytes-like buffer, sent without copying."""
+
+    def render(self, content: Any) -> Union[bytes, memoryview]:
+        if isinstance(content, (bytes, memoryview)):
+            return content
+        return super().render(content)
+
+
 class ProxyServer:
     """
     Centralized proxy server with comprehensive features.
@@ -639,14 +648,14 @@ class ProxyServer:
             headers=headers
         )
     
-    async def _create_cached_response(self, cached_response: ProxyResponse) -> Response:
+    async def _create_cached_response(self, cached_response: CacheResponse) -> Response:
         """Create response from cached data."""
         
         headers = cached_response.headers.copy()
         headers["X-Cache"] = "HIT"
-        headers["X-Cache-Key"] = cached_response.metadata.get("cache_key", "")
+        headers["X-Cache-Key"] = cached_response.cache_key
         
-        return Response(
+        return BufferResponse(
             content=cached_response.content,
             status_code=cached_response.status_code,
             headers=headers
@@ -17,10 +17,12 @@ Features:
 """
 
 import asyncio
+import fnmatch
+import logging
 import time
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set, Callable
+from typing import Dict, Iterator, List, Optional, Any, Set, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from collections import defaultdict, deque
@@ -62,13 +64,14 @@ class InvalidationRule:
     # Trigger conditions
     trigger_type: InvalidationType
     trigger_pattern: str
-    trigger_tags: List[str] = field(default_factory=list)
-    trigger_events: List[str] = field(default_factory=list)
     
     # Invalidation scope
     scope: InvalidationScope
     scope_pattern: str = "*"
     
+    trigger_tags: List[str] = field(default_factory=list)
+    trigger_events: List[str] = field(default_factory=list)
+    
     # Timing
     delay_seconds: int = 0
     batch_size: int = 100
@@ -125,6 +128,103 @@ class InvalidationResult:
     time_based_expired: int = 0
 
 
+class _TrieNode:
+    __slots__ = ("children", "keys")
+    
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.keys: Set[str] = set()
+
+
+class CacheKeyTrie:
+    """
+    Prefix trie over ':'-separated cache key segments.
+    
+    Glob lookups walk the literal prefix of the pattern (everything before
+    the first wildcard) and only test keys below that node, so a pattern
+    like ``proxy:cache:ocr:*`` costs the size of the matching subtree rather
+    than the number of tracked keys.
+    """
+    
+    WILDCARDS = "*?["
+    
+    def __init__(self, separator: str = ":"):
+        self.separator = separator
+        self.root = _TrieNode()
+        self.size = 0
+    
+    def insert(self, key: str):
+        node = self.root
+        for segment in key.split(self.separator):
+            node = node.children.setdefault(segment, _TrieNode())
+        if key not in node.keys:
+            node.keys.add(key)
+            self.size += 1
+    
+    def remove(self, key: str) -> bool:
+        path = [self.root]
+        segments = key.split(self.separator)
+        for segment in segments:
+            child = path[-1].children.get(segment)
+            if child is None:
+                return False
+            path.append(child)
+        
+        if key not in path[-1].keys:
+            return False
+        path[-1].keys.discard(key)
+        self.size -= 1
+        
+        # Prune now-empty branches
+        for depth in range(len(segments), 0, -1):
+            node = path[depth]
+            if node.keys or node.children:
+                break
+            del path[depth - 1].children[segments[depth - 1]]
+        return True
+    
+    def match(self, pattern: str) -> List[str]:
+        """Keys matching a glob pattern (fnmatch semantics, case-sensitive)"""
+        cut = min((i for i in (pattern.find(c) for c in self.WILDCARDS) if i >= 0), default=-1)
+        if cut < 0:
+            return [pattern] if self._contains(pattern) else []
+        
+        prefix = pattern[:cut]
+        *full_segments, partial = prefix.split(self.separator)
+        
+        node = self.root
+        for segment in full_segments:
+            node = node.children.get(segment)
+            if node is None:
+                return []
+        
+        candidates: List[str] = list(node.keys)
+        for segment, child in node.children.items():
+            if segment.startswith(partial):
+                candidates.extend(self._iter_keys(child))
+        
+        return [key for key in candidates if key.startswith(prefix) and fnmatch.fnmatchcase(key, pattern)]
+    
+    def _contains(self, key: str) -> bool:
+        node = self.root
+        for segment in key.split(self.separator):
+            node = node.children.get(segment)
+            if node is None:
+                return False
+        return key in node.keys
+    
+    @staticmethod
+    def _iter_keys(node: _TrieNode) -> Iterator[str]:
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield from current.keys
+            stack.extend(current.children.values())
+    
+    def __len__(self) -> int:
+        return self.size
+
+
 class CacheInvalidationManager:
     """
     Smart cache invalidation manager.
@@ -140,6 +240,7 @@ class CacheInvalidationManager:
     def __init__(self, response_cache: ResponseCache):
         """Initialize cache invalidation manager."""
         self.response_cache = response_cache
+        response_cache.invalidation_manager = self  # cache writes register here
         self.invalidation_rules: Dict[str, InvalidationRule] = {}
         self.event_listeners: Dict[str, List[Callable]] = defaultdict(list)
         
@@ -164,7 +265,14 @@ class CacheInvalidationManager:
         # Cache tracking
         self.cache_key_patterns: Dict[str, Set[str]] = defaultdict(set)  # pattern -> keys
         self.cache_key_tags: Dict[str, Set[str]] = defaultdict(set)  # key -> tags
-        self.cache_key_timestamps: Dict[str, datetime] = {}  # key -> creation time
+        self.cache_key_timestamps: Dict[str, datetime] = {}  # key -> creation time (insertion ordered)
+        
+        # Indexes maintained by register/unregister so lookups scale with matches
+        self.key_trie = CacheKeyTrie()  # glob patterns
+        self.tag_index: Dict[str, Set[str]] = defaultdict(set)  # tag -> keys
+        self.endpoint_index: Dict[str, Set[str]] = defaultdict(set)  # endpoint -> keys
+        self.cache_key_endpoints: Dict[str, str] = {}  # key -> endpoint
+        self.cache_key_pattern_names: Dict[str, Set[str]] = defaultdict(set)  # key -> patterns
         
         logger.info("Cache invalidation manager initialized")
     
@@ -438,11 +546,8 @@ class CacheInvalidationManager:
             # Delete from cache
             success = await self.response_cache.cache_service.delete(cache_key, "proxy_cache", None)
             
-            if success:
-                # Remove from tracking
-                self.cache_key_patterns.pop(cache_key, None)
-                self.cache_key_tags.pop(cache_key, None)
-                self.cache_key_timestamps.pop(cache_key, None)
+            # Remove from tracking; a failed delete means the entry is already gone
+            self.unregister_cache_entry(cache_key)
             
             return success
             
@@ -472,32 +577,23 @@ class CacheInvalidationManager:
         return invalidated_keys, failed_keys
     
     async def _find_keys_by_pattern(self, pattern: str) -> List[str]:
-        """Find cache keys matching pattern."""
+        """Find cache keys matching a glob pattern."""
         
-        matched_keys = []
-        
-        for cache_key in self.cache_key_timestamps.keys():
-            if re.match(pattern.replace("*", ".*"), cache_key):
-                matched_keys.append(cache_key)
-        
-        return matched_keys
+        return self.key_trie.match(pattern)
     
     async def _find_keys_by_tags(self, tags: List[str]) -> List[str]:
-        """Find cache keys with specific tags."""
+        """Find cache keys with any of the given tags."""
         
-        matched_keys = []
+        matched_keys: Set[str] = set()
+        for tag in tags:
+            matched_keys.update(self.tag_index.get(tag, ()))
         
-        for cache_key, key_tags in self.cache_key_tags.items():
-            if any(tag in key_tags for tag in tags):
-                matched_keys.append(cache_key)
-        
-        return matched_keys
+        return list(matched_keys)
     
     async def _find_keys_by_endpoint(self, endpoint_id: str) -> List[str]:
         """Find cache keys for specific endpoint."""
         
-        endpoint_pattern = f"*{endpoint_id}*"
-        return await self._find_keys_by_pattern(endpoint_pattern)
+        return list(self.endpoint_index.get(endpoint_id, ()))
     
     async def _find_all_cache_keys(self) -> List[str]:
         """Get all cache keys."""
@@ -531,12 +627,13 @@ class CacheInvalidationManager:
         """Clean up expired cache entries."""
         
         expired_keys = []
-        current_time = datetime.utcnow()
+        cutoff = datetime.utcnow() - timedelta(seconds=3600)  # 1 hour default TTL
         
-        # Find expired keys
+        # Timestamps are kept in registration order, so stop at the first live key
         for cache_key, timestamp in self.cache_key_timestamps.items():
-            if (current_time - timestamp).total_seconds() > 3600:  # 1 hour default TTL
-                expired_keys.append(cache_key)
+            if timestamp > cutoff:
+                break
+            expired_keys.append(cache_key)
         
         # Delete expired keys
         if expired_keys:
@@ -547,26 +644,10 @@ class CacheInvalidationManager:
     async def _cleanup_tracking_data(self):
         """Clean up tracking data for removed cache entries."""
         
-        # This would clean up tracking data for cache entries that no longer exist
-        # For now, just ensure data consistency
-        
-        # Remove patterns that have no corresponding keys
-        patterns_to_remove = []
-        for pattern, keys in self.cache_key_patterns.items():
-            if not any(key in self.cache_key_timestamps for key in keys):
-                patterns_to_remove.append(pattern)
-        
-        for pattern in patterns_to_remove:
-            self.cache_key_patterns.pop(pattern, None)
-        
-        # Remove tags that have no corresponding keys
-        tags_to_remove = []
-        for key, tags in self.cache_key_tags.items():
-            if key not in self.cache_key_timestamps:
-                tags_to_remove.append(key)
-        
-        for key in tags_to_remove:
-            self.cache_key_tags.pop(key, None)
+        # Indexes are maintained on register/unregister; only drop empty buckets
+        for index in (self.cache_key_patterns, self.tag_index, self.endpoint_index):
+            for name in [name for name, keys in index.items() if not keys]:
+                index.pop(name, None)
     
     async def invalidate_by_pattern(
         self,
@@ -574,19 +655,23 @@ class CacheInvalidationManager:
         endpoint_id: Optional[str] = None,
         reason: str = "manual"
     ) -> InvalidationResult:
-        """Manually invalidate cache by pattern."""
+        """
+        Manually invalidate cache by pattern.
+        
+        ``pattern`` is a glob over full cache keys, e.g.
+        ``proxy:cache:ocr:GET:/v1/*``; its literal prefix narrows the trie walk.
+        """
         
         start_time = time.time()
         
         try:
-            # Build full pattern
+            # Find matching keys (endpoint index first, then glob within it)
             if endpoint_id:
-                full_pattern = f"*{endpoint_id}*{pattern}*"
+                matching_keys = await self._find_keys_by_endpoint(endpoint_id)
+                if pattern != "*":
+                    matching_keys = [key for key in matching_keys if fnmatch.fnmatchcase(key, pattern)]
             else:
-                full_pattern = f"*{pattern}*"
-            
-            # Find matching keys
-            matching_keys = await self._find_keys_by_pattern(full_pattern)
+                matching_keys = await self._find_keys_by_pattern(pattern)
             
             # Invalidate keys
             invalidated_keys, failed_keys = await self._invalidate_keys(matching_keys)
@@ -647,8 +732,8 @@ class CacheInvalidationManager:
             
             # Filter by endpoint if specified
             if endpoint_id:
-                endpoint_pattern = f"*{endpoint_id}*"
-                matching_keys = [key for key in matching_keys if re.match(endpoint_pattern.replace("*", ".*"), key)]
+                endpoint_keys = self.endpoint_index.get(endpoint_id, set())
+                matching_keys = [key for key in matching_keys if key in endpoint_keys]
             
             # Invalidate keys
             invalidated_keys, failed_keys = await self._invalidate_keys(matching_keys)
@@ -739,27 +824,58 @@ class CacheInvalidationManager:
         self,
         cache_key: str,
         tags: List[str] = None,
-        pattern: str = None
+        pattern: str = None,
+        endpoint_id: str = None
     ):
         """Register cache entry for tracking."""
         
+        # Re-registering refreshes the entry, so drop its old index entries
+        if cache_key in self.cache_key_timestamps:
+            self.unregister_cache_entry(cache_key)
+        
         self.cache_key_timestamps[cache_key] = datetime.utcnow()
+        self.key_trie.insert(cache_key)
         
         if tags:
             self.cache_key_tags[cache_key] = set(tags)
+            for tag in tags:
+                self.tag_index[tag].add(cache_key)
         
         if pattern:
             self.cache_key_patterns[pattern].add(cache_key)
+            self.cache_key_pattern_names[cache_key].add(pattern)
+        
+        if endpoint_id:
+            self.endpoint_index[endpoint_id].add(cache_key)
+            self.cache_key_endpoints[cache_key] = endpoint_id
     
     def unregister_cache_entry(self, cache_key: str):
         """Unregister cache entry."""
         
         self.cache_key_timestamps.pop(cache_key, None)
-        self.cache_key_tags.pop(cache_key, None)
-        
-        # Remove from pattern tracking
-        for pattern, keys in self.cache_key_patterns.items():
-            keys.discard(cache_key)
+        self.key_trie.remove(cache_key)
+        
+        for tag in self.cache_key_tags.pop(cache_key, ()):
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self.tag_index[tag]
+        
+        for pattern in self.cache_key_pattern_names.pop(cache_key, ()):
+            keys = self.cache_key_patterns.get(pattern)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self.cache_key_patterns[pattern]
+        
+        endpoint_id = self.cache_key_endpoints.pop(cache_key, None)
+        if endpoint_id is not None:
+            keys = self.endpoint_index.get(endpoint_id)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self.endpoint_index[endpoint_id]
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get invalidation statistics."""
@@ -769,6 +885,8 @@ class CacheInvalidationManager:
             "active_rules": len([r for r in self.invalidation_rules.values() if r.is_active]),
             "total_rules": len(self.invalidation_rules),
             "tracked_cache_keys": len(self.cache_key_timestamps),
+            "indexed_tags": len(self.tag_index),
+            "indexed_endpoints": len(self.endpoint_index),
             "rule_breakdown": {
                 rule_id: {
                     "name": rule.name,
@@ -9,7 +9,8 @@ Intelligent response caching with TTL for proxy requests:
 - Cache analytics and monitoring
 
 Features:
-- Request/response caching with compression
+- Request/response caching with pluggable compression codecs (zstd with
+  per-endpoint trained dictionaries when available, zlib otherwise)
 - Intelligent cache key generation
 - TTL-based expiration with refresh strategies
 - Cache warming and preloading
@@ -18,9 +19,11 @@ Features:
 """
 
 import asyncio
+import logging
 import time
 import hashlib
 import json
+import struct
 import zlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Union
@@ -33,6 +36,15 @@ from app.services.telemetry.event_tracker import event_tracker, EventCategory, E
 
 logger = logging.getLogger(__name__)
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Stored entry layout: 4-byte big-endian header length | JSON header | body
+_ENVELOPE_HEADER = struct.Struct(">I")
+
 
 class CacheStrategy(Enum):
     """Cache strategies."""
@@ -88,7 +100,7 @@ class CacheResponse:
     """Cached response data."""
     status_code: int
     headers: Dict[str, str]
-    content: Union[bytes, str]
+    content: Union[bytes, str, memoryview]
     content_type: str
     cached_at: datetime
     expires_at: datetime
@@ -96,6 +108,8 @@ class CacheResponse:
     cache_tier: CacheTier
     compression_ratio: float = 1.0
     size_bytes: int = 0
+    codec: str = "none"
+    cache_key: str = ""
 
 
 class CacheKeyGenerator:
@@ -127,7 +141,7 @@ class CacheKeyGenerator:
         # Add TTL and priority
         cache_key = CacheKey(
             key=f"{self.namespace_prefix}{readable_key}",
-            hash_key=f"{self.namespace_prefix}h:{key_hash}",
+            hash_key=f"{self.namespace_prefix}{readable_key}:h:{key_hash}",
             namespace=cache_request.endpoint_id,
             created_at=datetime.utcnow(),
             ttl_seconds=cache_request.ttl_seconds,
@@ -172,46 +186,193 @@ class CacheKeyGenerator:
         return f"{self.namespace_prefix}pattern:{endpoint_id}:{pattern}"
 
 
+class CacheCodec:
+    """Identity codec; stored bodies are returned without copying."""
+
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def decompress(self, data: Union[bytes, memoryview]) -> Union[bytes, memoryview]:
+        return data
+
+
+class ZlibCodec(CacheCodec):
+    """zlib (deflate) codec, always available."""
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: Union[bytes, memoryview]) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(CacheCodec):
+    """Zstandard codec, optionally bound to a trained dictionary."""
+
+    def __init__(self, level: int = 3, dictionary: Optional["zstandard.ZstdCompressionDict"] = None):
+        self.level = level
+        self.dictionary = dictionary
+        self.name = f"zstd:d{dictionary.dict_id()}" if dictionary is not None else "zstd"
+        # Compressor/decompressor objects are not safe for concurrent use, but the
+        # event loop calls them from one thread at a time
+        self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def decompress(self, data: Union[bytes, memoryview]) -> bytes:
+        return self._decompressor.decompress(data)
+
+
 class CacheCompression:
-    """Handles compression and decompression of cached content."""
-    
+    """
+    Chooses and applies the codec for each cached body.
+
+    Every stored entry records the tag of the codec that produced it, so
+    reads never guess. Content that is small or already compressed (images,
+    archives, upstream ``Content-Encoding``) is stored as-is. When zstandard
+    is installed, bodies from each endpoint are sampled and, once enough
+    samples exist, a dictionary is trained for that endpoint; small JSON
+    responses that share structure compress far better against it.
+    """
+
+    PRECOMPRESSED_TYPES = (
+        "image/", "video/", "audio/",
+        "application/zip", "application/gzip", "application/x-gzip",
+        "application/zstd", "application/pdf", "font/woff2"
+    )
+
     def __init__(self):
         self.compression_threshold = 1024  # 1KB
-        self.compression_algorithms = ["gzip", "deflate"]
-    
-    def compress_content(self, content: Union[bytes, str]) -> Tuple[bytes, float]:
-        """Compress content if beneficial."""
-        
+        self.min_saving = 0.1  # keep compressed output only if it saves 10%
+
+        # Dictionary training (zstd only)
+        self.dictionary_enabled = ZSTD_AVAILABLE
+        self.dictionary_size = 16 * 1024
+        self.dictionary_samples = 64
+        self.dictionary_sample_max_bytes = 64 * 1024
+
+        self.identity = CacheCodec()
+        self.default_codec: CacheCodec = ZstdCodec() if ZSTD_AVAILABLE else ZlibCodec()
+        self.codecs: Dict[str, CacheCodec] = {
+            self.identity.name: self.identity,
+            "zlib": ZlibCodec(),
+        }
+        self.codecs[self.default_codec.name] = self.default_codec
+
+        self.endpoint_codecs: Dict[str, CacheCodec] = {}
+        self._samples: Dict[str, List[bytes]] = {}
+
+    @property
+    def compression_algorithms(self) -> List[str]:
+        return sorted(self.codecs)
+
+    def _is_precompressed(self, content_type: str, content_encoding: str) -> bool:
+        if content_encoding and content_encoding.lower() != "identity":
+            return True
+        base_type = content_type.split(";")[0].strip().lower()
+        return base_type.startswith(self.PRECOMPRESSED_TYPES)
+
+    def codec_for(self, endpoint_id: Optional[str]) -> CacheCodec:
+        """Codec used for new entries of an endpoint."""
+        if endpoint_id is not None and endpoint_id in self.endpoint_codecs:
+            return self.endpoint_codecs[endpoint_id]
+        return self.default_codec
+
+    def compress_content(
+        self,
+        content: Union[bytes, str],
+        endpoint_id: Optional[str] = None,
+        content_type: str = "",
+        content_encoding: str = ""
+    ) -> Tuple[bytes, str, float]:
+        """Compress content if beneficial; returns (body, codec tag, ratio)."""
+
         # Convert to bytes if string
         if isinstance(content, str):
             content = content.encode('utf-8')
-        
+
         content_size = len(content)
-        
-        # Don't compress if too small
-        if content_size < self.compression_threshold:
-            return content, 1.0
-        
-        # Try compression
-        compressed_data = zlib.compress(content, level=6)
+
+        # Fast path: small or already-compressed bodies are stored verbatim
+        if content_size < self.compression_threshold or self._is_precompressed(content_type, content_encoding):
+            return content, self.identity.name, 1.0
+
+        codec = self.codec_for(endpoint_id)
+        compressed_data = codec.compress(content)
         compression_ratio = len(compressed_data) / content_size
-        
-        # Only use compression if it saves at least 10%
-        if compression_ratio < 0.9:
-            return compressed_data, compression_ratio
-        else:
-            return content, 1.0
-    
-    def decompress_content(self, content: bytes, original_size: int) -> bytes:
-        """Decompress content."""
-        
+
+        if compression_ratio < 1.0 - self.min_saving:
+            return compressed_data, codec.name, compression_ratio
+        return content, self.identity.name, 1.0
+
+    def decompress_content(self, content: Union[bytes, memoryview], codec_tag: str) -> Union[bytes, memoryview]:
+        """Decompress content written with ``codec_tag``."""
+        codec = self.codecs.get(codec_tag)
+        if codec is None:
+            raise ValueError(f"Unknown cache codec: {codec_tag}")
+        return codec.decompress(content)
+
+    def has_codec(self, codec_tag: str) -> bool:
+        return codec_tag in self.codecs
+
+    # Dictionary training
+
+    def add_sample(self, endpoint_id: str, content: bytes) -> bool:
+        """
+        Record a body for dictionary training.
+
+        Returns True once the endpoint has enough samples to train.
+        """
+        if not self.dictionary_enabled or endpoint_id in self.endpoint_codecs:
+            return False
+        samples = self._samples.setdefault(endpoint_id, [])
+        if len(samples) < self.dictionary_samples:
+            samples.append(bytes(content[:self.dictionary_sample_max_bytes]))
+        return len(samples) >= self.dictionary_samples
+
+    def take_samples(self, endpoint_id: str) -> List[bytes]:
+        """Remove and return the endpoint's training samples."""
+        return self._samples.pop(endpoint_id, [])
+
+    def train_dictionary(self, samples: List[bytes]) -> Optional[bytes]:
+        """
+        Train a zstd dictionary from samples (CPU-bound).
+
+        Touches no shared state, so it can run in a worker thread. Returns
+        the serialized dictionary, or None if training failed.
+        """
+        if not self.dictionary_enabled or not samples:
+            return None
         try:
-            # Try to decompress
-            decompressed = zlib.decompress(content)
-            return decompressed
-        except zlib.error:
-            # If decompression fails, assume it's not compressed
-            return content
+            return zstandard.train_dictionary(self.dictionary_size, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            # Too little distinct data
+            logger.debug(f"Dictionary training skipped: {e}")
+            return None
+
+    def use_default_codec(self, endpoint_id: str):
+        """Stop sampling an endpoint whose dictionary could not be trained."""
+        self.endpoint_codecs[endpoint_id] = self.default_codec
+
+    def register_dictionary(self, dictionary_data: bytes, endpoint_id: Optional[str] = None) -> str:
+        """Make a serialized dictionary available for decoding (and encoding for ``endpoint_id``)."""
+        dictionary = zstandard.ZstdCompressionDict(dictionary_data)
+        codec = self.codecs.get(f"zstd:d{dictionary.dict_id()}")
+        if codec is None:
+            codec = ZstdCodec(dictionary=dictionary)
+            self.codecs[codec.name] = codec
+        if endpoint_id is not None:
+            self.endpoint_codecs[endpoint_id] = codec
+        return codec.name
 
 
 class CacheInvalidation:
@@ -319,12 +480,15 @@ class ResponseCache:
         self.key_generator = CacheKeyGenerator()
         self.compression = CacheCompression()
         self.invalidation = CacheInvalidation(cache_service)
+        self.invalidation_manager = None  # set by CacheInvalidationManager
+        self._training_tasks: Dict[str, asyncio.Task] = {}
         
         # Cache configuration
         self.config = {
             "default_ttl": 300,  # 5 minutes
             "max_cache_size": 100 * 1024 * 1024,  # 100MB
             "compression_enabled": True,
+            "dictionary_ttl": 7 * 24 * 3600,  # trained dictionaries outlive the entries using them
             "cache_warming_enabled": True,
             "analytics_enabled": True
         }
@@ -392,7 +556,7 @@ class ResponseCache:
             cache_key = self.key_generator.generate_cache_key(cache_request)
             
             # Get from cache
-            cached_data = await self.cache_service.get(cache_key.hash_key, "proxy_cache", None)
+            cached_data = await self.cache_service.get_raw(cache_key.hash_key, "proxy_cache", None)
             
             if cached_data is None:
                 # Cache miss
@@ -411,17 +575,16 @@ class ResponseCache:
                 
                 return None
             
-            # Cache hit - deserialize response
+            # Cache hit - decode envelope; the body stays a view over the stored payload
             try:
-                response_data = cached_data
+                response_data, body = self._decode_entry(cached_data)
+                codec_tag = response_data.get("codec", "none")
                 
-                # Decompress if needed
-                if response_data.get("compressed", False):
-                    content = self.compression.decompress_content(
-                        response_data["content"], response_data["original_size"]
-                    )
-                else:
-                    content = response_data["content"]
+                if not self.compression.has_codec(codec_tag):
+                    await self._load_dictionary(codec_tag)
+                content = self.compression.decompress_content(body, codec_tag)
+                if not isinstance(content, memoryview):
+                    content = memoryview(content)
                 
                 cache_response = CacheResponse(
                     status_code=response_data["status_code"],
@@ -433,7 +596,9 @@ class ResponseCache:
                     cache_hit=True,
                     cache_tier=CacheTier.MEMORY,  # Currently using memory cache
                     compression_ratio=response_data.get("compression_ratio", 1.0),
-                    size_bytes=response_data.get("size_bytes", 0)
+                    size_bytes=response_data.get("original_size", len(content)),
+                    codec=codec_tag,
+                    cache_key=cache_key.hash_key
                 )
                 
                 # Update statistics
@@ -509,32 +674,41 @@ class ResponseCache:
             cache_key = self.key_generator.generate_cache_key(cache_request)
             
             # Prepare response data for caching
+            content = proxy_response.content
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            
             response_data = {
                 "status_code": proxy_response.status_code,
                 "headers": dict(proxy_response.headers),
-                "content": proxy_response.content,
                 "content_type": content_type,
                 "cached_at": datetime.utcnow().isoformat(),
                 "expires_at": (datetime.utcnow() + timedelta(seconds=cache_key.ttl_seconds)).isoformat(),
-                "original_size": len(proxy_response.content) if isinstance(proxy_response.content, bytes) else 0,
+                "original_size": len(content),
                 "compression_ratio": 1.0,
-                "compressed": False
+                "codec": "none"
             }
             
             # Compress content if beneficial
+            body = content
             if self.config["compression_enabled"]:
-                compressed_content, compression_ratio = self.compression.compress_content(proxy_response.content)
+                body, codec_tag, compression_ratio = self.compression.compress_content(
+                    content,
+                    endpoint.id,
+                    content_type,
+                    proxy_response.headers.get("content-encoding", "")
+                )
+                response_data["codec"] = codec_tag
+                response_data["compression_ratio"] = compression_ratio
                 
-                if compression_ratio < 1.0:  # Compression saved space
-                    response_data["content"] = compressed_content
-                    response_data["compression_ratio"] = compression_ratio
-                    response_data["compressed"] = True
-                    response_data["original_size"] = len(proxy_response.content)
+                if codec_tag != "none" and self.compression.add_sample(endpoint.id, content):
+                    self._schedule_dictionary_training(endpoint.id)
             
             # Store in cache
-            success = await self.cache_service.set(
+            entry = self._encode_entry(response_data, body)
+            success = await self.cache_service.set_raw(
                 cache_key.hash_key,
-                response_data,
+                entry,
                 "proxy_cache",
                 None,
                 cache_key.ttl_seconds
@@ -543,7 +717,14 @@ class ResponseCache:
             if success:
                 # Update statistics
                 self.stats["cache_sets"] += 1
-                self.stats["total_size_bytes"] += len(str(response_data))
+                self.stats["total_size_bytes"] += len(entry)
+                
+                if self.invalidation_manager is not None:
+                    self.invalidation_manager.register_cache_entry(
+                        cache_key.hash_key,
+                        tags=getattr(endpoint, "tags", None),
+                        endpoint_id=endpoint.id
+                    )
                 
                 # Log cache set
                 event_tracker.track_performance_event(
@@ -553,7 +734,7 @@ class ResponseCache:
                         "endpoint_id": endpoint.id,
                         "path": proxy_request.path,
                         "ttl_seconds": cache_key.ttl_seconds,
-                        "compressed": response_data["compressed"],
+                        "codec": response_data["codec"],
                         "size_bytes": response_data.get("original_size", 0)
                     }
                 )
@@ -567,6 +748,55 @@ class ResponseCache:
             logger.error(f"Cache set operation failed: {e}")
             return False
     
+    @staticmethod
+    def _encode_entry(response_data: Dict[str, Any], body: bytes) -> bytes:
+        """Pack header metadata and body into one stored value."""
+        header = json.dumps(response_data, separators=(",", ":"), default=str).encode()
+        return b"".join((_ENVELOPE_HEADER.pack(len(header)), header, body))
+    
+    @staticmethod
+    def _decode_entry(payload: bytes) -> Tuple[Dict[str, Any], memoryview]:
+        """Split a stored value into header metadata and a body view (no body copy)."""
+        view = memoryview(payload)
+        (header_length,) = _ENVELOPE_HEADER.unpack_from(view)
+        header_end = _ENVELOPE_HEADER.size + header_length
+        response_data = json.loads(bytes(view[_ENVELOPE_HEADER.size:header_end]))
+        return response_data, view[header_end:]
+    
+    def _schedule_dictionary_training(self, endpoint_id: str):
+        """Train the endpoint's dictionary off the event loop."""
+        if endpoint_id in self._training_tasks:
+            return
+        task = asyncio.create_task(self._train_dictionary(endpoint_id))
+        self._training_tasks[endpoint_id] = task
+        task.add_done_callback(lambda _: self._training_tasks.pop(endpoint_id, None))
+    
+    async def _train_dictionary(self, endpoint_id: str):
+        try:
+            samples = self.compression.take_samples(endpoint_id)
+            # Only the training runs in the thread; codecs are registered on the loop
+            dictionary_data = await asyncio.to_thread(self.compression.train_dictionary, samples)
+            if dictionary_data is None:
+                # Stay on the default codec for this endpoint
+                self.compression.use_default_codec(endpoint_id)
+                return
+            codec_tag = self.compression.register_dictionary(dictionary_data, endpoint_id)
+            # Other workers need the dictionary to decode entries written with it
+            await self.cache_service.set_raw(
+                codec_tag, dictionary_data, "proxy_dict", None, self.config["dictionary_ttl"]
+            )
+            logger.info(f"Trained cache dictionary {codec_tag} for endpoint {endpoint_id}")
+        except Exception as e:
+            logger.error(f"Cache dictionary training failed for {endpoint_id}: {e}")
+    
+    async def _load_dictionary(self, codec_tag: str):
+        """Fetch a dictionary trained by another worker."""
+        if not (ZSTD_AVAILABLE and codec_tag.startswith("zstd:d")):
+            return
+        dictionary_data = await self.cache_service.get_raw(codec_tag, "proxy_dict", None)
+        if dictionary_data is not None:
+            self.compression.register_dictionary(dictionary_data)
+    
     def _should_cache_content_type(self, content_type: str) -> bool:
         """Determine if content type should be cached."""
         
@@ -1,19 +1,29 @@
 import asyncio
+import logging
+import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, Set
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy import and_, or_, desc, func, select, update
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models.enterprise import JobQueue, ScheduledTask, TaskRun
-from app.models.job import Job
+from app.models.job import Job, JobBatch
 from app.services.enterprise_service import EnterpriseService
+from app.services.job_notifier import job_notifier, notify_jobs_available
+
+logger = logging.getLogger(__name__)
 
 
 class QueueManager:
     """Enhanced queue management for batch processing"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_factory: Callable[[], Session] = SessionLocal):
         self.db = db
+        # Workers never share ``self.db``: the dispatcher and every in-flight
+        # job get their own session from this factory.
+        self.session_factory = session_factory
         self.enterprise_service = EnterpriseService(db)
         self.active_workers = {}
         self.job_processors = {
@@ -66,12 +76,16 @@ class QueueManager:
             self.db.add(urgent_queue)
             self.db.commit()
     
+    @staticmethod
+    def _worker_key(queue_name: str, tenant_id: str = None) -> str:
+        return f"{tenant_id}:{queue_name}" if tenant_id else queue_name
+    
     async def start_worker(self, queue_name: str, tenant_id: str = None):
         """Start a worker for a specific queue"""
-        if f"{tenant_id}:{queue_name}" in self.active_workers:
+        worker_id = self._worker_key(queue_name, tenant_id)
+        if self.active_workers.get(worker_id):
             return
         
-        worker_id = f"{tenant_id}:{queue_name}" if tenant_id else queue_name
         self.active_workers[worker_id] = True
         
         # Start worker task
@@ -80,7 +94,7 @@ class QueueManager:
     
     async def stop_worker(self, queue_name: str, tenant_id: str = None):
         """Stop a worker for a specific queue"""
-        worker_id = f"{tenant_id}:{queue_name}" if tenant_id else queue_name
+        worker_id = self._worker_key(queue_name, tenant_id)
         
         if worker_id in self.active_workers:
             self.active_workers[worker_id] = False
@@ -90,50 +104,90 @@ class QueueManager:
             del self._worker_tasks[worker_id]
     
     async def _worker_loop(self, queue_name: str, tenant_id: str = None):
-        """Main worker loop for processing jobs"""
-        while self.active_workers.get(f"{tenant_id}:{queue_name}" if tenant_id else queue_name, False):
-            try:
-                await self._process_next_job(queue_name, tenant_id)
-                await asyncio.sleep(1)  # Brief pause between jobs
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"Worker error: {e}")
-                await asyncio.sleep(5)  # Longer pause on error
+        """Dispatcher loop: claim jobs in batches and run up to max_concurrent_jobs at once"""
+        worker_id = self._worker_key(queue_name, tenant_id)
+        running: Set[asyncio.Task] = set()
+        db = self.session_factory()
+        idle_wait = settings.QUEUE_IDLE_POLL_MIN_SECONDS
+        error_wait = 1.0
+        
+        await job_notifier.start(db.get_bind())
+        
+        try:
+            while self.active_workers.get(worker_id, False):
+                try:
+                    queue = self._load_queue(db, queue_name)
+                    if not queue:
+                        await job_notifier.wait(queue_name, settings.QUEUE_IDLE_POLL_MAX_SECONDS)
+                        continue
+                    
+                    free_slots = max(queue.max_concurrent_jobs or 1, 1) - len(running)
+                    claimed = self._claim_jobs(db, queue_name, tenant_id, queue, free_slots) if free_slots > 0 else []
+                    error_wait = 1.0
+                    
+                    for job_id in claimed:
+                        task = asyncio.create_task(self._run_claimed_job(job_id, queue))
+                        running.add(task)
+                        task.add_done_callback(running.discard)
+                    
+                    if running and len(running) >= max(queue.max_concurrent_jobs or 1, 1):
+                        # Pool is full; wait for a slot instead of polling
+                        await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    elif claimed:
+                        idle_wait = settings.QUEUE_IDLE_POLL_MIN_SECONDS
+                    else:
+                        # Nothing claimable: block until a producer signals this
+                        # queue, backing off the safety poll while it stays idle,
+                        # but never past the next delayed retry.
+                        timeout = idle_wait
+                        next_retry = self._seconds_until_next_retry(db, queue_name, tenant_id)
+                        if next_retry is not None:
+                            timeout = min(timeout, next_retry + 0.01)
+                        if await job_notifier.wait(queue_name, timeout):
+                            idle_wait = settings.QUEUE_IDLE_POLL_MIN_SECONDS
+                        else:
+                            idle_wait = min(idle_wait * 2, settings.QUEUE_IDLE_POLL_MAX_SECONDS)
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Worker error on queue {worker_id}: {e}")
+                    db.rollback()
+                    await asyncio.sleep(error_wait)
+                    error_wait = min(error_wait * 2, settings.QUEUE_IDLE_POLL_MAX_SECONDS)
+        finally:
+            # Let claimed jobs finish so they are not left stuck in "processing"
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            db.close()
     
-    async def _process_next_job(self, queue_name: str, tenant_id: str = None):
-        """Get and process the next job from the queue"""
-        # Get queue configuration
-        queue = self.db.query(JobQueue).filter(
+    def _load_queue(self, db: Session, queue_name: str) -> Optional[JobQueue]:
+        """Load a detached snapshot of the queue configuration"""
+        queue = db.query(JobQueue).filter(
             JobQueue.name == queue_name
         ).first()
         
-        if not queue:
-            return
-        
-        # Get next job from queue
-        job = self._get_next_job_from_queue(queue_name, tenant_id, queue)
-        
-        if not job:
-            return
-        
-        # Process the job
-        await self._execute_job(job, queue)
+        if queue:
+            db.expunge(queue)
+        return queue
     
-    def _get_next_job_from_queue(self, queue_name: str, tenant_id: str, queue: JobQueue) -> Optional[Job]:
-        """Get the next job from the queue based on priority and availability"""
-        query = self.db.query(Job).filter(
+    def _next_jobs_query(self, queue_name: str, tenant_id: str, queue: JobQueue, limit: int,
+                         now: datetime = None):
+        """Build the candidate query for the next jobs based on priority and availability"""
+        now = now or datetime.utcnow()
+        # Leading columns match idx_jobs_queue_status_not_before_priority
+        query = select(Job.job_id).where(
             and_(
                 Job.queue_name == queue_name,
-                Job.status == "queued"
+                Job.status == "queued",
+                or_(Job.not_before.is_(None), Job.not_before <= now)
             )
         )
         
         if tenant_id:
-            query = query.filter(Job.tenant_id == tenant_id)
+            query = query.where(Job.tenant_id == tenant_id)
         
         # Filter by priority range
-        query = query.filter(
+        query = query.where(
             and_(
                 Job.priority >= queue.priority_min,
                 Job.priority <= queue.priority_max
@@ -141,87 +195,180 @@ class QueueManager:
         )
         
         # Order by priority (highest first) and creation time (oldest first)
-        jobs = query.order_by(desc(Job.priority), Job.created_at).limit(1).all()
-        
-        return jobs[0] if jobs else None
+        return query.order_by(desc(Job.priority), Job.created_at).limit(limit)
     
-    async def _execute_job(self, job: Job, queue: JobQueue):
-        """Execute a job with retry logic"""
-        job.status = "processing"
-        job.started_at = datetime.utcnow()
-        self.db.commit()
-        
+    def _claim_jobs(self, db: Session, queue_name: str, tenant_id: str,
+                    queue: JobQueue, limit: int) -> List[str]:
+        """Atomically move up to ``limit`` queued jobs to processing and return their ids.
+        
+        PostgreSQL claims the whole batch in one ``UPDATE ... RETURNING`` over a
+        ``FOR UPDATE SKIP LOCKED`` subquery, so concurrent workers never block on
+        or double-claim the same rows. Other backends (SQLite) fall back to a
+        compare-and-swap update per candidate, which is equally safe because the
+        ``status = 'queued'`` guard only matches for the first writer.
+        """
+        now = datetime.utcnow()
+        candidates = self._next_jobs_query(queue_name, tenant_id, queue, limit, now)
+        
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = (
+                update(Job)
+                .where(Job.job_id.in_(candidates.with_for_update(skip_locked=True)))
+                .values(status="processing", started_at=now)
+                .returning(Job.job_id)
+                .execution_options(synchronize_session=False)
+            )
+            claimed = list(db.execute(stmt).scalars())
+            db.commit()
+            return claimed
+        
+        claimed = []
+        for job_id in db.execute(candidates).scalars().all():
+            result = db.execute(
+                update(Job)
+                .where(and_(Job.job_id == job_id, Job.status == "queued"))
+                .values(status="processing", started_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                claimed.append(job_id)
+        db.commit()
+        return claimed
+    
+    async def _run_claimed_job(self, job_id: str, queue: JobQueue):
+        """Execute a claimed job in its own session"""
+        db = self.session_factory()
+        try:
+            job = db.query(Job).filter(Job.job_id == job_id).first()
+            if job:
+                await self._execute_job(db, job, queue)
+        except Exception as e:
+            logger.error(f"Job {job_id} crashed outside of its processor: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    async def _execute_job(self, db: Session, job: Job, queue: JobQueue):
+        """Execute a claimed job once; failures are rescheduled instead of retried inline"""
         processor = self._get_job_processor(job)
         if not processor:
-            await self._fail_job(job, "No processor available for job type")
+            await self._fail_job(db, job, "No processor available for job type")
             return
         
-        retry_count = 0
-        max_retries = queue.max_retries
-        
-        while retry_count <= max_retries:
-            try:
-                # Create task run record
-                task_run = TaskRun(
-                    task_id=job.job_id,  # Using job_id as task_id for simplicity
-                    status="running"
-                )
-                self.db.add(task_run)
-                self.db.commit()
-                
-                start_time = datetime.utcnow()
-                
-                # Execute the job
-                result = await processor(job)
-                
-                end_time = datetime.utcnow()
-                execution_time = int((end_time - start_time).total_seconds() * 1000)
-                
-                # Update task run
-                task_run.status = "completed"
-                task_run.completed_at = end_time
-                task_run.execution_time_ms = execution_time
-                task_run.result = result
-                self.db.commit()
-                
-                # Mark job as completed
-                job.status = "completed"
-                job.finished_at = end_time
-                job.actual_duration = execution_time // 1000
-                self.db.commit()
-                
-                self.enterprise_service.increment_quota_usage(job.tenant_id, jobs=1)
+        task_run = None  # set once the attempt's run is stored
+        try:
+            # Create task run record
+            run = TaskRun(
+                task_id=job.job_id,  # Using job_id as task_id for simplicity
+                status="running"
+            )
+            db.add(run)
+            db.commit()
+            task_run = run
+            
+            start_time = datetime.utcnow()
+            
+            # Execute the job
+            result = await processor(job)
+            
+            end_time = datetime.utcnow()
+            execution_time = int((end_time - start_time).total_seconds() * 1000)
+            
+            # Update task run
+            task_run.status = "completed"
+            task_run.completed_at = end_time
+            task_run.execution_time_ms = execution_time
+            task_run.result = result
+            db.commit()
+            
+            # Mark job as completed
+            job.status = "completed"
+            job.finished_at = end_time
+            job.actual_duration = execution_time // 1000
+            job.not_before = None
+            db.commit()
+            
+            EnterpriseService(db).increment_quota_usage(job.tenant_id, jobs=1)
+            
+        except Exception as e:
+            db.rollback()
+            attempt = (job.retry_count or 0) + 1
+            error_msg = f"Job execution failed (attempt {attempt}): {str(e)}"
+            logger.warning(error_msg)
+            
+            if (job.retry_count or 0) >= queue.max_retries:
+                await self._fail_job(db, job, error_msg, task_run)
                 return
-                
-            except Exception as e:
-                retry_count += 1
-                error_msg = f"Job execution failed (attempt {retry_count}): {str(e)}"
-                print(error_msg)
-                
-                if retry_count > max_retries:
-                    await self._fail_job(job, error_msg)
-                    return
-                
-                # Wait before retry
-                await asyncio.sleep(queue.retry_delay_seconds)
+            
+            # Close this attempt's run before the job is queued again
+            if task_run is not None:
+                self._mark_run_failed(task_run, error_msg)
+            self._schedule_retry(db, job, queue, error_msg)
+    
+    @staticmethod
+    def _retry_delay_seconds(queue: JobQueue, retry_number: int) -> float:
+        """Exponential backoff from the queue's base delay, with equal jitter"""
+        base = max(queue.retry_delay_seconds or 1, 1)
+        delay = min(base * (2 ** (retry_number - 1)), settings.QUEUE_RETRY_MAX_DELAY_SECONDS)
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def _schedule_retry(self, db: Session, job: Job, queue: JobQueue, error_message: str):
+        """Put a failed job back in the queue, claimable again after its backoff"""
+        job.retry_count = (job.retry_count or 0) + 1
+        job.status = "queued"
+        job.error_details = error_message
+        job.not_before = datetime.utcnow() + timedelta(
+            seconds=self._retry_delay_seconds(queue, job.retry_count)
+        )
+        db.commit()
+    
+    def _seconds_until_next_retry(self, db: Session, queue_name: str, tenant_id: str = None) -> Optional[float]:
+        """Seconds until the earliest delayed job on this queue becomes claimable"""
+        now = datetime.utcnow()
+        query = db.query(func.min(Job.not_before)).filter(
+            and_(
+                Job.queue_name == queue_name,
+                Job.status == "queued",
+                Job.not_before > now
+            )
+        )
+        if tenant_id:
+            query = query.filter(Job.tenant_id == tenant_id)
+        
+        next_due = query.scalar()
+        if next_due is None:
+            return None
+        return max((next_due - now).total_seconds(), 0.0)
+    
+    @staticmethod
+    def _mark_run_failed(task_run: TaskRun, error_message: str):
+        """Record a failed attempt on its task run (committed by the caller)"""
+        task_run.status = "failed"
+        task_run.completed_at = datetime.utcnow()
+        task_run.error_message = error_message
+        if task_run.started_at:
+            task_run.execution_time_ms = int((task_run.completed_at - task_run.started_at).total_seconds() * 1000)
     
-    async def _fail_job(self, job: Job, error_message: str):
-        """Mark job as failed"""
+    async def _fail_job(self, db: Session, job: Job, error_message: str, task_run: Optional[TaskRun] = None):
+        """Mark job as failed, closing the failed attempt's task run if there is one"""
         job.status = "failed"
         job.error_details = error_message
         job.finished_at = datetime.utcnow()
-        self.db.commit()
-        
-        # Create failed task run
-        task_run = TaskRun(
-            task_id=job.job_id,
-            status="failed",
-            started_at=job.started_at or datetime.utcnow(),
-            completed_at=datetime.utcnow(),
-            error_message=error_message
-        )
-        self.db.add(task_run)
-        self.db.commit()
+        db.commit()
+        
+        if task_run is not None:
+            self._mark_run_failed(task_run, error_message)
+        else:
+            # Create failed task run
+            task_run = TaskRun(
+                task_id=job.job_id,
+                status="failed",
+                started_at=job.started_at or datetime.utcnow(),
+                completed_at=datetime.utcnow(),
+                error_message=error_message
+            )
+            db.add(task_run)
+        db.commit()
     
     def _get_job_processor(self, job: Job) -> Optional[Callable]:
         """Get the appropriate processor for a job based on its type"""
@@ -260,49 +407,72 @@ class QueueManager:
                         batch_name: str = None) -> Dict[str, Any]:
         """Create a batch processing job"""
         batch_id = str(uuid.uuid4())
-        
-        # Update jobs to be part of this batch
-        for job_id in job_ids:
-            job = self.db.query(Job).filter(Job.job_id == job_id).first()
-            if job:
-                job.metadata = job.metadata or {}
-                job.metadata["batch_id"] = batch_id
-                job.metadata["batch_name"] = batch_name or f"Batch {batch_id[:8]}"
-        
+        batch = JobBatch(
+            batch_id=batch_id,
+            tenant_id=tenant_id,
+            name=batch_name or f"Batch {batch_id[:8]}",
+            created_by=user_id
+        )
+        self.db.add(batch)
+        self.db.flush()
+        
+        # Attach all jobs to this batch in a single UPDATE
+        result = self.db.execute(
+            update(Job)
+            .where(and_(Job.job_id.in_(job_ids), Job.tenant_id == tenant_id))
+            .values(batch_id=batch_id)
+            .execution_options(synchronize_session=False)
+        )
+        batch.job_count = result.rowcount
         self.db.commit()
         
+        queue_names = [
+            row[0] for row in self.db.query(Job.queue_name).filter(
+                Job.batch_id == batch_id
+            ).distinct()
+        ]
+        for queue_name in queue_names:
+            notify_jobs_available(queue_name, self.db)
+        
         return {
             "batch_id": batch_id,
-            "batch_name": batch_name or f"Batch {batch_id[:8]}",
-            "job_count": len(job_ids),
+            "batch_name": batch.name,
+            "job_count": batch.job_count,
             "status": "created"
         }
     
     def get_batch_status(self, batch_id: str) -> Dict[str, Any]:
         """Get status of a batch processing job"""
-        jobs = self.db.query(Job).filter(
-            Job.metadata["batch_id"] == batch_id
-        ).all()
+        batch = self.db.query(JobBatch).filter(JobBatch.batch_id == batch_id).first()
         
-        if not jobs:
+        if not batch:
             return {"error": "Batch not found"}
         
-        total_jobs = len(jobs)
-        completed_jobs = len([j for j in jobs if j.status == "completed"])
-        failed_jobs = len([j for j in jobs if j.status == "failed"])
-        processing_jobs = len([j for j in jobs if j.status == "processing"])
+        # One grouped aggregate over the (batch_id, status) index
+        status_counts = dict(
+            self.db.query(Job.status, func.count(Job.job_id))
+            .filter(Job.batch_id == batch_id)
+            .group_by(Job.status)
+            .all()
+        )
+        
+        total_jobs = sum(status_counts.values())
+        completed_jobs = status_counts.get("completed", 0)
+        failed_jobs = status_counts.get("failed", 0)
+        processing_jobs = status_counts.get("processing", 0)
         
         progress_percentage = (completed_jobs / total_jobs * 100) if total_jobs > 0 else 0
         
         return {
             "batch_id": batch_id,
-            "batch_name": jobs[0].metadata.get("batch_name", f"Batch {batch_id[:8]}"),
+            "tenant_id": batch.tenant_id,
+            "batch_name": batch.name,
             "total_jobs": total_jobs,
             "completed_jobs": completed_jobs,
             "failed_jobs": failed_jobs,
             "processing_jobs": processing_jobs,
             "progress_percentage": round(progress_percentage, 2),
-            "status": "completed" if completed_jobs == total_jobs else "processing"
+            "status": "completed" if total_jobs and completed_jobs == total_jobs else "processing"
         }
     
     async def schedule_recurring_task(self, tenant_id: str, user_id: str, 
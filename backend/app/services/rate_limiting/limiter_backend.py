@@ -0,0 +1,370 @@
+"""
+Rate Limiter State Backends
+
+Shared limiter state so limits hold across workers and nodes. Every rule that
+applies to a request is evaluated in one atomic step: all rules are checked
+first and their state is only updated when every rule allows the request, so
+a rejected request never consumes quota.
+
+- ``RedisLimiterBackend`` runs the evaluation as a single Lua script (one
+  round trip regardless of how many rules apply), using the Redis server
+  clock so all nodes agree on time.
+- ``LocalLimiterBackend`` is an in-process implementation of the same
+  algorithms, used when Redis is disabled or unreachable and in tests.
+
+Algorithms:
+
+- ``gcra``: generic cell rate algorithm, one timestamp per key. Serves both
+  token bucket and leaky bucket rules (burst = bucket capacity).
+- ``sliding``: sliding window counter, the previous window's count weighted
+  by its remaining overlap plus the current window's count.
+- ``fixed``: fixed window counter aligned to the epoch.
+"""
+
+import heapq
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+GCRA = "gcra"
+SLIDING = "sliding"
+FIXED = "fixed"
+
+# ARGV per key: algorithm, limit, window (ms), burst, cost
+_ARGS_PER_KEY = 5
+
+EVALUATE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local results = {}
+local writes = {}
+local all_allowed = true
+
+for i = 1, #KEYS do
+  local base = (i - 1) * 5
+  local algo = ARGV[base + 1]
+  local limit = tonumber(ARGV[base + 2])
+  local window = tonumber(ARGV[base + 3])
+  local burst = tonumber(ARGV[base + 4])
+  local cost = tonumber(ARGV[base + 5])
+  local key = KEYS[i]
+
+  if algo == 'gcra' then
+    local interval = window / limit
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then tat = now end
+    local new_tat = tat + interval * cost
+    local allow_at = new_tat - interval * burst
+    if allow_at > now then
+      all_allowed = false
+      local remaining = math.max(0, math.floor((now - (tat - interval * burst)) / interval))
+      results[i] = {0, remaining, math.ceil(allow_at - now), math.ceil(tat - now)}
+    else
+      results[i] = {1, math.floor((now - allow_at) / interval), 0, math.ceil(new_tat - now)}
+      writes[i] = {'gcra', new_tat}
+    end
+  else
+    local current = math.floor(now / window)
+    local state = redis.call('HMGET', key, 'w', 'c', 'p')
+    local w = tonumber(state[1]) or current
+    local c = tonumber(state[2]) or 0
+    local p = tonumber(state[3]) or 0
+    if w ~= current then
+      if w == current - 1 then p = c else p = 0 end
+      c = 0
+    end
+    local elapsed = now - current * window
+    local count = c
+    if algo == 'sliding' then count = c + p * (window - elapsed) / window end
+    if count + cost > limit then
+      all_allowed = false
+      local retry = window - elapsed
+      if algo == 'sliding' and p > 0 and c + cost <= limit then
+        retry = math.ceil(window - (limit - c - cost) * window / p - elapsed)
+      end
+      results[i] = {0, math.max(0, math.floor(limit - count)), math.max(1, retry), window - elapsed}
+    else
+      results[i] = {1, math.floor(limit - count - cost), 0, window - elapsed}
+      local ttl = window - elapsed
+      if algo == 'sliding' then ttl = ttl + window end
+      writes[i] = {algo, current, c + cost, p, ttl}
+    end
+  end
+end
+
+if all_allowed then
+  for i = 1, #KEYS do
+    local wr = writes[i]
+    local cost = tonumber(ARGV[(i - 1) * 5 + 5])
+    if wr and cost > 0 then
+      if wr[1] == 'gcra' then
+        redis.call('SET', KEYS[i], string.format('%.17g', wr[2]), 'PX', math.max(1, math.ceil(wr[2] - now)))
+      else
+        redis.call('HSET', KEYS[i], 'w', wr[2], 'c', wr[3], 'p', wr[4])
+        redis.call('PEXPIRE', KEYS[i], math.max(1, wr[5]))
+      end
+    end
+  end
+end
+
+local flat = {}
+for i = 1, #KEYS do
+  for j = 1, 4 do flat[#flat + 1] = results[i][j] end
+end
+return flat
+"""
+
+
+@dataclass
+class LimitCheck:
+    """One rule evaluated against one key"""
+    key: str
+    algorithm: str  # gcra | sliding | fixed
+    limit: int
+    window_seconds: float
+    burst: int = 0  # gcra capacity (defaults to limit)
+    cost: int = 1  # 0 inspects state without consuming
+
+
+@dataclass
+class LimitDecision:
+    """Outcome of a LimitCheck"""
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds until the request would be allowed
+    reset_after: float  # seconds until the state fully resets / window ends
+
+
+def _window_ms(check: LimitCheck) -> int:
+    return max(1, int(check.window_seconds * 1000))
+
+
+class _KeyState:
+    """Compact per-key limiter state"""
+    __slots__ = ("tat", "window", "current", "previous", "expires", "slot")
+
+    def __init__(self):
+        self.tat = 0.0  # gcra theoretical arrival time (ms)
+        self.window = 0  # window index (sliding/fixed)
+        self.current = 0
+        self.previous = 0
+        self.expires = 0.0  # ms; the state has no effect after this
+        self.slot = -1  # expiry bucket the key is filed under
+
+
+class LocalLimiterBackend:
+    """
+    In-process limiter state with the same semantics as the Lua script.
+
+    Limits are only per-process here, so this is the fallback when Redis is
+    not available, not a substitute for it. State is bounded: each key holds
+    a fixed-size record, keys are filed in one-second expiry buckets that are
+    swept as time passes, and beyond ``max_keys`` the least recently used key
+    is evicted (which only ever makes a limit more lenient).
+    """
+
+    BUCKET_MS = 1000
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._state: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._buckets: Dict[int, List[str]] = {}
+        self._bucket_heap: List[int] = []
+        self._scheduled = 0  # bucket entries, including stale ones for evicted keys
+        self.evictions = 0
+
+    @staticmethod
+    def _now_ms() -> float:
+        # Whole microseconds first, as Redis TIME reports them, so the same
+        # instant maps to the same millisecond as in the Lua script
+        return round(time.time() * 1_000_000) // 1000
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def _schedule(self, key: str, state: _KeyState):
+        slot = int(state.expires // self.BUCKET_MS) + 1
+        state.slot = slot
+        bucket = self._buckets.get(slot)
+        if bucket is None:
+            bucket = self._buckets[slot] = []
+            heapq.heappush(self._bucket_heap, slot)
+        bucket.append(key)
+        self._scheduled += 1
+
+    def _rebuild_buckets(self):
+        """Refile live keys only, dropping entries left behind by evicted keys"""
+        self._buckets.clear()
+        self._bucket_heap.clear()
+        self._scheduled = 0
+        for key, state in self._state.items():
+            self._schedule(key, state)
+
+    def _sweep(self, now: float) -> int:
+        """Drop keys whose expiry bucket has passed; amortized O(expired keys)"""
+        removed = 0
+        current_slot = int(now // self.BUCKET_MS)
+        while self._bucket_heap and self._bucket_heap[0] <= current_slot:
+            slot = heapq.heappop(self._bucket_heap)
+            keys = self._buckets.pop(slot, ())
+            self._scheduled -= len(keys)
+            for key in keys:
+                state = self._state.get(key)
+                if state is None or state.slot != slot:
+                    continue  # evicted, reset or refiled since
+                if state.expires <= now:
+                    del self._state[key]
+                    removed += 1
+                else:
+                    self._schedule(key, state)
+        return removed
+
+    def _state_for(self, key: str, now: float) -> Optional[_KeyState]:
+        state = self._state.get(key)
+        if state is not None and state.expires <= now:
+            del self._state[key]
+            return None
+        return state
+
+    def _store(self, key: str, now: float) -> _KeyState:
+        state = self._state.get(key)
+        if state is not None:
+            self._state.move_to_end(key)
+            return state
+        if len(self._state) >= self.max_keys:
+            self._sweep(now)
+            while len(self._state) >= self.max_keys:
+                self._state.popitem(last=False)
+                self.evictions += 1
+            if self._scheduled > 2 * self.max_keys:
+                self._rebuild_buckets()
+        state = self._state[key] = _KeyState()
+        return state
+
+    async def evaluate(self, checks: List[LimitCheck]) -> List[LimitDecision]:
+        now = self._now_ms()
+        self._sweep(now)
+        decisions: List[LimitDecision] = []
+        writes = []
+        all_allowed = True
+
+        for check in checks:
+            window = _window_ms(check)
+            state = self._state_for(check.key, now)
+
+            if check.algorithm == GCRA:
+                burst = check.burst or check.limit
+                interval = window / check.limit
+                tat = max(state.tat if state is not None else now, now)
+                new_tat = tat + interval * check.cost
+                allow_at = new_tat - interval * burst
+                if allow_at > now:
+                    all_allowed = False
+                    remaining = max(0, math.floor((now - (tat - interval * burst)) / interval))
+                    decisions.append(LimitDecision(False, remaining, math.ceil(allow_at - now) / 1000,
+                                                   math.ceil(tat - now) / 1000))
+                else:
+                    decisions.append(LimitDecision(True, math.floor((now - allow_at) / interval), 0.0,
+                                                   math.ceil(new_tat - now) / 1000))
+                    writes.append((check, (new_tat, 0, 0, 0, new_tat)))
+                continue
+
+            current = int(now // window)
+            if state is None:
+                w, c, p = current, 0, 0
+            else:
+                w, c, p = state.window, state.current, state.previous
+            if w != current:
+                p = c if w == current - 1 else 0
+                c = 0
+            elapsed = now - current * window
+            count = c + p * (window - elapsed) / window if check.algorithm == SLIDING else c
+
+            if count + check.cost > check.limit:
+                all_allowed = False
+                retry = window - elapsed
+                if check.algorithm == SLIDING and p > 0 and c + check.cost <= check.limit:
+                    retry = math.ceil(window - (check.limit - c - check.cost) * window / p - elapsed)
+                decisions.append(LimitDecision(False, max(0, math.floor(check.limit - count)),
+                                               max(1, retry) / 1000, (window - elapsed) / 1000))
+            else:
+                decisions.append(LimitDecision(True, math.floor(check.limit - count - check.cost), 0.0,
+                                               (window - elapsed) / 1000))
+                ttl = window - elapsed + (window if check.algorithm == SLIDING else 0)
+                writes.append((check, (0.0, current, c + check.cost, p, now + ttl)))
+
+        if all_allowed:
+            for check, (tat, w, c, p, expires) in writes:
+                if check.cost <= 0:
+                    continue
+                state = self._store(check.key, now)
+                state.tat, state.window, state.current, state.previous, state.expires = tat, w, c, p, expires
+                if state.slot < 0:
+                    self._schedule(check.key, state)
+
+        return decisions
+
+    async def reset(self, keys: List[str]) -> int:
+        removed = 0
+        for key in keys:
+            removed += self._state.pop(key, None) is not None
+        return removed
+
+    def purge_expired(self) -> int:
+        """Drop state that no longer affects any decision"""
+        return self._sweep(self._now_ms())
+
+    def clear(self):
+        self._state.clear()
+        self._buckets.clear()
+        self._bucket_heap.clear()
+        self._scheduled = 0
+
+
+class RedisLimiterBackend:
+    """Limiter state in Redis, evaluated atomically by one Lua script call"""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(EVALUATE_SCRIPT)
+
+    async def evaluate(self, checks: List[LimitCheck]) -> List[LimitDecision]:
+        keys = []
+        args = []
+        for check in checks:
+            keys.append(check.key)
+            args.extend((
+                check.algorithm,
+                check.limit,
+                _window_ms(check),
+                check.burst or check.limit,
+                check.cost
+            ))
+
+        flat = await self._script(keys=keys, args=args)
+        return [
+            LimitDecision(
+                allowed=bool(flat[i]),
+                remaining=int(flat[i + 1]),
+                retry_after=int(flat[i + 2]) / 1000,
+                reset_after=int(flat[i + 3]) / 1000
+            )
+            for i in range(0, len(flat), 4)
+        ]
+
+    async def reset(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        return await self.client.delete(*keys)
+
+    def purge_expired(self) -> int:
+        # Keys carry their own expiry in Redis
+        return 0
+
+    def clear(self):
+        pass
@@ -5,20 +5,34 @@ Implements multiple rate limiting algorithms for the proxy server including
 token bucket, sliding window, fixed window, and leaky bucket algorithms.
 Provides flexible rate limiting with support for different scopes, policies,
 and real-time monitoring.
+
+Limiter state lives in Redis (see ``limiter_backend``) so limits hold across
+workers and nodes; an in-process backend takes over when Redis is unavailable.
 """
 
 import asyncio
+import bisect
+import fnmatch
+import heapq
+import itertools
+import math
+import re
+import statistics
 import time
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple, Any, Union
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict
 from enum import Enum
 from dataclasses import dataclass, field
 import json
 
-from app.services.cache.redis_cache import RedisCache
-from app.services.telemetry.event_tracker import EventTracker
+from app.core.cache_config import namespace_manager
+from app.services.cache.redis_cache import RedisCache, RedisUnavailableError, get_redis_client
+from app.services.rate_limiting.limiter_backend import (
+    FIXED, GCRA, SLIDING, LimitCheck, LimitDecision, LocalLimiterBackend, RedisLimiterBackend
+)
+from app.services.telemetry.event_tracker import event_tracker, EventLevel
 
 logger = logging.getLogger(__name__)
 
@@ -74,159 +88,20 @@ class RateLimitResult:
     retry_after_seconds: Optional[int] = None
     violation_detected: bool = False
     rate_limited_count: int = 0
+    limit: int = 0  # limit of the rule that determined remaining_requests
 
-class TokenBucket:
-    """Token bucket rate limiter implementation"""
-    
-    def __init__(self, capacity: int, refill_rate: float):
-        self.capacity = capacity
-        self.refill_rate = refill_rate  # tokens per second
-        self.tokens = capacity
-        self.last_refill = time.time()
-    
-    def consume(self, tokens: int = 1) -> bool:
-        """Consume tokens from bucket"""
-        now = time.time()
-        
-        # Calculate tokens to add based on time passed
-        time_passed = now - self.last_refill
-        tokens_to_add = time_passed * self.refill_rate
-        
-        # Refill bucket (cap at capacity)
-        self.tokens = min(self.capacity, self.tokens + tokens_to_add)
-        self.last_refill = now
-        
-        # Check if we can consume
-        if self.tokens >= tokens:
-            self.tokens -= tokens
-            return True
-        return False
-    
-    def get_remaining_tokens(self) -> float:
-        """Get remaining tokens in bucket"""
-        now = time.time()
-        time_passed = now - self.last_refill
-        tokens_to_add = time_passed * self.refill_rate
-        return min(self.capacity, self.tokens + tokens_to_add)
-
-class SlidingWindow:
-    """Sliding window rate limiter implementation"""
-    
-    def __init__(self, max_requests: int, window_seconds: int):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.requests = deque()
-    
-    def is_allowed(self) -> bool:
-        """Check if request is allowed under sliding window"""
-        now = time.time()
-        
-        # Remove expired requests
-        cutoff = now - self.window_seconds
-        while self.requests and self.requests[0] < cutoff:
-            self.requests.popleft()
-        
-        # Check if under limit
-        if len(self.requests) < self.max_requests:
-            self.requests.append(now)
-            return True
-        
-        return False
-    
-    def get_remaining_requests(self) -> int:
-        """Get remaining requests in current window"""
-        now = time.time()
-        
-        # Remove expired requests
-        cutoff = now - self.window_seconds
-        while self.requests and self.requests[0] < cutoff:
-            self.requests.popleft()
-        
-        return max(0, self.max_requests - len(self.requests))
-
-class FixedWindow:
-    """Fixed window rate limiter implementation"""
-    
-    def __init__(self, max_requests: int, window_seconds: int):
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        self.window_start = self._get_window_start()
-        self.request_count = 0
-    
-    def _get_window_start(self) -> float:
-        """Get current window start time"""
-        return int(time.time() / self.window_seconds) * self.window_seconds
-    
-    def is_allowed(self) -> bool:
-        """Check if request is allowed under fixed window"""
-        now = time.time()
-        current_window = self._get_window_start()
-        
-        # Reset if new window
-        if current_window != self.window_start:
-            self.window_start = current_window
-            self.request_count = 0
-        
-        # Check if under limit
-        if self.request_count < self.max_requests:
-            self.request_count += 1
-            return True
-        
-        return False
-    
-    def get_remaining_requests(self) -> int:
-        """Get remaining requests in current window"""
-        now = time.time()
-        current_window = self._get_window_start()
-        
-        # Reset if new window
-        if current_window != self.window_start:
-            self.window_start = current_window
-            self.request_count = 0
-        
-        return max(0, self.max_requests - self.request_count)
-    
-    def get_window_reset_time(self) -> datetime:
-        """Get time when current window resets"""
-        return datetime.fromtimestamp(self.window_start + self.window_seconds, tz=timezone.utc)
+class AdaptiveRateLimiter:
+    """
+    Adaptive limit that adjusts to observed response times.
 
-class LeakyBucket:
-    """Leaky bucket rate limiter implementation"""
-    
-    def __init__(self, capacity: int, leak_rate: float):
-        self.capacity = capacity
-        self.leak_rate = leak_rate  # requests per second
-        self.water_level = 0  # Current water level (requests)
-        self.last_leak = time.time()
-    
-    def process_request(self) -> bool:
-        """Process a request through the bucket"""
-        now = time.time()
-        
-        # Calculate water leaked since last check
-        time_passed = now - self.last_leak
-        water_leaked = time_passed * self.leak_rate
-        
-        # Reduce water level
-        self.water_level = max(0, self.water_level - water_leaked)
-        self.last_leak = now
-        
-        # Check if we can accept request
-        if self.water_level < self.capacity:
-            self.water_level += 1
-            return True
-        
-        return False
+    Only the limit is tracked here (load is measured per process); requests are
+    counted by the shared sliding window of the limiter backend.
+    """
     
-    def get_water_level(self) -> float:
-        """Get current water level"""
-        now = time.time()
-        time_passed = now - self.last_leak
-        water_leaked = time_passed * self.leak_rate
-        return max(0, self.water_level - water_leaked)
-
-class AdaptiveRateLimiter:
-    """Adaptive rate limiter that adjusts based on system load"""
+    __slots__ = (
+        "base_max_requests", "window_seconds", "adaptation_factor",
+        "current_limit", "system_load", "performance_score"
+    )
     
     def __init__(
         self,
@@ -237,13 +112,12 @@ class AdaptiveRateLimiter:
         self.base_max_requests = base_max_requests
         self.window_seconds = window_seconds
         self.adaptation_factor = adaptation_factor
-        self.sliding_window = SlidingWindow(base_max_requests, window_seconds)
         self.current_limit = base_max_requests
         self.system_load = 0.5  # 0.0 = no load, 1.0 = max load
         self.performance_score = 1.0
     
-    def is_allowed(self, response_time: Optional[float] = None) -> bool:
-        """Check if request is allowed with adaptive limits"""
+    def update(self, response_time: Optional[float] = None) -> int:
+        """Fold in a response time sample and return the current request limit"""
         # Update system load if response time provided
         if response_time is not None:
             self._update_system_load(response_time)
@@ -251,10 +125,7 @@ class AdaptiveRateLimiter:
         # Adjust current limit based on system load
         self._adjust_limit()
         
-        # Update sliding window with current limit
-        self.sliding_window.max_requests = int(self.current_limit)
-        
-        return self.sliding_window.is_allowed()
+        return max(1, int(self.current_limit))
     
     def _update_system_load(self, response_time: float) -> None:
         """Update system load based on response time"""
@@ -296,20 +167,34 @@ class RateLimiter:
     - Adaptive: Automatically adjusts based on system load
     """
     
+    # Backend algorithm for each rule algorithm (adaptive counts in a sliding window)
+    _BACKEND_ALGORITHMS = {
+        RateLimitAlgorithm.TOKEN_BUCKET: GCRA,
+        RateLimitAlgorithm.LEAKY_BUCKET: GCRA,
+        RateLimitAlgorithm.SLIDING_WINDOW: SLIDING,
+        RateLimitAlgorithm.FIXED_WINDOW: FIXED,
+        RateLimitAlgorithm.ADAPTIVE: SLIDING,
+    }
+    
     def __init__(self):
         self.redis_cache = RedisCache()
-        self.event_tracker = EventTracker()
+        self.event_tracker = event_tracker
         
-        # Rate limiting algorithms
-        self._token_buckets = {}  # scope_key -> TokenBucket
-        self._sliding_windows = {}  # scope_key -> SlidingWindow
-        self._fixed_windows = {}  # scope_key -> FixedWindow
-        self._leaky_buckets = {}  # scope_key -> LeakyBucket
-        self._adaptive_limiters = {}  # scope_key -> AdaptiveRateLimiter
+        # Limiter state backends: shared (Redis) and in-process fallback
+        self._backend: Optional[RedisLimiterBackend] = None
+        self._backend_client = None
+        self._adaptive_limiters: "OrderedDict[str, AdaptiveRateLimiter]" = OrderedDict()  # LRU, load is per process
         
         # Rate limit rules
         self._rules: List[RateLimitRule] = []
-        self._rules_by_priority = []
+        
+        # Compiled rule index: (scope, scope_value) -> [(sort_key, rule)] ordered by
+        # priority (highest first), then insertion order
+        self._rule_index: Dict[Tuple[RateLimitScope, str], List[Tuple[Tuple[int, int], RateLimitRule]]] = {}
+        # (scope, scope_value) -> (regex, group per bucket entry): one match of the
+        # combined regex tells which of the bucket's rules apply to an endpoint
+        self._bucket_matchers: Dict[Tuple[RateLimitScope, str], Tuple["re.Pattern", List[int]]] = {}
+        self._rule_sequence = itertools.count()
         
         # Real-time statistics
         self._rate_limit_stats = {
@@ -327,26 +212,40 @@ class RateLimiter:
             'cleanup_interval_seconds': 3600,
             'stats_retention_hours': 24,
             'redis_namespace': 'rate_limit',
+            'local_state_max_keys': 100000,  # hard cap on in-process limiter keys
+            'adaptive_max_keys': 10000,
         }
+        self._local_backend = LocalLimiterBackend(max_keys=self.config['local_state_max_keys'])
         
         logger.info("RateLimiter initialized")
     
+    async def initialize(self) -> None:
+        """Select the limiter state backend"""
+        backend = await self._get_backend()
+        logger.info(f"RateLimiter using {'redis' if backend is not self._local_backend else 'local'} state")
+    
+    async def _get_backend(self):
+        """Shared Redis backend for the running loop's client, or the local one"""
+        try:
+            client = await get_redis_client()
+        except RedisUnavailableError:
+            return self._local_backend
+        if client is not self._backend_client:
+            self._backend = RedisLimiterBackend(client)
+            self._backend_client = client
+        return self._backend
+    
     async def add_rule(self, rule: RateLimitRule) -> None:
         """Add a rate limit rule"""
         self._rules.append(rule)
-        
-        # Sort rules by priority (higher priority first)
-        self._rules_by_priority = sorted(
-            self._rules,
-            key=lambda r: r.priority,
-            reverse=True
-        )
+        self._index_rule(rule)
         
         logger.info(f"Added rate limit rule: {rule.name} ({rule.algorithm.value})")
         
         # Track rule addition
-        await self.event_tracker.track_event(
+        self.event_tracker.track_system_event(
             "rate_limit_rule_added",
+            EventLevel.INFO,
             {
                 "rule_id": rule.id,
                 "algorithm": rule.algorithm.value,
@@ -358,21 +257,18 @@ class RateLimiter:
     
     async def remove_rule(self, rule_id: str) -> bool:
         """Remove a rate limit rule"""
-        original_count = len(self._rules)
-        self._rules = [r for r in self._rules if r.id != rule_id]
-        
-        if len(self._rules) < original_count:
-            # Resort rules
-            self._rules_by_priority = sorted(
-                self._rules,
-                key=lambda r: r.priority,
-                reverse=True
-            )
+        removed = [r for r in self._rules if r.id == rule_id]
+        
+        if removed:
+            self._rules = [r for r in self._rules if r.id != rule_id]
+            for rule in removed:
+                self._unindex_rule(rule)
             
             logger.info(f"Removed rate limit rule: {rule_id}")
             
-            await self.event_tracker.track_event(
+            self.event_tracker.track_system_event(
                 "rate_limit_rule_removed",
+                EventLevel.INFO,
                 {"rule_id": rule_id}
             )
             
@@ -401,48 +297,82 @@ class RateLimiter:
         Returns:
             RateLimitResult with allowance and limit information
         """
-        start_time = time.time()
-        
-        # Default result
-        result = RateLimitResult(
-            allowed=True,
-            remaining_requests=self.config['default_max_requests'],
-            reset_time=datetime.now(timezone.utc) + timedelta(seconds=self.config['default_window_seconds'])
-        )
+        results = await self.check_rate_limits([(identifier, scope)], endpoint, response_time, request_size)
+        return results[0]
+    
+    async def check_rate_limits(
+        self,
+        subjects: List[Tuple[str, RateLimitScope]],
+        endpoint: str = "",
+        response_time: Optional[float] = None,
+        request_size: int = 0
+    ) -> List[RateLimitResult]:
+        """
+        Check one request against several scopes (e.g. its client IP and its
+        API key) in a single atomic backend call: if any rule of any scope
+        rejects the request, no quota is consumed in any of them.
         
-        applicable_rules = await self._find_applicable_rules(identifier, scope, endpoint)
+        Returns:
+            One RateLimitResult per subject, in order
+        """
+        start_time = time.time()
         
-        # Check each applicable rule
-        for rule in applicable_rules:
-            rule_result = await self._check_rule(rule, identifier, response_time, request_size)
+        subject_rules = [
+            await self._find_applicable_rules(identifier, scope, endpoint)
+            for identifier, scope in subjects
+        ]
+        
+        # All rules are evaluated in one atomic backend call
+        rule_results = await self._check_rules([
+            (rule, identifier)
+            for (identifier, _), rules in zip(subjects, subject_rules)
+            for rule in rules
+        ], response_time, request_size)
+        
+        results = []
+        offset = 0
+        for rules in subject_rules:
+            result = RateLimitResult(
+                allowed=True,
+                remaining_requests=self.config['default_max_requests'],
+                limit=self.config['default_max_requests'],
+                reset_time=datetime.now(timezone.utc) + timedelta(seconds=self.config['default_window_seconds'])
+            )
             
-            # Update overall result
-            if not rule_result.allowed:
-                result.allowed = False
-                result.violation_detected = True
-                result.rate_limited_count += 1
-                
-                # Update headers for client
-                result.headers.update(rule_result.headers)
-                result.retry_after_seconds = rule_result.retry_after_seconds
-                
-                # Break on first violation (most restrictive)
-                break
-            else:
-                # Update remaining requests if this rule is more restrictive
-                result.remaining_requests = min(
-                    result.remaining_requests,
-                    rule_result.remaining_requests
-                )
+            for rule_result in rule_results[offset:offset + len(rules)]:
+                # Update overall result
+                if not rule_result.allowed:
+                    result.allowed = False
+                    result.violation_detected = True
+                    result.rate_limited_count += 1
+                    
+                    # Update headers for client
+                    result.headers.update(rule_result.headers)
+                    result.retry_after_seconds = rule_result.retry_after_seconds
+                    result.remaining_requests = rule_result.remaining_requests
+                    result.reset_time = rule_result.reset_time
+                    result.limit = rule_result.limit
+                    
+                    # Report the first violation (highest priority rule)
+                    break
+                else:
+                    # Update remaining requests if this rule is more restrictive
+                    if rule_result.remaining_requests < result.remaining_requests:
+                        result.remaining_requests = rule_result.remaining_requests
+                        result.reset_time = rule_result.reset_time
+                        result.limit = rule_result.limit
+            offset += len(rules)
+            
+            # Add rate limit headers
+            self._add_rate_limit_headers(result)
+            results.append(result)
         
-        # Update statistics
+        # Update statistics (one check per request)
         processing_time = time.time() - start_time
-        await self._update_statistics(result, processing_time)
-        
-        # Add rate limit headers
-        self._add_rate_limit_headers(result)
+        overall = next((result for result in results if not result.allowed), results[0])
+        await self._update_statistics(overall, processing_time)
         
-        return result
+        return results
     
     async def get_rate_limit_status(
         self,
@@ -494,6 +424,11 @@ class RateLimiter:
             'scope_breakdown': await self._get_scope_statistics(),
             'rule_violations': dict(self._rate_limit_stats['rule_violations']),
             'redis_statistics': redis_stats,
+            'local_state': {
+                'keys': len(self._local_backend),
+                'evictions': self._local_backend.evictions,
+                'adaptive_limiters': len(self._adaptive_limiters)
+            },
             'active_rules': len([r for r in self._rules if r.enabled]),
             'total_rules': len(self._rules)
         }
@@ -511,28 +446,21 @@ class RateLimiter:
             # Find all applicable rules
             applicable_rules = await self._find_applicable_rules(identifier, scope, endpoint)
             
-            reset_count = 0
-            for rule in applicable_rules:
-                scope_key = self._get_scope_key(rule, identifier)
-                
-                # Clear algorithm-specific data
-                if rule.algorithm == RateLimitAlgorithm.TOKEN_BUCKET:
-                    self._token_buckets.pop(scope_key, None)
-                elif rule.algorithm == RateLimitAlgorithm.SLIDING_WINDOW:
-                    self._sliding_windows.pop(scope_key, None)
-                elif rule.algorithm == RateLimitAlgorithm.FIXED_WINDOW:
-                    self._fixed_windows.pop(scope_key, None)
-                elif rule.algorithm == RateLimitAlgorithm.LEAKY_BUCKET:
-                    self._leaky_buckets.pop(scope_key, None)
-                elif rule.algorithm == RateLimitAlgorithm.ADAPTIVE:
-                    self._adaptive_limiters.pop(scope_key, None)
-                
-                reset_count += 1
+            state_keys = [self._get_state_key(rule, identifier) for rule in applicable_rules]
+            for state_key in state_keys:
+                self._adaptive_limiters.pop(state_key, None)
+            
+            backend = await self._get_backend()
+            await backend.reset(state_keys)
+            if backend is not self._local_backend:
+                await self._local_backend.reset(state_keys)
+            reset_count = len(state_keys)
             
             logger.info(f"Reset rate limits for {identifier} ({reset_count} rules)")
             
-            await self.event_tracker.track_event(
+            self.event_tracker.track_system_event(
                 "rate_limit_reset",
+                EventLevel.INFO,
                 {
                     "identifier": identifier,
                     "scope": scope.value,
@@ -594,6 +522,60 @@ class RateLimiter:
             logger.error(f"Failed to get usage statistics: {e}")
             return {'error': str(e)}
     
+    def _index_rule(self, rule: RateLimitRule) -> None:
+        """Insert a rule into the lookup index and recompile its bucket's matcher"""
+        sort_key = (-rule.priority, next(self._rule_sequence))
+        index_key = (rule.scope, rule.scope_value)
+        bucket = self._rule_index.setdefault(index_key, [])
+        # sort_key ends in a unique sequence number, so rules themselves are never compared
+        bisect.insort(bucket, (sort_key, rule))
+        self._compile_bucket(index_key)
+    
+    def _unindex_rule(self, rule: RateLimitRule) -> None:
+        """Remove a rule from the lookup index"""
+        index_key = (rule.scope, rule.scope_value)
+        bucket = self._rule_index.get(index_key, [])
+        bucket[:] = [entry for entry in bucket if entry[1].id != rule.id]
+        if not bucket:
+            self._rule_index.pop(index_key, None)
+        self._compile_bucket(index_key)
+    
+    def _compile_bucket(self, index_key: Tuple[RateLimitScope, str]) -> None:
+        """
+        Combine a bucket's endpoint patterns into one regex.
+        
+        Each rule contributes an optional zero-width lookahead followed by an
+        empty marker group (always present for rules without patterns), so a
+        single ``match`` sets exactly the markers of the applicable rules.
+        """
+        bucket = self._rule_index.get(index_key)
+        if not bucket:
+            self._bucket_matchers.pop(index_key, None)
+            return
+        
+        parts = []
+        for i, (_, rule) in enumerate(bucket):
+            if rule.endpoint_patterns:
+                patterns = "|".join(fnmatch.translate(pattern) for pattern in rule.endpoint_patterns)
+                parts.append(f"(?:(?={patterns})(?P<_rule{i}>))?")
+            else:
+                parts.append(f"(?P<_rule{i}>)")
+        regex = re.compile("".join(parts))
+        self._bucket_matchers[index_key] = (regex, [regex.groupindex[f"_rule{i}"] for i in range(len(bucket))])
+    
+    def _bucket_candidates(
+        self,
+        index_key: Tuple[RateLimitScope, str],
+        endpoint: str
+    ) -> List[Tuple[Tuple[int, int], RateLimitRule]]:
+        """Entries of a bucket whose endpoint patterns match, in priority order"""
+        bucket = self._rule_index.get(index_key)
+        if not bucket:
+            return []
+        regex, marker_groups = self._bucket_matchers[index_key]
+        groups = regex.match(endpoint).groups()
+        return [entry for entry, group in zip(bucket, marker_groups) if groups[group - 1] is not None]
+    
     async def _find_applicable_rules(
         self,
         identifier: str,
@@ -601,220 +583,123 @@ class RateLimiter:
         endpoint: str
     ) -> List[RateLimitRule]:
         """Find rules applicable to the request"""
-        applicable_rules = []
-        
-        for rule in self._rules_by_priority:
-            if not rule.enabled:
-                continue
-            
-            # Check scope match
-            if rule.scope != scope:
-                continue
-            
-            # Check scope value match
-            if rule.scope_value != "*" and rule.scope_value != identifier:
-                continue
-            
-            # Check endpoint pattern match
-            if rule.endpoint_patterns and not self._matches_endpoint_patterns(endpoint, rule.endpoint_patterns):
-                continue
-            
-            applicable_rules.append(rule)
-        
-        return applicable_rules
-    
-    def _matches_endpoint_patterns(self, endpoint: str, patterns: List[str]) -> bool:
-        """Check if endpoint matches any of the patterns"""
-        import fnmatch
+        # Only rules for this scope and identifier (or its wildcard) are visited,
+        # each bucket filtered by endpoint in a single regex match
+        exact = self._bucket_candidates((scope, identifier), endpoint)
+        wildcard = self._bucket_candidates((scope, "*"), endpoint) if identifier != "*" else []
+        candidates = heapq.merge(exact, wildcard, key=lambda entry: entry[0]) if exact and wildcard else exact or wildcard
         
-        return any(fnmatch.fnmatch(endpoint, pattern) for pattern in patterns)
+        return [rule for _, rule in candidates if rule.enabled]
     
-    async def _check_rule(
+    def _build_check(
         self,
         rule: RateLimitRule,
         identifier: str,
         response_time: Optional[float],
         request_size: int
-    ) -> RateLimitResult:
-        """Check a specific rate limit rule"""
-        scope_key = self._get_scope_key(rule, identifier)
-        result = RateLimitResult(
-            allowed=True,
-            remaining_requests=rule.max_requests,
-            reset_time=datetime.now(timezone.utc) + timedelta(seconds=rule.window_seconds)
+    ) -> LimitCheck:
+        """Translate a rule into a backend check"""
+        state_key = self._get_state_key(rule, identifier)
+        limit = rule.max_requests
+        burst = 0
+        cost = 1
+        
+        if rule.algorithm == RateLimitAlgorithm.TOKEN_BUCKET:
+            burst = int(rule.max_requests * rule.burst_multiplier)
+            cost = max(1, request_size // 1024)  # 1 token per KB
+        elif rule.algorithm == RateLimitAlgorithm.LEAKY_BUCKET:
+            burst = int(rule.max_requests * rule.burst_multiplier)
+        elif rule.algorithm == RateLimitAlgorithm.ADAPTIVE:
+            limiter = self._adaptive_limiters.get(state_key)
+            if limiter is None:
+                if len(self._adaptive_limiters) >= self.config['adaptive_max_keys']:
+                    self._adaptive_limiters.popitem(last=False)
+                limiter = self._adaptive_limiters[state_key] = AdaptiveRateLimiter(
+                    rule.max_requests,
+                    rule.window_seconds,
+                    rule.metadata.get('adaptation_factor', 0.1)
+                )
+            else:
+                self._adaptive_limiters.move_to_end(state_key)
+            limit = limiter.update(response_time)
+        
+        return LimitCheck(
+            key=state_key,
+            algorithm=self._BACKEND_ALGORITHMS[rule.algorithm],
+            limit=limit,
+            window_seconds=rule.window_seconds,
+            burst=burst,
+            cost=cost
         )
-        
+    
+    async def _evaluate(self, checks: List[LimitCheck]) -> List[LimitDecision]:
+        """Evaluate checks on the shared backend, degrading to local state on errors"""
+        backend = await self._get_backend()
+        try:
+            return await backend.evaluate(checks)
+        except Exception as e:
+            if backend is self._local_backend:
+                raise
+            logger.warning(f"Shared rate limit state unavailable, using local state: {e}")
+            return await self._local_backend.evaluate(checks)
+    
+    async def _check_rules(
+        self,
+        rules: List[Tuple[RateLimitRule, str]],
+        response_time: Optional[float],
+        request_size: int
+    ) -> List[RateLimitResult]:
+        """Check all applicable (rule, identifier) pairs in one round trip, in order"""
+        if not rules:
+            return []
+        
+        checks = [
+            self._build_check(rule, identifier, response_time, request_size)
+            for rule, identifier in rules
+        ]
         try:
-            if rule.algorithm == RateLimitAlgorithm.TOKEN_BUCKET:
-                result = await self._check_token_bucket(rule, scope_key, result, request_size)
-            elif rule.algorithm == RateLimitAlgorithm.SLIDING_WINDOW:
-                result = await self._check_sliding_window(rule, scope_key, result)
-            elif rule.algorithm == RateLimitAlgorithm.FIXED_WINDOW:
-                result = await self._check_fixed_window(rule, scope_key, result)
-            elif rule.algorithm == RateLimitAlgorithm.LEAKY_BUCKET:
-                result = await self._check_leaky_bucket(rule, scope_key, result)
-            elif rule.algorithm == RateLimitAlgorithm.ADAPTIVE:
-                result = await self._check_adaptive(rule, scope_key, result, response_time)
+            decisions = await self._evaluate(checks)
+        except Exception as e:
+            logger.error(f"Error checking rate limit rules: {e}")
+            # Fail open (allow request) on error
+            return []
+        
+        now = datetime.now(timezone.utc)
+        results = []
+        for (rule, identifier), check, decision in zip(rules, checks, decisions):
+            result = RateLimitResult(
+                allowed=decision.allowed,
+                remaining_requests=max(0, decision.remaining),
+                reset_time=now + timedelta(seconds=decision.reset_after),
+                limit=check.burst or check.limit
+            )
             
             # Handle violation
-            if not result.allowed:
+            if not decision.allowed:
                 result.violation_detected = True
+                result.retry_after_seconds = max(1, math.ceil(decision.retry_after))
                 self._rate_limit_stats['rule_violations'][rule.id] += 1
                 
                 # Store violation for tracking
                 await self._track_violation(rule, identifier)
                 
                 # Add Retry-After header
-                if result.retry_after_seconds:
-                    result.headers['Retry-After'] = str(result.retry_after_seconds)
-            
-            return result
+                result.headers['Retry-After'] = str(result.retry_after_seconds)
             
-        except Exception as e:
-            logger.error(f"Error checking rate limit rule {rule.id}: {e}")
-            # Fail open (allow request) on error
-            return result
-    
-    async def _check_token_bucket(
-        self,
-        rule: RateLimitRule,
-        scope_key: str,
-        result: RateLimitResult,
-        request_size: int
-    ) -> RateLimitResult:
-        """Check token bucket rate limit"""
-        # Get or create token bucket
-        if scope_key not in self._token_buckets:
-            capacity = int(rule.max_requests * rule.burst_multiplier)
-            refill_rate = rule.max_requests / rule.window_seconds
-            self._token_buckets[scope_key] = TokenBucket(capacity, refill_rate)
-        
-        bucket = self._token_buckets[scope_key]
-        
-        # Calculate tokens needed (weight by request size)
-        tokens_needed = max(1, request_size // 1024)  # 1 token per KB
-        
-        if bucket.consume(tokens_needed):
-            result.remaining_requests = int(bucket.get_remaining_tokens())
-            result.reset_time = datetime.fromtimestamp(
-                time.time() + (bucket.capacity - bucket.tokens) / bucket.refill_rate,
-                tz=timezone.utc
-            )
-        else:
-            result.allowed = False
-            result.retry_after_seconds = int(1 / bucket.refill_rate)  # Time until next token
+            results.append(result)
         
-        return result
+        return results
     
-    async def _check_sliding_window(
-        self,
-        rule: RateLimitRule,
-        scope_key: str,
-        result: RateLimitResult
-    ) -> RateLimitResult:
-        """Check sliding window rate limit"""
-        # Get or create sliding window
-        if scope_key not in self._sliding_windows:
-            self._sliding_windows[scope_key] = SlidingWindow(rule.max_requests, rule.window_seconds)
-        
-        window = self._sliding_windows[scope_key]
-        
-        if window.is_allowed():
-            result.remaining_requests = window.get_remaining_requests()
-        else:
-            result.allowed = False
-            # Calculate time until oldest request expires
-            result.retry_after_seconds = rule.window_seconds
-        
-        return result
-    
-    async def _check_fixed_window(
-        self,
-        rule: RateLimitRule,
-        scope_key: str,
-        result: RateLimitResult
-    ) -> RateLimitResult:
-        """Check fixed window rate limit"""
-        # Get or create fixed window
-        if scope_key not in self._fixed_windows:
-            self._fixed_windows[scope_key] = FixedWindow(rule.max_requests, rule.window_seconds)
-        
-        window = self._fixed_windows[scope_key]
-        
-        if window.is_allowed():
-            result.remaining_requests = window.get_remaining_requests()
-            result.reset_time = window.get_window_reset_time()
-        else:
-            result.allowed = False
-            # Time until current window ends
-            time_until_reset = window.get_window_reset_time() - datetime.now(timezone.utc)
-            result.retry_after_seconds = int(time_until_reset.total_seconds())
-        
-        return result
-    
-    async def _check_leaky_bucket(
-        self,
-        rule: RateLimitRule,
-        scope_key: str,
-        result: RateLimitResult
-    ) -> RateLimitResult:
-        """Check leaky bucket rate limit"""
-        # Get or create leaky bucket
-        if scope_key not in self._leaky_buckets:
-            capacity = int(rule.max_requests * rule.burst_multiplier)
-            leak_rate = rule.max_requests / rule.window_seconds
-            self._leaky_buckets[scope_key] = LeakyBucket(capacity, leak_rate)
-        
-        bucket = self._leaky_buckets[scope_key]
-        
-        if bucket.process_request():
-            result.remaining_requests = int(bucket.capacity - bucket.get_water_level())
-        else:
-            result.allowed = False
-            # Time to leak one request
-            result.retry_after_seconds = int(1 / bucket.leak_rate)
-        
-        return result
-    
-    async def _check_adaptive(
-        self,
-        rule: RateLimitRule,
-        scope_key: str,
-        result: RateLimitResult,
-        response_time: Optional[float]
-    ) -> RateLimitResult:
-        """Check adaptive rate limit"""
-        # Get or create adaptive limiter
-        if scope_key not in self._adaptive_limiters:
-            self._adaptive_limiters[scope_key] = AdaptiveRateLimiter(
-                rule.max_requests,
-                rule.window_seconds,
-                rule.metadata.get('adaptation_factor', 0.1)
-            )
-        
-        limiter = self._adaptive_limiters[scope_key]
-        
-        if limiter.is_allowed(response_time):
-            result.remaining_requests = int(limiter.current_limit)
-            # Adaptive limiters use sliding window for timing
-            if scope_key in self._sliding_windows:
-                result.reset_time = datetime.fromtimestamp(
-                    time.time() + self._sliding_windows[scope_key].window_seconds,
-                    tz=timezone.utc
-                )
-        else:
-            result.allowed = False
-            result.retry_after_seconds = rule.window_seconds
-        
-        return result
-    
-    def _get_scope_key(self, rule: RateLimitRule, identifier: str) -> str:
-        """Generate unique scope key for algorithm storage"""
-        return f"{rule.scope.value}:{rule.scope_value}:{identifier}"
+    def _get_state_key(self, rule: RateLimitRule, identifier: str) -> str:
+        """Backend key for a rule's state for one identifier"""
+        # The identifier is a hash tag so a request's keys share a Redis Cluster slot
+        return namespace_manager.get_cache_key(
+            self.redis_cache.namespace,
+            f"{self.config['redis_namespace']}:{{{identifier}}}:{rule.id}"
+        )
     
     async def _get_rule_status(self, rule: RateLimitRule, identifier: str) -> Dict[str, Any]:
         """Get status for a specific rule"""
-        scope_key = self._get_scope_key(rule, identifier)
         status = {
             'rule_id': rule.id,
             'rule_name': rule.name,
@@ -825,23 +710,18 @@ class RateLimiter:
         }
         
         try:
-            # Get algorithm-specific status
-            if rule.algorithm == RateLimitAlgorithm.TOKEN_BUCKET and scope_key in self._token_buckets:
-                bucket = self._token_buckets[scope_key]
-                status['remaining_tokens'] = round(bucket.get_remaining_tokens(), 2)
-                status['capacity'] = bucket.capacity
-                
-            elif rule.algorithm == RateLimitAlgorithm.SLIDING_WINDOW and scope_key in self._sliding_windows:
-                window = self._sliding_windows[scope_key]
-                status['remaining_requests'] = window.get_remaining_requests()
-                
-            elif rule.algorithm == RateLimitAlgorithm.FIXED_WINDOW and scope_key in self._fixed_windows:
-                window = self._fixed_windows[scope_key]
-                status['remaining_requests'] = window.get_remaining_requests()
-                status['window_reset_time'] = window.get_window_reset_time().isoformat()
-                
-            elif rule.algorithm == RateLimitAlgorithm.ADAPTIVE and scope_key in self._adaptive_limiters:
-                limiter = self._adaptive_limiters[scope_key]
+            # A zero-cost check reads the state without consuming from it
+            check = self._build_check(rule, identifier, None, 0)
+            check.cost = 0
+            decision = (await self._evaluate([check]))[0]
+            
+            status['remaining_requests'] = decision.remaining
+            status['reset_after_seconds'] = decision.reset_after
+            if check.algorithm == GCRA:
+                status['capacity'] = check.burst
+            
+            if rule.algorithm == RateLimitAlgorithm.ADAPTIVE:
+                limiter = self._adaptive_limiters[check.key]
                 status['current_limit'] = round(limiter.current_limit, 2)
                 status['system_load'] = round(limiter.system_load, 3)
                 status['performance_score'] = round(limiter.performance_score, 3)
@@ -864,15 +744,14 @@ class RateLimiter:
                 'window_seconds': rule.window_seconds
             }
             
-            # Store in Redis for tracking
+            # Store in Redis for tracking: last 100 violations for 24 hours
             cache_key = f"{self.config['redis_namespace']}:violations:{rule.id}"
-            await self.redis_cache.lpush(cache_key, json.dumps(violation_data))
-            await self.redis_cache.ltrim(cache_key, 0, 99)  # Keep last 100 violations
-            await self.redis_cache.expire(cache_key, 86400)  # 24 hours
+            await self.redis_cache.lpush_capped(cache_key, json.dumps(violation_data), 100, ttl=86400)
             
             # Track in telemetry
-            await self.event_tracker.track_event(
+            self.event_tracker.track_system_event(
                 "rate_limit_violation",
+                EventLevel.WARNING,
                 {
                     "rule_id": rule.id,
                     "identifier": identifier,
@@ -896,7 +775,7 @@ class RateLimiter:
         """Add standard rate limit headers to result"""
         # Standard rate limit headers
         result.headers.update({
-            'X-RateLimit-Limit': str(result.remaining_requests),
+            'X-RateLimit-Limit': str(result.limit),
             'X-RateLimit-Remaining': str(result.remaining_requests),
             'X-RateLimit-Reset': str(int(result.reset_time.timestamp()))
         })
@@ -982,18 +861,8 @@ class RateLimiter:
             current_time = time.time()
             cleanup_count = 0
             
-            # Clean up expired sliding windows
-            expired_keys = []
-            for key, window in self._sliding_windows.items():
-                # Remove windows older than their window size
-                if hasattr(window, 'requests') and window.requests:
-                    oldest_request = window.requests[0]
-                    if current_time - oldest_request > window.window_seconds * 2:
-                        expired_keys.append(key)
-            
-            for key in expired_keys:
-                del self._sliding_windows[key]
-                cleanup_count += 1
+            # Shared state expires in Redis; only the local fallback needs sweeping
+            cleanup_count += self._local_backend.purge_expired()
             
             # Clean up old violation logs
             violation_pattern = f"{self.config['redis_namespace']}:violations:*"
@@ -1009,11 +878,21 @@ class RateLimiter:
     
     async def close(self):
         """Cleanup resources"""
-        # Clear all algorithm instances
-        self._token_buckets.clear()
-        self._sliding_windows.clear()
-        self._fixed_windows.clear()
-        self._leaky_buckets.clear()
+        # Clear process-local state
+        self._local_backend.clear()
         self._adaptive_limiters.clear()
+        self._backend = None
+        self._backend_client = None
         
-        logger.info("RateLimiter closed")
\ No newline at end of file
+        logger.info("RateLimiter closed")
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the shared rate limiter (HTTP middleware and API routes)"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
@@ -47,13 +47,13 @@ Global Services:
 """
 
 from .metrics_collector import (
-    MetricsCollector, MetricType, MetricData, SystemMetrics,
+    MetricsCollector, MetricType, MetricData, SystemMetrics, QuantileSketch,
     metrics_collector, record_business_metric, record_application_metric,
     record_custom_metric, increment_metric, timer_metric
 )
 
 from .event_tracker import (
-    EventTracker, EventLevel, EventCategory, EventContext, Event,
+    EventTracker, EventLevel, EventCategory, EventContext, Event, EventPage,
     event_tracker, tracked_operation, track_function,
     track_user_action, track_business_event, track_api_call, track_billing_event
 )
@@ -93,12 +93,12 @@ from .background_tasks import (
 
 __all__ = [
     # Metrics Collector
-    "MetricsCollector", "MetricType", "MetricData", "SystemMetrics",
+    "MetricsCollector", "MetricType", "MetricData", "SystemMetrics", "QuantileSketch",
     "metrics_collector", "record_business_metric", "record_application_metric",
     "record_custom_metric", "increment_metric", "timer_metric",
     
     # Event Tracker
-    "EventTracker", "EventLevel", "EventCategory", "EventContext", "Event",
+    "EventTracker", "EventLevel", "EventCategory", "EventContext", "Event", "EventPage",
     "event_tracker", "tracked_operation", "track_function",
     "track_user_action", "track_business_event", "track_api_call", "track_billing_event",
     
@@ -243,8 +243,8 @@ def get_telemetry_health_status() -> dict:
     return {
         "metrics_collector": {
             "status": "healthy",
-            "total_metrics": len(metrics_collector._metrics),
-            "active_gauges": len(metrics_collector._gauges),
+            "total_metrics": len(metrics_collector._series),
+            "dropped_series": metrics_collector.dropped_series,
         },
         "event_tracker": {
             "status": "healthy", 
@@ -271,22 +271,16 @@ class AlertManager:
         """Evaluate a single alert rule."""
         from .metrics_collector import metrics_collector
         
-        # Get recent metrics data
-        cutoff_time = datetime.utcnow() - timedelta(seconds=rule.evaluation_period)
-        recent_metrics = metrics_collector.get_recent_metrics(
+        # Average of all samples recorded over the evaluation period
+        recent_stats = metrics_collector.get_recent_stats(
             rule.metric_name, 
             duration_minutes=rule.evaluation_period // 60
         )
         
-        if not recent_metrics:
+        if not recent_stats:
             return
         
-        # Calculate average value over evaluation period
-        values = [m.value for m in recent_metrics if m.timestamp >= cutoff_time]
-        if not values:
-            return
-        
-        avg_value = sum(values) / len(values)
+        avg_value = recent_stats["mean"]
         
         # Check if condition is met
         if self._check_condition(avg_value, rule.condition, rule.threshold):
@@ -21,7 +21,7 @@ import json
 from app.services.telemetry import (
     metrics_collector, event_tracker, performance_monitor,
     distributed_tracer, alert_manager,
-    EventCategory, EventLevel
+    EventCategory, EventLevel, AlertSeverity
 )
 
 
@@ -261,10 +261,9 @@ class TelemetryBackgroundTasks:
         """Check for metric anomalies and generate alerts."""
         try:
             # Check for unusual spikes in error rates
-            recent_error_rate = metrics_collector.get_recent_metrics("http.error_rate.percent", 10)
-            if recent_error_rate:
-                values = [m.value for m in recent_error_rate]
-                avg_error_rate = sum(values) / len(values)
+            error_rate_stats = metrics_collector.get_recent_stats("http.error_rate.percent", 10)
+            if error_rate_stats:
+                avg_error_rate = error_rate_stats["mean"]
                 
                 # Alert if error rate is unusually high
                 if avg_error_rate > 10:  # 10% error rate threshold
@@ -276,11 +275,10 @@ class TelemetryBackgroundTasks:
                     )
             
             # Check for performance degradation
-            response_times = metrics_collector.get_recent_metrics("http.response_time_ms", 30)
-            if response_times:
-                values = [m.value for m in response_times]
-                avg_response_time = sum(values) / len(values)
-                max_response_time = max(values)
+            response_time_stats = metrics_collector.get_recent_stats("http.response_time_ms", 30)
+            if response_time_stats:
+                avg_response_time = response_time_stats["mean"]
+                max_response_time = response_time_stats["max"]
                 
                 # Alert if average response time is slow
                 if avg_response_time > 2000:  # 2 second threshold
@@ -404,7 +402,7 @@ class TelemetryBackgroundTasks:
                     )
             
             # Analyze error event patterns
-            error_events = event_tracker.get_events({"level": "error"}, limit=100)
+            error_events = event_tracker.get_events({"level": "error"}, limit=100, newest_first=True)
             if error_events:
                 # Group errors by type
                 error_types = defaultdict(int)
@@ -432,7 +430,8 @@ class TelemetryBackgroundTasks:
             # Get recent security events
             security_events = event_tracker.get_events(
                 {"category": "security"}, 
-                limit=50
+                limit=50,
+                newest_first=True
             )
             
             # Look for suspicious patterns
@@ -469,7 +468,8 @@ class TelemetryBackgroundTasks:
             # Get recent business events
             business_events = event_tracker.get_events(
                 {"category": "business"}, 
-                limit=100
+                limit=100,
+                newest_first=True
             )
             
             # Analyze revenue events
@@ -13,29 +13,49 @@ Features:
 - OpenTelemetry-compatible tracing
 - Automatic span creation
 - Context propagation
-- Trace sampling
+- Head and tail trace sampling
+- Bounded span storage
 - Service dependency analysis
 - Real-time trace streaming
 """
 
 import asyncio
+import random
 import time
 import threading
 import logging
-import uuid
-from typing import Dict, List, Optional, Any, Callable, Set
-from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterator, List, Optional, Any, Callable, Set, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from collections import deque, defaultdict
+from collections import defaultdict
 from contextvars import ContextVar
 import json
 import traceback
-import weakref
 
 
 logger = logging.getLogger(__name__)
 
+# W3C trace-flags bit set when the trace is sampled
+SAMPLED_FLAG = 0x01
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _random_trace_id() -> str:
+    """128-bit trace id as 32 hex chars; the module RNG is reseeded after fork"""
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+def _random_span_id() -> str:
+    """64-bit span id as 16 hex chars"""
+    return f"{random.getrandbits(64) or 1:016x}"
+
+
+def _to_timestamp(moment: datetime) -> float:
+    """Naive UTC datetime (as produced by ``datetime.utcnow()``) to epoch seconds"""
+    return (moment - _EPOCH).total_seconds()
+
 
 class TraceStatus(Enum):
     """Trace execution status."""
@@ -57,6 +77,18 @@ class SpanType(Enum):
     EXTERNAL_API = "external_api"
 
 
+_SPAN_KINDS = {
+    SpanType.ENTRY: "SERVER",
+    SpanType.EXIT: "CLIENT",
+    SpanType.HTTP_REQUEST: "SERVER",
+    SpanType.DATABASE: "CLIENT",
+    SpanType.MESSAGE_QUEUE: "CLIENT",
+    SpanType.CACHE: "CLIENT",
+    SpanType.EXTERNAL_API: "CLIENT",
+    SpanType.INTERNAL: "INTERNAL"
+}
+
+
 @dataclass
 class TraceContext:
     """Distributed trace context."""
@@ -64,8 +96,14 @@ class TraceContext:
     span_id: str
     parent_span_id: Optional[str] = None
     baggage: Dict[str, Any] = field(default_factory=dict)
-    trace_flags: int = 0x1  # Sampled flag
+    trace_flags: int = SAMPLED_FLAG
     trace_state: str = ""
+    # Context that was current when this span started; restored when it ends
+    previous: Optional["TraceContext"] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def sampled(self) -> bool:
+        return bool(self.trace_flags & SAMPLED_FLAG)
 
 
 @dataclass
@@ -84,24 +122,92 @@ class TraceEvent:
     attributes: List[TraceAttribute] = field(default_factory=list)
 
 
-@dataclass
 class TraceSpan:
-    """Individual trace span."""
-    span_id: str
-    trace_id: str
-    name: str
-    span_type: SpanType
-    start_time: datetime
-    end_time: Optional[datetime] = None
-    status: TraceStatus = TraceStatus.OK
-    parent_span_id: Optional[str] = None
-    service_name: str = "unknown"
-    operation_name: str = ""
-    attributes: List[TraceAttribute] = field(default_factory=list)
-    events: List[TraceEvent] = field(default_factory=list)
-    resource_attributes: Dict[str, Any] = field(default_factory=dict)
-    links: List[str] = field(default_factory=list)  # Linked span IDs
-    kind: str = "INTERNAL"  # INTERNAL, CLIENT, SERVER, PRODUCER, CONSUMER
+    """
+    Individual trace span.
+    
+    Slotted, with epoch-second timestamps and attributes kept as a dict of
+    ``key -> (value, type)``; events, links and resource attributes are only
+    allocated when used.
+    """
+    
+    __slots__ = ("span_id", "trace_id", "name", "span_type", "start_ts", "end_ts", "status",
+                 "parent_span_id", "service_name", "operation_name", "kind",
+                 "_attributes", "_events", "_links", "_resource_attributes")
+    
+    def __init__(self, span_id: str, trace_id: str, name: str, span_type: SpanType,
+                 start_ts: float, parent_span_id: Optional[str] = None,
+                 service_name: str = "unknown", operation_name: str = "",
+                 kind: str = "INTERNAL"):
+        self.span_id = span_id
+        self.trace_id = trace_id
+        self.name = name
+        self.span_type = span_type
+        self.start_ts = start_ts
+        self.end_ts: Optional[float] = None
+        self.status = TraceStatus.OK
+        self.parent_span_id = parent_span_id
+        self.service_name = service_name
+        self.operation_name = operation_name
+        self.kind = kind  # INTERNAL, CLIENT, SERVER, PRODUCER, CONSUMER
+        self._attributes: Dict[str, Tuple[Any, str]] = {}
+        self._events: Optional[List[TraceEvent]] = None
+        self._links: Optional[List[str]] = None
+        self._resource_attributes: Optional[Dict[str, Any]] = None
+    
+    @property
+    def start_time(self) -> datetime:
+        return datetime.utcfromtimestamp(self.start_ts)
+    
+    @property
+    def end_time(self) -> Optional[datetime]:
+        return datetime.utcfromtimestamp(self.end_ts) if self.end_ts is not None else None
+    
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end_ts - self.start_ts) * 1000 if self.end_ts is not None else None
+    
+    def set_attribute(self, key: str, value: Any, value_type: str = "string"):
+        self._attributes[key] = (value, value_type)
+    
+    @property
+    def attributes(self) -> List[TraceAttribute]:
+        return [TraceAttribute(key, value, value_type) for key, (value, value_type) in self._attributes.items()]
+    
+    @property
+    def events(self) -> List[TraceEvent]:
+        if self._events is None:
+            self._events = []
+        return self._events
+    
+    @property
+    def links(self) -> List[str]:
+        """Linked span IDs"""
+        if self._links is None:
+            self._links = []
+        return self._links
+    
+    @property
+    def resource_attributes(self) -> Dict[str, Any]:
+        if self._resource_attributes is None:
+            self._resource_attributes = {}
+        return self._resource_attributes
+    
+    def __repr__(self) -> str:
+        return f"TraceSpan(name={self.name!r}, trace_id={self.trace_id!r}, span_id={self.span_id!r})"
+
+
+class _PendingTrace:
+    """Spans of a sampled trace that still has spans open in this process"""
+    
+    __slots__ = ("trace_id", "spans", "open", "error", "created")
+    
+    def __init__(self, trace_id: str, created: float):
+        self.trace_id = trace_id
+        self.spans: List[TraceSpan] = []
+        self.open = 0
+        self.error = False
+        self.created = created
 
 
 class DistributedTracer:
@@ -110,29 +216,62 @@ class DistributedTracer:
     
     Provides comprehensive distributed tracing with automatic span creation,
     context propagation, and trace analysis capabilities.
+    
+    Sampling happens in two steps:
+    
+    - Head sampling decides when a trace starts, from the trace id, so every
+      service reaches the same decision; it is propagated in the sampled bit
+      of ``trace_flags``. Spans of unsampled traces only carry context and
+      are never stored.
+    - Tail sampling decides once every local span of a sampled trace has
+      ended: with a latency threshold set, only traces that errored or took
+      at least that long are kept.
+    
+    Kept spans go into a fixed-size span arena (a ring); the oldest spans are
+    overwritten when it is full, so memory stays flat under load.
     """
     
-    def __init__(self, max_traces: int = 10000, max_spans_per_trace: int = 1000):
+    # Pending traces with spans still open after this long are decided anyway
+    PENDING_TIMEOUT_SECONDS = 3600
+    
+    def __init__(self, max_traces: int = 10000, max_spans_per_trace: int = 1000,
+                 max_spans: int = 100000, sampling_rate: float = 1.0,
+                 tail_latency_ms: Optional[float] = None):
         """Initialize the distributed tracer.
         
         Args:
-            max_traces: Maximum number of traces to keep in memory
+            max_traces: Maximum number of traces being recorded at once
             max_spans_per_trace: Maximum spans per trace
+            max_spans: Size of the span arena holding kept spans
+            sampling_rate: Fraction of new traces to sample (head sampling)
+            tail_latency_ms: Keep only errored traces and traces at least this
+                slow (tail sampling); None keeps every sampled trace
         """
         self.max_traces = max_traces
         self.max_spans_per_trace = max_spans_per_trace
         
         # Thread-safe data storage
         self._lock = threading.RLock()
-        self._traces: Dict[str, Dict[str, TraceSpan]] = {}  # trace_id -> span_id -> span
-        self._span_index: Dict[str, str] = {}  # span_id -> trace_id
+        self._arena: List[Optional[TraceSpan]] = [None] * max_spans
+        self._arena_first = 0  # sequence number of the oldest stored span
+        self._arena_next = 0  # sequence number of the next stored span
+        self._traces: Dict[str, List[int]] = {}  # trace_id -> arena sequence numbers of kept spans
+        self._active_traces: Dict[str, _PendingTrace] = {}  # sampled traces still recording
+        self._open_spans: Dict[str, Tuple[TraceSpan, _PendingTrace]] = {}  # span_id -> open span
         self._service_dependencies: Dict[str, Set[str]] = defaultdict(set)
-        self._active_traces: Dict[str, TraceContext] = {}
-        self._completed_traces: deque = deque(maxlen=max_traces)
         
         # Sampling configuration
-        self._sampling_rate: float = 1.0  # Trace all spans by default
+        self._sampling_rate: float = 1.0
+        self._sampling_threshold = 1 << 64
         self._sampling_rules: List[Callable[[str], bool]] = []
+        self._tail_latency_ms: Optional[float] = tail_latency_ms
+        self.set_sampling_rate(sampling_rate)
+        
+        # Sampling outcomes
+        self.traces_started = 0
+        self.traces_sampled_out = 0  # head sampling
+        self.traces_dropped = 0  # tail sampling or capacity
+        self.traces_kept = 0
         
         # Background tasks
         self._cleanup_task: Optional[asyncio.Task] = None
@@ -146,8 +285,12 @@ class DistributedTracer:
             'trace_context', default=None
         )
         
-        logger.info("Distributed tracer initialized with max_traces=%d, max_spans_per_trace=%d",
-                   max_traces, max_spans_per_trace)
+        logger.info("Distributed tracer initialized with max_traces=%d, max_spans_per_trace=%d, max_spans=%d",
+                   max_traces, max_spans_per_trace, max_spans)
+    
+    @property
+    def max_spans(self) -> int:
+        return len(self._arena)
     
     async def start(self):
         """Start the distributed tracer background tasks."""
@@ -181,27 +324,103 @@ class DistributedTracer:
             logger.error(f"Error in trace cleanup: {e}")
     
     async def _cleanup_old_traces(self):
-        """Clean up old completed traces."""
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
+        """Drop kept spans older than 24 hours and decide pending traces that never finished."""
+        now = time.time()
+        cutoff = now - 24 * 3600
+        kept: List[TraceSpan] = []
         
         with self._lock:
-            trace_ids_to_remove = []
-            
-            for trace_id, spans in self._traces.items():
-                # Check if all spans in the trace are completed and old
-                if all(span.end_time and span.end_time < cutoff_time for span in spans.values()):
-                    trace_ids_to_remove.append(trace_id)
+            while self._arena_first < self._arena_next:
+                span = self._arena[self._arena_first % self.max_spans]
+                if span.end_ts is not None and span.end_ts >= cutoff:
+                    break
+                self._evict_oldest()
             
-            for trace_id in trace_ids_to_remove:
-                # Move to completed traces
-                self._completed_traces.append(self._traces[trace_id].copy())
-                del self._traces[trace_id]
-                del self._active_traces[trace_id]
-                
-                # Clean up index
-                for span_id in list(self._span_index.keys()):
-                    if self._span_index[span_id] == trace_id:
-                        del self._span_index[span_id]
+            stale = [
+                pending for pending in self._active_traces.values()
+                if pending.created < now - self.PENDING_TIMEOUT_SECONDS
+            ]
+            for pending in stale:
+                for span in pending.spans:
+                    self._open_spans.pop(span.span_id, None)
+                kept.extend(self._finish_trace(pending))
+        
+        self._stream_spans(kept)
+    
+    # Span arena
+    
+    def _evict_oldest(self):
+        """Drop the oldest span from the arena (lock held)."""
+        slot = self._arena_first % self.max_spans
+        span = self._arena[slot]
+        self._arena[slot] = None
+        seqs = self._traces.get(span.trace_id)
+        if seqs:
+            # A trace's spans are stored in order, so the oldest is first
+            seqs.pop(0)
+            if not seqs:
+                del self._traces[span.trace_id]
+        self._arena_first += 1
+    
+    def _store_span(self, span: TraceSpan):
+        """Append a kept span to the arena, overwriting the oldest when full (lock held)."""
+        if self._arena_next - self._arena_first >= self.max_spans:
+            self._evict_oldest()
+        seq = self._arena_next
+        self._arena[seq % self.max_spans] = span
+        self._arena_next += 1
+        seqs = self._traces.get(span.trace_id)
+        if seqs is None:
+            seqs = self._traces[span.trace_id] = []
+        seqs.append(seq)
+    
+    def resize_span_arena(self, max_spans: int):
+        """Change the arena size, keeping the newest spans that fit."""
+        with self._lock:
+            spans = [self._arena[seq % self.max_spans] for seq in range(self._arena_first, self._arena_next)]
+            self._arena = [None] * max_spans
+            self._arena_first = self._arena_next = 0
+            self._traces = {}
+            for span in spans[-max_spans:]:
+                self._store_span(span)
+    
+    def _stored_spans(self, trace_id: str) -> List[TraceSpan]:
+        """Kept and still-recording spans of a trace (lock held)."""
+        spans = [self._arena[seq % self.max_spans] for seq in self._traces.get(trace_id, ())]
+        pending = self._active_traces.get(trace_id)
+        if pending is not None:
+            spans.extend(pending.spans)
+        return spans
+    
+    def _iter_traces(self) -> Iterator[Tuple[str, List[TraceSpan]]]:
+        """Kept traces with their spans (lock held)."""
+        for trace_id, seqs in self._traces.items():
+            yield trace_id, [self._arena[seq % self.max_spans] for seq in seqs]
+    
+    # Sampling
+    
+    def _finish_trace(self, pending: _PendingTrace) -> List[TraceSpan]:
+        """Apply tail sampling to a trace whose local spans all ended (lock held)."""
+        self._active_traces.pop(pending.trace_id, None)
+        if not self._keep_trace(pending):
+            self.traces_dropped += 1
+            return []
+        self.traces_kept += 1
+        for span in pending.spans:
+            self._store_span(span)
+        return pending.spans
+    
+    def _keep_trace(self, pending: _PendingTrace) -> bool:
+        if self._tail_latency_ms is None or pending.error or pending.open:
+            return True
+        start = min(span.start_ts for span in pending.spans)
+        end = max(span.end_ts for span in pending.spans)
+        return (end - start) * 1000 >= self._tail_latency_ms
+    
+    def set_tail_sampling(self, latency_ms: Optional[float]):
+        """Keep only errored traces and traces at least ``latency_ms`` long; None keeps all."""
+        self._tail_latency_ms = latency_ms
+        logger.info(f"Set tail sampling latency threshold to {latency_ms}")
     
     def set_trace_context(self, context: Optional[TraceContext]):
         """Set the current trace context."""
@@ -213,16 +432,15 @@ class DistributedTracer:
     
     def create_trace_context(self, trace_id: Optional[str] = None,
                            parent_span_id: Optional[str] = None) -> TraceContext:
-        """Create a new trace context."""
+        """Create a new trace context, applying head sampling."""
         if not trace_id:
-            trace_id = str(uuid.uuid4()).replace('-', '')
-        
-        span_id = str(uuid.uuid4()).replace('-', '')
+            trace_id = _random_trace_id()
         
         return TraceContext(
             trace_id=trace_id,
-            span_id=span_id,
-            parent_span_id=parent_span_id
+            span_id=_random_span_id(),
+            parent_span_id=parent_span_id,
+            trace_flags=SAMPLED_FLAG if self.should_sample(trace_id) else 0
         )
     
     def start_span(self, name: str, span_type: SpanType = SpanType.INTERNAL,
@@ -243,58 +461,72 @@ class DistributedTracer:
         Returns:
             New trace context with span information
         """
-        # Use provided context or create new one
-        context = parent_context or self.get_current_context() or self.create_trace_context()
+        current = self.get_current_context()
+        parent = parent_context or current
+        span_id = _random_span_id()
+        
+        if parent is not None:
+            trace_id = parent.trace_id
+            parent_span_id = parent.span_id
+            trace_flags = parent.trace_flags
+        else:
+            trace_id = _random_trace_id()
+            parent_span_id = None
+            trace_flags = SAMPLED_FLAG if self.should_sample(trace_id) else 0
+        
+        new_context = TraceContext(
+            trace_id=trace_id,
+            span_id=span_id,
+            parent_span_id=parent_span_id,
+            baggage=parent.baggage.copy() if parent is not None and parent.baggage else {},
+            trace_flags=trace_flags,
+            trace_state=parent.trace_state if parent is not None else "",
+            previous=current
+        )
+        self.set_trace_context(new_context)
         
-        # Create new span ID
-        span_id = str(uuid.uuid4()).replace('-', '')
+        if not trace_flags & SAMPLED_FLAG:
+            return new_context
         
-        # Create span
         span = TraceSpan(
             span_id=span_id,
-            trace_id=context.trace_id,
+            trace_id=trace_id,
             name=name,
             span_type=span_type,
-            start_time=datetime.utcnow(),
-            parent_span_id=context.parent_span_id,
+            start_ts=time.time(),
+            parent_span_id=parent_span_id,
             service_name=service_name,
             operation_name=operation_name or name,
-            attributes=attributes or [],
-            kind=self._determine_span_kind(span_type)
+            kind=_SPAN_KINDS.get(span_type, "INTERNAL")
         )
+        if attributes:
+            for attribute in attributes:
+                span.set_attribute(attribute.key, attribute.value, attribute.type)
         
         # Store span
         with self._lock:
-            if context.trace_id not in self._traces:
-                self._traces[context.trace_id] = {}
+            pending = self._active_traces.get(trace_id)
+            if pending is None:
+                if len(self._active_traces) >= self.max_traces:
+                    self.traces_dropped += 1
+                    return new_context
+                pending = self._active_traces[trace_id] = _PendingTrace(trace_id, span.start_ts)
+                self.traces_started += 1
             
             # Check span limit per trace
-            if len(self._traces[context.trace_id]) >= self.max_spans_per_trace:
-                logger.warning(f"Max spans per trace reached for trace {context.trace_id}")
-                return context
+            if len(pending.spans) >= self.max_spans_per_trace:
+                logger.warning(f"Max spans per trace reached for trace {trace_id}")
+                return new_context
             
-            self._traces[context.trace_id][span_id] = span
-            self._span_index[span_id] = context.trace_id
-        
-        # Update service dependencies
-        if parent_context:
-            with self._lock:
-                self._service_dependencies[service_name].add(parent_context.service_name)
-        
-        # Set new context
-        new_context = TraceContext(
-            trace_id=context.trace_id,
-            span_id=span_id,
-            parent_span_id=context.span_id,
-            baggage=context.baggage.copy(),
-            trace_flags=context.trace_flags,
-            trace_state=context.trace_state
-        )
-        
-        # Set as current context
-        self.set_trace_context(new_context)
+            pending.spans.append(span)
+            pending.open += 1
+            self._open_spans[span_id] = (span, pending)
+            
+            # Update service dependencies
+            parent_entry = self._open_spans.get(parent_span_id) if parent_span_id else None
+            if parent_entry is not None and parent_entry[0].service_name != service_name:
+                self._service_dependencies[service_name].add(parent_entry[0].service_name)
         
-        logger.debug(f"Started span: {name} ({span_id}) in trace: {context.trace_id}")
         return new_context
     
     def end_span(self, status: TraceStatus = TraceStatus.OK,
@@ -311,81 +543,63 @@ class DistributedTracer:
             events: Optional span events
             
         Returns:
-            Updated trace context
+            The context that was current when the span started
         """
         context = self.get_current_context()
         if not context:
             logger.warning("No active span to end")
             return None
         
-        span_id = context.span_id
-        trace_id = context.trace_id
-        
+        kept: List[TraceSpan] = []
         with self._lock:
-            if trace_id in self._traces and span_id in self._traces[trace_id]:
-                span = self._traces[trace_id][span_id]
-                span.end_time = end_time or datetime.utcnow()
+            entry = self._open_spans.pop(context.span_id, None)
+            if entry is not None:
+                span, pending = entry
+                span.end_ts = _to_timestamp(end_time) if end_time else time.time()
                 span.status = status
                 
                 # Add attributes
                 if attributes:
-                    span.attributes.extend(attributes)
+                    for attribute in attributes:
+                        span.set_attribute(attribute.key, attribute.value, attribute.type)
                 
                 # Add events
                 if events:
                     span.events.extend(events)
                 
-                # Calculate duration
-                duration_ms = (span.end_time - span.start_time).total_seconds() * 1000
-                span.attributes.append(TraceAttribute("duration_ms", duration_ms, "float"))
+                span.set_attribute("duration_ms", span.duration_ms, "float")
+                
+                if status == TraceStatus.ERROR:
+                    pending.error = True
+                pending.open -= 1
+                if pending.open == 0:
+                    kept = self._finish_trace(pending)
         
-        # Stream completed span
-        self._stream_completed_span(trace_id, span_id)
+        # Stream completed spans of kept traces
+        self._stream_spans(kept)
         
-        # Return to parent context
-        if context.parent_span_id:
-            parent_context = TraceContext(
-                trace_id=trace_id,
-                span_id=context.parent_span_id,
-                parent_span_id=span.parent_span_id,
-                baggage=context.baggage,
-                trace_flags=context.trace_flags,
-                trace_state=context.trace_state
-            )
-            self.set_trace_context(parent_context)
-            return parent_context
-        else:
-            # Root span completed, clear context
-            self.set_trace_context(None)
+        # Return to the context the span started in
+        self.set_trace_context(context.previous)
+        return context.previous
+    
+    def _current_span(self) -> Optional[TraceSpan]:
+        context = self.get_current_context()
+        if context is None or not context.trace_flags & SAMPLED_FLAG:
             return None
+        entry = self._open_spans.get(context.span_id)
+        return entry[0] if entry is not None else None
     
     def add_span_attribute(self, key: str, value: Any, value_type: str = "string"):
         """Add an attribute to the current span."""
-        context = self.get_current_context()
-        if not context:
-            return
-        
-        attribute = TraceAttribute(key, value, value_type)
-        
-        with self._lock:
-            trace_id = context.trace_id
-            span_id = context.span_id
-            
-            if trace_id in self._traces and span_id in self._traces[trace_id]:
-                span = self._traces[trace_id][span_id]
-                
-                # Update existing attribute or add new one
-                existing_attr = next((attr for attr in span.attributes if attr.key == key), None)
-                if existing_attr:
-                    existing_attr.value = value
-                    existing_attr.type = value_type
-                else:
-                    span.attributes.append(attribute)
+        span = self._current_span()
+        if span is not None:
+            with self._lock:
+                span.set_attribute(key, value, value_type)
     
     def add_span_event(self, name: str, attributes: Optional[List[TraceAttribute]] = None):
         """Add an event to the current span."""
-        context = self.get_current_context()
-        if not context:
+        span = self._current_span()
+        if span is None:
             return
         
         event = TraceEvent(
@@ -395,25 +609,13 @@ class DistributedTracer:
         )
         
         with self._lock:
-            trace_id = context.trace_id
-            span_id = context.span_id
-            
-            if trace_id in self._traces and span_id in self._traces[trace_id]:
-                span = self._traces[trace_id][span_id]
-                span.events.append(event)
+            span.events.append(event)
     
     def link_span(self, linked_span_id: str):
         """Link the current span to another span."""
-        context = self.get_current_context()
-        if not context:
-            return
-        
-        with self._lock:
-            trace_id = context.trace_id
-            span_id = context.span_id
-            
-            if trace_id in self._traces and span_id in self._traces[trace_id]:
-                span = self._traces[trace_id][span_id]
+        span = self._current_span()
+        if span is not None:
+            with self._lock:
                 span.links.append(linked_span_id)
     
     def record_exception(self, exception: Exception, attributes: Optional[List[TraceAttribute]] = None):
@@ -436,22 +638,14 @@ class DistributedTracer:
     
     def _determine_span_kind(self, span_type: SpanType) -> str:
         """Determine OpenTelemetry span kind from span type."""
-        mapping = {
-            SpanType.ENTRY: "SERVER",
-            SpanType.EXIT: "CLIENT",
-            SpanType.HTTP_REQUEST: "SERVER",
-            SpanType.DATABASE: "CLIENT",
-            SpanType.MESSAGE_QUEUE: "CLIENT",
-            SpanType.CACHE: "CLIENT",
-            SpanType.EXTERNAL_API: "CLIENT",
-            SpanType.INTERNAL: "INTERNAL"
-        }
-        return mapping.get(span_type, "INTERNAL")
+        return _SPAN_KINDS.get(span_type, "INTERNAL")
     
-    def _stream_completed_span(self, trace_id: str, span_id: str):
-        """Stream completed span to listeners."""
-        span_data = self.get_span_data(trace_id, span_id)
-        if span_data:
+    def _stream_spans(self, spans: List[TraceSpan]):
+        """Stream completed spans to listeners."""
+        if not spans or not self._stream_listeners:
+            return
+        for span in spans:
+            span_data = self._span_to_dict(span)
             for listener in self._stream_listeners:
                 try:
                     listener(span_data)
@@ -461,13 +655,14 @@ class DistributedTracer:
     def get_trace(self, trace_id: str) -> Optional[Dict[str, TraceSpan]]:
         """Get all spans for a trace."""
         with self._lock:
-            return self._traces.get(trace_id, {}).copy()
+            return {span.span_id: span for span in self._stored_spans(trace_id)}
     
     def get_span(self, trace_id: str, span_id: str) -> Optional[TraceSpan]:
         """Get a specific span."""
         with self._lock:
-            if trace_id in self._traces and span_id in self._traces[trace_id]:
-                return self._traces[trace_id][span_id]
+            for span in self._stored_spans(trace_id):
+                if span.span_id == span_id:
+                    return span
         return None
     
     def get_span_data(self, trace_id: str, span_id: str) -> Optional[Dict[str, Any]]:
@@ -475,25 +670,29 @@ class DistributedTracer:
         span = self.get_span(trace_id, span_id)
         if not span:
             return None
-        
+        return self._span_to_dict(span)
+    
+    @staticmethod
+    def _span_to_dict(span: TraceSpan) -> Dict[str, Any]:
+        end_time = span.end_time
         return {
-            "trace_id": trace_id,
-            "span_id": span_id,
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
             "name": span.name,
             "span_type": span.span_type.value,
             "start_time": span.start_time.isoformat(),
-            "end_time": span.end_time.isoformat() if span.end_time else None,
+            "end_time": end_time.isoformat() if end_time else None,
             "status": span.status.value,
             "parent_span_id": span.parent_span_id,
             "service_name": span.service_name,
             "operation_name": span.operation_name,
-            "attributes": [{"key": attr.key, "value": attr.value, "type": attr.type} 
-                          for attr in span.attributes],
+            "attributes": [{"key": key, "value": value, "type": value_type}
+                          for key, (value, value_type) in span._attributes.items()],
             "events": [{"name": event.name, "timestamp": event.timestamp.isoformat(),
                        "attributes": [{"key": attr.key, "value": attr.value, "type": attr.type}
                                     for attr in event.attributes]}
-                      for event in span.events],
-            "links": span.links,
+                      for event in span._events or ()],
+            "links": list(span._links or ()),
             "kind": span.kind
         }
     
@@ -501,22 +700,26 @@ class DistributedTracer:
                             start_time: Optional[datetime] = None,
                             end_time: Optional[datetime] = None) -> List[str]:
         """Get trace IDs containing spans for a specific service."""
+        start_ts = _to_timestamp(start_time) if start_time else None
+        end_ts = _to_timestamp(end_time) if end_time else None
+        
         with self._lock:
             matching_traces = []
+            now = time.time()
             
-            for trace_id, spans in self._traces.items():
+            for trace_id, spans in self._iter_traces():
                 # Check time range
-                if start_time or end_time:
-                    trace_start = min(span.start_time for span in spans.values())
-                    trace_end = max(span.end_time or datetime.utcnow() for span in spans.values())
+                if start_ts is not None or end_ts is not None:
+                    trace_start = min(span.start_ts for span in spans)
+                    trace_end = max(span.end_ts or now for span in spans)
                     
-                    if start_time and trace_end < start_time:
+                    if start_ts is not None and trace_end < start_ts:
                         continue
-                    if end_time and trace_start > end_time:
+                    if end_ts is not None and trace_start > end_ts:
                         continue
                 
                 # Check if any span belongs to the service
-                if any(span.service_name == service_name for span in spans.values()):
+                if any(span.service_name == service_name for span in spans):
                     matching_traces.append(trace_id)
             
             return matching_traces
@@ -532,36 +735,41 @@ class DistributedTracer:
         with self._lock:
             total_traces = len(self._traces)
             active_traces = len(self._active_traces)
-            completed_traces = len(self._completed_traces)
             
             # Calculate span statistics
-            total_spans = sum(len(spans) for spans in self._traces.values())
+            total_spans = self._arena_next - self._arena_first
             error_spans = 0
             total_duration = 0
             
-            for spans in self._traces.values():
-                for span in spans.values():
-                    if span.status == TraceStatus.ERROR:
-                        error_spans += 1
-                    if span.end_time:
-                        total_duration += (span.end_time - span.start_time).total_seconds()
-            
             # Service statistics
             service_stats = defaultdict(int)
-            for spans in self._traces.values():
-                for span in spans.values():
-                    service_stats[span.service_name] += 1
+            for seq in range(self._arena_first, self._arena_next):
+                span = self._arena[seq % self.max_spans]
+                if span.status == TraceStatus.ERROR:
+                    error_spans += 1
+                if span.end_ts is not None:
+                    total_duration += span.end_ts - span.start_ts
+                service_stats[span.service_name] += 1
             
             return {
                 "total_traces": total_traces,
                 "active_traces": active_traces,
-                "completed_traces": completed_traces,
+                "completed_traces": self.traces_kept,
                 "total_spans": total_spans,
                 "error_spans": error_spans,
                 "error_rate": (error_spans / total_spans * 100) if total_spans > 0 else 0,
                 "avg_trace_duration": (total_duration / total_spans) if total_spans > 0 else 0,
                 "services": dict(service_stats),
-                "service_dependencies": self.get_service_dependencies()
+                "service_dependencies": self.get_service_dependencies(),
+                "sampling": {
+                    "head_sampling_rate": self._sampling_rate,
+                    "tail_latency_ms": self._tail_latency_ms,
+                    "traces_started": self.traces_started,
+                    "traces_sampled_out": self.traces_sampled_out,
+                    "traces_dropped": self.traces_dropped,
+                    "traces_kept": self.traces_kept,
+                    "span_arena_size": self.max_spans
+                }
             }
     
     def get_slowest_traces(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -569,21 +777,18 @@ class DistributedTracer:
         with self._lock:
             trace_durations = []
             
-            for trace_id, spans in self._traces.items():
-                if all(span.end_time for span in spans.values()):  # Completed traces only
-                    trace_start = min(span.start_time for span in spans.values())
-                    trace_end = max(span.end_time for span in spans.values())
-                    duration = (trace_end - trace_start).total_seconds()
-                    
-                    service_count = len(set(span.service_name for span in spans.values()))
+            for trace_id, spans in self._iter_traces():
+                if all(span.end_ts is not None for span in spans):  # Completed traces only
+                    trace_start = min(span.start_ts for span in spans)
+                    trace_end = max(span.end_ts for span in spans)
                     
                     trace_durations.append({
                         "trace_id": trace_id,
-                        "duration_seconds": duration,
+                        "duration_seconds": trace_end - trace_start,
                         "span_count": len(spans),
-                        "service_count": service_count,
-                        "start_time": trace_start.isoformat(),
-                        "end_time": trace_end.isoformat()
+                        "service_count": len(set(span.service_name for span in spans)),
+                        "start_time": datetime.utcfromtimestamp(trace_start).isoformat(),
+                        "end_time": datetime.utcfromtimestamp(trace_end).isoformat()
                     })
             
             # Sort by duration (descending)
@@ -592,8 +797,9 @@ class DistributedTracer:
             return trace_durations[:limit]
     
     def set_sampling_rate(self, rate: float):
-        """Set the sampling rate for trace collection."""
+        """Set the head sampling rate for new traces."""
         self._sampling_rate = max(0.0, min(1.0, rate))  # Clamp between 0 and 1
+        self._sampling_threshold = int(self._sampling_rate * (1 << 64))
         logger.info(f"Set sampling rate to {self._sampling_rate}")
     
     def add_sampling_rule(self, rule_func: Callable[[str], bool]):
@@ -601,18 +807,27 @@ class DistributedTracer:
         self._sampling_rules.append(rule_func)
     
     def should_sample(self, trace_id: str) -> bool:
-        """Determine if a trace should be sampled."""
-        # Check sampling rate
-        import random
-        if random.random() > self._sampling_rate:
-            return False
+        """
+        Head sampling decision for a new trace.
+        
+        Derived from the low 64 bits of the trace id rather than a fresh
+        random draw, so any service seeing the same trace id agrees.
+        """
+        try:
+            sampled = int(trace_id[-16:], 16) < self._sampling_threshold
+        except ValueError:
+            sampled = random.random() < self._sampling_rate
         
         # Check sampling rules
-        for rule in self._sampling_rules:
-            if not rule(trace_id):
-                return False
+        if sampled:
+            for rule in self._sampling_rules:
+                if not rule(trace_id):
+                    sampled = False
+                    break
         
-        return True
+        if not sampled:
+            self.traces_sampled_out += 1
+        return sampled
     
     def add_stream_listener(self, listener: Callable[[Dict[str, Any]], None]):
         """Add a real-time trace stream listener."""
@@ -627,7 +842,7 @@ class DistributedTracer:
         if format_type.lower() == "json":
             trace_data = {
                 "trace_id": trace_id,
-                "spans": [self.get_span_data(trace_id, span_id) for span_id in trace],
+                "spans": [self._span_to_dict(span) for span in trace.values()],
                 "exported_at": datetime.utcnow().isoformat()
             }
             return json.dumps(trace_data, indent=2, default=str)
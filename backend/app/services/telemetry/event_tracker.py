@@ -14,18 +14,21 @@ Features:
 - Event correlation and chaining
 - Performance impact monitoring
 - Configurable event retention
+- Indexed in-memory store with cursor pagination
 - Integration with external logging systems
 - Real-time event streaming
 """
 
 import asyncio
+import bisect
+import sys
 import time
 import threading
 import logging
 import uuid
 import json
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterator, List, Optional, Any, Callable, Tuple, Union
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from collections import deque, defaultdict
@@ -62,32 +65,284 @@ class EventCategory(Enum):
     EXTRACTION = "extraction"
 
 
-@dataclass
 class EventContext:
     """Context information for events."""
-    user_id: Optional[str] = None
-    session_id: Optional[str] = None
-    request_id: Optional[str] = None
-    correlation_id: Optional[str] = None
-    source: str = "application"
-    environment: str = "development"
-    version: str = "1.0.0"
+    
+    __slots__ = ("user_id", "session_id", "request_id", "correlation_id", "source", "environment", "version")
+    
+    def __init__(self, user_id: Optional[str] = None, session_id: Optional[str] = None,
+                 request_id: Optional[str] = None, correlation_id: Optional[str] = None,
+                 source: str = "application", environment: str = "development", version: str = "1.0.0"):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.request_id = request_id
+        self.correlation_id = correlation_id
+        self.source = source
+        self.environment = environment
+        self.version = version
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    def __repr__(self) -> str:
+        return f"EventContext({self.to_dict()!r})"
+
+
+# Shared by events without a context or metadata instead of one empty object each
+_EMPTY_CONTEXT = EventContext()
 
 
-@dataclass
 class Event:
-    """Event data structure."""
-    id: str
-    name: str
-    category: EventCategory
-    level: EventLevel
-    timestamp: datetime
-    context: EventContext
-    data: Dict[str, Any] = field(default_factory=dict)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    duration_ms: Optional[float] = None
-    error_details: Optional[Dict[str, Any]] = None
-    tags: List[str] = field(default_factory=list)
+    """Event record; slotted to keep memory per stored event small."""
+    
+    __slots__ = ("id", "name", "category", "level", "timestamp", "context", "data",
+                 "_metadata", "duration_ms", "error_details", "tags", "seq")
+    
+    def __init__(self, id: str, name: str, category: EventCategory, level: EventLevel,
+                 timestamp: datetime, context: EventContext,
+                 data: Optional[Dict[str, Any]] = None,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 duration_ms: Optional[float] = None,
+                 error_details: Optional[Dict[str, Any]] = None,
+                 tags: Optional[List[str]] = None):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.level = level
+        self.timestamp = timestamp
+        self.context = context
+        self.data = data if data is not None else {}
+        self._metadata = metadata
+        self.duration_ms = duration_ms
+        self.error_details = error_details
+        self.tags = tags if tags is not None else []
+        self.seq = -1  # position in the store, assigned when stored
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        # Allocated on first use; most events never carry metadata
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "category": self.category,
+            "level": self.level,
+            "timestamp": self.timestamp,
+            "context": self.context.to_dict() if self.context is not None else None,
+            "data": self.data,
+            "metadata": self._metadata or {},
+            "duration_ms": self.duration_ms,
+            "error_details": self.error_details,
+            "tags": self.tags
+        }
+    
+    def __repr__(self) -> str:
+        return f"Event(id={self.id!r}, name={self.name!r}, category={self.category}, level={self.level})"
+
+
+@dataclass
+class EventPage:
+    """One page of a cursor-paginated event query."""
+    events: List[Event]
+    next_cursor: Optional[int] = None  # pass back as ``cursor`` for the next page; None when exhausted
+
+
+class _Postings:
+    """Ascending sequence numbers of one index key; consumed from the front as events are evicted"""
+    
+    __slots__ = ("seqs", "head")
+    
+    def __init__(self, seqs: Optional[List[int]] = None):
+        self.seqs: List[int] = seqs or []
+        self.head = 0
+    
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+    
+    def append(self, seq: int):
+        self.seqs.append(seq)
+    
+    def first(self) -> int:
+        return self.seqs[self.head]
+    
+    def pop_first(self):
+        self.head += 1
+        # Compact once the consumed prefix dominates, keeping pops amortized O(1)
+        if self.head >= 32 and self.head * 2 >= len(self.seqs):
+            del self.seqs[:self.head]
+            self.head = 0
+    
+    def bounds(self, low: int, high: int) -> Tuple[int, int]:
+        return (bisect.bisect_left(self.seqs, low, self.head),
+                bisect.bisect_left(self.seqs, high, self.head))
+
+
+class EventStore:
+    """
+    Bounded, indexed in-memory event store.
+    
+    Events live in a ring addressed by a monotonically increasing sequence
+    number, so eviction is FIFO and O(1). Secondary indexes map category,
+    level, user_id and correlation_id to the (ascending) sequence numbers of
+    their events; a value seen once (typically a correlation_id) maps to its
+    bare sequence number until a second event shares it. Per-minute time buckets map time ranges to sequence
+    ranges. Queries walk the most selective index from a cursor and stop as
+    soon as a page is full; nothing is copied wholesale.
+    
+    Not thread-safe on its own; EventTracker guards it with its lock.
+    """
+    
+    # Indexed Event fields; each maps a value to the postings of its sequence numbers
+    INDEXED_FIELDS = ("category", "level", "user_id", "correlation_id")
+    
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+        self._ring: List[Optional[Event]] = [None] * max_events
+        self._first_seq = 0
+        self._next_seq = 0
+        self._by_id: Dict[str, int] = {}
+        # value -> seq while it has one event, promoted to _Postings on the second
+        self._indexes: Dict[str, Dict[Any, Union[int, _Postings]]] = {name: {} for name in self.INDEXED_FIELDS}
+        self._bucket_minutes: deque = deque()  # minute of each time bucket, ascending
+        self._bucket_first_seq: deque = deque()  # first sequence number in that minute
+    
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+    
+    @staticmethod
+    def _index_values(event: Event) -> Tuple:
+        return (event.category, event.level, event.context.user_id, event.context.correlation_id)
+    
+    def append(self, event: Event) -> Optional[Event]:
+        """Store an event; returns the event evicted to make room, if any."""
+        evicted = self.pop_oldest() if len(self) >= self.max_events else None
+        
+        seq = self._next_seq
+        self._next_seq += 1
+        event.seq = seq
+        self._ring[seq % self.max_events] = event
+        self._by_id[event.id] = seq
+        
+        for name, value in zip(self.INDEXED_FIELDS, self._index_values(event)):
+            if value is None:
+                continue
+            index = self._indexes[name]
+            postings = index.get(value)
+            if postings is None:
+                index[value] = seq
+            elif type(postings) is int:
+                index[value] = _Postings([postings, seq])
+            else:
+                postings.append(seq)
+        
+        minute = int(event.timestamp.timestamp() // 60)
+        if not self._bucket_minutes or minute > self._bucket_minutes[-1]:
+            self._bucket_minutes.append(minute)
+            self._bucket_first_seq.append(seq)
+        return evicted
+    
+    def oldest(self) -> Optional[Event]:
+        return self._ring[self._first_seq % self.max_events] if len(self) else None
+    
+    def pop_oldest(self) -> Optional[Event]:
+        if not len(self):
+            return None
+        seq = self._first_seq
+        slot = seq % self.max_events
+        event = self._ring[slot]
+        self._ring[slot] = None
+        self._first_seq += 1
+        self._by_id.pop(event.id, None)
+        
+        # The oldest event is at the left of every index it is in
+        for name, value in zip(self.INDEXED_FIELDS, self._index_values(event)):
+            if value is None:
+                continue
+            index = self._indexes[name]
+            postings = index.get(value)
+            if postings is None:
+                continue
+            if type(postings) is int:
+                if postings == seq:
+                    del index[value]
+            elif postings.first() == seq:
+                postings.pop_first()
+                if not postings:
+                    del index[value]
+        
+        while len(self._bucket_first_seq) > 1 and self._bucket_first_seq[1] <= self._first_seq:
+            self._bucket_minutes.popleft()
+            self._bucket_first_seq.popleft()
+        return event
+    
+    def clear(self):
+        self.__init__(self.max_events)
+    
+    def get(self, event_id: str) -> Optional[Event]:
+        seq = self._by_id.get(event_id)
+        return self._ring[seq % self.max_events] if seq is not None else None
+    
+    def index_size(self, name: str, value: Any) -> int:
+        postings = self._indexes[name].get(value)
+        if postings is None:
+            return 0
+        return 1 if type(postings) is int else len(postings)
+    
+    def count(self, name: str) -> Dict[Any, int]:
+        """Events currently stored per value of an indexed field."""
+        return {value: 1 if type(postings) is int else len(postings)
+                for value, postings in self._indexes[name].items()}
+    
+    def seq_at_or_after(self, moment: datetime) -> int:
+        """First sequence number whose minute bucket is not before ``moment``'s minute."""
+        minute = int(moment.timestamp() // 60)
+        position = bisect.bisect_left(self._bucket_minutes, minute)
+        if position >= len(self._bucket_minutes):
+            return self._next_seq
+        return max(self._bucket_first_seq[position], self._first_seq)
+    
+    def seq_after(self, moment: datetime) -> int:
+        """First sequence number whose minute bucket is after ``moment``'s minute."""
+        minute = int(moment.timestamp() // 60)
+        position = bisect.bisect_right(self._bucket_minutes, minute)
+        if position >= len(self._bucket_minutes):
+            return self._next_seq
+        return max(self._bucket_first_seq[position], self._first_seq)
+    
+    def scan(self, index: Optional[Tuple[str, Any]], low: int, high: int,
+             newest_first: bool) -> Iterator[Event]:
+        """
+        Events with ``low <= seq < high``, from one index or the whole ring.
+        
+        Callers must not modify the store while iterating.
+        """
+        low = max(low, self._first_seq)
+        high = min(high, self._next_seq)
+        if low >= high:
+            return
+        
+        if index is None:
+            seqs = range(high - 1, low - 1, -1) if newest_first else range(low, high)
+            for seq in seqs:
+                yield self._ring[seq % self.max_events]
+            return
+        
+        postings = self._indexes[index[0]].get(index[1])
+        if postings is None:
+            return
+        if type(postings) is int:
+            if low <= postings < high:
+                yield self._ring[postings % self.max_events]
+            return
+        start, stop = postings.bounds(low, high)
+        seqs = postings.seqs
+        positions = range(stop - 1, start - 1, -1) if newest_first else range(start, stop)
+        for position in positions:
+            yield self._ring[seqs[position] % self.max_events]
 
 
 class EventTracker:
@@ -110,8 +365,7 @@ class EventTracker:
         
         # Thread-safe event storage
         self._lock = threading.RLock()
-        self._events: deque = deque(maxlen=max_events)
-        self._event_index: Dict[str, int] = {}  # event_id -> index
+        self._events = EventStore(max_events)
         self._category_counts: defaultdict = defaultdict(int)
         self._level_counts: defaultdict = defaultdict(int)
         
@@ -167,15 +421,14 @@ class EventTracker:
         cutoff_time = datetime.utcnow() - self.retention_period
         
         with self._lock:
-            # Remove expired events from the front of the deque
-            while self._events and self._events[0].timestamp < cutoff_time:
-                expired_event = self._events.popleft()
-                # Update counters
-                self._category_counts[expired_event.category.value] -= 1
-                self._level_counts[expired_event.level.value] -= 1
-                # Remove from index
-                if expired_event.id in self._event_index:
-                    del self._event_index[expired_event.id]
+            # Remove expired events from the oldest end of the store
+            while len(self._events) and self._events.oldest().timestamp < cutoff_time:
+                self._forget(self._events.pop_oldest())
+    
+    def _forget(self, event: Event):
+        """Update counters for an event leaving the store (lock held)."""
+        self._category_counts[event.category.value] -= 1
+        self._level_counts[event.level.value] -= 1
     
     def set_request_context(self, context: EventContext):
         """Set the current request context for automatic event enrichment."""
@@ -213,7 +466,7 @@ class EventTracker:
             tags = []
         
         # Use provided context or current context
-        event_context = context or self.get_current_context() or EventContext()
+        event_context = context or self.get_current_context() or _EMPTY_CONTEXT
         
         # Generate unique event ID
         event_id = str(uuid.uuid4())
@@ -221,7 +474,7 @@ class EventTracker:
         # Create event
         event = Event(
             id=event_id,
-            name=name,
+            name=sys.intern(name),
             category=category,
             level=level,
             timestamp=datetime.utcnow(),
@@ -234,8 +487,9 @@ class EventTracker:
         
         # Store event
         with self._lock:
-            self._events.append(event)
-            self._event_index[event_id] = len(self._events) - 1
+            evicted = self._events.append(event)
+            if evicted is not None:
+                self._forget(evicted)
             self._category_counts[category.value] += 1
             self._level_counts[level.value] += 1
         
@@ -420,84 +674,125 @@ class EventTracker:
         """Add an event stream listener."""
         self._stream_listeners.append(listener)
     
-    def get_events(self, filters: Optional[Dict[str, Any]] = None,
-                  limit: Optional[int] = None,
-                  offset: int = 0) -> List[Event]:
-        """Get events based on filters."""
-        with self._lock:
-            events = list(self._events)
+    def query_events(self, filters: Optional[Dict[str, Any]] = None,
+                     limit: Optional[int] = 100,
+                     cursor: Optional[int] = None,
+                     newest_first: bool = True) -> EventPage:
+        """
+        Query events with cursor-based pagination.
         
-        # Apply filters
-        if filters:
-            events = self._apply_filters(events, filters)
+        Args:
+            filters: category, level, user_id, correlation_id, start_time,
+                end_time, tags (any of)
+            limit: Maximum events per page (None or 0 for all matches)
+            cursor: ``next_cursor`` of the previous page
+            newest_first: Page from the newest event backwards (default) or
+                from the oldest forwards
+            
+        Returns:
+            EventPage with the matching events and the cursor for the next page
+        """
+        filters = filters or {}
+        category = filters.get("category")
+        level = filters.get("level")
+        tags = filters.get("tags")
+        if not limit:
+            limit = None
+        
+        # Indexed equality filters, most selective first
+        equality = []
+        try:
+            if category is not None:
+                equality.append(("category", EventCategory(category)))
+            if level is not None:
+                equality.append(("level", EventLevel(level)))
+        except ValueError:
+            # No event can have an unknown category or level
+            return EventPage(events=[], next_cursor=None)
+        for name in ("user_id", "correlation_id"):
+            if filters.get(name) is not None:
+                equality.append((name, filters[name]))
         
-        # Apply user-defined filters
+        with self._lock:
+            store = self._events
+            low = store.seq_at_or_after(filters["start_time"]) if "start_time" in filters else 0
+            high = store.seq_after(filters["end_time"]) if "end_time" in filters else store._next_seq
+            if cursor is not None:
+                if newest_first:
+                    high = min(high, cursor)
+                else:
+                    low = max(low, cursor + 1)
+            
+            driver = min(equality, key=lambda item: store.index_size(*item)) if equality else None
+            residual = [item for item in equality if item is not driver]
+            
+            events: List[Event] = []
+            next_cursor = None
+            for event in store.scan(driver, low, high, newest_first):
+                if not self._matches(event, residual, filters, tags):
+                    continue
+                if limit is not None and len(events) >= limit:
+                    next_cursor = events[-1].seq
+                    break
+                events.append(event)
+        
+        return EventPage(events=events, next_cursor=next_cursor)
+    
+    def _matches(self, event: Event, residual: List[Tuple[str, Any]],
+                 filters: Dict[str, Any], tags: Optional[List[str]]) -> bool:
+        """Check the filters the driving index did not already guarantee."""
+        for name, value in residual:
+            if name == "category":
+                if event.category is not value:
+                    return False
+            elif name == "level":
+                if event.level is not value:
+                    return False
+            elif getattr(event.context, name) != value:
+                return False
+        if "start_time" in filters and event.timestamp < filters["start_time"]:
+            return False
+        if "end_time" in filters and event.timestamp > filters["end_time"]:
+            return False
+        if tags and not any(tag in event.tags for tag in tags):
+            return False
         for filter_func in self._filters:
-            events = [e for e in events if filter_func(e)]
-        
-        # Apply pagination
-        if offset > 0:
-            events = events[offset:]
-        if limit:
-            events = events[:limit]
-        
-        return events
+            if not filter_func(event):
+                return False
+        return True
     
-    def _apply_filters(self, events: List[Event], filters: Dict[str, Any]) -> List[Event]:
-        """Apply filters to events list."""
-        filtered = events
-        
-        if "category" in filters:
-            filtered = [e for e in filtered if e.category.value == filters["category"]]
-        
-        if "level" in filters:
-            filtered = [e for e in filtered if e.level.value == filters["level"]]
-        
-        if "start_time" in filters:
-            start_time = filters["start_time"]
-            filtered = [e for e in filtered if e.timestamp >= start_time]
-        
-        if "end_time" in filters:
-            end_time = filters["end_time"]
-            filtered = [e for e in filtered if e.timestamp <= end_time]
-        
-        if "user_id" in filters:
-            filtered = [e for e in filtered if e.context.user_id == filters["user_id"]]
-        
-        if "tags" in filters:
-            required_tags = filters["tags"]
-            filtered = [e for e in filtered if any(tag in e.tags for tag in required_tags)]
-        
-        return filtered
+    def get_events(self, filters: Optional[Dict[str, Any]] = None,
+                  limit: Optional[int] = None,
+                  offset: int = 0,
+                  newest_first: bool = False) -> List[Event]:
+        """Get events based on filters (oldest first unless ``newest_first``)."""
+        page = self.query_events(
+            filters,
+            limit=offset + limit if limit else None,
+            newest_first=newest_first
+        )
+        return page.events[offset:]
     
     def get_event_by_id(self, event_id: str) -> Optional[Event]:
         """Get a specific event by ID."""
         with self._lock:
-            if event_id in self._event_index:
-                index = self._event_index[event_id]
-                if index < len(self._events):
-                    return self._events[index]
-        return None
+            return self._events.get(event_id)
     
     def get_correlated_events(self, correlation_id: str) -> List[Event]:
         """Get all events with the same correlation ID."""
-        with self._lock:
-            return [e for e in self._events if e.context.correlation_id == correlation_id]
+        return self.query_events({"correlation_id": correlation_id}, limit=None, newest_first=False).events
     
     def get_event_statistics(self) -> Dict[str, Any]:
         """Get event tracking statistics."""
         with self._lock:
             now = datetime.utcnow()
-            last_hour = now - timedelta(hours=1)
-            last_24h = now - timedelta(hours=24)
-            
-            recent_events = [e for e in self._events if e.timestamp >= last_hour]
-            daily_events = [e for e in self._events if e.timestamp >= last_24h]
+            store = self._events
             
+            # Minute-bucket resolution; no per-event scan
             return {
-                "total_events": len(self._events),
-                "events_last_hour": len(recent_events),
-                "events_last_24h": len(daily_events),
+                "total_events": len(store),
+                "events_last_hour": store._next_seq - store.seq_at_or_after(now - timedelta(hours=1)),
+                "events_last_24h": store._next_seq - store.seq_at_or_after(now - timedelta(hours=24)),
                 "category_distribution": dict(self._category_counts),
                 "level_distribution": dict(self._level_counts),
                 "storage_usage": {
@@ -512,12 +807,10 @@ class EventTracker:
         events = self.get_events(limit=limit)
         
         if format_type.lower() == "json":
-            events_data = [asdict(event) for event in events]
+            events_data = [event.to_dict() for event in events]
             # Convert datetime objects to ISO strings
             for event_data in events_data:
                 event_data["timestamp"] = event_data["timestamp"].isoformat()
-                if event_data["context"]:
-                    event_data["context"] = asdict(event_data["context"])
             return json.dumps(events_data, indent=2, default=str)
         else:
             raise ValueError(f"Unsupported export format: {format_type}")
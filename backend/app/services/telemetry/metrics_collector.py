@@ -8,25 +8,28 @@ This module provides comprehensive metrics collection capabilities including:
 - Custom metrics (billing, licensing, payments)
 
 Features:
-- Real-time collection and aggregation
-- Efficient in-memory storage with configurable limits
-- Thread-safe operations
-- Automatic cleanup of expired metrics
+- Pre-aggregated storage: one series per interned (name, labels), updated
+  in place, so recording a sample allocates nothing
+- Mergeable quantile sketches for histograms and timers (relative-error
+  buckets, combinable across workers)
+- Per-minute rollup rings per series for windowed queries
+- Striped locks instead of one global lock
+- Automatic cleanup of stale series
 - Integration with popular monitoring backends
 """
 
 import asyncio
+import math
+import re
 import time
 import threading
 import psutil
 import logging
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
 from enum import Enum
 import json
-import hashlib
 
 
 logger = logging.getLogger(__name__)
@@ -68,34 +71,286 @@ class SystemMetrics:
     timestamp: datetime
 
 
+_DISTRIBUTIONS = (MetricType.HISTOGRAM, MetricType.TIMER)
+
+_PROMETHEUS_INVALID = re.compile(r"[^a-zA-Z0-9_:]")
+
+# Quantiles reported for histograms and timers
+_QUANTILES = (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99))
+
+
+class QuantileSketch:
+    """
+    Relative-error quantile sketch (DDSketch style).
+    
+    Values are counted in logarithmic buckets so any quantile is within
+    ``relative_accuracy`` of the true value; memory and query cost are
+    O(buckets), independent of the number of samples. Sketches with the same
+    accuracy merge exactly by adding bucket counts.
+    """
+    
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma", "_multiplier", "_positive", "_negative",
+                 "zero_count", "count", "sum", "min", "max")
+    
+    # Values closer to zero than this are counted as zero
+    MIN_VALUE = 1e-9
+    
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self._gamma)
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self.clear()
+    
+    def clear(self):
+        self._positive.clear()
+        self._negative.clear()
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) * self._multiplier)
+    
+    def _value(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+    
+    def add(self, value: float):
+        if value > self.MIN_VALUE:
+            bins = self._positive
+            index = self._index(value)
+        elif value < -self.MIN_VALUE:
+            bins = self._negative
+            index = self._index(-value)
+        else:
+            self.zero_count += 1
+            bins = None
+        if bins is not None:
+            bins[index] = bins.get(index, 0) + 1
+            if len(bins) > self.max_bins:
+                self._collapse(bins)
+        
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+    
+    def _collapse(self, bins: Dict[int, int]):
+        """Fold the lowest-magnitude buckets together to stay within max_bins"""
+        indexes = sorted(bins)
+        excess = len(indexes) - self.max_bins + 1
+        folded = sum(bins.pop(index) for index in indexes[:excess])
+        target = indexes[excess]
+        bins[target] += folded
+    
+    def merge(self, other: "QuantileSketch"):
+        """Add another sketch's samples to this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for own, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+            for index, count in theirs.items():
+                own[index] = own.get(index, 0) + count
+            if len(own) > self.max_bins:
+                self._collapse(own)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile ``q`` (0..1), or None if the sketch is empty"""
+        return self.quantiles((q,))[0]
+    
+    def quantiles(self, qs) -> List[Optional[float]]:
+        """Values at several quantiles in one pass over the buckets"""
+        if not self.count:
+            return [None] * len(qs)
+        
+        # (rank, position) in ascending rank order, answered while walking the buckets once
+        pending = sorted((q * (self.count - 1), i) for i, q in enumerate(qs) if 0 < q < 1)
+        results: List[Optional[float]] = [self.min if q <= 0 else self.max for q in qs]
+        # Buckets in ascending value order; most negative first (larger index, larger magnitude)
+        walk = [(self._negative[index], -index, True) for index in sorted(self._negative, reverse=True)]
+        walk.append((self.zero_count, None, False))
+        walk.extend((self._positive[index], index, False) for index in sorted(self._positive))
+        
+        seen = 0
+        cursor = 0
+        for count, index, negative in walk:
+            seen += count
+            if cursor < len(pending) and seen > pending[cursor][0]:
+                if index is None:
+                    value = 0.0
+                elif negative:
+                    value = max(-self._value(-index), self.min)
+                else:
+                    value = min(self._value(index), self.max)
+                while cursor < len(pending) and seen > pending[cursor][0]:
+                    results[pending[cursor][1]] = value
+                    cursor += 1
+                if cursor == len(pending):
+                    break
+        return results
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form, for merging sketches from other workers"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": self._positive.copy(),
+            "negative": self._negative.copy(),
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch._positive = {int(k): v for k, v in data["positive"].items()}
+        sketch._negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+class _Rollup:
+    """One minute of a series, reused in place as the ring wraps"""
+    
+    __slots__ = ("minute", "count", "sum", "min", "max", "last", "sketch")
+    
+    def __init__(self):
+        self.minute = -1
+        self.sketch: Optional[QuantileSketch] = None
+        self.reset(-1)
+    
+    def reset(self, minute: int):
+        self.minute = minute
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+        if self.sketch is not None:
+            self.sketch.clear()
+
+
+class _Series:
+    """Aggregated state of one metric name + label set"""
+    
+    __slots__ = ("name", "labels", "metric_type", "tags", "lock", "value", "sketch", "rollups", "updated")
+    
+    def __init__(self, name: str, labels: Dict[str, Any], metric_type: MetricType, tags: List[str],
+                 lock: threading.Lock, rollup_minutes: int, relative_accuracy: float):
+        self.name = name
+        self.labels = dict(labels)
+        self.metric_type = metric_type
+        self.tags = list(tags)
+        self.lock = lock
+        self.value = 0.0  # counter total or last gauge value
+        self.sketch = QuantileSketch(relative_accuracy) if metric_type in _DISTRIBUTIONS else None
+        self.rollups = [_Rollup() for _ in range(rollup_minutes)]
+        self.updated = 0.0
+    
+    def record(self, value: float, now: float):
+        minute = int(now // 60)
+        rollup = self.rollups[minute % len(self.rollups)]
+        with self.lock:
+            if self.metric_type is MetricType.COUNTER:
+                self.value += value
+            else:
+                self.value = value
+                if self.sketch is not None:
+                    self.sketch.add(value)
+            self.updated = now
+            
+            if rollup.minute != minute:
+                rollup.reset(minute)
+            rollup.count += 1
+            rollup.sum += value
+            rollup.last = value
+            if value < rollup.min:
+                rollup.min = value
+            if value > rollup.max:
+                rollup.max = value
+            if self.sketch is not None:
+                if rollup.sketch is None:
+                    rollup.sketch = QuantileSketch(self.sketch.relative_accuracy)
+                rollup.sketch.add(value)
+    
+    def rollups_since(self, first_minute: int) -> List[_Rollup]:
+        return sorted((r for r in self.rollups if r.minute >= first_minute), key=lambda r: r.minute)
+
+
+def _window_start(duration_minutes: int) -> int:
+    """First rollup minute of the last ``duration_minutes`` minutes, the current one included"""
+    return int(time.time() // 60) - max(1, duration_minutes) + 1
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_key(labels: Optional[Dict[str, Any]]) -> Tuple:
+    if not labels:
+        return ()
+    try:
+        key = tuple(sorted(labels.items()))
+        hash(key)
+        return key
+    except TypeError:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
 class MetricsCollector:
     """
     High-performance real-time metrics collection service.
     
-    Provides thread-safe metrics collection with automatic aggregation
-    and cleanup capabilities.
+    Every (name, labels) pair is one pre-aggregated series: counters keep a
+    running total, gauges the last value, histograms and timers a quantile
+    sketch, and each series keeps a ring of per-minute rollups for windowed
+    queries. Recording updates a series in place under one of a fixed set
+    of striped locks.
     """
     
-    def __init__(self, max_metrics: int = 10000, retention_period_hours: int = 24):
+    LOCK_STRIPES = 64
+    
+    def __init__(self, max_metrics: int = 10000, retention_period_hours: int = 24,
+                 rollup_minutes: int = 60, relative_accuracy: float = 0.01):
         """Initialize the metrics collector.
         
         Args:
-            max_metrics: Maximum number of metrics to keep in memory
-            retention_period_hours: How long to keep metrics before cleanup
+            max_metrics: Maximum number of series (name + label set) kept in memory
+            retention_period_hours: Series not updated for this long are dropped
+            rollup_minutes: Minutes of per-minute rollups kept per series
+            relative_accuracy: Relative error of histogram quantiles
         """
         self.max_metrics = max_metrics
         self.retention_period = timedelta(hours=retention_period_hours)
+        self.rollup_minutes = rollup_minutes
+        self.relative_accuracy = relative_accuracy
         
-        # Thread-safe data structures
-        self._lock = threading.RLock()
-        self._metrics: deque = deque(maxlen=max_metrics)
-        self._counters: Dict[str, float] = defaultdict(float)
-        self._gauges: Dict[str, float] = {}
-        self._histograms: Dict[str, List[float]] = defaultdict(lambda: deque(maxlen=1000))
-        
-        # Aggregation buckets for time-series data
-        self._minute_buckets: Dict[str, List[MetricData]] = defaultdict(list)
-        self._hourly_buckets: Dict[str, List[MetricData]] = defaultdict(list)
+        self._lock = threading.Lock()  # series creation and removal only
+        self._stripes = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._series: Dict[Tuple[str, Tuple], _Series] = {}
+        self._series_by_name: Dict[str, List[_Series]] = {}
+        self.dropped_series = 0
         
         # Background tasks
         self._background_task: Optional[asyncio.Task] = None
@@ -131,12 +386,9 @@ class MetricsCollector:
                 # Collect system metrics every 30 seconds
                 await self._collect_system_metrics()
                 
-                # Clean up expired metrics every 5 minutes
+                # Drop series that stopped reporting
                 await self._cleanup_expired_metrics()
                 
-                # Aggregate metrics every minute
-                await self._aggregate_metrics()
-                
                 await asyncio.sleep(30)
         except asyncio.CancelledError:
             logger.info("Background collector task cancelled")
@@ -184,31 +436,59 @@ class MetricsCollector:
             logger.error(f"Error collecting system metrics: {e}")
     
     async def _cleanup_expired_metrics(self):
-        """Remove expired metrics from all storage structures."""
-        cutoff_time = datetime.utcnow() - self.retention_period
+        """Remove series that have not been updated within the retention period."""
+        cutoff = time.time() - self.retention_period.total_seconds()
         
         with self._lock:
-            # Clean main metrics deque
-            while self._metrics and self._metrics[0].timestamp < cutoff_time:
-                self._metrics.popleft()
-            
-            # Clean buckets
-            for bucket_dict in [self._minute_buckets, self._hourly_buckets]:
-                for name in bucket_dict:
-                    bucket_dict[name] = [
-                        m for m in bucket_dict[name] if m.timestamp >= cutoff_time
-                    ]
-    
-    async def _aggregate_metrics(self):
-        """Aggregate metrics into time buckets."""
-        current_time = datetime.utcnow()
-        minute_bucket = current_time.replace(second=0, microsecond=0)
+            expired = [key for key, series in self._series.items() if series.updated < cutoff]
+            for key in expired:
+                series = self._series.pop(key)
+                siblings = self._series_by_name.get(series.name, [])
+                if series in siblings:
+                    siblings.remove(series)
+                if not siblings:
+                    self._series_by_name.pop(series.name, None)
+        
+        if expired:
+            logger.debug(f"Dropped {len(expired)} stale metric series")
+    
+    def _get_series(self, name: str, metric_type: MetricType, labels: Optional[Dict[str, Any]],
+                    tags: Optional[List[str]]) -> Optional[_Series]:
+        key = (name, _labels_key(labels))
+        series = self._series.get(key)
+        if series is not None:
+            return series
         
         with self._lock:
-            # Move recent metrics to minute bucket
-            for metric in list(self._metrics):
-                if metric.timestamp >= minute_bucket:
-                    self._minute_buckets[metric.name].append(metric)
+            series = self._series.get(key)
+            if series is not None:
+                return series
+            if len(self._series) >= self.max_metrics:
+                self.dropped_series += 1
+                if self.dropped_series == 1 or self.dropped_series % 1000 == 0:
+                    logger.warning(f"Metric series limit ({self.max_metrics}) reached; dropping new series {name}")
+                return None
+            series = _Series(
+                name, labels or {}, metric_type, tags or [],
+                self._stripes[hash(key) % self.LOCK_STRIPES],
+                self.rollup_minutes, self.relative_accuracy
+            )
+            self._series[key] = series
+            self._series_by_name.setdefault(name, []).append(series)
+            return series
+    
+    def _find_series(self, name: str, labels: Optional[Dict[str, Any]]) -> Optional[_Series]:
+        return self._series.get((name, _labels_key(labels)))
+    
+    def _matching_series(self, name: str, labels: Optional[Dict[str, Any]]) -> List[_Series]:
+        """Series of ``name`` whose labels include all of ``labels``"""
+        candidates = self._series_by_name.get(name, [])
+        if not labels:
+            return list(candidates)
+        return [
+            series for series in candidates
+            if all(series.labels.get(k) == v for k, v in labels.items())
+        ]
     
     def record_metric(self, name: str, value: float, metric_type: MetricType,
                      labels: Optional[Dict[str, Any]] = None,
@@ -221,35 +501,11 @@ class MetricsCollector:
             value: Metric value
             metric_type: Type of metric (counter, gauge, histogram, timer)
             labels: Optional labels for categorization
-            tags: Optional tags for filtering
+            tags: Optional tags for filtering (kept per series)
         """
-        if labels is None:
-            labels = {}
-        if tags is None:
-            tags = []
-        
-        metric = MetricData(
-            name=name,
-            value=value,
-            timestamp=datetime.utcnow(),
-            metric_type=metric_type,
-            labels=labels,
-            tags=tags
-        )
-        
-        with self._lock:
-            self._metrics.append(metric)
-            
-            # Update aggregate data structures
-            if metric_type == MetricType.COUNTER:
-                key = self._make_key(name, labels)
-                self._counters[key] += value
-            elif metric_type == MetricType.GAUGE:
-                key = self._make_key(name, labels)
-                self._gauges[key] = value
-            elif metric_type == MetricType.HISTOGRAM:
-                key = self._make_key(name, labels)
-                self._histograms[key].append(value)
+        series = self._get_series(name, metric_type, labels, tags)
+        if series is not None:
+            series.record(value, time.time())
     
     def increment_counter(self, name: str, value: float = 1.0,
                          labels: Optional[Dict[str, Any]] = None,
@@ -277,53 +533,175 @@ class MetricsCollector:
     
     def get_current_value(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[float]:
         """Get the current value for a gauge metric."""
-        key = self._make_key(name, labels or {})
-        return self._gauges.get(key)
+        series = self._find_series(name, labels)
+        if series is None or series.metric_type is not MetricType.GAUGE:
+            return None
+        return series.value
     
     def get_counter_value(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
         """Get the cumulative value for a counter metric."""
-        key = self._make_key(name, labels or {})
-        return self._counters.get(key, 0.0)
+        series = self._find_series(name, labels)
+        if series is None or series.metric_type is not MetricType.COUNTER:
+            return 0.0
+        return series.value
     
-    def get_histogram_stats(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, float]]:
-        """Get statistics for a histogram metric."""
-        key = self._make_key(name, labels or {})
-        values = list(self._histograms.get(key, []))
+    def get_histogram_sketch(self, name: str, labels: Optional[Dict[str, Any]] = None,
+                             duration_minutes: Optional[int] = None) -> Optional[QuantileSketch]:
+        """
+        Merged sketch of a histogram or timer.
         
-        if not values:
+        Args:
+            name: Metric name
+            labels: Exact label set of the series
+            duration_minutes: Only the last N minutes (up to ``rollup_minutes``);
+                all samples since the series was created if omitted
+        """
+        series = self._find_series(name, labels)
+        if series is None or series.sketch is None:
             return None
         
-        values.sort()
-        count = len(values)
-        return {
-            "count": count,
-            "min": values[0],
-            "max": values[-1],
-            "mean": sum(values) / count,
-            "p50": values[int(count * 0.5)],
-            "p90": values[int(count * 0.9)],
-            "p95": values[int(count * 0.95)],
-            "p99": values[int(count * 0.99)]
+        merged = QuantileSketch(series.sketch.relative_accuracy)
+        with series.lock:
+            if duration_minutes is None:
+                merged.merge(series.sketch)
+            else:
+                first_minute = _window_start(duration_minutes)
+                for rollup in series.rollups_since(first_minute):
+                    if rollup.sketch is not None:
+                        merged.merge(rollup.sketch)
+        return merged
+    
+    def get_histogram_stats(self, name: str, labels: Optional[Dict[str, Any]] = None,
+                            duration_minutes: Optional[int] = None) -> Optional[Dict[str, float]]:
+        """Get statistics for a histogram metric; O(buckets), no samples are stored or sorted."""
+        if duration_minutes is not None:
+            return self._sketch_stats(self.get_histogram_sketch(name, labels, duration_minutes))
+        
+        series = self._find_series(name, labels)
+        if series is None or series.sketch is None:
+            return None
+        with series.lock:
+            return self._sketch_stats(series.sketch)
+    
+    @staticmethod
+    def _sketch_stats(sketch: Optional[QuantileSketch]) -> Optional[Dict[str, float]]:
+        if sketch is None or not sketch.count:
+            return None
+        
+        stats = {
+            "count": sketch.count,
+            "min": sketch.min,
+            "max": sketch.max,
+            "mean": sketch.mean
         }
+        values = sketch.quantiles([q for _, q in _QUANTILES])
+        for (label, _), value in zip(_QUANTILES, values):
+            stats[label] = value
+        return stats
+    
+    _ROLLUP_STATS = {
+        "sum": lambda r: r.sum,
+        "count": lambda r: r.count,
+        "mean": lambda r: r.sum / r.count,
+        "min": lambda r: r.min,
+        "max": lambda r: r.max,
+        "last": lambda r: r.last,
+    }
     
     def get_recent_metrics(self, name: str, duration_minutes: int = 60,
-                          labels: Optional[Dict[str, Any]] = None) -> List[MetricData]:
-        """Get recent metrics within the specified duration."""
-        cutoff_time = datetime.utcnow() - timedelta(minutes=duration_minutes)
+                          labels: Optional[Dict[str, Any]] = None,
+                          stat: Optional[str] = None) -> List[MetricData]:
+        """
+        Get per-minute rollups within the specified duration.
         
-        with self._lock:
-            filtered_metrics = [
-                m for m in self._metrics
-                if m.name == name and m.timestamp >= cutoff_time
-            ]
-            
-            if labels:
-                filtered_metrics = [
-                    m for m in filtered_metrics
-                    if all(m.labels.get(k) == v for k, v in labels.items())
+        One point per series and minute, oldest first. ``stat`` picks the
+        aggregate (sum, count, mean, min, max or last); by default the sum
+        for counters and the mean for gauges, histograms and timers. Use
+        ``get_recent_stats`` for count-weighted totals over the window.
+        """
+        if stat is not None and stat not in self._ROLLUP_STATS:
+            raise ValueError(f"Unknown rollup stat: {stat}")
+        
+        first_minute = _window_start(duration_minutes)
+        points = []
+        for series in self._matching_series(name, labels):
+            series_stat = stat or ("sum" if series.metric_type is MetricType.COUNTER else "mean")
+            aggregate = self._ROLLUP_STATS[series_stat]
+            with series.lock:
+                rollups = [
+                    (r.minute, aggregate(r))
+                    for r in series.rollups_since(first_minute) if r.count
                 ]
-            
-            return sorted(filtered_metrics, key=lambda x: x.timestamp)
+            for minute, value in rollups:
+                points.append(MetricData(
+                    name=name,
+                    value=value,
+                    timestamp=datetime.utcfromtimestamp(minute * 60),
+                    metric_type=series.metric_type,
+                    labels=series.labels,
+                    tags=series.tags
+                ))
+        
+        return sorted(points, key=lambda x: x.timestamp)
+    
+    def get_recent_stats(self, name: str, duration_minutes: int = 60,
+                         labels: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, float]]:
+        """
+        Exact count, sum, min, max and mean of every sample recorded within
+        the duration, across the matching series; None if there are none.
+        """
+        first_minute = _window_start(duration_minutes)
+        count, total, low, high = 0, 0.0, math.inf, -math.inf
+        for series in self._matching_series(name, labels):
+            with series.lock:
+                for rollup in series.rollups_since(first_minute):
+                    if not rollup.count:
+                        continue
+                    count += rollup.count
+                    total += rollup.sum
+                    low = min(low, rollup.min)
+                    high = max(high, rollup.max)
+        
+        if not count:
+            return None
+        return {"count": count, "sum": total, "min": low, "max": high, "mean": total / count}
+    
+    def export_series(self) -> List[Dict[str, Any]]:
+        """
+        Snapshot of every series in a serializable form.
+        
+        Snapshots from several workers can be combined with ``merge_series``.
+        """
+        snapshot = []
+        for series in list(self._series.values()):
+            with series.lock:
+                entry = {
+                    "name": series.name,
+                    "labels": series.labels,
+                    "type": series.metric_type.value,
+                    "value": series.value,
+                    "updated": series.updated
+                }
+                if series.sketch is not None:
+                    entry["sketch"] = series.sketch.to_dict()
+            snapshot.append(entry)
+        return snapshot
+    
+    def merge_series(self, snapshot: List[Dict[str, Any]]) -> None:
+        """Fold another worker's ``export_series`` snapshot into this collector."""
+        for entry in snapshot:
+            metric_type = MetricType(entry["type"])
+            series = self._get_series(entry["name"], metric_type, entry["labels"], None)
+            if series is None:
+                continue
+            with series.lock:
+                if metric_type is MetricType.COUNTER:
+                    series.value += entry["value"]
+                elif entry["updated"] >= series.updated:
+                    series.value = entry["value"]
+                if series.sketch is not None and "sketch" in entry:
+                    series.sketch.merge(QuantileSketch.from_dict(entry["sketch"]))
+                series.updated = max(series.updated, entry["updated"])
     
     def get_system_metrics_snapshot(self) -> Dict[str, Any]:
         """Get a snapshot of current system metrics."""
@@ -338,10 +716,18 @@ class MetricsCollector:
             logger.error(f"Error getting system metrics snapshot: {e}")
             return {}
     
-    def _make_key(self, name: str, labels: Dict[str, Any]) -> str:
-        """Create a unique key for metrics with labels."""
-        label_str = json.dumps(labels, sort_keys=True, default=str)
-        return f"{name}:{hashlib.md5(label_str.encode()).hexdigest()[:8]}"
+    @staticmethod
+    def _series_name(series: _Series) -> str:
+        if not series.labels:
+            return series.name
+        labels = ",".join(f"{k}={v}" for k, v in sorted(series.labels.items(), key=lambda kv: kv[0]))
+        return f"{series.name}{{{labels}}}"
+    
+    def _series_by_type(self) -> Dict[MetricType, List[_Series]]:
+        grouped: Dict[MetricType, List[_Series]] = {metric_type: [] for metric_type in MetricType}
+        for series in list(self._series.values()):
+            grouped[series.metric_type].append(series)
+        return grouped
     
     def export_metrics(self, format_type: str = "json") -> str:
         """
@@ -353,64 +739,91 @@ class MetricsCollector:
         Returns:
             Exported metrics as string
         """
-        with self._lock:
-            metrics_data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "counters": dict(self._counters),
-                "gauges": dict(self._gauges),
-                "histograms": {
-                    name: {
-                        "count": len(values),
-                        "min": min(values) if values else 0,
-                        "max": max(values) if values else 0,
-                        "mean": sum(values) / len(values) if values else 0
-                    }
-                    for name, values in self._histograms.items()
-                },
-                "system": self.get_system_metrics_snapshot()
-            }
-            
-            if format_type.lower() == "json":
-                return json.dumps(metrics_data, indent=2, default=str)
-            elif format_type.lower() == "prometheus":
-                return self._export_prometheus_format(metrics_data)
-            else:
-                raise ValueError(f"Unsupported export format: {format_type}")
+        if format_type.lower() == "prometheus":
+            return self._export_prometheus_format()
+        if format_type.lower() != "json":
+            raise ValueError(f"Unsupported export format: {format_type}")
+        
+        grouped = self._series_by_type()
+        histograms = {}
+        for series in grouped[MetricType.HISTOGRAM] + grouped[MetricType.TIMER]:
+            with series.lock:
+                sketch = series.sketch
+                histograms[self._series_name(series)] = {
+                    "count": sketch.count,
+                    "min": sketch.min if sketch.count else 0,
+                    "max": sketch.max if sketch.count else 0,
+                    "mean": sketch.mean,
+                    **dict(zip((label for label, _ in _QUANTILES),
+                               (value or 0 for value in sketch.quantiles([q for _, q in _QUANTILES]))))
+                }
+        
+        metrics_data = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "counters": {self._series_name(s): s.value for s in grouped[MetricType.COUNTER]},
+            "gauges": {self._series_name(s): s.value for s in grouped[MetricType.GAUGE]},
+            "histograms": histograms,
+            "system": self.get_system_metrics_snapshot()
+        }
+        return json.dumps(metrics_data, indent=2, default=str)
     
-    def _export_prometheus_format(self, metrics_data: Dict[str, Any]) -> str:
+    def _export_prometheus_format(self) -> str:
         """Export metrics in Prometheus text format."""
-        lines = []
+        def metric_name(name: str) -> str:
+            return _PROMETHEUS_INVALID.sub("_", name)
         
-        # Add counters
-        for name, value in metrics_data["counters"].items():
-            lines.append(f"{name} {value}")
+        def label_text(labels: Dict[str, Any], extra: Optional[Dict[str, str]] = None) -> str:
+            items = [(metric_name(str(k)), str(v)) for k, v in labels.items()]
+            if extra:
+                items.extend(extra.items())
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in items) + "}"
         
-        # Add gauges
-        for name, value in metrics_data["gauges"].items():
-            lines.append(f"{name} {value}")
+        lines = []
+        grouped = self._series_by_type()
+        for metric_type, prom_type in ((MetricType.COUNTER, "counter"), (MetricType.GAUGE, "gauge")):
+            declared = set()
+            for series in grouped[metric_type]:
+                name = metric_name(series.name)
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# TYPE {name} {prom_type}")
+                lines.append(f"{name}{label_text(series.labels)} {series.value}")
         
-        # Add histograms
-        for name, stats in metrics_data["histograms"].items():
-            for stat, value in stats.items():
-                lines.append(f"{name}_{stat} {value}")
+        declared = set()
+        for series in grouped[MetricType.HISTOGRAM] + grouped[MetricType.TIMER]:
+            name = metric_name(series.name)
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} summary")
+            with series.lock:
+                sketch = series.sketch
+                for (_, q), value in zip(_QUANTILES, sketch.quantiles([q for _, q in _QUANTILES])):
+                    if value is not None:
+                        lines.append(f"{name}{label_text(series.labels, {'quantile': str(q)})} {value}")
+                lines.append(f"{name}_sum{label_text(series.labels)} {sketch.sum}")
+                lines.append(f"{name}_count{label_text(series.labels)} {sketch.count}")
         
         return "\n".join(lines)
     
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get a comprehensive summary of collected metrics."""
-        with self._lock:
-            return {
-                "total_metrics": len(self._metrics),
-                "active_counters": len(self._counters),
-                "active_gauges": len(self._gauges),
-                "active_histograms": len(self._histograms),
-                "storage_usage": {
-                    "current_metrics": len(self._metrics),
-                    "max_metrics": self.max_metrics,
-                    "usage_percent": (len(self._metrics) / self.max_metrics) * 100
-                },
-                "system_snapshot": self.get_system_metrics_snapshot()
-            }
+        grouped = self._series_by_type()
+        total = len(self._series)
+        return {
+            "total_metrics": total,
+            "active_counters": len(grouped[MetricType.COUNTER]),
+            "active_gauges": len(grouped[MetricType.GAUGE]),
+            "active_histograms": len(grouped[MetricType.HISTOGRAM]) + len(grouped[MetricType.TIMER]),
+            "storage_usage": {
+                "current_metrics": total,
+                "max_metrics": self.max_metrics,
+                "usage_percent": (total / self.max_metrics) * 100,
+                "dropped_series": self.dropped_series
+            },
+            "system_snapshot": self.get_system_metrics_snapshot()
+        }
 
 
 # Global metrics collector instance
@@ -0,0 +1,382 @@
+"""
+Write-behind usage metering.
+
+The HTTP path records usage into an in-process buffer instead of writing a
+UsageMetric row and updating quotas per request. Increments are coalesced per
+``(user, subscription, metric_type, hour window)`` and flushed when the buffer
+reaches ``USAGE_METER_MAX_PENDING`` keys or every ``USAGE_METER_FLUSH_INTERVAL``
+seconds: one bulk INSERT of coalesced usage rows plus one batched atomic
+``current_usage = current_usage + delta`` UPDATE of the matching quotas.
+
+Quota counters are mirrored in memory (database value + unflushed delta) so
+quota checks on the request path need no query; the mirror is reconciled
+against the database every ``USAGE_METER_RECONCILE_INTERVAL`` seconds, which
+also picks up usage recorded by other processes. Quota alerts are evaluated
+only for quotas whose usage crossed an alert threshold during a flush.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, insert, select, tuple_, update
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.usage import UsageMetric, UsageQuota
+from app.services.usage_tracking_service import METRIC_UNITS, UsageTrackingService
+
+logger = logging.getLogger(__name__)
+
+# Quota usage percentages at which UsageTrackingService raises alerts
+ALERT_THRESHOLDS = (80.0, 90.0, 100.0)
+
+UsageKey = Tuple[int, Optional[int], str, datetime]
+QuotaKey = Tuple[int, int, str]
+
+
+@dataclass
+class _UsageBucket:
+    """Coalesced usage for one key and hour window"""
+    value: float = 0.0
+    count: int = 0
+    errors: int = 0
+    response_time_ms_total: int = 0
+    endpoint: Optional[str] = None
+    operation: Optional[str] = None
+
+
+@dataclass
+class _QuotaCounter:
+    """In-memory mirror of an active quota"""
+    quota_limit: float
+    persisted_usage: float  # current_usage as last read from the database
+    pending: float = 0.0  # recorded, not yet flushed
+    in_flight: float = 0.0  # being flushed
+    allow_overage: bool = False
+
+    @property
+    def usage(self) -> float:
+        return self.persisted_usage + self.in_flight + self.pending
+
+
+def _metric_name(metric_type) -> str:
+    return getattr(metric_type, "value", metric_type)
+
+
+def _window_start(now: datetime) -> datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+class UsageMeter:
+    """Buffers usage increments and writes them to the database in batches"""
+
+    def __init__(
+        self,
+        flush_interval: float = None,
+        max_pending: int = None,
+        reconcile_interval: float = None,
+        session_factory=SessionLocal
+    ):
+        self.flush_interval = flush_interval or settings.USAGE_METER_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.USAGE_METER_MAX_PENDING
+        self.reconcile_interval = reconcile_interval or settings.USAGE_METER_RECONCILE_INTERVAL
+        self.session_factory = session_factory
+
+        self._buckets: Dict[UsageKey, _UsageBucket] = {}
+        self._quotas: Dict[QuotaKey, Optional[_QuotaCounter]] = {}  # None: no active quota
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._last_reconcile = 0.0
+        self.stats = {"recorded": 0, "flushes": 0, "rows_written": 0, "flush_errors": 0}
+
+    # Request path
+
+    def record(
+        self,
+        user_id: int,
+        metric_type: str,
+        metric_value: float = 1.0,
+        subscription_id: Optional[int] = None,
+        endpoint: Optional[str] = None,
+        operation: Optional[str] = None,
+        response_time_ms: Optional[int] = None,
+        error_occurred: bool = False
+    ):
+        """Record usage; no I/O, the increment is written on the next flush"""
+        metric_type = _metric_name(metric_type)
+        key = (user_id, subscription_id, metric_type, _window_start(datetime.utcnow()))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _UsageBucket(endpoint=endpoint, operation=operation)
+        bucket.value += metric_value
+        bucket.count += 1
+        bucket.errors += error_occurred
+        bucket.response_time_ms_total += response_time_ms or 0
+
+        if subscription_id is not None:
+            quota_key = (user_id, subscription_id, metric_type)
+            counter = self._quotas.get(quota_key)
+            if counter is not None:
+                counter.pending += metric_value
+            else:
+                self._quotas.setdefault(quota_key, None)
+
+        self.stats["recorded"] += 1
+        if len(self._buckets) >= self.max_pending:
+            self._schedule_flush()
+
+    def quota_usage(self, user_id: int, subscription_id: int, metric_type: str) -> Optional[Tuple[float, float]]:
+        """(usage, limit) from the in-memory mirror, or None if not loaded / no quota"""
+        counter = self._quotas.get((user_id, subscription_id, _metric_name(metric_type)))
+        if counter is None:
+            return None
+        return counter.usage, counter.quota_limit
+
+    # Lifecycle
+
+    def start(self):
+        """Start the periodic flush loop on the running event loop"""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+                    await self.reconcile()
+            except Exception as e:
+                logger.error(f"Usage meter flush loop error: {e}")
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    # Flush
+
+    async def flush(self) -> int:
+        """Write buffered usage to the database; returns the number of usage rows written"""
+        async with self._flush_lock:
+            if not self._buckets:
+                return 0
+
+            buckets, self._buckets = self._buckets, {}
+            deltas: Dict[QuotaKey, float] = {}
+            for quota_key, counter in self._quotas.items():
+                if counter is not None and counter.pending:
+                    counter.in_flight, counter.pending = counter.pending, 0.0
+                    deltas[quota_key] = counter.in_flight
+            # Quotas not mirrored yet (first flush after start) are updated from the buckets
+            for (user_id, subscription_id, metric_type, _), bucket in buckets.items():
+                quota_key = (user_id, subscription_id, metric_type)
+                if subscription_id is not None and self._quotas.get(quota_key) is None:
+                    deltas[quota_key] = deltas.get(quota_key, 0.0) + bucket.value
+
+            try:
+                crossed = await asyncio.to_thread(self._write, buckets, deltas)
+            except Exception as e:
+                self.stats["flush_errors"] += 1
+                logger.error(f"Usage meter flush failed, will retry: {e}")
+                self._requeue(buckets)
+                return 0
+
+            for quota_key, delta in deltas.items():
+                counter = self._quotas.get(quota_key)
+                if counter is not None:
+                    counter.persisted_usage += counter.in_flight
+                    counter.in_flight = 0.0
+
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(buckets)
+
+        if crossed:
+            await self._check_alerts(crossed)
+        return len(buckets)
+
+    def _requeue(self, buckets: Dict[UsageKey, _UsageBucket]):
+        """Put a failed batch back in front of anything recorded since"""
+        for key, bucket in buckets.items():
+            current = self._buckets.get(key)
+            if current is None:
+                self._buckets[key] = bucket
+                continue
+            current.value += bucket.value
+            current.count += bucket.count
+            current.errors += bucket.errors
+            current.response_time_ms_total += bucket.response_time_ms_total
+        for counter in self._quotas.values():
+            if counter is not None and counter.in_flight:
+                counter.pending += counter.in_flight
+                counter.in_flight = 0.0
+
+    def _write(self, buckets: Dict[UsageKey, _UsageBucket], deltas: Dict[QuotaKey, float]) -> List[QuotaKey]:
+        """Bulk insert usage rows and apply quota deltas in one transaction (worker thread)"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "user_id": user_id,
+                "subscription_id": subscription_id,
+                "metric_type": metric_type,
+                "metric_value": bucket.value,
+                "unit": METRIC_UNITS.get(metric_type, "units"),
+                "timestamp": now,
+                "window_start": window_start,
+                "window_end": window_start + timedelta(hours=1),
+                "window_type": "hourly",
+                "endpoint": bucket.endpoint,
+                "operation": bucket.operation,
+                "response_time_ms": bucket.response_time_ms_total // bucket.count if bucket.count else None,
+                "error_occurred": bucket.errors > 0,
+                "meta_data": {"events": bucket.count, "errors": bucket.errors, "coalesced": True},
+                "created_at": now,
+            }
+            for (user_id, subscription_id, metric_type, window_start), bucket in buckets.items()
+        ]
+
+        quotas = UsageQuota.__table__
+        c = quotas.c
+        new_usage = c.current_usage + bindparam("delta")
+        quota_update = (
+            update(quotas)
+            .where(and_(
+                c.user_id == bindparam("q_user_id"),
+                c.subscription_id == bindparam("q_subscription_id"),
+                c.metric_type == bindparam("q_metric_type"),
+                c.is_active == True,
+                c.period_end > bindparam("q_now")
+            ))
+            .values(
+                current_usage=new_usage,
+                usage_percentage=case((c.quota_limit > 0, new_usage * 100.0 / c.quota_limit), else_=c.usage_percentage),
+                is_exceeded=case((new_usage > c.quota_limit, True), else_=c.is_exceeded),
+                exceeded_at=case((and_(new_usage > c.quota_limit, c.exceeded_at.is_(None)), bindparam("q_now")),
+                                 else_=c.exceeded_at),
+                current_overage=case((new_usage > c.quota_limit, new_usage - c.quota_limit), else_=c.current_overage),
+                updated_at=bindparam("q_now")
+            )
+        )
+        quota_params = [
+            {"delta": delta, "q_user_id": user_id, "q_subscription_id": subscription_id,
+             "q_metric_type": metric_type, "q_now": now}
+            for (user_id, subscription_id, metric_type), delta in deltas.items()
+        ]
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(UsageMetric.__table__), rows)
+            if quota_params:
+                db.execute(quota_update, quota_params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        crossed = []
+        for quota_key, delta in deltas.items():
+            counter = self._quotas.get(quota_key)
+            if counter is None or counter.quota_limit <= 0:
+                continue
+            before = counter.persisted_usage / counter.quota_limit * 100
+            after = (counter.persisted_usage + delta) / counter.quota_limit * 100
+            if any(before < threshold <= after for threshold in ALERT_THRESHOLDS):
+                crossed.append(quota_key)
+        return crossed
+
+    async def _check_alerts(self, quota_keys: List[QuotaKey]):
+        db = self.session_factory()
+        try:
+            service = UsageTrackingService(db)
+            for user_id, subscription_id, metric_type in quota_keys:
+                await service._check_quota_limits(user_id, subscription_id, metric_type)
+        except Exception as e:
+            logger.error(f"Usage meter quota alert check failed: {e}")
+        finally:
+            db.close()
+
+    # Reconciliation
+
+    async def reconcile(self):
+        """Reload mirrored quota counters from the database"""
+        async with self._flush_lock:
+            self._last_reconcile = time.monotonic()
+            keys = list(self._quotas)
+            if not keys:
+                return
+            try:
+                loaded = await asyncio.to_thread(self._load_quotas, keys)
+            except Exception as e:
+                logger.warning(f"Usage meter quota reconciliation failed: {e}")
+                return
+
+            # Buffered usage for quotas that were not mirrored yet becomes their pending delta
+            unmirrored: Dict[QuotaKey, float] = {}
+            for (user_id, subscription_id, metric_type, _), bucket in self._buckets.items():
+                quota_key = (user_id, subscription_id, metric_type)
+                if subscription_id is not None and self._quotas.get(quota_key) is None:
+                    unmirrored[quota_key] = unmirrored.get(quota_key, 0.0) + bucket.value
+
+            for key in keys:
+                row = loaded.get(key)
+                counter = self._quotas.get(key)
+                if row is None:
+                    if counter is None or not counter.pending:
+                        self._quotas[key] = None
+                    continue
+                quota_limit, current_usage, allow_overage = row
+                if counter is None:
+                    self._quotas[key] = _QuotaCounter(
+                        quota_limit, current_usage, pending=unmirrored.get(key, 0.0), allow_overage=allow_overage
+                    )
+                else:
+                    counter.quota_limit = quota_limit
+                    counter.persisted_usage = current_usage
+                    counter.allow_overage = allow_overage
+
+    def _load_quotas(self, keys: List[QuotaKey]) -> Dict[QuotaKey, Tuple[float, float, bool]]:
+        c = UsageQuota.__table__.c
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(c.user_id, c.subscription_id, c.metric_type, c.quota_limit, c.current_usage, c.allow_overage)
+                .where(and_(
+                    tuple_(c.user_id, c.subscription_id, c.metric_type).in_(keys),
+                    c.is_active == True,
+                    c.period_end > datetime.utcnow()
+                ))
+            ).all()
+        finally:
+            db.close()
+        return {
+            (row.user_id, row.subscription_id, row.metric_type): (row.quota_limit, row.current_usage, bool(row.allow_overage))
+            for row in rows
+        }
+
+
+_usage_meter: Optional[UsageMeter] = None
+
+
+def get_usage_meter() -> UsageMeter:
+    """Get the shared usage meter"""
+    global _usage_meter
+    if _usage_meter is None:
+        _usage_meter = UsageMeter()
+    return _usage_meter
@@ -20,6 +20,21 @@ from app.models.license import License
 
 logger = logging.getLogger(__name__)
 
+# Unit reported for each metric type
+METRIC_UNITS = {
+    UsageMetricType.DOCUMENT_PROCESSING: "documents",
+    UsageMetricType.DOCUMENT_PAGES: "pages",
+    UsageMetricType.API_CALLS: "calls",
+    UsageMetricType.STORAGE_USAGE: "GB",
+    UsageMetricType.USER_SESSIONS: "sessions",
+    UsageMetricType.BATCH_OPERATIONS: "batches",
+    UsageMetricType.EXPORT_OPERATIONS: "exports",
+    UsageMetricType.OCR_OPERATIONS: "operations",
+    UsageMetricType.LLM_OPERATIONS: "operations",
+    UsageMetricType.DATABASE_QUERIES: "queries",
+    UsageMetricType.BANDWIDTH_USAGE: "GB"
+}
+
 
 class UsageTrackingService:
     """
@@ -513,20 +528,7 @@ class UsageTrackingService:
     
     def _get_unit_for_metric(self, metric_type: str) -> str:
         """Get the unit for a metric type"""
-        units = {
-            UsageMetricType.DOCUMENT_PROCESSING: "documents",
-            UsageMetricType.DOCUMENT_PAGES: "pages",
-            UsageMetricType.API_CALLS: "calls",
-            UsageMetricType.STORAGE_USAGE: "GB",
-            UsageMetricType.USER_SESSIONS: "sessions",
-            UsageMetricType.BATCH_OPERATIONS: "batches",
-            UsageMetricType.EXPORT_OPERATIONS: "exports",
-            UsageMetricType.OCR_OPERATIONS: "operations",
-            UsageMetricType.LLM_OPERATIONS: "operations",
-            UsageMetricType.DATABASE_QUERIES: "queries",
-            UsageMetricType.BANDWIDTH_USAGE: "GB"
-        }
-        return units.get(metric_type, "units")
+        return METRIC_UNITS.get(metric_type, "units")
     
     async def reset_quota(
         self,
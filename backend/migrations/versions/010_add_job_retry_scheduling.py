@@ -0,0 +1,33 @@
+"""Add delayed retry scheduling to jobs
+
+Revision ID: 010_add_job_retry_scheduling
+Revises: 009_add_alerting_system
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_job_retry_scheduling'
+down_revision = '009_add_alerting_system'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add jobs.not_before and the worker claim index."""
+    
+    op.add_column('jobs', sa.Column('not_before', sa.DateTime(), nullable=True))
+    op.create_index(
+        'idx_jobs_queue_status_not_before_priority',
+        'jobs',
+        ['queue_name', 'status', 'not_before', 'priority']
+    )
+
+
+def downgrade():
+    """Drop delayed retry scheduling."""
+    
+    op.drop_index('idx_jobs_queue_status_not_before_priority', table_name='jobs')
+    op.drop_column('jobs', 'not_before')
@@ -0,0 +1,45 @@
+"""Add first-class job batches
+
+Revision ID: 011_add_job_batches
+Revises: 010_add_job_retry_scheduling
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_add_job_batches'
+down_revision = '010_add_job_retry_scheduling'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create job_batches and link jobs to it."""
+    
+    op.create_table('job_batches',
+        sa.Column('batch_id', sa.String(), nullable=False),
+        sa.Column('tenant_id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('created_by', sa.String(), nullable=True),
+        sa.Column('job_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.user_id'], ),
+        sa.PrimaryKeyConstraint('batch_id')
+    )
+    op.create_index('ix_job_batches_tenant_id', 'job_batches', ['tenant_id'])
+    
+    op.add_column('jobs', sa.Column('batch_id', sa.String(), nullable=True))
+    op.create_foreign_key('fk_jobs_batch_id', 'jobs', 'job_batches', ['batch_id'], ['batch_id'])
+    op.create_index('idx_jobs_batch_status', 'jobs', ['batch_id', 'status'])
+
+
+def downgrade():
+    """Drop job batches."""
+    
+    op.drop_index('idx_jobs_batch_status', table_name='jobs')
+    op.drop_constraint('fk_jobs_batch_id', 'jobs', type_='foreignkey')
+    op.drop_column('jobs', 'batch_id')
+    op.drop_index('ix_job_batches_tenant_id', table_name='job_batches')
+    op.drop_table('job_batches')
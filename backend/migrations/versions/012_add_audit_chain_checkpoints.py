@@ -0,0 +1,48 @@
+"""Add audit chain sequencing and Merkle checkpoints
+
+Revision ID: 012_add_audit_chain_checkpoints
+Revises: 011_add_job_batches
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012_add_audit_chain_checkpoints'
+down_revision = '011_add_job_batches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add audit_trails.sequence and create audit_checkpoints."""
+
+    # Nullable: entries written before this revision stay unsequenced
+    op.add_column('audit_trails', sa.Column('sequence', sa.BigInteger(), nullable=True))
+    op.create_index('ix_audit_trails_sequence', 'audit_trails', ['sequence'], unique=True)
+
+    op.create_table('audit_checkpoints',
+        sa.Column('checkpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('first_sequence', sa.BigInteger(), nullable=False),
+        sa.Column('last_sequence', sa.BigInteger(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('merkle_root', sa.String(length=64), nullable=False),
+        sa.Column('chain_hash', sa.String(length=64), nullable=False),
+        sa.Column('verified_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('checkpoint_id')
+    )
+    op.create_index('ix_audit_checkpoints_last_sequence', 'audit_checkpoints', ['last_sequence'], unique=True)
+    op.create_index('ix_audit_checkpoints_verified_at', 'audit_checkpoints', ['verified_at'])
+
+
+def downgrade():
+    """Drop audit chain sequencing and checkpoints."""
+
+    op.drop_index('ix_audit_checkpoints_verified_at', table_name='audit_checkpoints')
+    op.drop_index('ix_audit_checkpoints_last_sequence', table_name='audit_checkpoints')
+    op.drop_table('audit_checkpoints')
+    op.drop_index('ix_audit_trails_sequence', table_name='audit_trails')
+    op.drop_column('audit_trails', 'sequence')
@@ -0,0 +1,55 @@
+"""
+Loading service modules without their package ``__init__``.
+
+``app.models.logging`` uses PostgreSQL-only column types and cannot be
+imported on its own in this tree, and the log collection and logging package
+``__init__`` modules pull in every sibling service. Tests therefore load the
+modules they exercise directly, against a stand-in ``app.models.logging``.
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+SERVICES = Path(__file__).resolve().parents[1] / "app" / "services"
+
+LOGGING_MODEL_NAMES = (
+    "LogEntry", "LogDestination", "AuditLog", "AuditEvent", "AuditTrail", "AuditCheckpoint",
+    "ComplianceLog", "DataSubjectRecord", "RetentionPolicy", "ForensicLog", "InvestigationCase",
+    "ChainOfCustody", "EvidenceRecord",
+)
+
+
+def load_service_modules(monkeypatch, tmp_path, package, names, models=None):
+    """
+    Load ``app.services.<package>.<name>`` for each of ``names``, in order.
+
+    ``app.models.logging`` is replaced by ``models`` (an object whose
+    attributes become the module's), or by placeholders for every logging
+    model name. The working directory moves to ``tmp_path`` because the
+    structured logger writes to ``./logs``. Returns the modules as a tuple.
+    """
+    models_module = types.ModuleType("app.models.logging")
+    if models is None:
+        for model in LOGGING_MODEL_NAMES:
+            setattr(models_module, model, None)
+    else:
+        models_module.__dict__.update(vars(models))
+    package_name = f"app.services.{package}"
+    package_module = types.ModuleType(package_name)
+    package_module.__path__ = [str(SERVICES / package)]
+    (tmp_path / "logs").mkdir(exist_ok=True)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, "app.models.logging", models_module)
+    monkeypatch.setitem(sys.modules, package_name, package_module)
+
+    modules = []
+    for name in names:
+        qualified = f"{package_name}.{name}"
+        spec = importlib.util.spec_from_file_location(qualified, SERVICES / package / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, qualified, module)
+        spec.loader.exec_module(module)
+        modules.append(module)
+    return tuple(modules)
@@ -0,0 +1,232 @@
+"""
+Audit Logger Tests
+
+Hash-chain appends by the single chain writer, Merkle checkpoints and
+resumable integrity verification.
+
+``app.models.logging`` uses PostgreSQL-only column types and cannot be
+imported on its own in this tree, so the audit logger is loaded against an
+equivalent SQLite schema of the tables it writes.
+"""
+
+import types
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, JSON, String, Text, create_engine, update
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from service_loader import load_service_modules
+
+def _models():
+    Base = declarative_base()
+
+    class AuditEvent(Base):
+        __tablename__ = "audit_events"
+        event_id = Column(String(32), primary_key=True)
+        event_type = Column(String(50))
+        resource_type = Column(String(50))
+        resource_id = Column(String(100))
+        user_id = Column(String(100))
+        outcome = Column(String(20))
+        severity = Column(String(20))
+        description = Column(Text)
+        details = Column(JSON)
+        ip_address = Column(String(45))
+        user_agent = Column(Text)
+        session_id = Column(String(100))
+        timestamp = Column(DateTime)
+        event_hash = Column(String(64))
+        compliance_tags = Column(JSON)
+        retention_period_days = Column(Integer)
+
+    class AuditTrail(Base):
+        __tablename__ = "audit_trails"
+        trail_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+        audit_event_id = Column(String(32), ForeignKey("audit_events.event_id"), unique=True)
+        sequence = Column(BigInteger, unique=True, index=True)
+        previous_hash = Column(String(64))
+        chain_hash = Column(String(64), nullable=False)
+        compliance_metadata = Column(JSON)
+        created_at = Column(DateTime, default=datetime.utcnow)
+
+    class AuditCheckpoint(Base):
+        __tablename__ = "audit_checkpoints"
+        checkpoint_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+        first_sequence = Column(BigInteger, nullable=False)
+        last_sequence = Column(BigInteger, nullable=False, unique=True, index=True)
+        entry_count = Column(Integer, nullable=False)
+        merkle_root = Column(String(64), nullable=False)
+        chain_hash = Column(String(64), nullable=False)
+        verified_at = Column(DateTime)
+        created_at = Column(DateTime, default=datetime.utcnow)
+
+    class ComplianceLog(Base):
+        __tablename__ = "compliance_logs"
+        compliance_log_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+        audit_event_id = Column(String(32), ForeignKey("audit_events.event_id"))
+        regulation_standard = Column(String(50))
+        compliance_status = Column(String(20))
+        checked_at = Column(DateTime)
+        retention_until = Column(DateTime)
+        metadata_ = Column("metadata", JSON)
+
+        def __init__(self, metadata=None, **kwargs):
+            super().__init__(metadata_=metadata, **kwargs)
+
+    return Base, types.SimpleNamespace(
+        AuditLog=None, AuditEvent=AuditEvent, AuditTrail=AuditTrail,
+        AuditCheckpoint=AuditCheckpoint, ComplianceLog=ComplianceLog
+    )
+
+
+@pytest.fixture
+def audit(monkeypatch, tmp_path):
+    """audit_logger module bound to a fresh SQLite database"""
+    Base, models = _models()
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    (module,) = load_service_modules(monkeypatch, tmp_path, "logging", ("audit_logger",), models=models)
+    monkeypatch.setattr(module, "SessionLocal", session_factory)
+
+    module.models = models
+    module.session_factory = session_factory
+    yield module
+    module.audit_chain_writer.close()
+
+
+def make_logger(audit, **writer_options):
+    writer = audit.AuditChainWriter(**writer_options)
+    return audit.AuditLogger(chain_writer=writer), writer
+
+
+def log_events(audit, logger, count, **kwargs):
+    return [
+        logger.log_audit_event(audit.AuditEventType.CREATE, "document", resource_id=str(i), **kwargs)
+        for i in range(count)
+    ]
+
+
+def queue_batch(audit, logger, writer, monkeypatch, events):
+    """Build audit events without starting the writer thread; returns the batch"""
+    batch = []
+    monkeypatch.setattr(writer, "submit", lambda audit_data, add_rows: batch.append((audit_data, add_rows)))
+    for details in events:
+        logger.log_audit_event(audit.AuditEventType.CREATE, "document", details=details)
+    return batch
+
+
+class TestMerkleRoot:
+
+    def test_root_depends_on_every_leaf_and_order(self, audit):
+        leaves = [audit.chain_hash(str(i), None) for i in range(5)]
+        root = audit.merkle_root(leaves)
+
+        assert audit.merkle_root(list(leaves)) == root
+        assert audit.merkle_root(leaves[:4]) != root
+        assert audit.merkle_root(leaves[::-1]) != root
+        assert audit.merkle_root(leaves[:2] + ["0" * 64] + leaves[3:]) != root
+
+
+class TestChainWriter:
+
+    def test_batched_chain_verifies_and_resumes_from_checkpoint(self, audit):
+        logger, writer = make_logger(audit, batch_size=50, checkpoint_interval=10)
+
+        log_events(audit, logger, 35, compliance_tags=["gdpr"])
+        assert logger.flush(10)
+        writer.close()
+
+        assert writer.stats["events_written"] == 35
+        assert writer.stats["checkpoints_written"] == 3
+
+        results = logger.verify_audit_trail_integrity()
+        assert results["chain_valid"]
+        assert results["total_events"] == results["verified_events"] == 35
+        assert results["checkpoints_verified"] == 3
+        assert results["resumed_from_sequence"] is None
+
+        resumed = logger.verify_audit_trail_integrity()
+        assert resumed["chain_valid"]
+        assert resumed["resumed_from_sequence"] == 30
+        assert resumed["total_events"] == 5
+
+    def test_tampering_is_detected(self, audit):
+        logger, writer = make_logger(audit, checkpoint_interval=10)
+        log_events(audit, logger, 25)
+        assert logger.flush(10)
+        assert logger.verify_audit_trail_integrity()["chain_valid"]
+
+        AuditTrail = audit.models.AuditTrail
+        db = audit.session_factory()
+        db.execute(update(AuditTrail).where(AuditTrail.sequence == 23).values(chain_hash="0" * 64))
+        db.execute(update(AuditTrail).where(AuditTrail.sequence == 5).values(chain_hash="0" * 64))
+        db.commit()
+        db.close()
+
+        # The resumed run only covers the unverified tail
+        resumed = logger.verify_audit_trail_integrity()
+        assert not resumed["chain_valid"]
+        assert resumed["resumed_from_sequence"] == 20
+        assert {d["corruption_type"] for d in resumed["corruption_details"]} == {"chain_hash_mismatch"}
+
+        full = logger.verify_audit_trail_integrity(full=True)
+        assert not full["chain_valid"]
+        assert "checkpoint_root_mismatch" in {d["corruption_type"] for d in full["corruption_details"]}
+        assert full["checkpoints_verified"] == 0
+
+    def test_bad_event_does_not_drop_its_batch(self, audit, monkeypatch):
+        logger, writer = make_logger(audit)
+        batch = queue_batch(audit, logger, writer, monkeypatch, [
+            {"n": 1}, {"n": 2}, {"when": datetime.utcnow()}, {"n": 4}, {"n": 5}
+        ])
+
+        writer._write_batch(batch)
+
+        assert writer.stats["events_written"] == 4
+        assert writer.stats["events_failed"] == 1
+        results = logger.verify_audit_trail_integrity()
+        assert results["chain_valid"] and results["total_events"] == 4
+
+    def test_duplicate_event_is_not_a_chain_conflict(self, audit, monkeypatch):
+        logger, writer = make_logger(audit)
+        batch = queue_batch(audit, logger, writer, monkeypatch, [{"n": 1}])
+        writer._write_batch(batch)
+
+        writer._write_batch(batch)
+
+        assert writer.stats["chain_conflicts"] == 0
+        assert writer.stats["events_failed"] == 1
+        assert writer.stats["events_written"] == 1
+
+    def test_concurrent_writer_is_rechained(self, audit, monkeypatch):
+        logger, writer = make_logger(audit)
+        other_logger, other_writer = make_logger(audit)
+
+        writer._write_batch(queue_batch(audit, logger, writer, monkeypatch, [{"n": 1}]))
+        # The other process appends after our head was loaded
+        other_writer._write_batch(queue_batch(audit, other_logger, other_writer, monkeypatch, [{"n": 2}]))
+        writer._write_batch(queue_batch(audit, logger, writer, monkeypatch, [{"n": 3}]))
+
+        assert writer.stats["chain_conflicts"] == 1
+        assert writer.stats["events_written"] == 2
+        results = logger.verify_audit_trail_integrity()
+        assert results["chain_valid"] and results["total_events"] == 3
+
+    def test_full_queue_drops_instead_of_blocking(self, audit):
+        logger, writer = make_logger(audit, max_queue_size=2)
+        # Hold the writer thread back so the queue fills up
+        writer._ensure_started = lambda: None
+
+        log_events(audit, logger, 3)
+
+        assert writer.stats["events_dropped"] == 1
+        del writer._ensure_started
+        writer._ensure_started()
+        assert writer.flush(timeout=10)
+        writer.close()
+        assert writer.stats["events_written"] == 2
+        assert logger.verify_audit_trail_integrity()["total_events"] == 2
@@ -0,0 +1,144 @@
+"""
+Cache Invalidation Tests
+
+Key-prefix trie lookups and registration of proxy cache writes with the
+invalidation manager's indexes.
+"""
+
+import fnmatch
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache_config import cache_settings
+from app.services.cache import redis_cache
+from app.services.cache.redis_cache import RedisCacheService
+from app.services.proxy_caching.cache_invalidation import CacheInvalidationManager, CacheKeyTrie
+from app.services.proxy_caching.response_cache import CacheStrategy, ResponseCache
+
+
+KEYS = [
+    "proxy:cache:ocr:GET:/v1/pages",
+    "proxy:cache:ocr:POST:/v1/pages",
+    "proxy:cache:ocr-v2:GET:/v1/pages",
+    "proxy:cache:llm:POST:/v1/chat",
+    "proxy:cache:llm:POST:/v1/chat:h:abc",
+    "other:ocr:GET",
+]
+
+
+class TestCacheKeyTrie:
+    """Glob matching over the trie"""
+
+    @pytest.mark.parametrize("pattern", [
+        "proxy:cache:ocr:*",
+        "proxy:cache:ocr*",
+        "proxy:cache:*:POST:*",
+        "proxy:cache:llm:POST:/v1/chat",
+        "proxy:cache:l?m:*",
+        "*ocr*",
+        "*",
+        "nothing:*",
+    ])
+    def test_matches_fnmatch(self, pattern):
+        trie = CacheKeyTrie()
+        for key in KEYS:
+            trie.insert(key)
+
+        expected = sorted(key for key in KEYS if fnmatch.fnmatchcase(key, pattern))
+        assert sorted(trie.match(pattern)) == expected
+
+    def test_remove_prunes_branches(self):
+        trie = CacheKeyTrie()
+        for key in KEYS:
+            trie.insert(key)
+
+        for key in KEYS:
+            assert trie.remove(key)
+        assert not trie.remove(KEYS[0])
+        assert len(trie) == 0
+        assert trie.root.children == {}
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    """ResponseCache on the fakeredis backend"""
+    config = cache_settings.CONNECTION_CONFIG
+    monkeypatch.setattr(config, "REDIS_ENABLED", True)
+    monkeypatch.setattr(config, "REDIS_MOCK_MODE", True)
+    monkeypatch.setattr(redis_cache, "_redis_clients", redis_cache.weakref.WeakKeyDictionary())
+    monkeypatch.setattr(redis_cache, "_fake_server", None)
+
+    cache = ResponseCache()
+    cache.cache_service = RedisCacheService(namespace="test")
+    cache.config["compression_enabled"] = False
+    return cache
+
+
+def _endpoint(endpoint_id, tags=()):
+    return SimpleNamespace(
+        id=endpoint_id,
+        cache_enabled=True,
+        cache_strategy=CacheStrategy.BASIC,
+        cache_ttl_seconds=60,
+        tags=list(tags)
+    )
+
+
+def _request(method, path, query=None):
+    return SimpleNamespace(method=method, path=path, query_params=query or {}, headers={})
+
+
+def _response():
+    return SimpleNamespace(
+        status_code=200,
+        headers={"content-type": "application/json"},
+        content=b'{"ok": true}'
+    )
+
+
+class TestCacheRegistration:
+    """ResponseCache writes feed the manager's indexes"""
+
+    @pytest.mark.asyncio
+    async def test_cache_response_registers_entry(self, response_cache):
+        manager = CacheInvalidationManager(response_cache)
+
+        assert await response_cache.cache_response(_request("GET", "/v1/pages"), _response(), _endpoint("ocr", ["ocr"]))
+
+        (key,) = manager.cache_key_timestamps
+        assert key.startswith("proxy:cache:ocr:GET:/v1/pages:")
+        assert manager.endpoint_index["ocr"] == {key}
+        assert manager.tag_index["ocr"] == {key}
+        assert manager.key_trie.match("proxy:cache:ocr:*") == [key]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_pattern_uses_caller_prefix(self, response_cache):
+        manager = CacheInvalidationManager(response_cache)
+        ocr, llm = _endpoint("ocr"), _endpoint("llm")
+        await response_cache.cache_response(_request("GET", "/v1/pages", {"page": 1}), _response(), ocr)
+        await response_cache.cache_response(_request("GET", "/v1/pages", {"page": 2}), _response(), ocr)
+        await response_cache.cache_response(_request("POST", "/v1/pages"), _response(), ocr)
+        await response_cache.cache_response(_request("GET", "/v1/pages"), _response(), llm)
+
+        result = await manager.invalidate_by_pattern("proxy:cache:ocr:GET:*")
+
+        assert result.success
+        assert result.entries_invalidated == 2
+        assert len(manager.cache_key_timestamps) == 2
+        assert len(manager.endpoint_index["ocr"]) == 1
+        for key in result.invalidated_keys:
+            assert await response_cache.cache_service.get_raw(key, "proxy_cache", None) is None
+        assert await response_cache.get_cached_response(_request("POST", "/v1/pages"), ocr) is not None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_endpoint_and_tags(self, response_cache):
+        manager = CacheInvalidationManager(response_cache)
+        await response_cache.cache_response(_request("GET", "/a"), _response(), _endpoint("ocr", ["docs"]))
+        await response_cache.cache_response(_request("GET", "/b"), _response(), _endpoint("llm", ["docs"]))
+        await response_cache.cache_response(_request("GET", "/c"), _response(), _endpoint("llm"))
+
+        assert (await manager.invalidate_by_endpoint("ocr")).entries_invalidated == 1
+        assert (await manager.invalidate_by_tags(["docs"])).entries_invalidated == 1
+        assert list(manager.endpoint_index) == ["llm"]
+        assert len(manager.cache_key_timestamps) == 1
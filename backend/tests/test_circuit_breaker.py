@@ -0,0 +1,182 @@
+"""
+Circuit Breaker Tests
+
+Bucketed rolling-window accounting and the breaker decisions built on it.
+
+``CircuitBreaker`` awaits ``event_tracker.track_event(name, data)``, which
+the synchronous EventTracker does not provide, so the breaker tests give it
+an AsyncMock tracker; event tracking is not under test here.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.circuit_breaker.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerState,
+)
+from app.services.circuit_breaker.failure_recovery import RecoveryConfig, RecoveryManager
+from app.services.circuit_breaker.rolling_window import RollingWindow
+
+T0 = 1_700_000_000.0
+
+
+class TestRollingWindow:
+    """Ring of per-second buckets"""
+
+    def test_counts_only_calls_inside_the_window(self):
+        window = RollingWindow(window_seconds=10)
+        window.record(True, 10.0, now=T0)
+        window.record(False, 30.0, now=T0 + 4)
+        window.record(False, now=T0 + 9.5)
+
+        snapshot = window.snapshot(now=T0 + 9.9)
+        assert (snapshot.successes, snapshot.failures, snapshot.requests) == (1, 2, 3)
+        assert snapshot.avg_latency_ms == 20.0
+        assert snapshot.failure_rate == pytest.approx(2 / 3)
+
+        snapshot = window.snapshot(now=T0 + 10)
+        assert (snapshot.successes, snapshot.failures) == (0, 2)
+        assert window.snapshot(now=T0 + 20).requests == 0
+
+    def test_recycled_bucket_forgets_the_previous_period(self):
+        window = RollingWindow(window_seconds=3)
+        for _ in range(5):
+            window.record(False, now=T0)
+
+        # Same slot, one full ring later
+        window.record(True, now=T0 + 3)
+
+        snapshot = window.snapshot(now=T0 + 3)
+        assert (snapshot.successes, snapshot.failures) == (1, 0)
+
+    def test_slow_calls_are_judged_on_recorded_latency(self):
+        window = RollingWindow(window_seconds=60, slow_call_threshold_ms=100)
+        window.record(True, 150.0, now=T0)
+        window.record(True, 100.0, now=T0)
+        window.record(True, 20.0, now=T0)
+        window.record(False, now=T0)
+
+        snapshot = window.snapshot(now=T0)
+        assert (snapshot.slow_calls, snapshot.latency_samples) == (2, 3)
+        assert snapshot.slow_call_rate == pytest.approx(2 / 3)
+
+    def test_matches_timestamp_list(self):
+        rng = random.Random(5)
+        window = RollingWindow(window_seconds=30)
+        calls = deque()
+        now = T0
+
+        for _ in range(3000):
+            now += rng.expovariate(5)
+            success = rng.random() > 0.3
+            window.record(success, now=now)
+            calls.append((now, success))
+
+            if rng.random() < 0.1:
+                # The window covers the 30 whole seconds ending with the current one
+                oldest = int(now) - 29
+                while calls and calls[0][0] < oldest:
+                    calls.popleft()
+                snapshot = window.snapshot(now=now)
+                assert snapshot.failures == sum(1 for _, ok in calls if not ok)
+                assert snapshot.successes == sum(1 for _, ok in calls if ok)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [T0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+async def _breaker(**config):
+    breaker = CircuitBreaker()
+    breaker.event_tracker = MagicMock(track_event=AsyncMock())
+    options = dict(failure_threshold=100, minimum_window_requests=4, failure_rate_threshold=0.5,
+                   rolling_window_seconds=10)
+    options.update(config)
+    await breaker.register_service("ocr", "http://ocr", CircuitBreakerConfig(**options))
+    return breaker
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise ConnectionError("connection refused")
+
+
+async def _call(breaker, operation):
+    try:
+        return await breaker.call_service("ocr", operation)
+    except Exception as e:
+        return e
+
+
+class TestCircuitBreakerWindow:
+    """Breaker decisions from the rolling window"""
+
+    @pytest.mark.asyncio
+    async def test_failure_rate_opens_circuit(self, clock):
+        breaker = await _breaker()
+        for operation in (_ok, _ok, _fail):
+            await _call(breaker, operation)
+        assert breaker._endpoints["ocr"].state == CircuitBreakerState.CLOSED
+
+        await _call(breaker, _fail)
+
+        assert breaker._endpoints["ocr"].state == CircuitBreakerState.OPEN
+
+    @pytest.mark.asyncio
+    async def test_failures_leave_the_window(self, clock):
+        breaker = await _breaker()
+        for operation in (_fail, _fail, _ok):
+            await _call(breaker, operation)
+
+        clock[0] += 11
+        for operation in (_ok, _ok, _ok, _fail):
+            await _call(breaker, operation)
+
+        endpoint = breaker._endpoints["ocr"]
+        assert endpoint.state == CircuitBreakerState.CLOSED
+        assert await breaker._count_failures_in_window(endpoint, datetime.fromtimestamp(clock[0], timezone.utc)) == 1
+        assert await breaker._count_requests_in_window(endpoint, datetime.fromtimestamp(clock[0], timezone.utc)) == 4
+
+    @pytest.mark.asyncio
+    async def test_slow_calls_open_circuit(self, clock):
+        breaker = await _breaker(slow_call_threshold_ms=50, slow_call_rate_threshold=0.75)
+        endpoint = breaker._endpoints["ocr"]
+        for _ in range(3):
+            await breaker._record_success(endpoint, 0.2)
+        assert endpoint.state == CircuitBreakerState.CLOSED
+
+        await breaker._record_success(endpoint, 0.2)
+
+        assert endpoint.state == CircuitBreakerState.OPEN
+
+
+class TestAdaptiveHealthCheck:
+    """Adaptive recovery health checks feeding the rolling window"""
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_recorded_as_failure(self):
+        manager = RecoveryManager("ocr", RecoveryConfig())
+
+        async def hangs():
+            await asyncio.sleep(1)
+            return True
+
+        assert await manager._check_health_adaptive(hangs, {"timeout": 0.01}) is False
+
+        snapshot = manager.window.snapshot()
+        assert (snapshot.successes, snapshot.failures) == (0, 1)
+        assert snapshot.latency_total_ms == pytest.approx(10.0)
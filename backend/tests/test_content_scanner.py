@@ -0,0 +1,110 @@
+"""
+Content Scanner Tests
+
+Single-pass hashing, header sampling and whole-file pattern scanning of
+uploads, and the validator's security scan built on it.
+"""
+
+import hashlib
+import random
+
+import pytest
+
+from app.services.document_formats.content_scanner import HEAD_SIZE, PatternMatcher, scan_file
+from app.services.document_validator import DocumentValidator
+
+PATTERNS = [b'<script', b'eval(', b'exec(', b'<iframe', b'javascript:']
+
+
+def _write(tmp_path, content, name="upload.bin"):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+class TestScanFile:
+    """scan_file"""
+
+    @pytest.mark.parametrize("chunk_size", [7, 64, 4096])
+    def test_hash_size_and_head_match_whole_file(self, tmp_path, chunk_size):
+        content = bytes(random.Random(1).getrandbits(8) for _ in range(HEAD_SIZE + 2500))
+        path = _write(tmp_path, content)
+
+        result = scan_file(path, PatternMatcher(PATTERNS), chunk_size=chunk_size)
+
+        assert result.sha256 == hashlib.sha256(content).hexdigest()
+        assert result.size_bytes == len(content)
+        assert result.head == content[:HEAD_SIZE]
+        assert result.chunks_read == -(-len(content) // chunk_size)
+
+    def test_finds_patterns_straddling_chunk_boundaries(self, tmp_path):
+        content = b'A' * 62 + b'<script' + b'B' * 103 + b'eval(' + b'C' * 10
+        path = _write(tmp_path, content)
+
+        # '<script' spans bytes 62..68 and 'eval(' spans 172..176, crossing
+        # the 64- and 176-byte chunk boundaries
+        result = scan_file(path, PatternMatcher(PATTERNS), chunk_size=8)
+
+        assert result.patterns_found == [b'<script', b'eval(']
+
+    def test_scans_past_the_first_8kb(self, tmp_path):
+        path = _write(tmp_path, b'%PDF-1.7\n' + b' ' * 50000 + b'javascript:alert(1)')
+
+        assert scan_file(path, PatternMatcher(PATTERNS), chunk_size=4096).patterns_found == [b'javascript:']
+
+    def test_matches_substring_search(self, tmp_path):
+        rng = random.Random(7)
+        alphabet = b'<scriptevalx(:'
+        for trial in range(20):
+            content = bytes(rng.choice(alphabet) for _ in range(2000))
+            path = _write(tmp_path, content, f"trial-{trial}.bin")
+
+            result = scan_file(path, PatternMatcher(PATTERNS), chunk_size=rng.randint(3, 300))
+
+            assert result.patterns_found == sorted(p for p in PATTERNS if p in content)
+
+    def test_without_matcher_only_hashes(self, tmp_path):
+        path = _write(tmp_path, b'<script>')
+
+        result = scan_file(path)
+
+        assert result.patterns_found == []
+        assert result.sha256 == hashlib.sha256(b'<script>').hexdigest()
+
+
+class TestPatternMatcher:
+    """PatternMatcher"""
+
+    def test_reports_overlapping_prefix_patterns(self):
+        matcher = PatternMatcher([b'<obj', b'<object'])
+
+        assert matcher.find_all(b'x<object>') == {b'<obj', b'<object'}
+        assert matcher.find_all(b'x<obj>') == {b'<obj'}
+
+    def test_accepts_memoryview(self):
+        matcher = PatternMatcher(PATTERNS)
+
+        assert matcher.find_all(memoryview(bytearray(b'..exec(..'))) == {b'exec('}
+
+    def test_no_patterns(self):
+        assert PatternMatcher([]).find_all(b'<script') == set()
+
+
+class TestSecurityScan:
+    """DocumentValidator security scan over the streamed result"""
+
+    def test_pattern_deep_in_file_fails_scan(self, tmp_path):
+        path = _write(tmp_path, b'%PDF-1.4\n' + b'0' * 20000 + b'<iframe src=x>', "doc.pdf")
+
+        scan = DocumentValidator()._perform_security_scan(path)
+
+        assert scan['status'] == 'failed'
+        assert scan['threats_detected'] == ['suspicious_pattern: <iframe']
+        assert scan['scan_metadata']['bytes_scanned'] == 20023
+
+    def test_clean_trusted_file_passes(self, tmp_path):
+        path = _write(tmp_path, b'\x89PNG\r\n\x1a\n' + b'\x00' * 5000, "image.png")
+
+        scan = DocumentValidator()._perform_security_scan(path)
+
+        assert (scan['status'], scan['threats_detected']) == ('passed', [])
@@ -0,0 +1,155 @@
+"""
+Distributed Tracer Tests
+
+Head sampling from the trace id, tail sampling once a trace's local spans
+have ended, and the bounded span arena.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.telemetry.distributed_tracer import (
+    SAMPLED_FLAG,
+    DistributedTracer,
+    TraceContext,
+    TraceStatus,
+)
+
+
+def _trace(tracer, name="request", children=(), duration_ms=None, status=TraceStatus.OK):
+    """Root span with child spans; returns the trace id"""
+    root = tracer.start_span(name, service_name="api")
+    for child in children:
+        tracer.start_span(child, service_name="worker")
+        tracer.end_span()
+    end_time = None
+    if duration_ms is not None:
+        end_time = datetime.utcfromtimestamp(tracer._open_spans[root.span_id][0].start_ts) \
+            + timedelta(milliseconds=duration_ms)
+    tracer.end_span(status, end_time=end_time)
+    return root.trace_id
+
+
+class TestHeadSampling:
+    """Sampling decided once per trace id"""
+
+    def test_decision_is_a_function_of_the_trace_id(self):
+        first, second = DistributedTracer(sampling_rate=0.3), DistributedTracer(sampling_rate=0.3)
+        trace_ids = [f"{i:032x}" for i in range(0, 1 << 64, (1 << 64) // 997)]
+
+        decisions = [first.should_sample(trace_id) for trace_id in trace_ids]
+
+        assert decisions == [second.should_sample(trace_id) for trace_id in trace_ids]
+        assert sum(decisions) / len(decisions) == pytest.approx(0.3, abs=0.01)
+
+    def test_unsampled_trace_propagates_context_but_stores_nothing(self):
+        tracer = DistributedTracer(sampling_rate=0.0)
+
+        root = tracer.start_span("request")
+        child = tracer.start_span("query")
+
+        assert (child.trace_id, child.parent_span_id) == (root.trace_id, root.span_id)
+        assert not child.sampled
+        assert tracer.end_span() is root
+        assert tracer.end_span() is None
+        assert tracer.get_trace(root.trace_id) == {}
+        assert (tracer.traces_started, tracer.traces_sampled_out) == (0, 1)
+
+    def test_remote_parent_decision_is_honoured(self):
+        tracer = DistributedTracer(sampling_rate=0.0)
+        remote = TraceContext(trace_id="ab" * 16, span_id="cd" * 8, trace_flags=SAMPLED_FLAG)
+
+        context = tracer.start_span("handler", parent_context=remote)
+        tracer.end_span()
+
+        assert context.sampled
+        assert list(tracer.get_trace(remote.trace_id)) == [context.span_id]
+
+
+class TestTailSampling:
+    """Keep/drop once every local span of a trace has ended"""
+
+    def test_trace_is_pending_until_its_last_span_ends(self):
+        tracer = DistributedTracer()
+        streamed = []
+        tracer.add_stream_listener(streamed.append)
+
+        root = tracer.start_span("request")
+        tracer.start_span("query")
+        tracer.end_span()
+        assert streamed == []
+        assert len(tracer.get_trace(root.trace_id)) == 2  # still visible while recording
+
+        tracer.end_span()
+        assert [span["name"] for span in streamed] == ["request", "query"]
+        assert tracer.traces_kept == 1
+
+    def test_only_slow_or_failed_traces_are_kept(self):
+        tracer = DistributedTracer(tail_latency_ms=100)
+
+        fast = _trace(tracer, duration_ms=5)
+        slow = _trace(tracer, duration_ms=250)
+        failed = _trace(tracer, duration_ms=5, status=TraceStatus.ERROR)
+
+        assert tracer.get_trace(fast) == {}
+        assert len(tracer.get_trace(slow)) == 1
+        assert len(tracer.get_trace(failed)) == 1
+        assert (tracer.traces_kept, tracer.traces_dropped) == (2, 1)
+
+    def test_concurrent_trace_limit(self):
+        tracer = DistributedTracer(max_traces=1)
+        tracer.start_span("first")
+        tracer.set_trace_context(None)
+
+        second = tracer.start_span("second")
+
+        assert tracer.get_trace(second.trace_id) == {}
+        assert tracer.traces_dropped == 1
+
+
+class TestSpanArena:
+    """Fixed-size ring of kept spans"""
+
+    def test_oldest_spans_are_overwritten(self):
+        tracer = DistributedTracer(max_spans=5)
+
+        traces = [_trace(tracer, children=["a"]) for _ in range(3)]
+
+        # Six spans into five slots: only the first trace's root is gone
+        assert [span.name for span in tracer.get_trace(traces[0]).values()] == ["a"]
+        assert len(tracer.get_trace(traces[1])) == 2
+        assert len(tracer.get_trace(traces[2])) == 2
+        assert tracer.get_trace_statistics()["total_spans"] == 5
+
+        _trace(tracer)
+        assert tracer.get_trace(traces[0]) == {}
+        assert tracer.get_trace_statistics()["total_traces"] == 3
+
+    def test_resize_keeps_newest_spans(self):
+        tracer = DistributedTracer(max_spans=10)
+        traces = [_trace(tracer, children=["a", "b"]) for _ in range(3)]
+
+        tracer.resize_span_arena(4)
+        assert tracer.max_spans == 4
+        assert tracer.get_trace(traces[0]) == {}
+        assert len(tracer.get_trace(traces[1])) == 1
+        assert len(tracer.get_trace(traces[2])) == 3
+
+        newest = _trace(tracer)
+        assert len(tracer.get_trace(newest)) == 1
+        assert len(tracer.get_trace(traces[1])) == 0
+
+    @pytest.mark.asyncio
+    async def test_cleanup_drops_spans_older_than_a_day(self):
+        tracer = DistributedTracer()
+        old = _trace(tracer)
+        recent = _trace(tracer)
+        for span in tracer.get_trace(old).values():
+            span.start_ts -= 2 * 86400
+            span.end_ts -= 2 * 86400
+
+        await tracer._cleanup_old_traces()
+
+        assert tracer.get_trace(old) == {}
+        assert len(tracer.get_trace(recent)) == 1
@@ -0,0 +1,108 @@
+"""
+Event Tracker Tests
+
+Indexed event store queries compared against a plain filter over the
+retained events, across ring eviction.
+"""
+
+import random
+
+import pytest
+
+from app.services.telemetry.event_tracker import (
+    EventCategory,
+    EventContext,
+    EventLevel,
+    EventStore,
+    EventTracker,
+    _Postings,
+)
+
+
+@pytest.fixture
+def tracker():
+    """Small tracker with 500 events tracked into a 200-event ring"""
+    rng = random.Random(18)
+    tracker = EventTracker(max_events=200)
+    for i in range(500):
+        tracker.track_event(
+            f"event-{i}",
+            rng.choice(list(EventCategory)),
+            rng.choice(list(EventLevel)),
+            context=EventContext(
+                user_id=rng.choice(["alice", "bob", None]),
+                correlation_id=f"req-{i // 3}" if i % 2 else f"req-single-{i}"
+            )
+        )
+    return tracker
+
+
+def _retained(tracker):
+    store = tracker._events
+    return [store._ring[seq % store.max_events] for seq in range(store._first_seq, store._next_seq)]
+
+
+class TestEventStore:
+    """EventStore indexes"""
+
+    def test_single_event_values_are_not_promoted(self, tracker):
+        correlation = tracker._events._indexes["correlation_id"]
+
+        assert type(correlation["req-single-498"]) is int
+        assert any(isinstance(postings, _Postings) for postings in correlation.values())
+        assert tracker._events.index_size("correlation_id", "req-single-498") == 1
+
+    @pytest.mark.parametrize("filters", [
+        {"correlation_id": "req-single-498"},
+        {"correlation_id": "req-single-100"},  # evicted
+        {"correlation_id": "req-165"},
+        {"correlation_id": "req-165", "user_id": "alice"},
+        {"user_id": "bob", "level": "error"},
+        {"category": "security"},
+        {},
+    ])
+    @pytest.mark.parametrize("newest_first", [True, False])
+    def test_query_matches_filter_over_retained_events(self, tracker, filters, newest_first):
+        def wanted(event):
+            return all(
+                (event.category.value if name == "category" else
+                 event.level.value if name == "level" else
+                 getattr(event.context, name)) == value
+                for name, value in filters.items()
+            )
+
+        expected = [event.id for event in _retained(tracker) if wanted(event)]
+        if newest_first:
+            expected.reverse()
+
+        pages, cursor = [], None
+        while True:
+            page = tracker.query_events(filters, limit=7, cursor=cursor, newest_first=newest_first)
+            pages.extend(event.id for event in page.events)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert pages == expected
+
+    def test_eviction_drops_index_entries(self):
+        store = EventStore(max_events=2)
+        tracker = EventTracker(max_events=2)
+        tracker._events = store
+        for correlation_id in ["a", "b", "b", "c"]:
+            tracker.track_event("e", EventCategory.API, EventLevel.INFO,
+                                context=EventContext(correlation_id=correlation_id))
+
+        assert store.count("correlation_id") == {"b": 1, "c": 1}
+        assert "a" not in store._indexes["correlation_id"]
+
+    def test_zero_limit_returns_every_match(self, tracker):
+        retained = len(_retained(tracker))
+
+        assert len(tracker.get_events({}, limit=0)) == retained
+        assert len(tracker.query_events({}, limit=0).events) == retained
+
+    @pytest.mark.parametrize("filters", [{"category": "no-such-category"}, {"level": "no-such-level"}])
+    def test_unknown_category_or_level_matches_nothing(self, tracker, filters):
+        assert tracker.get_events(filters) == []
+        page = tracker.query_events(filters)
+        assert page.events == [] and page.next_cursor is None
@@ -0,0 +1,109 @@
+"""
+Shared HTTP Client Tests
+
+Pooled httpx clients are per event loop, so sync callers that use
+``run_sync`` (one loop per call) never reuse connections of a closed loop.
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services import http_clients
+from app.services.http_clients import get_async_client, in_event_loop, run_sync
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connections are pooled
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestSharedClients:
+
+    def test_separate_runs_use_separate_clients(self, server):
+        async def fetch():
+            client = get_async_client("test", base_url=server)
+            response = await client.get("/")
+            return client, response.status_code
+
+        first_client, first_status = run_sync(fetch())
+        second_client, second_status = run_sync(fetch())
+
+        assert first_status == second_status == 200
+        assert first_client is not second_client
+        assert first_client.is_closed and second_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared_within_a_loop(self):
+        client = get_async_client("shared")
+        assert get_async_client("shared") is client
+        assert get_async_client("other") is not client
+
+        await http_clients.close_async_clients()
+        assert client.is_closed
+        assert get_async_client("shared") is not client
+        await http_clients.close_async_clients()
+
+    def test_in_event_loop(self):
+        assert not in_event_loop()
+
+        async def inside():
+            return in_event_loop()
+
+        assert asyncio.run(inside())
+
+
+class TestOCRServiceSyncProxy:
+    """Blocking extract_text tries the OCR proxy before the direct backend"""
+
+    @staticmethod
+    def extract_text(service, path):
+        # Call through the telemetry decorator; only the extraction logic is under test
+        return type(service).extract_text.__wrapped__(service, path)
+
+    def test_sync_extract_text_tries_proxy_first(self):
+        from app.services.ocr_service import OCRService
+
+        service = OCRService.__new__(OCRService)
+        service.available = True
+        service.backend = "paddleocr"
+        proxy_result = {"text": "via proxy", "blocks": []}
+
+        with patch.object(OCRService, "_extract_via_proxy", AsyncMock(return_value=proxy_result)), \
+                patch.object(OCRService, "_extract_paddleocr") as direct:
+            assert self.extract_text(service, "invoice.png") == proxy_result
+            direct.assert_not_called()
+
+    def test_sync_extract_text_falls_back_when_proxy_fails(self):
+        from app.services.ocr_service import OCRService
+
+        service = OCRService.__new__(OCRService)
+        service.available = True
+        service.backend = "paddleocr"
+
+        with patch.object(OCRService, "_extract_via_proxy",
+                          AsyncMock(return_value={"success": False, "error": "down"})), \
+                patch.object(OCRService, "_extract_paddleocr", return_value={"text": "direct"}) as direct:
+            assert self.extract_text(service, "invoice.png") == {"text": "direct"}
+            direct.assert_called_once_with("invoice.png")
@@ -0,0 +1,100 @@
+"""
+Job Notifier Tests
+
+In-process wakeups for queue workers and the PostgreSQL NOTIFY path.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.config import settings
+from app.services.job_notifier import NOTIFY_CHANNEL, JobNotifier, job_notifier, notify_jobs_available
+
+
+class TestJobNotifier:
+    """Per-queue wakeup events"""
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_without_notification(self):
+        notifier = JobNotifier()
+        await notifier.start()
+
+        started = time.monotonic()
+        assert await notifier.wait("default", 0.05) is False
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_notify_wakes_only_that_queue(self):
+        notifier = JobNotifier()
+        await notifier.start()
+        default = asyncio.ensure_future(notifier.wait("default", 5))
+        urgent = asyncio.ensure_future(notifier.wait("urgent", 0.2))
+        await asyncio.sleep(0)
+
+        notifier.notify("default")
+
+        assert await asyncio.wait_for(default, 1) is True
+        assert await urgent is False
+
+    @pytest.mark.asyncio
+    async def test_notify_from_another_thread(self):
+        notifier = JobNotifier()
+        await notifier.start()
+        waiter = asyncio.ensure_future(notifier.wait("default", 5))
+        await asyncio.sleep(0)
+
+        thread = threading.Thread(target=notifier.notify, args=("default",))
+        thread.start()
+        thread.join()
+
+        assert await asyncio.wait_for(waiter, 1) is True
+
+    @pytest.mark.asyncio
+    async def test_notification_before_wait_is_not_lost(self):
+        notifier = JobNotifier()
+        await notifier.start()
+
+        notifier.notify("default")
+
+        assert await notifier.wait("default", 0.05) is True
+        assert await notifier.wait("default", 0.05) is False
+
+    def test_notify_before_start_is_ignored(self):
+        JobNotifier().notify("default")
+
+
+class TestNotifyJobsAvailable:
+    """Producer side"""
+
+    def _session(self, dialect):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = dialect
+        return db
+
+    def test_postgres_backend_issues_notify(self, monkeypatch):
+        monkeypatch.setattr(settings, "QUEUE_NOTIFY_BACKEND", "postgres")
+        monkeypatch.setattr(job_notifier, "notify", MagicMock())
+        db = self._session("postgresql")
+
+        notify_jobs_available("default", db)
+
+        (statement, params), _ = db.execute.call_args
+        assert "pg_notify" in str(statement)
+        assert params == {"channel": NOTIFY_CHANNEL, "payload": "default"}
+        db.commit.assert_called_once()
+        job_notifier.notify.assert_called_once_with("default")
+
+    @pytest.mark.parametrize("backend, dialect", [("local", "postgresql"), ("postgres", "sqlite")])
+    def test_other_setups_only_notify_locally(self, monkeypatch, backend, dialect):
+        monkeypatch.setattr(settings, "QUEUE_NOTIFY_BACKEND", backend)
+        monkeypatch.setattr(job_notifier, "notify", MagicMock())
+        db = self._session(dialect)
+
+        notify_jobs_available("default", db)
+
+        db.execute.assert_not_called()
+        job_notifier.notify.assert_called_once_with("default")
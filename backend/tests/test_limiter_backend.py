@@ -0,0 +1,183 @@
+"""
+Limiter Backend Tests
+
+The Redis Lua script and the in-process backend compared decision for
+decision, atomic multi-rule evaluation, and the degraded local fallback.
+
+The Redis side runs the real script on fakeredis (Lua via lupa). Both
+fakeredis' TIME command and the local backend read ``time.time``, which is
+replaced by a controllable clock so the two see identical timestamps.
+"""
+
+import random
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.services.rate_limiting.limiter_backend import (
+    FIXED, GCRA, SLIDING, LimitCheck, LocalLimiterBackend, RedisLimiterBackend
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+class Clock:
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def redis_backend():
+    return RedisLimiterBackend(fakeredis.aioredis.FakeRedis())
+
+
+class TestBackendParity:
+    """LocalLimiterBackend makes the same decisions as the Lua script"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("seed", range(4))
+    async def test_random_traffic(self, clock, redis_backend, seed):
+        rng = random.Random(seed)
+        local = LocalLimiterBackend()
+        rules = [
+            (GCRA, 5, 1.0, 8),
+            (GCRA, 3, 2.0, 0),
+            (SLIDING, 6, 1.0, 0),
+            (FIXED, 4, 0.5, 0),
+        ]
+
+        for _ in range(300):
+            identifier = rng.choice(["a", "b"])
+            checks = [
+                LimitCheck(key=f"{{{identifier}}}:{i}", algorithm=algorithm, limit=limit,
+                           window_seconds=window, burst=burst, cost=rng.choice([0, 1, 1, 1, 2]))
+                for i, (algorithm, limit, window, burst) in enumerate(rules)
+                if rng.random() < 0.7
+            ]
+            if not checks:
+                continue
+
+            expected = await redis_backend.evaluate(checks)
+            assert await local.evaluate(checks) == expected
+
+            clock.advance(rng.choice([0, 0, 0.001, 0.05, 0.2, 0.7]))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend_name", ["local", "redis"])
+    async def test_rejected_request_consumes_no_quota(self, clock, redis_backend, backend_name):
+        backend = LocalLimiterBackend() if backend_name == "local" else redis_backend
+        tight = LimitCheck(key="{a}:tight", algorithm=FIXED, limit=1, window_seconds=60)
+        loose = LimitCheck(key="{a}:loose", algorithm=FIXED, limit=3, window_seconds=60)
+
+        assert [d.allowed for d in await backend.evaluate([loose, tight])] == [True, True]
+        for _ in range(3):
+            assert [d.allowed for d in await backend.evaluate([loose, tight])] == [True, False]
+
+        # Only the first request counted against the loose rule
+        (decision,) = await backend.evaluate([loose])
+        assert (decision.allowed, decision.remaining) == (True, 1)
+
+    @pytest.mark.asyncio
+    async def test_gcra_retry_after_and_recovery(self, clock):
+        local = LocalLimiterBackend()
+        check = LimitCheck(key="k", algorithm=GCRA, limit=10, window_seconds=1.0, burst=2)
+
+        assert [(await local.evaluate([check]))[0].allowed for _ in range(3)] == [True, True, False]
+        (denied,) = await local.evaluate([check])
+        assert denied.retry_after == 0.1
+
+        clock.advance(0.1)
+        assert (await local.evaluate([check]))[0].allowed
+
+
+class TestRateLimiterFallback:
+    """RateLimiter degrades to local state when the shared backend fails"""
+
+    @pytest.mark.asyncio
+    async def test_redis_error_uses_local_backend(self, monkeypatch):
+        from app.services.rate_limiting.rate_limiter import RateLimiter
+
+        limiter = RateLimiter()
+        failing = AsyncMock()
+        failing.evaluate.side_effect = ConnectionError("redis down")
+        monkeypatch.setattr(limiter, "_get_backend", AsyncMock(return_value=failing))
+        check = LimitCheck(key="k", algorithm=FIXED, limit=1, window_seconds=60)
+
+        assert [d.allowed for d in await limiter._evaluate([check])] == [True]
+        assert [d.allowed for d in await limiter._evaluate([check])] == [False]
+        assert len(limiter._local_backend) == 1
+
+
+class TestLocalState:
+    """Bounded, expiring in-process state"""
+
+    @pytest.mark.asyncio
+    async def test_idle_keys_are_swept_when_their_bucket_passes(self, clock):
+        local = LocalLimiterBackend()
+        short = LimitCheck(key="short", algorithm=FIXED, limit=5, window_seconds=1)
+        long = LimitCheck(key="long", algorithm=SLIDING, limit=5, window_seconds=10)
+        await local.evaluate([short])
+        await local.evaluate([long])
+        assert len(local) == 2
+
+        clock.advance(2.5)
+        assert local.purge_expired() == 1
+        assert len(local) == 1
+
+        # Sliding state lives for the window after its own
+        clock.advance(19.5)
+        assert local.purge_expired() == 1
+        assert len(local) == 0
+        assert local._bucket_heap == [] and local._scheduled == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_state_is_ignored_before_the_sweep(self, clock):
+        local = LocalLimiterBackend()
+        check = LimitCheck(key="k", algorithm=GCRA, limit=1, window_seconds=1)
+        assert (await local.evaluate([check]))[0].allowed
+        assert not (await local.evaluate([check]))[0].allowed
+
+        clock.advance(1.0)
+        assert (await local.evaluate([check]))[0].allowed
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_key_is_evicted(self, clock):
+        local = LocalLimiterBackend(max_keys=3)
+        checks = {key: LimitCheck(key=key, algorithm=FIXED, limit=1, window_seconds=60) for key in "abcd"}
+        for key in "abc":
+            await local.evaluate([checks[key]])
+
+        # Only allowed requests write state, so raise the limit to refresh "a"
+        checks["a"].limit = 2
+        await local.evaluate([checks["a"]])
+        await local.evaluate([checks["d"]])
+
+        assert list(local._state) == ["c", "a", "d"]
+        assert local.evictions == 1
+        # The evicted key starts over, which can only be more lenient
+        assert (await local.evaluate([checks["b"]]))[0].allowed
+
+    @pytest.mark.asyncio
+    async def test_bucket_entries_stay_bounded_under_churn(self, clock):
+        local = LocalLimiterBackend(max_keys=50)
+        for i in range(2000):
+            await local.evaluate([LimitCheck(key=f"k{i}", algorithm=FIXED, limit=5, window_seconds=600)])
+
+        assert len(local) == 50
+        assert local._scheduled <= 2 * local.max_keys + 1
+        assert sum(len(keys) for keys in local._buckets.values()) == local._scheduled
@@ -0,0 +1,416 @@
+"""
+Log Collector Tests
+
+Per-destination workers: overflow policies, spilling to the on-disk spool,
+replay of spooled segments, and retry before spilling. Columnar batches and
+the sinks that share their encoded rows.
+
+Like test_log_processor, the collector module is loaded against a stand-in
+for ``app.models.logging``, which cannot be imported on its own in this tree.
+Worker tests drive ``_DestinationWorker`` directly unless they need its
+thread, so queue and spool contents can be asserted step by step.
+"""
+
+import csv
+import os
+import sys
+import time
+import types
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, Text, create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("aiohttp")
+
+from service_loader import load_service_modules
+
+@pytest.fixture
+def collector_module(monkeypatch, tmp_path):
+    """The log_collector module, loaded without the package __init__"""
+    (module,) = load_service_modules(monkeypatch, tmp_path, "log_collection", ("log_collector",))
+    return module
+
+
+def _event(module, i):
+    return module.LogEvent(
+        timestamp=datetime(2026, 1, 1, 0, 0, i % 60), level=module.LogSeverity.INFO, category="app",
+        message=f"event {i}", source=module.LogSource.APPLICATION, data={"i": i}
+    )
+
+
+def _worker(module, handler, policy, spool=None, queue_size=2, batch_size=2, max_retries=0):
+    info = {'last_error': None, 'last_success': None, 'error_count': 0, 'success_count': 0}
+    return module._DestinationWorker(
+        name="sink", info=info, handler=handler, on_delivered=lambda delivered, latency_ms: None,
+        queue_size=queue_size, batch_size=batch_size, batch_timeout=0, overflow_policy=policy,
+        max_retries=max_retries, retry_backoff=0, spool=spool, block_timeout=0.05
+    )
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class TestLogSpool:
+    """Append-only NDJSON segments"""
+
+    def test_segments_rotate_at_the_size_limit(self, collector_module, tmp_path):
+        spool = collector_module.LogSpool(str(tmp_path / "spool"), segment_max_bytes=10)
+        for line in (b"record-1\n", b"record-2\n", b"record-3\n"):
+            spool.append(line)
+
+        first = spool.take_segment()
+        assert spool.read(first) == [b"record-1", b"record-2"]
+        spool.complete(first)
+        second = spool.take_segment()
+        assert spool.read(second) == [b"record-3"]
+        spool.complete(second)
+        assert not spool.has_data()
+        assert spool.take_segment() is None
+
+    def test_segments_left_by_a_previous_process_are_picked_up(self, collector_module, tmp_path):
+        directory = str(tmp_path / "spool")
+        collector_module.LogSpool(directory).append(b"left-over\n")
+
+        spool = collector_module.LogSpool(directory)
+        spool.append(b"new\n")
+
+        assert spool.has_data()
+        replayed = []
+        while (path := spool.take_segment()) is not None:
+            replayed.append((os.path.basename(path), spool.read(path)))
+            spool.complete(path)
+        assert replayed == [("000000000000.ndjson", [b"left-over"]), ("000000000001.ndjson", [b"new"])]
+
+
+class TestOverflowPolicies:
+    """What a full destination queue does with the next event"""
+
+    def test_drop_oldest_keeps_the_newest_events(self, collector_module):
+        worker = _worker(collector_module, lambda batch: None, collector_module.OverflowPolicy.DROP_OLDEST)
+
+        for i in range(4):
+            assert worker.offer(_event(collector_module, i))
+
+        assert [event.message for _, event in worker._queue] == ["event 2", "event 3"]
+        assert (worker.metrics['enqueued'], worker.metrics['dropped']) == (4, 2)
+
+    def test_block_gives_up_after_the_timeout(self, collector_module):
+        worker = _worker(collector_module, lambda batch: None, collector_module.OverflowPolicy.BLOCK,
+                         queue_size=1)
+        assert worker.offer(_event(collector_module, 0))
+
+        started = time.time()
+        assert not worker.offer(_event(collector_module, 1))
+
+        assert time.time() - started >= 0.05
+        assert worker.metrics['dropped'] == 1
+        assert len(worker._queue) == 1
+
+    def test_spill_writes_overflow_to_the_spool(self, collector_module, tmp_path):
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+        worker = _worker(collector_module, lambda batch: None, collector_module.OverflowPolicy.SPILL, spool)
+
+        for i in range(5):
+            assert worker.offer(_event(collector_module, i))
+
+        assert (worker.metrics['enqueued'], worker.metrics['spilled']) == (2, 3)
+        spooled = spool.read(spool.take_segment())
+        assert [collector_module.decode_json(line)["message"] for line in spooled] == \
+            ["event 2", "event 3", "event 4"]
+
+
+class TestReplay:
+    """Spooled segments are delivered once the live queue is idle"""
+
+    def test_replay_after_the_live_queue_drains(self, collector_module, tmp_path):
+        delivered = []
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+        worker = _worker(collector_module, lambda batch: delivered.append(batch.columns['message']),
+                         collector_module.OverflowPolicy.SPILL, spool)
+        events = [_event(collector_module, i) for i in range(5)]
+        for event in events:
+            worker.offer(event)
+
+        live = worker._take_batch()
+        assert worker._take_batch() == []  # idle with spooled data: time to replay
+        worker._replay_spool()
+
+        assert [event for _, event in live] == events[:2]
+        assert delivered == [["event 2", "event 3"], ["event 4"]]
+        assert worker.metrics['replayed'] == 3
+        assert not spool.has_data()
+        assert os.listdir(spool.directory) == []
+
+    def test_replayed_batch_matches_the_original_events(self, collector_module, tmp_path):
+        batches = []
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+        worker = _worker(collector_module, batches.append, collector_module.OverflowPolicy.SPILL, spool,
+                         queue_size=0, batch_size=10)
+        events = [_event(collector_module, i) for i in range(3)]
+        for event in events:
+            worker.offer(event)
+
+        worker._replay_spool()
+
+        (batch,) = batches
+        original = collector_module.ColumnarLogBatch.from_events("original", events)
+        assert batch.rows() == original.rows()
+        assert batch.encoded_rows() == original.encoded_rows()
+
+    def test_live_traffic_interrupts_replay(self, collector_module, tmp_path):
+        delivered = []
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+
+        def handler(batch):
+            delivered.extend(batch.columns['message'])
+            if len(delivered) == 2:
+                worker._queue.append((time.time(), _event(collector_module, 99)))
+
+        worker = _worker(collector_module, handler, collector_module.OverflowPolicy.SPILL, spool, queue_size=0)
+        for i in range(4):
+            worker.offer(_event(collector_module, i))
+
+        worker._replay_spool()
+
+        assert delivered == ["event 0", "event 1"]
+        remaining = spool.read(spool.take_segment())
+        assert [collector_module.decode_json(line)["message"] for line in remaining] == ["event 2", "event 3"]
+
+    def test_torn_last_line_is_skipped(self, collector_module, tmp_path):
+        delivered = []
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+        worker = _worker(collector_module, lambda batch: delivered.extend(batch.columns['message']),
+                         collector_module.OverflowPolicy.SPILL, spool, queue_size=0, batch_size=10)
+        for i in range(2):
+            worker.offer(_event(collector_module, i))
+        spool.append(b'{"timestamp": "2026-01-01T00:00:0')
+
+        worker._replay_spool()
+
+        assert delivered == ["event 0", "event 1"]
+        assert worker.metrics['replayed'] == 2
+        assert not spool.has_data()
+
+
+class TestDelivery:
+    """Retries, spilling failed batches, and independent destinations"""
+
+    def test_failed_batch_is_retried_spilled_and_replayed(self, collector_module, tmp_path):
+        attempts = []
+        delivered = []
+
+        def handler(batch):
+            attempts.append(batch.source)
+            if len(attempts) <= 3:
+                raise ConnectionError("sink unavailable")
+            delivered.extend(batch.columns['message'])
+
+        spool = collector_module.LogSpool(str(tmp_path / "spool"))
+        worker = _worker(collector_module, handler, collector_module.OverflowPolicy.SPILL, spool,
+                         queue_size=10, max_retries=2)
+        worker.offer(_event(collector_module, 0))
+        worker.offer(_event(collector_module, 1))
+
+        worker.start()
+        try:
+            _wait_for(lambda: worker.metrics['replayed'] == 2)
+        finally:
+            worker.stop(timeout=5)
+
+        assert attempts == ["application"] * 3 + ["spool_replay"]
+        assert delivered == ["event 0", "event 1"]
+        assert (worker.metrics['retries'], worker.metrics['failed_batches'], worker.metrics['spilled']) == (2, 1, 2)
+        assert worker.info['error_count'] == 3
+
+    def test_failing_destination_does_not_hold_up_the_others(self, collector_module, tmp_path):
+        collector = collector_module.LogCollector(batch_size=2, batch_timeout=0, max_retries=0,
+                                                  spool_dir=str(tmp_path / "spool"))
+        delivered = []
+        collector.add_destination("good", collector_module.DestinationType.FILE, {})
+        collector.add_destination("bad", collector_module.DestinationType.FILE, {})
+        collector._workers["good"].handler = lambda batch: delivered.extend(batch.columns['message'])
+        collector._workers["bad"].handler = lambda batch: time.sleep(0.2) or 1 / 0
+
+        collector.start()
+        try:
+            assert collector.collect_batch([_event(collector_module, i) for i in range(4)]) == 4
+            _wait_for(lambda: len(delivered) == 4, timeout=1.0)
+        finally:
+            collector.stop(timeout=5)
+
+        stats = collector.get_statistics()
+        assert stats['destinations']['good']['delivered'] == 4
+        assert stats['destinations']['bad']['delivered'] == 0
+        assert stats['destinations']['bad']['spilled'] == 4
+        assert stats['total_logs_collected'] == 4
+        assert collector.health_check()['components']['destination_bad'] == 'unhealthy'
+
+
+def _rich_events(module):
+    """Events covering every field, including text that needs escaping"""
+    return [
+        module.LogEvent(
+            timestamp=datetime(2026, 3, 1, 23, 59, 59, 123456), level=module.LogSeverity.ERROR,
+            category="db", message='tab\there "quoted"\nnew line \\ back', source=module.LogSource.DATABASE,
+            data={"rows": 3, "nested": {"ok": True}}, correlation_id="corr-1", user_id="u1",
+            request_id="r1", session_id="s1", tenant_id="acme", tags=["slow", "retry"]
+        ),
+        module.LogEvent(
+            timestamp=datetime(2026, 3, 2, 0, 0, 1), level=module.LogSeverity.INFO, category="api",
+            message="ünïcode ✓", source=module.LogSource.API
+        ),
+    ]
+
+
+class TestColumnarLogBatch:
+    """Per-field columns and encoded rows"""
+
+    def test_encoded_rows_match_per_record_serialization(self, collector_module):
+        events = _rich_events(collector_module)
+
+        batch = collector_module.ColumnarLogBatch.from_events("b1", events)
+
+        assert batch.batch_size == 2
+        assert batch.columns['timestamp'] == [event.timestamp for event in events]
+        assert [collector_module.decode_json(row) for row in batch.encoded_rows()] == \
+            [event.to_dict() for event in events]
+        assert batch.encoded_rows() is batch.encoded_rows()
+        assert batch.ndjson() == b"\n".join(batch.encoded_rows()) + b"\n"
+
+    def test_rows_are_keyed_by_field(self, collector_module):
+        events = _rich_events(collector_module)
+
+        rows = collector_module.ColumnarLogBatch.from_events("b1", events).rows()
+
+        assert rows[1] == {**events[1].to_dict(), 'timestamp': events[1].timestamp}
+        assert list(rows[0]) == list(collector_module.LOG_FIELDS)
+
+    def test_ndjson_round_trip_reuses_the_lines(self, collector_module):
+        original = collector_module.ColumnarLogBatch.from_events("b1", _rich_events(collector_module))
+        lines = original.ndjson().split(b"\n")[:-1]
+
+        restored = collector_module.ColumnarLogBatch.from_ndjson("b2", [b"not json", *lines, b'{"level": "info"}'],
+                                                                 source="spool_replay")
+
+        assert restored.rows() == original.rows()
+        assert restored.encoded_rows() == lines
+        assert restored.source == "spool_replay"
+        assert collector_module.ColumnarLogBatch.from_ndjson("b3", [b"{}"], source="spool_replay") is None
+
+
+class TestSinks:
+    """Destination handlers fed from one columnar batch"""
+
+    def _collector(self, module, tmp_path):
+        return module.LogCollector(spool_dir=str(tmp_path / "spool"))
+
+    @pytest.mark.parametrize("format_type", ["json", "line", "csv"])
+    def test_file_formats(self, collector_module, tmp_path, format_type):
+        events = _rich_events(collector_module)
+        batch = collector_module.ColumnarLogBatch.from_events("b1", events)
+        path = tmp_path / f"out.{format_type}"
+        handler = self._collector(collector_module, tmp_path)._file_handler
+
+        for _ in range(2):
+            handler(batch, {'file_path': str(path), 'format': format_type})
+
+        if format_type == "json":
+            records = [collector_module.decode_json(line) for line in path.read_bytes().splitlines()]
+            assert records == [event.to_dict() for event in events] * 2
+        elif format_type == "line":
+            text = path.read_text()
+            assert text.startswith(f"{events[0].timestamp.isoformat()} [error] tab\there")
+            assert text.count("[info] ünïcode ✓\n") == 2
+        else:
+            with open(path, newline='') as f:
+                rows = list(csv.reader(f))
+            assert rows[0] == list(collector_module.LOG_FIELDS)
+            assert len(rows) == 5  # header written once
+            assert rows[1][:5] == [events[0].timestamp.isoformat(), "error", "db", events[0].message, "database"]
+
+    def test_database_executemany(self, collector_module, tmp_path, monkeypatch):
+        metadata = MetaData()
+        table = Table(
+            "log_entries", metadata,
+            Column("timestamp", DateTime), Column("level", String), Column("category", String),
+            Column("message", Text), Column("source", String), Column("data", JSON),
+            Column("correlation_id", String), Column("user_id", String), Column("request_id", String),
+            Column("session_id", String), Column("tenant_id", String), Column("tags", JSON),
+        )
+        engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+        metadata.create_all(engine)
+        monkeypatch.setattr(collector_module, "LogEntry", types.SimpleNamespace(__table__=table))
+        monkeypatch.setattr(collector_module, "SessionLocal", sessionmaker(bind=engine))
+        batch = collector_module.ColumnarLogBatch.from_events("b1", _rich_events(collector_module))
+
+        self._collector(collector_module, tmp_path)._database_handler(batch, {})
+
+        with engine.connect() as connection:
+            stored = [dict(row._mapping) for row in connection.execute(select(table))]
+        assert stored == batch.rows()
+
+    def test_copy_text_format(self, collector_module, tmp_path):
+        copied = []
+        cursor = MagicMock()
+        cursor.copy_expert.side_effect = lambda sql, buffer: copied.append((sql, buffer.getvalue()))
+        db = MagicMock()
+        db.connection.return_value.connection.driver_connection.cursor.return_value = cursor
+        events = _rich_events(collector_module)
+        batch = collector_module.ColumnarLogBatch.from_events("b1", events)
+
+        self._collector(collector_module, tmp_path)._copy_log_entries(db, types.SimpleNamespace(name="log_entries"),
+                                                                      batch)
+
+        ((sql, text),) = copied
+        assert sql.startswith("COPY log_entries (log_id, timestamp, level,")
+        lines = text.split("\n")
+        assert len(lines) == 3 and lines[-1] == ""
+        first, second = (line.split("\t") for line in lines[:2])
+        assert len(first) == len(collector_module.LOG_FIELDS) + 2
+        assert first[1:6] == [events[0].timestamp.isoformat(), "error", "db",
+                              'tab\\there "quoted"\\nnew line \\\\ back', "database"]
+        assert collector_module.decode_json(first[6]) == events[0].data
+        assert second[7:12] == ["\\N"] * 5
+        assert cursor.close.called
+        db.execute.assert_not_called()
+
+    def test_copy_falls_back_without_copy_expert(self, collector_module, tmp_path):
+        db = MagicMock()
+        db.connection.return_value.connection.driver_connection.cursor.return_value = types.SimpleNamespace(
+            close=lambda: None)
+        batch = collector_module.ColumnarLogBatch.from_events("b1", _rich_events(collector_module))
+        table = MagicMock()
+
+        self._collector(collector_module, tmp_path)._copy_log_entries(db, table, batch)
+
+        db.execute.assert_called_once_with(table.insert(), batch.rows())
+
+    def test_elasticsearch_bulk_body(self, collector_module, tmp_path, monkeypatch):
+        posted = []
+
+        def post(url, data, headers, timeout):
+            posted.append((url, data))
+            return types.SimpleNamespace(status_code=200)
+
+        monkeypatch.setitem(sys.modules, "requests", types.SimpleNamespace(post=post))
+        events = _rich_events(collector_module)
+        batch = collector_module.ColumnarLogBatch.from_events("b1", events)
+
+        self._collector(collector_module, tmp_path)._elasticsearch_handler(
+            batch, {'elasticsearch_url': "http://es", 'index_pattern': "logs-{YYYY.MM.dd}"}
+        )
+
+        ((url, body),) = posted
+        assert url == "http://es/_bulk"
+        lines = [collector_module.decode_json(line) for line in body.split(b"\n")[:-1]]
+        assert lines == [
+            {"index": {"_index": "logs-2026.03.01", "_id": "corr-1"}}, events[0].to_dict(),
+            {"index": {"_index": "logs-2026.03.02"}}, events[1].to_dict(),
+        ]
@@ -0,0 +1,92 @@
+"""
+Log Processor Tests
+
+Sensitive-data masking through the shared scanner compared against the
+original per-pattern ``re.sub`` transform.
+
+``app.models.logging`` cannot be imported on its own in this tree (see
+test_audit_logger), so the log collector and processor modules are loaded
+against a stand-in exposing the model names that they and the logging
+services import; masking never touches the database.
+"""
+
+import re
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("geopy")
+pytest.importorskip("geoip2")
+
+from service_loader import load_service_modules
+
+@pytest.fixture
+def log_modules(monkeypatch, tmp_path):
+    """(log_collector, log_processor) modules, loaded without the package __init__"""
+    return load_service_modules(monkeypatch, tmp_path, "log_collection", ("log_collector", "log_processor"))
+
+
+def _reference_mask(message, sensitive_patterns):
+    """The transform before the shared scanner"""
+    for name, pattern in sensitive_patterns.items():
+        if name == 'credit_card':
+            message = re.sub(r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b', '[CREDIT_CARD_MASKED]', message)
+        elif name == 'ssn':
+            message = re.sub(r'\b\d{3}[- ]?\d{2}[- ]?\d{4}\b', '[SSN_MASKED]', message)
+        elif name == 'email':
+            message = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_MASKED]', message)
+        else:
+            message = re.sub(pattern, '[SENSITIVE_DATA_MASKED]', message)
+    return message
+
+
+MESSAGES = [
+    "user login ok",
+    "card 4111 1111 1111 1111 charged",
+    "ssn 123-45-6789 on file for jane.doe@example.com",
+    "call +44 (20) 7946-0958 or 07946095812",
+    "client 10.0.0.12 requested token=abc123",
+    "no digits here but an @ sign",
+]
+
+PATTERN_SETS = [
+    {'credit_card': '', 'ssn': '', 'email': ''},
+    {'email': 'ignored', 'credit_card': 'ignored'},
+    {'phone': r'\(\d{2}\) \d{4}-\d{4}'},
+    {'ip_address': r'10\.0\.\d+\.\d+', 'token': r'token=\w+'},
+    {'ssn': '', 'phone': r'\b\d{11}\b', 'password': r'secret'},
+]
+
+
+class TestMaskSensitive:
+    """mask_sensitive transform"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("patterns", PATTERN_SETS)
+    async def test_matches_reference(self, log_modules, patterns):
+        collector, processor_module = log_modules
+        processor = processor_module.LogProcessor()
+        for message in MESSAGES:
+            event = collector.LogEvent(timestamp=datetime.utcnow(), level=collector.LogSeverity.INFO,
+                                       category="test", message=message,
+                                       source=collector.LogSource.APPLICATION)
+
+            masked = await processor._apply_mask_sensitive_transform(event, {'patterns': patterns})
+
+            assert masked.message == _reference_mask(message, patterns)
+
+    def test_custom_pattern_overrides_builtin_name(self, log_modules):
+        scanner = log_modules[1].SensitiveDataScanner()
+        text = "tel (20) 7946-0958, id 1234567890123"
+
+        masked = scanner.mask(text, {'phone': '[PHONE]'}, {'phone': r'\(\d{2}\) \d{4}-\d{4}'})
+        assert masked == "tel [PHONE], id 1234567890123"
+
+        # Without a custom pattern the built-in one applies
+        assert scanner.mask(text, {'phone': '[PHONE]'}) == "tel (20) 7946-0958, id [PHONE]"
+
+    def test_custom_pattern_runs_without_builtin_candidates(self, log_modules):
+        scanner = log_modules[1].SensitiveDataScanner()
+
+        assert scanner.mask("password=hunter", {'ip_address': '[X]'}, {'ip_address': r'hunter'}) == "password=[X]"
@@ -0,0 +1,184 @@
+"""
+Log Router Tests
+
+The compiled rule network compared against the per-event loop over
+``RoutingRule.matches`` it replaced, recompilation on rule changes, and
+batch routing.
+
+As in test_log_processor, the log collection modules are loaded against a
+stand-in for ``app.models.logging``, which cannot be imported on its own in
+this tree; routing never touches the database.
+"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from service_loader import load_service_modules
+
+@pytest.fixture
+def log_modules(monkeypatch, tmp_path):
+    """(log_collector, log_router) modules, loaded without the package __init__"""
+    return load_service_modules(monkeypatch, tmp_path, "log_collection", ("log_collector", "log_router"))
+
+
+# (rule type, conditions); one rule per entry, covering every branch of RoutingRule.matches
+RULE_SPECS = [
+    ("SEVERITY_BASED", {'severities': ['error', 'critical']}),
+    ("SEVERITY_BASED", {'severities': ['info'], 'include': ['warning']}),
+    ("SEVERITY_BASED", {'severities': ['info'], 'exclude': ['debug', 'trace']}),
+    ("SEVERITY_BASED", {'severities': []}),
+    ("SOURCE_BASED", {'sources': ['security', 'audit']}),
+    ("SOURCE_BASED", {'sources': ['unused'], 'patterns': [r'^(api|net)']}),
+    ("CATEGORY_BASED", {'categories': ['auth']}),
+    ("CATEGORY_BASED", {'categories': ['unused'], 'patterns': [r'api\.', 'bill']}),
+    ("CONTENT_BASED", {'message': {'patterns': ['timeout']}}),
+    ("CONTENT_BASED", {'message': {'patterns': ['payment', r'fail\w+']}, 'data': {'status': {'equals': 500}}}),
+    ("CONTENT_BASED", {'data': {'user.tier': {'in': ['gold']}}}),
+    ("CONTENT_BASED", {'data': {'status': {'pattern': '^5'}}}),
+    ("CONTENT_BASED", {'message': {'patterns': ['(']}}),
+    ("CONTENT_BASED", {}),
+    ("CORRELATION_BASED", {'correlation_id_patterns': ['req-'], 'tenant_patterns': ['acme']}),
+    ("CORRELATION_BASED", {'user_patterns': ['adm']}),
+    ("CORRELATION_BASED", {'user_patterns': ['[']}),
+    ("CUSTOM_SCRIPT", {'script': "log_event['level'] == 'error' and len(log_event['message']) > 12"}),
+    ("CUSTOM_SCRIPT", {'script': "log_event["}),
+    ("CUSTOM_SCRIPT", {'script': "log_event['data']['missing'] > 1"}),
+    ("CUSTOM_SCRIPT", {}),
+]
+
+MESSAGES = ["ok", "Request TIMEOUT after 30s", "payment failed", "Payment Failure for order", "cache miss"]
+
+
+def _random_rules(modules, rng):
+    collector, router = modules
+    rules = []
+    for i, (rule_type, conditions) in enumerate(RULE_SPECS):
+        rules.append(router.RoutingRule(
+            rule_id=f"rule-{i}", name=f"rule {i}", rule_type=router.RuleType[rule_type],
+            conditions=conditions, destinations=[f"dest-{i % 3}"], priority=rng.choice([0, 1, 1, 5, 10]),
+            enabled=rng.random() > 0.15
+        ))
+    rng.shuffle(rules)
+    return rules
+
+
+def _random_event(modules, rng):
+    collector, router = modules
+    return collector.LogEvent(
+        timestamp=datetime(2026, 1, 1),
+        level=rng.choice(list(collector.LogSeverity)),
+        category=rng.choice(["auth", "auth.login", "db", "api.v1", "billing"]),
+        message=rng.choice(MESSAGES),
+        source=rng.choice(list(collector.LogSource)),
+        data=rng.choice([{}, {'status': 500}, {'status': 200, 'user': {'tier': 'gold'}}, {'user': 'flat'}]),
+        correlation_id=rng.choice([None, "req-17", "job-9"]),
+        user_id=rng.choice([None, "u1", "admin"]),
+        tenant_id=rng.choice([None, "acme", "t-2"]),
+    )
+
+
+def _reference(rules, log_event):
+    """The per-event loop before the compiled network"""
+    matching_rules = [rule for rule in rules if rule.matches(log_event)]
+    matching_rules.sort(key=lambda r: r.priority, reverse=True)
+    return [rule.rule_id for rule in matching_rules]
+
+
+class TestCompiledRuleSet:
+    """Same rules, in the same order, as the rule loop"""
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_matches_rule_loop(self, log_modules, seed):
+        router = log_modules[1]
+        rng = random.Random(seed)
+        rules = _random_rules(log_modules, rng)
+        compiled = router.CompiledRuleSet(rules)
+
+        for _ in range(300):
+            log_event = _random_event(log_modules, rng)
+            assert [rule.rule_id for rule in compiled.match(log_event)] == _reference(rules, log_event)
+
+    def test_enabled_flag_is_read_at_match_time(self, log_modules):
+        collector, router = log_modules
+        rules = _random_rules(log_modules, random.Random(0))
+        compiled = router.CompiledRuleSet(rules)
+        log_event = collector.LogEvent(
+            timestamp=datetime(2026, 1, 1), level=collector.LogSeverity.ERROR, category="auth",
+            message="payment failed, request timeout", source=collector.LogSource.SECURITY,
+            data={'status': 500}, correlation_id="req-1", tenant_id="acme", user_id="admin"
+        )
+        compiled.match(log_event)  # memoize
+
+        for rule in rules:
+            rule.enabled = not rule.enabled
+
+        assert [rule.rule_id for rule in compiled.match(log_event)] == _reference(rules, log_event)
+
+    def test_numbered_backreferences_keep_their_meaning(self, log_modules):
+        collector, router = log_modules
+        rules = [
+            router.RoutingRule(rule_id="grouped", name="grouped", rule_type=router.RuleType.CONTENT_BASED,
+                               conditions={'message': {'patterns': ['(a|b)c']}}, destinations=["a"]),
+            router.RoutingRule(rule_id="backref", name="backref", rule_type=router.RuleType.CONTENT_BASED,
+                               conditions={'message': {'patterns': [r'(\w)\1']}}, destinations=["b"]),
+        ]
+        compiled = router.CompiledRuleSet(rules)
+
+        # Joined, the second pattern's \1 would refer to the first pattern's group
+        assert compiled._message_gate is None
+        for message in ("bc", "hello", "no match"):
+            log_event = collector.LogEvent(timestamp=datetime(2026, 1, 1), level=collector.LogSeverity.INFO,
+                                           category="app", message=message, source=collector.LogSource.API)
+            assert [rule.rule_id for rule in compiled.match(log_event)] == _reference(rules, log_event)
+
+
+class TestLogRouter:
+    """Routing through the compiled network"""
+
+    def _router(self, log_modules, delivered):
+        router_module = log_modules[1]
+        router = router_module.LogRouter()
+        for name in ("dest-0", "dest-1", "dest-2"):
+            router.add_destination(name, lambda log_event, name=name: delivered.append((name, log_event.message)))
+        for rule in _random_rules(log_modules, random.Random(1)):
+            rule.strategy = router_module.RoutingStrategy.ALL
+            router.add_rule(rule)
+        return router
+
+    def test_rule_changes_recompile(self, log_modules):
+        router = self._router(log_modules, [])
+        rng = random.Random(2)
+        log_events = [_random_event(log_modules, rng) for _ in range(200)]
+
+        def check():
+            for log_event in log_events:
+                expected = _reference(list(router.rules.values()), log_event)
+                assert [rule.rule_id for rule in router._get_matching_rules(log_event)] == expected
+
+        check()
+        router.update_rule("rule-0", {'priority': 100, 'conditions': {'severities': ['info']}})
+        check()
+        router.remove_rule("rule-8")
+        check()
+        router.rules["rule-6"].conditions['categories'].append('db')
+        router.recompile_rules()
+        check()
+
+    def test_batch_routing_matches_single_routing(self, log_modules):
+        single, batched = [], []
+        rng = random.Random(3)
+        log_events = [_random_event(log_modules, rng) for _ in range(100)]
+        router = self._router(log_modules, single)
+        expected = [sorted(router.route_log(log_event)) for log_event in log_events]
+
+        router = self._router(log_modules, batched)
+        results = router.batch_route_logs(log_events)
+
+        assert sorted(results) == list(range(len(log_events)))
+        assert [sorted(results[index]) for index in range(len(log_events))] == expected
+        assert sorted(batched) == sorted(single)
+        assert router.stats['rule_evaluations'] == len(log_events)
@@ -0,0 +1,239 @@
+"""
+Metrics Collector Tests
+
+Quantile sketch error bounds and merging, and the pre-aggregated series the
+collector keeps per name and label set.
+"""
+
+import json
+import math
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.services.telemetry import background_tasks
+from app.services.telemetry.background_tasks import TelemetryBackgroundTasks
+from app.services.telemetry.metrics_collector import MetricsCollector, MetricType, QuantileSketch
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999]
+
+
+def _exact(values, q):
+    """Quantile with the sketch's rank convention: the value at rank q * (n - 1)"""
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _samples(distribution, n=20000, seed=3):
+    rng = random.Random(seed)
+    if distribution == "lognormal":
+        return [rng.lognormvariate(0, 2) for _ in range(n)]
+    if distribution == "uniform":
+        return [rng.uniform(0.001, 5000) for _ in range(n)]
+    # Mixed signs with a block of exact zeros
+    return [rng.gauss(0, 100) for _ in range(n)] + [0.0] * (n // 10)
+
+
+class TestQuantileSketch:
+    """DDSketch-style relative error sketch"""
+
+    @pytest.mark.parametrize("distribution", ["lognormal", "uniform", "mixed"])
+    @pytest.mark.parametrize("accuracy", [0.01, 0.05])
+    def test_quantiles_within_relative_error(self, distribution, accuracy):
+        values = _samples(distribution)
+        sketch = QuantileSketch(accuracy)
+        for value in values:
+            sketch.add(value)
+
+        for q, estimate in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+            exact = _exact(values, q)
+            assert abs(estimate - exact) <= accuracy * abs(exact) + 1e-12, (q, estimate, exact)
+
+    def test_extremes_count_and_mean_are_exact(self):
+        values = _samples("mixed")
+        sketch = QuantileSketch()
+        for value in values:
+            sketch.add(value)
+
+        assert sketch.quantiles([0, 1]) == [min(values), max(values)]
+        assert sketch.count == len(values)
+        assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+    def test_memory_is_bounded_by_buckets(self):
+        sketch = QuantileSketch(0.01)
+        for value in _samples("lognormal", n=100000):
+            sketch.add(value)
+
+        # ln(max / min) / ln(gamma) buckets, independent of the sample count
+        assert len(sketch._positive) < 2000
+
+    def test_merge_is_exact(self):
+        values = _samples("lognormal")
+        whole, parts = QuantileSketch(), [QuantileSketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            whole.add(value)
+            parts[i % 4].add(value)
+
+        merged = QuantileSketch()
+        for part in parts:
+            merged.merge(part)
+
+        assert merged.quantiles(QUANTILES) == whole.quantiles(QUANTILES)
+        assert (merged.count, merged.min, merged.max) == (whole.count, whole.min, whole.max)
+
+    def test_merge_rejects_different_accuracy(self):
+        with pytest.raises(ValueError):
+            QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+    def test_serialized_round_trip(self):
+        sketch = QuantileSketch()
+        for value in _samples("mixed", n=2000):
+            sketch.add(value)
+
+        restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+        assert restored.quantiles(QUANTILES) == sketch.quantiles(QUANTILES)
+
+    def test_collapsing_keeps_upper_quantiles_accurate(self):
+        values = _samples("lognormal")
+        sketch = QuantileSketch(0.01, max_bins=512)
+        for value in values:
+            sketch.add(value)
+
+        # Only the lowest-magnitude buckets are folded together
+        assert len(sketch._positive) <= 512
+        for q in (0.5, 0.9, 0.99):
+            assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.01)
+
+    def test_empty_sketch(self):
+        assert QuantileSketch().quantiles([0, 0.5, 1]) == [None, None, None]
+
+
+class TestMetricsCollector:
+    """Pre-aggregated series"""
+
+    def test_counters_gauges_and_histograms(self):
+        collector = MetricsCollector()
+        for _ in range(3):
+            collector.increment_counter("requests", 2, labels={"route": "/a"})
+        collector.increment_counter("requests", labels={"route": "/b"})
+        collector.set_gauge("queue.depth", 4)
+        collector.set_gauge("queue.depth", 7)
+        for value in range(1, 101):
+            collector.record_timer("latency", value / 1000)
+
+        assert collector.get_counter_value("requests", {"route": "/a"}) == 6
+        assert collector.get_counter_value("requests", {"route": "/b"}) == 1
+        assert collector.get_current_value("queue.depth") == 7
+        stats = collector.get_histogram_stats("latency")
+        assert (stats["count"], stats["min"], stats["max"]) == (100, 0.001, 0.1)
+        assert stats["p50"] == pytest.approx(0.05, rel=0.01)
+        assert stats["p99"] == pytest.approx(0.099, rel=0.01)
+        assert len(collector._series) == 4
+
+    def test_series_cap_drops_new_series(self):
+        collector = MetricsCollector(max_metrics=2)
+        for i in range(5):
+            collector.increment_counter("requests", labels={"route": str(i)})
+        collector.increment_counter("requests", labels={"route": "0"})
+
+        assert len(collector._series) == 2
+        assert collector.dropped_series == 3
+        assert collector.get_counter_value("requests", {"route": "0"}) == 2
+
+    def test_windowed_stats_use_minute_rollups(self):
+        collector = MetricsCollector(rollup_minutes=10)
+        clock = [600.0 * 1000]
+        with patch.object(time, "time", lambda: clock[0]):
+            for value in (1.0, 2.0, 3.0):
+                collector.record_histogram("size", value)
+            clock[0] += 120
+            for value in (10.0, 20.0):
+                collector.record_histogram("size", value)
+
+            recent = collector.get_histogram_stats("size", duration_minutes=1)
+            points = collector.get_recent_metrics("size", duration_minutes=5)
+
+        assert (recent["count"], recent["min"], recent["max"]) == (2, 10.0, 20.0)
+        assert collector.get_histogram_stats("size")["count"] == 5
+        assert [point.value for point in points] == [2.0, 15.0]
+
+    def test_rollups_keep_extremes_and_counts(self):
+        collector = MetricsCollector(rollup_minutes=10)
+        clock = [600.0 * 1000]
+        with patch.object(time, "time", lambda: clock[0]):
+            for value in (1.0, 2.0, 3.0):
+                collector.record_histogram("size", value)
+            clock[0] += 120
+            collector.record_histogram("size", 30.0)
+
+            maxima = collector.get_recent_metrics("size", duration_minutes=5, stat="max")
+            counts = collector.get_recent_metrics("size", duration_minutes=5, stat="count")
+            stats = collector.get_recent_stats("size", duration_minutes=5)
+
+        assert [point.value for point in maxima] == [3.0, 30.0]
+        assert [point.value for point in counts] == [3, 1]
+        # Weighted by sample count, not an average of minute means
+        assert stats == {"count": 4, "sum": 36.0, "min": 1.0, "max": 30.0, "mean": 9.0}
+        with pytest.raises(ValueError):
+            collector.get_recent_metrics("size", stat="p99")
+
+    def test_window_queries_cover_the_same_minutes(self):
+        collector = MetricsCollector(rollup_minutes=10)
+        clock = [600.0 * 1000]
+        with patch.object(time, "time", lambda: clock[0]):
+            for value in (1.0, 2.0, 3.0):
+                clock[0] += 60
+                collector.record_histogram("size", value)
+
+            for minutes in (1, 2, 3):
+                counts = (
+                    collector.get_histogram_stats("size", duration_minutes=minutes)["count"],
+                    collector.get_recent_stats("size", duration_minutes=minutes)["count"],
+                    len(collector.get_recent_metrics("size", duration_minutes=minutes)),
+                )
+                assert counts == (minutes,) * 3
+
+    @pytest.mark.asyncio
+    async def test_response_time_outlier_alert(self, monkeypatch):
+        collector = MetricsCollector()
+        for _ in range(500):
+            collector.record_histogram("http.response_time_ms", 50.0)
+        collector.record_histogram("http.response_time_ms", 12000.0)
+        alerts = []
+        monkeypatch.setattr(background_tasks, "metrics_collector", collector)
+        monkeypatch.setattr(background_tasks.alert_manager, "check_custom_condition",
+                            lambda condition, title, message, severity: alerts.append((title, severity)))
+
+        await TelemetryBackgroundTasks()._check_metric_anomalies()
+
+        # A single slow request stands out although the minute's mean is ~74ms
+        assert alerts == [("Extreme Response Time Outliers", background_tasks.AlertSeverity.HIGH)]
+
+    def test_merge_series_from_another_worker(self):
+        first, second = MetricsCollector(), MetricsCollector()
+        values = _samples("lognormal", n=4000)
+        for i, value in enumerate(values):
+            (first if i % 2 else second).record_histogram("latency", value)
+        first.increment_counter("requests", 3)
+        second.increment_counter("requests", 4)
+
+        first.merge_series(json.loads(json.dumps(second.export_series())))
+
+        assert first.get_counter_value("requests") == 7
+        stats = first.get_histogram_stats("latency")
+        assert stats["count"] == len(values)
+        assert math.isclose(stats["p90"], _exact(values, 0.9), rel_tol=0.01)
+
+    def test_prometheus_export_has_labels_and_quantiles(self):
+        collector = MetricsCollector()
+        collector.increment_counter("http.requests", labels={"method": "GET"})
+        collector.record_histogram("db.query", 0.5)
+
+        text = collector.export_metrics("prometheus")
+
+        assert 'http_requests{method="GET"} 1' in text
+        assert 'db_query{quantile="0.5"}' in text
+        assert MetricType.COUNTER.value in text
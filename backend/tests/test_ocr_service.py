@@ -0,0 +1,88 @@
+"""
+OCR Service Tests
+
+Page counting and fan-out of multi-page documents to the OCR process pool,
+and merging of per-page results.
+"""
+
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.document_converter import count_document_pages
+from app.services.ocr_pool import merge_page_results
+
+
+def _page(number, *texts, error=None):
+    return {
+        "page": number,
+        "blocks": [{"text": text, "confidence": 0.5 + number / 10} for text in texts],
+        "error": error
+    }
+
+
+@pytest.fixture
+def tiff_path(tmp_path):
+    """Three-frame TIFF"""
+    path = tmp_path / "scan.tiff"
+    frames = [Image.new("L", (8, 8), color) for color in (0, 128, 255)]
+    frames[0].save(path, save_all=True, append_images=frames[1:])
+    return str(path)
+
+
+class TestPages:
+    """Page counting and merging"""
+
+    def test_count_tiff_frames(self, tiff_path):
+        assert count_document_pages(tiff_path) == 3
+
+    def test_merge_keeps_page_order_and_errors(self):
+        merged = merge_page_results([
+            _page(3, "c"),
+            _page(1, "a1", "a2"),
+            _page(2, error="render failed"),
+        ])
+
+        assert merged["text"] == "a1\na2\n\n\n\nc"
+        assert [block["text"] for block in merged["blocks"]] == ["a1", "a2", "c"]
+        assert merged["errors"] == [{"page": 2, "error": "render failed"}]
+        assert merged["pages_processed"] == 3
+        assert merged["confidence"] == pytest.approx((0.6 + 0.6 + 0.8) / 3)
+
+
+class TestProcessDocumentAsync:
+    """process_document_async keeps document parsing off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_pages_are_counted_off_the_event_loop(self, tiff_path, monkeypatch):
+        pytest.importorskip("requests")
+        from app.services import ocr_service
+        from app.services.ocr_service import OCRService
+
+        service = OCRService.__new__(OCRService)
+        service.available = True
+        service.backend = "paddleocr"
+
+        counted_on = []
+        count_pages = OCRService._ocr_page_count
+
+        def record_thread(self, file_path):
+            counted_on.append(threading.get_ident())
+            return count_pages(self, file_path)
+
+        pool = MagicMock()
+        pool.ocr_pages_async = AsyncMock(return_value=[_page(1, "a"), _page(2, "b")])
+        monkeypatch.setattr(settings, "MAX_TIFF_PAGES", 2)
+
+        with patch.object(OCRService, "_ocr_page_count", record_thread), \
+                patch.object(ocr_service, "get_ocr_pool", return_value=pool):
+            # Call through the telemetry decorator; only the OCR flow is under test
+            result = await OCRService.process_document_async.__wrapped__(service, tiff_path)
+
+        assert counted_on and counted_on[0] != threading.get_ident()
+        pool.ocr_pages_async.assert_awaited_once_with(tiff_path, 2, settings.DEFAULT_DPI)
+        assert result["text"] == "a\n\nb"
+        assert result["engine"] == "paddleocr"
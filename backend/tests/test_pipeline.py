@@ -0,0 +1,174 @@
+"""
+Middleware Pipeline Tests
+
+Stage ordering, short-circuiting, response hooks and completion of the
+pure-ASGI request pipeline.
+"""
+
+import pytest
+
+from app.core import middleware_config
+from app.core.config import settings
+from app.middleware.pipeline import MiddlewarePipeline, PipelineStage, StageMiddleware, TenantResolutionStage
+
+
+class RecordingStage(PipelineStage):
+    """Appends every hook call to a shared log"""
+
+    def __init__(self, name, log, short_circuit=None, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.log = log
+        self.short_circuit = short_circuit
+
+    async def on_request(self, ctx):
+        self.log.append(("request", self.name))
+        return self.short_circuit
+
+    async def on_response_start(self, ctx, message):
+        self.log.append(("start", self.name))
+        ctx.response_headers.append((b"x-stage", self.name.encode()))
+
+    async def on_response_body(self, ctx, message):
+        self.log.append(("body", self.name))
+
+    async def on_complete(self, ctx):
+        self.log.append(("complete", self.name, ctx.status_code, type(ctx.error).__name__))
+
+
+def make_endpoint(log, status=200):
+    async def endpoint(scope, receive, send):
+        log.append(("endpoint",))
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return endpoint
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def call(app, path="/api/v1/documents", headers=()):
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": b"",
+             "headers": list(headers), "client": ("10.0.0.1", 50000)}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return scope, messages
+
+
+class TestStageOrder:
+    """Hooks run like nested middleware"""
+
+    @pytest.mark.asyncio
+    async def test_request_outer_first_response_inner_first(self):
+        log = []
+        stages = [RecordingStage(name, log) for name in ("a", "b", "c")]
+
+        _, messages = await call(MiddlewarePipeline(make_endpoint(log), stages))
+
+        assert log == [
+            ("request", "a"), ("request", "b"), ("request", "c"),
+            ("endpoint",),
+            ("start", "c"), ("start", "b"), ("start", "a"),
+            ("body", "c"), ("body", "b"), ("body", "a"),
+            ("complete", "c", 200, "NoneType"), ("complete", "b", 200, "NoneType"),
+            ("complete", "a", 200, "NoneType"),
+        ]
+        assert messages[0]["headers"] == [(b"x-stage", b"c"), (b"x-stage", b"b"), (b"x-stage", b"a")]
+
+    @pytest.mark.asyncio
+    async def test_short_circuit_skips_inner_stages(self):
+        log = []
+        rejection = make_endpoint(log, status=429)
+        stages = [RecordingStage("a", log), RecordingStage("b", log, short_circuit=rejection),
+                  RecordingStage("c", log)]
+
+        _, messages = await call(MiddlewarePipeline(make_endpoint([]), stages))
+
+        assert messages[0]["status"] == 429
+        assert log == [
+            ("request", "a"), ("request", "b"),
+            ("endpoint",),
+            ("start", "b"), ("start", "a"),
+            ("body", "b"), ("body", "a"),
+            ("complete", "b", 429, "NoneType"), ("complete", "a", 429, "NoneType"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_excluded_paths_skip_the_stage(self):
+        log = []
+        stages = [RecordingStage("a", log), RecordingStage("b", log, exclude_paths=["/health"])]
+
+        await call(MiddlewarePipeline(make_endpoint(log), stages), path="/health/live")
+
+        assert {entry[1] for entry in log if len(entry) > 1} == {"a"}
+
+    @pytest.mark.asyncio
+    async def test_error_still_completes_entered_stages(self):
+        log = []
+
+        async def failing(scope, receive, send):
+            raise RuntimeError("boom")
+
+        pipeline = MiddlewarePipeline(failing, [RecordingStage("a", log), RecordingStage("b", log)])
+
+        with pytest.raises(RuntimeError):
+            await call(pipeline)
+        assert log[-2:] == [("complete", "b", 0, "RuntimeError"), ("complete", "a", 0, "RuntimeError")]
+
+    @pytest.mark.asyncio
+    async def test_only_overridden_hooks_are_called(self):
+        class RequestOnly(PipelineStage):
+            name = "request_only"
+
+            async def on_request(self, ctx):
+                ctx.state["seen"] = True
+
+        pipeline = MiddlewarePipeline(make_endpoint([]), [RequestOnly()], record_timings=True)
+
+        assert not pipeline._start_hooks and not pipeline._body_hooks and not pipeline._complete_hooks
+        scope, _ = await call(pipeline)
+        assert scope["state"] == {"seen": True}
+
+    @pytest.mark.asyncio
+    async def test_non_http_scopes_pass_through(self):
+        log = []
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(scope["type"])
+
+        await MiddlewarePipeline(app, [RecordingStage("a", log)])({"type": "lifespan"}, receive, None)
+
+        assert (seen, log) == (["lifespan"], [])
+
+
+class TestStages:
+    """Built-in stages and the application's stage list"""
+
+    @pytest.mark.asyncio
+    async def test_tenant_resolution(self):
+        scope, _ = await call(StageMiddleware(make_endpoint([]), TenantResolutionStage()),
+                              headers=[(b"x-tenant-id", b"acme")])
+
+        assert scope["state"] == {"enterprise_enabled": True, "tenant_id": "acme"}
+
+    def test_application_stage_order(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "TELEMETRY_ENABLED", True)
+
+        stages = middleware_config.build_request_stages()
+
+        assert [stage.name for stage in stages] == ["tenant", "rate_limit", "cache", "telemetry", "usage"]
+
+    def test_disabled_stages_are_left_out(self, monkeypatch):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+        monkeypatch.setattr(settings, "TELEMETRY_ENABLED", False)
+
+        stages = middleware_config.build_request_stages()
+
+        assert [stage.name for stage in stages] == ["tenant", "cache", "usage"]
@@ -0,0 +1,315 @@
+"""
+Queue Manager Tests
+
+Job claiming, retry scheduling and task run bookkeeping against SQLite.
+
+``app.models.user`` and ``app.models.enterprise`` both define a
+``permissions`` table and cannot be imported together in this tree, so the
+queue manager is loaded with a stand-in EnterpriseService (only used to count
+quota usage on success), the job models are imported by the ``models``
+fixture (skipping when another test module already imported the user
+models), and the ``users`` table the job foreign keys point at is declared
+for the duration of each test.
+"""
+
+import asyncio
+import importlib.util
+import sys
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import Base
+from app.services.job_notifier import notify_jobs_available
+
+QUEUE_MANAGER = Path(__file__).resolve().parents[1] / "app" / "services" / "queue_manager.py"
+
+
+@pytest.fixture
+def queue_manager(monkeypatch):
+    """queue_manager module loaded against a stand-in EnterpriseService"""
+    enterprise_service = types.ModuleType("app.services.enterprise_service")
+    enterprise_service.EnterpriseService = MagicMock()
+    monkeypatch.setitem(sys.modules, "app.services.enterprise_service", enterprise_service)
+
+    name = "app.services.queue_manager"
+    spec = importlib.util.spec_from_file_location(name, QUEUE_MANAGER)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def models():
+    """Job, batch, queue and task run models"""
+    try:
+        from app.models.enterprise import JobQueue, TaskRun
+        from app.models.job import Job, JobBatch
+    except InvalidRequestError as e:
+        pytest.skip(f"enterprise models conflict with models imported by another test module: {e}")
+    return types.SimpleNamespace(Job=Job, JobBatch=JobBatch, JobQueue=JobQueue, TaskRun=TaskRun)
+
+
+@pytest.fixture
+def session_factory(tmp_path, models):
+    """SQLite database with the job and task run tables"""
+    users = None
+    if "users" not in Base.metadata.tables:
+        users = Table("users", Base.metadata, Column("user_id", String, primary_key=True))
+
+    metadata = MetaData()
+    Table("users", metadata, Column("user_id", String, primary_key=True))
+    Table("scheduled_tasks", metadata, Column("task_id", String, primary_key=True))
+    Table("tenants", metadata, Column("tenant_id", String, primary_key=True))
+    for table in (models.JobQueue.__table__, models.JobBatch.__table__, models.Job.__table__,
+                  models.TaskRun.__table__):
+        table.to_metadata(metadata)
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    metadata.create_all(engine)
+    yield sessionmaker(bind=engine, expire_on_commit=False)
+
+    if users is not None:
+        Base.metadata.remove(users)
+
+
+def make_queue(models, **overrides):
+    options = dict(tenant_id="t1", name="default", max_concurrent_jobs=5, max_retries=2,
+                   retry_delay_seconds=10, priority_min=-10, priority_max=10)
+    options.update(overrides)
+    return models.JobQueue(**options)
+
+
+def add_jobs(models, session_factory, *jobs):
+    db = session_factory()
+    for job_id, options in jobs:
+        db.add(models.Job(job_id=job_id, tenant_id="t1", queue_name="default", uploaded_by="u1",
+                   status=options.pop("status", "queued"), **options))
+    db.commit()
+    db.close()
+
+
+def load_job(models, session_factory, job_id):
+    db = session_factory()
+    try:
+        return db.get(models.Job, job_id)
+    finally:
+        db.close()
+
+
+def task_runs(models, session_factory, job_id):
+    db = session_factory()
+    try:
+        return db.execute(select(models.TaskRun).where(models.TaskRun.task_id == job_id)).scalars().all()
+    finally:
+        db.close()
+
+
+class TestClaimJobs:
+    """Batch job claiming"""
+
+    def test_claims_due_jobs_by_priority(self, models, queue_manager, session_factory):
+        now = datetime.utcnow()
+        add_jobs(
+            models,
+            session_factory,
+            ("low", {"priority": 0, "created_at": now - timedelta(minutes=3)}),
+            ("high", {"priority": 5, "created_at": now - timedelta(minutes=1)}),
+            ("old", {"priority": 0, "created_at": now - timedelta(minutes=5)}),
+            ("delayed", {"priority": 9, "not_before": now + timedelta(minutes=5)}),
+            ("running", {"priority": 9, "status": "processing"}),
+            ("out_of_range", {"priority": 20}),
+        )
+        manager = queue_manager.QueueManager(session_factory(), session_factory)
+        queue = make_queue(models)
+
+        db = session_factory()
+        assert manager._claim_jobs(db, "default", "t1", queue, 2) == ["high", "old"]
+        assert manager._claim_jobs(db, "default", "t1", queue, 5) == ["low"]
+        assert manager._claim_jobs(db, "default", "t1", queue, 5) == []
+        db.close()
+
+        assert load_job(models, session_factory, "high").status == "processing"
+        assert load_job(models, session_factory, "delayed").status == "queued"
+
+    def test_concurrent_workers_do_not_share_jobs(self, models, queue_manager, session_factory):
+        add_jobs(models, session_factory, *((f"job-{i}", {"priority": 0}) for i in range(6)))
+        manager = queue_manager.QueueManager(session_factory(), session_factory)
+        queue = make_queue(models)
+
+        first, second = session_factory(), session_factory()
+        claims = [manager._claim_jobs(db, "default", "t1", queue, 4) for db in (first, second, first)]
+        first.close()
+        second.close()
+
+        claimed = [job_id for batch in claims for job_id in batch]
+        assert sorted(claimed) == [f"job-{i}" for i in range(6)]
+        assert len(claimed) == len(set(claimed))
+
+    def test_postgres_claims_with_skip_locked(self, models, queue_manager):
+        manager = queue_manager.QueueManager(MagicMock(), MagicMock())
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = "postgresql"
+        db.execute.return_value.scalars.return_value = iter(["job-1"])
+
+        assert manager._claim_jobs(db, "default", None, make_queue(models), 3) == ["job-1"]
+
+        (statement,), _ = db.execute.call_args
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert sql.startswith("UPDATE jobs SET status=")
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "RETURNING jobs.job_id" in sql
+        db.commit.assert_called_once()
+
+
+class TestExecuteJob:
+    """Attempts, retries and their task runs"""
+
+    @staticmethod
+    async def run(models, queue_manager, session_factory, processor, queue):
+        manager = queue_manager.QueueManager(MagicMock(), session_factory)
+        manager._get_job_processor = lambda job: processor
+        db = session_factory()
+        try:
+            await manager._execute_job(db, db.get(models.Job, "job-1"), queue)
+        finally:
+            db.close()
+
+    @pytest.mark.asyncio
+    async def test_success_completes_run(self, models, queue_manager, session_factory):
+        add_jobs(models, session_factory, ("job-1", {"status": "processing"}))
+
+        async def processor(job):
+            return {"pages": 3}
+
+        await self.run(models, queue_manager, session_factory, processor, make_queue(models))
+
+        job = load_job(models, session_factory, "job-1")
+        (run,) = task_runs(models, session_factory, "job-1")
+        assert job.status == "completed"
+        assert (run.status, run.result) == ("completed", {"pages": 3})
+
+    @pytest.mark.asyncio
+    async def test_retry_marks_attempt_failed_before_requeue(self, models, queue_manager, session_factory):
+        add_jobs(models, session_factory, ("job-1", {"status": "processing"}))
+
+        async def processor(job):
+            raise RuntimeError("ocr backend down")
+
+        before = datetime.utcnow()
+        await self.run(models, queue_manager, session_factory, processor, make_queue(models))
+
+        job = load_job(models, session_factory, "job-1")
+        assert (job.status, job.retry_count) == ("queued", 1)
+        assert before + timedelta(seconds=5) <= job.not_before <= before + timedelta(seconds=11)
+
+        (run,) = task_runs(models, session_factory, "job-1")
+        assert run.status == "failed"
+        assert "ocr backend down" in run.error_message
+        assert run.completed_at is not None
+
+    @pytest.mark.asyncio
+    async def test_last_attempt_fails_job_with_one_run(self, models, queue_manager, session_factory):
+        add_jobs(models, session_factory, ("job-1", {"status": "processing", "retry_count": 2}))
+
+        async def processor(job):
+            raise RuntimeError("still down")
+
+        await self.run(models, queue_manager, session_factory, processor, make_queue(models))
+
+        job = load_job(models, session_factory, "job-1")
+        (run,) = task_runs(models, session_factory, "job-1")
+        assert job.status == "failed"
+        assert run.status == "failed"
+        assert "attempt 3" in run.error_message
+
+
+class TestWorkerWakeup:
+    """Idle workers wait for a notification instead of polling"""
+
+    @pytest.mark.asyncio
+    async def test_submission_wakes_idle_worker(self, models, queue_manager, session_factory, monkeypatch):
+        monkeypatch.setattr(settings, "QUEUE_IDLE_POLL_MIN_SECONDS", 30.0)
+        db = session_factory()
+        db.add(make_queue(models))
+        db.commit()
+        db.close()
+
+        async def processor(job):
+            return {}
+
+        manager = queue_manager.QueueManager(MagicMock(), session_factory)
+        manager._get_job_processor = lambda job: processor
+        await manager.start_worker("default")
+        worker = manager._worker_tasks["default"]
+        try:
+            await asyncio.sleep(0.2)  # let the worker go idle
+            add_jobs(models, session_factory, ("job-1", {}))
+            notify_jobs_available("default")
+
+            for _ in range(100):
+                if load_job(models, session_factory, "job-1").status == "completed":
+                    break
+                await asyncio.sleep(0.02)
+            assert load_job(models, session_factory, "job-1").status == "completed"
+        finally:
+            await manager.stop_worker("default")
+            await asyncio.gather(worker, return_exceptions=True)
+
+
+class TestBatches:
+    """Batch membership and aggregated status"""
+
+    def test_create_batch_attaches_tenant_jobs(self, models, queue_manager, session_factory, monkeypatch):
+        add_jobs(models, session_factory, ("job-1", {}), ("job-2", {}))
+        db = session_factory()
+        db.add(models.Job(job_id="other-tenant", tenant_id="t2", queue_name="default", uploaded_by="u2"))
+        db.commit()
+        notified = []
+        monkeypatch.setattr(queue_manager, "notify_jobs_available", lambda name, session: notified.append(name))
+
+        manager = queue_manager.QueueManager(db, session_factory)
+        batch = manager.create_batch_job("t1", "u1", ["job-1", "job-2", "other-tenant", "missing"], "invoices")
+        db.close()
+
+        assert (batch["batch_name"], batch["job_count"]) == ("invoices", 2)
+        assert load_job(models, session_factory, "job-1").batch_id == batch["batch_id"]
+        assert load_job(models, session_factory, "other-tenant").batch_id is None
+        assert notified == ["default"]
+
+    def test_batch_status_aggregates_job_states(self, models, queue_manager, session_factory, monkeypatch):
+        monkeypatch.setattr(queue_manager, "notify_jobs_available", lambda name, session: None)
+        states = ["completed", "completed", "failed", "processing", "queued"]
+        add_jobs(models, session_factory, *((f"job-{i}", {"status": status}) for i, status in enumerate(states)))
+        db = session_factory()
+        manager = queue_manager.QueueManager(db, session_factory)
+        batch_id = manager.create_batch_job("t1", "u1", [f"job-{i}" for i in range(5)])["batch_id"]
+
+        status = manager.get_batch_status(batch_id)
+        assert (status["total_jobs"], status["completed_jobs"], status["failed_jobs"],
+                status["processing_jobs"]) == (5, 2, 1, 1)
+        assert status["progress_percentage"] == 40.0
+        assert status["status"] == "processing"
+
+        db.query(models.Job).update({models.Job.status: "completed"})
+        db.commit()
+        assert manager.get_batch_status(batch_id)["status"] == "completed"
+        assert manager.get_batch_status("missing") == {"error": "Batch not found"}
+        db.close()
+
+    def test_batch_status_query_uses_batch_index(self, session_factory):
+        db = session_factory()
+        plan = db.execute(text(
+            "EXPLAIN QUERY PLAN SELECT status, count(job_id) FROM jobs WHERE batch_id = 'b' GROUP BY status"
+        )).all()
+        db.close()
+
+        assert any("idx_jobs_batch_status" in row[-1] for row in plan)
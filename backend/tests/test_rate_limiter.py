@@ -0,0 +1,84 @@
+"""
+Rate Limiter Tests
+
+Rule index lookups compared against the original linear rule scan.
+"""
+
+import fnmatch
+import random
+
+import pytest
+
+from app.services.rate_limiting.rate_limiter import (
+    RateLimitAlgorithm,
+    RateLimiter,
+    RateLimitRule,
+    RateLimitScope,
+)
+
+
+def _scan_rules(rules, identifier, scope, endpoint):
+    """The pre-index lookup: every rule, sorted by priority (stable)"""
+    applicable = []
+    for rule in sorted(rules, key=lambda r: r.priority, reverse=True):
+        if not rule.enabled or rule.scope != scope:
+            continue
+        if rule.scope_value != "*" and rule.scope_value != identifier:
+            continue
+        if rule.endpoint_patterns and not any(fnmatch.fnmatch(endpoint, p) for p in rule.endpoint_patterns):
+            continue
+        applicable.append(rule)
+    return applicable
+
+
+class TestRuleIndex:
+    """Indexed rule lookup"""
+
+    @pytest.mark.asyncio
+    async def test_matches_linear_scan(self):
+        rng = random.Random(12)
+        limiter = RateLimiter()
+        scopes = [RateLimitScope.IP, RateLimitScope.USER, RateLimitScope.GLOBAL]
+        identifiers = ["*", "10.0.0.1", "10.0.0.2", "user-1"]
+        patterns = [[], ["/api/*"], ["/api/documents/*", "/health"], ["/admin*"], ["/api/*/1*"]]
+
+        for i in range(200):
+            await limiter.add_rule(RateLimitRule(
+                id=f"rule-{i}",
+                name=f"rule {i}",
+                algorithm=RateLimitAlgorithm.FIXED_WINDOW,
+                scope=rng.choice(scopes),
+                scope_value=rng.choice(identifiers),
+                max_requests=10,
+                window_seconds=60,
+                endpoint_patterns=rng.choice(patterns),
+                priority=rng.randint(0, 5),
+                enabled=rng.random() > 0.1
+            ))
+        for i in range(0, 200, 7):
+            await limiter.remove_rule(f"rule-{i}")
+
+        for scope in scopes:
+            for identifier in identifiers:
+                for endpoint in ["/api/documents/1", "/api/documents/12", "/health", "/admin/users", "/other", ""]:
+                    found = await limiter._find_applicable_rules(identifier, scope, endpoint)
+                    expected = _scan_rules(limiter._rules, identifier, scope, endpoint)
+                    assert [r.id for r in found] == [r.id for r in expected]
+
+    @pytest.mark.asyncio
+    async def test_equal_priority_keeps_insertion_order(self):
+        limiter = RateLimiter()
+        for i, priority in enumerate([1, 3, 1, 3, 2]):
+            await limiter.add_rule(RateLimitRule(
+                id=f"rule-{i}",
+                name=f"rule {i}",
+                algorithm=RateLimitAlgorithm.SLIDING_WINDOW,
+                scope=RateLimitScope.IP,
+                scope_value="*" if i % 2 else "10.0.0.1",
+                max_requests=10,
+                window_seconds=60,
+                priority=priority
+            ))
+
+        found = await limiter._find_applicable_rules("10.0.0.1", RateLimitScope.IP, "/")
+        assert [r.id for r in found] == ["rule-1", "rule-3", "rule-4", "rule-0", "rule-2"]
@@ -0,0 +1,152 @@
+"""
+Rate Limiting Tests
+
+RateLimitStage on the in-process limiter backend: per-IP enforcement,
+API-key scope, RateLimit-* headers and the application stage's user
+API-key resolver.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import middleware_config, security
+from app.core.cache_config import cache_settings
+from app.core.config import settings
+from app.models.user import User
+from app.middleware import rate_limiting
+from app.middleware.pipeline import MiddlewarePipeline
+from app.middleware.rate_limiting import RateLimitStage
+from app.services.rate_limiting.rate_limiter import RateLimiter
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def call(pipeline, ip="10.0.0.1", api_key=None):
+    headers = [(b"host", b"test")]
+    if api_key:
+        headers.append((b"x-api-key", api_key.encode()))
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/documents", "query_string": b"",
+             "headers": headers, "client": (ip, 50000)}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await pipeline(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(cache_settings.CONNECTION_CONFIG, "REDIS_ENABLED", False)
+    return RateLimiter()
+
+
+def make_pipeline(limiter, **kwargs):
+    stage = RateLimitStage(calls_per_minute=3, api_key_calls_per_minute=2, rate_limiter=limiter, **kwargs)
+    return MiddlewarePipeline(endpoint, [stage])
+
+
+class TestRateLimitStage:
+
+    @pytest.mark.asyncio
+    async def test_ip_limit_and_headers(self, limiter):
+        pipeline = make_pipeline(limiter)
+
+        statuses = []
+        for _ in range(5):
+            status, headers = await call(pipeline)
+            statuses.append(status)
+
+        assert statuses == [200, 200, 200, 429, 429]
+        assert headers[b"ratelimit-limit"] == b"3"
+        assert headers[b"ratelimit-remaining"] == b"0"
+        assert b"retry-after" in headers
+
+        # Other clients have their own window
+        status, headers = await call(pipeline, ip="10.0.0.2")
+        assert status == 200
+        assert headers[b"ratelimit-remaining"] == b"2"
+
+    @pytest.mark.asyncio
+    async def test_unvalidated_api_keys_do_not_bypass_ip_limit(self, limiter):
+        pipeline = make_pipeline(limiter)
+
+        statuses = [(await call(pipeline, api_key=f"random-{i}"))[0] for i in range(5)]
+
+        assert statuses == [200, 200, 200, 429, 429]
+
+    @pytest.mark.asyncio
+    async def test_validated_api_key_is_limited_per_key(self, limiter):
+        async def resolver(api_key):
+            return "key-1" if api_key == "valid" else None
+
+        pipeline = make_pipeline(limiter, api_key_resolver=resolver)
+
+        first = await call(pipeline, ip="10.0.0.3", api_key="valid")
+        second = await call(pipeline, ip="10.0.0.4", api_key="valid")
+        third = await call(pipeline, ip="10.0.0.5", api_key="valid")
+
+        assert [first[0], second[0], third[0]] == [200, 200, 429]
+        assert first[1][b"ratelimit-limit"] == b"2"
+        # An invalid key from a fresh IP is only IP-limited
+        assert (await call(pipeline, ip="10.0.0.6", api_key="bogus"))[0] == 200
+
+    @pytest.mark.asyncio
+    async def test_denied_request_consumes_neither_limit(self, limiter):
+        async def resolver(api_key):
+            return "key-1" if api_key == "valid" else None
+
+        pipeline = make_pipeline(limiter, api_key_resolver=resolver)
+
+        statuses = [(await call(pipeline, ip="10.0.3.1", api_key="valid"))[0] for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        # The key denial left the IP's third request unused
+        status, headers = await call(pipeline, ip="10.0.3.1")
+        assert (status, headers[b"ratelimit-remaining"]) == (200, b"0")
+
+        # Denied by the IP limit: the key's quota is untouched
+        other = make_pipeline(RateLimiter(), api_key_resolver=resolver)
+        assert [(await call(other, ip="10.0.3.2"))[0] for _ in range(3)] == [200, 200, 200]
+        assert (await call(other, ip="10.0.3.2", api_key="valid"))[0] == 429
+        assert (await call(other, ip="10.0.3.3", api_key="valid"))[0] == 200
+        assert (await call(other, ip="10.0.3.4", api_key="valid"))[0] == 200
+
+    @pytest.mark.asyncio
+    async def test_application_stage_limits_user_api_keys(self, limiter, monkeypatch, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+        User.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(User.__table__.insert(), [
+                {"user_id": "u-1", "email": "a@example.com", "password_hash": "x", "full_name": "A",
+                 "status": "active", "api_key": "valid", "api_key_expires_at": None},
+                {"user_id": "u-2", "email": "b@example.com", "password_hash": "x", "full_name": "B",
+                 "status": "active", "api_key": "expired",
+                 "api_key_expires_at": datetime.utcnow() - timedelta(days=1)},
+            ])
+        monkeypatch.setattr(security, "SessionLocal", sessionmaker(bind=engine))
+        monkeypatch.setattr(rate_limiting, "get_rate_limiter", lambda: limiter)
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "RATE_LIMIT_CALLS_PER_MINUTE", 3)
+        monkeypatch.setattr(settings, "RATE_LIMIT_API_KEY_CALLS_PER_MINUTE", 2)
+
+        stage = next(s for s in middleware_config.build_request_stages() if s.name == "rate_limit")
+        pipeline = MiddlewarePipeline(endpoint, [stage])
+
+        statuses = [(await call(pipeline, ip=f"10.0.1.{i}", api_key="valid"))[0] for i in range(3)]
+
+        assert statuses == [200, 200, 429]
+        # An expired key from fresh IPs is only IP-limited
+        statuses = [(await call(pipeline, ip=f"10.0.2.{i}", api_key="expired"))[0] for i in range(3)]
+        assert statuses == [200, 200, 200]
@@ -0,0 +1,119 @@
+"""
+Redis Cache Tests
+
+Two-tier cache on the fakeredis backend (REDIS_MOCK_MODE) and Redis
+reconnect backoff.
+"""
+
+import pytest
+
+from app.core.cache_config import cache_settings
+from app.services.cache import redis_cache
+from app.services.cache.redis_cache import RedisCache, RedisCacheService, RedisUnavailableError, get_redis_client
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    """Fresh client state for every test"""
+    config = cache_settings.CONNECTION_CONFIG
+    monkeypatch.setattr(config, "REDIS_ENABLED", True)
+    monkeypatch.setattr(config, "REDIS_MOCK_MODE", False)
+    monkeypatch.setattr(redis_cache, "_redis_clients", redis_cache.weakref.WeakKeyDictionary())
+    monkeypatch.setattr(redis_cache, "_fake_server", None)
+    monkeypatch.setattr(redis_cache, "_reconnect_at", 0.0)
+    monkeypatch.setattr(redis_cache, "_reconnect_delay", 0.0)
+    return config
+
+
+class TestMockMode:
+    """Cache service on fakeredis"""
+
+    @pytest.mark.asyncio
+    async def test_l2_hit_after_l1_is_cleared(self, connection):
+        connection.REDIS_MOCK_MODE = True
+        cache = RedisCacheService(namespace="test")
+
+        assert await cache.set("k", {"value": 1}, "api_response", "tenant-1", ttl=60)
+        cache.l1.clear()
+
+        assert await cache.get("k", "api_response", "tenant-1") == {"value": 1}
+        assert cache.stats["l2_hits"] == 1
+        assert await cache.get("k", "api_response", "tenant-2") is None
+
+    @pytest.mark.asyncio
+    async def test_content_addressed_keys_include_version(self, connection):
+        connection.REDIS_MOCK_MODE = True
+        cache = RedisCacheService(namespace="test")
+
+        await cache.cache_ocr_result("sha", {"text": "ocr"}, "tenant-1", engine_version="paddle:1")
+
+        assert await cache.get_cached_ocr("sha", "tenant-1", engine_version="paddle:1") == {"text": "ocr"}
+        assert await cache.get_cached_ocr("sha", "tenant-1", engine_version="paddle:2") is None
+        assert await cache.get_cached_llm_extraction("sha", "tenant-1", model_version="paddle:1") is None
+
+    @pytest.mark.asyncio
+    async def test_capped_list_push(self, connection):
+        connection.REDIS_MOCK_MODE = True
+        cache = RedisCache(namespace="test")
+
+        for i in range(5):
+            await cache.lpush_capped("events", f"e{i}", 3, ttl=60)
+
+        assert await cache.lrange("events") == ["e4", "e3", "e2"]
+        client = await get_redis_client()
+        assert 0 < await client.ttl(cache._raw_key("events")) <= 60
+
+
+class _FlakyRedis:
+    """redis.asyncio.Redis stand-in whose first ``failures`` pings fail"""
+
+    failures = 0
+    connects = 0
+
+    def __init__(self, **kwargs):
+        type(self).connects += 1
+
+    async def ping(self):
+        if type(self).connects <= type(self).failures:
+            raise ConnectionError("connection refused")
+        return True
+
+
+class TestReconnect:
+    """Connection failures back off instead of disabling Redis for good"""
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, connection):
+        connection.REDIS_ENABLED = False
+        with pytest.raises(RedisUnavailableError):
+            await get_redis_client()
+
+    @pytest.mark.asyncio
+    async def test_retries_after_backoff(self, connection, monkeypatch):
+        import redis.asyncio
+
+        monkeypatch.setattr(connection, "REDIS_URL", None)
+        monkeypatch.setattr(connection, "REDIS_RECONNECT_BACKOFF", 1.0)
+        monkeypatch.setattr(_FlakyRedis, "failures", 2)
+        monkeypatch.setattr(_FlakyRedis, "connects", 0)
+        monkeypatch.setattr(redis.asyncio, "Redis", _FlakyRedis)
+
+        with pytest.raises(RedisUnavailableError):
+            await get_redis_client()
+        assert redis_cache._reconnect_delay == 1.0
+
+        # Inside the backoff window no connection is attempted
+        with pytest.raises(RedisUnavailableError):
+            await get_redis_client()
+        assert _FlakyRedis.connects == 1
+
+        redis_cache._reconnect_at = 0.0
+        with pytest.raises(RedisUnavailableError):
+            await get_redis_client()
+        assert redis_cache._reconnect_delay == 2.0
+
+        redis_cache._reconnect_at = 0.0
+        client = await get_redis_client()
+        assert isinstance(client, _FlakyRedis)
+        assert redis_cache._reconnect_delay == 0.0
+        assert await get_redis_client() is client
@@ -0,0 +1,209 @@
+"""
+Response Cache Tests
+
+Codec selection, the stored entry envelope, zero-copy cache hits and
+per-endpoint zstd dictionaries shared between workers through Redis.
+"""
+
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.cache_config import cache_settings
+from app.services.cache import redis_cache
+from app.services.cache.redis_cache import RedisCacheService
+from app.services.proxy_caching import response_cache as response_cache_module
+from app.services.proxy_caching.response_cache import (
+    CacheCompression, CacheStrategy, ResponseCache, ZlibCodec
+)
+
+
+def _json_body(i):
+    items = [{"id": i * 100 + n, "name": f"item-{n}", "status": "ok", "score": n * 0.5} for n in range(20)]
+    return json.dumps({"request": i, "items": items}).encode()
+
+
+def _endpoint(endpoint_id="ocr"):
+    return SimpleNamespace(id=endpoint_id, cache_enabled=True, cache_strategy=CacheStrategy.BASIC,
+                           cache_ttl_seconds=60, tags=[])
+
+
+def _request(path="/v1/pages", query=None):
+    return SimpleNamespace(method="GET", path=path, query_params=query or {}, headers={})
+
+
+def _response(content, content_type="application/json", **headers):
+    return SimpleNamespace(status_code=200, headers={"content-type": content_type, **headers}, content=content)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Cache services created in the test share one fakeredis server"""
+    config = cache_settings.CONNECTION_CONFIG
+    monkeypatch.setattr(config, "REDIS_ENABLED", True)
+    monkeypatch.setattr(config, "REDIS_MOCK_MODE", True)
+    monkeypatch.setattr(redis_cache, "_redis_clients", redis_cache.weakref.WeakKeyDictionary())
+    monkeypatch.setattr(redis_cache, "_fake_server", None)
+
+
+def _worker():
+    cache = ResponseCache()
+    cache.cache_service = RedisCacheService(namespace="test")
+    return cache
+
+
+class TestCacheCompression:
+    """Codec choice and round trips"""
+
+    def test_small_and_precompressed_bodies_stored_verbatim(self):
+        compression = CacheCompression()
+        large = _json_body(1) * 4
+
+        assert compression.compress_content(b'{"a": 1}', "ocr", "application/json")[1] == "none"
+        assert compression.compress_content(large, "ocr", "image/png")[1] == "none"
+        assert compression.compress_content(large, "ocr", "application/json", "gzip")[1] == "none"
+        assert compression.compress_content(large, "ocr", "application/json", "identity")[1] != "none"
+
+    def test_incompressible_body_stored_verbatim(self):
+        body = random.Random(0).randbytes(4096)
+
+        compressed, codec, ratio = CacheCompression().compress_content(body, "ocr", "application/octet-stream")
+
+        assert (compressed, codec, ratio) == (body, "none", 1.0)
+
+    def test_round_trip_through_recorded_codec(self):
+        compression = CacheCompression()
+        body = _json_body(1) * 4
+
+        compressed, codec, ratio = compression.compress_content(body, "ocr", "application/json")
+
+        assert codec == compression.default_codec.name
+        assert ratio < 0.9
+        assert bytes(compression.decompress_content(memoryview(compressed), codec)) == body
+
+    def test_zlib_fallback_without_zstandard(self, monkeypatch):
+        monkeypatch.setattr(response_cache_module, "ZSTD_AVAILABLE", False)
+        compression = CacheCompression()
+        body = _json_body(1) * 4
+
+        compressed, codec, _ = compression.compress_content(body, "ocr", "application/json")
+
+        assert isinstance(compression.default_codec, ZlibCodec)
+        assert codec == "zlib"
+        assert compression.decompress_content(compressed, codec) == body
+        assert not compression.add_sample("ocr", body)
+
+    def test_unknown_codec_is_an_error(self):
+        with pytest.raises(ValueError, match="Unknown cache codec"):
+            CacheCompression().decompress_content(b"x", "zstd:d12345")
+
+
+class TestEntryEnvelope:
+    """Stored entry layout and zero-copy hits"""
+
+    def test_decode_returns_view_over_payload(self):
+        payload = ResponseCache._encode_entry({"codec": "none", "status_code": 200}, b"body bytes")
+
+        header, body = ResponseCache._decode_entry(payload)
+
+        assert header == {"codec": "none", "status_code": 200}
+        assert body.obj is payload
+        assert body.tobytes() == b"body bytes"
+
+    @pytest.mark.asyncio
+    async def test_uncompressed_hit_does_not_copy_body(self):
+        cache = ResponseCache()
+        payload = ResponseCache._encode_entry({
+            "status_code": 200, "headers": {}, "content_type": "application/json",
+            "cached_at": "2026-01-01T00:00:00", "expires_at": "2026-01-01T00:01:00", "codec": "none"
+        }, b'{"ok": true}')
+        cache.cache_service = SimpleNamespace(get_raw=AsyncMock(return_value=payload))
+
+        response = await cache.get_cached_response(_request(), _endpoint())
+
+        assert isinstance(response.content, memoryview)
+        assert response.content.obj is payload
+        assert bytes(response.content) == b'{"ok": true}'
+        assert response.size_bytes == 12
+
+
+class TestResponseCacheRoundTrip:
+    """cache_response followed by get_cached_response"""
+
+    @pytest.mark.asyncio
+    async def test_compressed_entry_round_trip(self, fake_redis):
+        cache = _worker()
+        body = _json_body(3) * 4
+
+        assert await cache.cache_response(_request(), _response(body), _endpoint())
+        response = await cache.get_cached_response(_request(), _endpoint())
+
+        assert response.codec == cache.compression.default_codec.name
+        assert response.compression_ratio < 0.9
+        assert bytes(response.content) == body
+        assert response.size_bytes == len(body)
+
+    @pytest.mark.asyncio
+    async def test_dictionary_is_shared_with_other_workers(self, fake_redis):
+        pytest.importorskip("zstandard")
+        writer, reader = _worker(), _worker()
+        writer.compression.dictionary_samples = 8
+        writer.compression.dictionary_size = 4096
+        endpoint = _endpoint()
+
+        for i in range(8):
+            await writer.cache_response(_request(query={"i": i}), _response(_json_body(i) * 2), endpoint)
+        # The eighth sample schedules training off the event loop
+        await asyncio.gather(*writer._training_tasks.values())
+        codec = writer.compression.codec_for("ocr").name
+        assert codec.startswith("zstd:d")
+
+        body = _json_body(99) * 2
+        await writer.cache_response(_request(query={"i": 99}), _response(body), endpoint)
+        assert not reader.compression.has_codec(codec)
+
+        response = await reader.get_cached_response(_request(query={"i": 99}), endpoint)
+
+        assert response.codec == codec
+        assert bytes(response.content) == body
+        assert reader.compression.has_codec(codec)
+
+    @pytest.mark.asyncio
+    async def test_training_thread_does_not_touch_codec_tables(self, fake_redis, monkeypatch):
+        pytest.importorskip("zstandard")
+        cache = _worker()
+        compression = cache.compression
+        compression.dictionary_size = 4096
+        samples = [_json_body(i) * 2 for i in range(8)]
+        compression._samples["ocr"] = samples
+        snapshots = []
+        train = compression.train_dictionary
+
+        def train_in_thread(batch):
+            data = train(batch)
+            snapshots.append((dict(compression.codecs), dict(compression.endpoint_codecs)))
+            return data
+
+        monkeypatch.setattr(compression, "train_dictionary", train_in_thread)
+        codecs_before = dict(compression.codecs)
+
+        await cache._train_dictionary("ocr")
+
+        assert snapshots == [(codecs_before, {})]
+        assert compression.codec_for("ocr").name.startswith("zstd:d")
+        assert compression.take_samples("ocr") == []
+
+    @pytest.mark.asyncio
+    async def test_failed_training_keeps_default_codec(self, fake_redis):
+        pytest.importorskip("zstandard")
+        cache = _worker()
+        cache.compression._samples["ocr"] = [b"x"]
+
+        await cache._train_dictionary("ocr")
+
+        assert cache.compression.codec_for("ocr") is cache.compression.default_codec
+        assert not cache.compression.add_sample("ocr", b"more")
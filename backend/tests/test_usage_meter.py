@@ -0,0 +1,153 @@
+"""
+Usage Meter Tests
+
+Write-behind usage metering against SQLite, the in-memory quota mirror and
+the quota check that reads it.
+
+The usage models' ORM relationships cannot all be configured on their own in
+this tree, so these tests only go through the tables (as the meter does).
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.middleware import usage_tracking
+from app.models.usage import UsageMetric, UsageQuota
+from app.services.usage_meter import UsageMeter
+
+QUOTAS = UsageQuota.__table__
+METRICS = UsageMetric.__table__
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """SQLite database with the usage tables and one 100-call quota for user 1"""
+    metadata = MetaData()
+    Table("users", metadata, Column("user_id", Integer, primary_key=True))
+    Table("subscriptions", metadata, Column("id", Integer, primary_key=True))
+    UsageMetric.__table__.to_metadata(metadata)
+    UsageQuota.__table__.to_metadata(metadata)
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    metadata.create_all(engine)
+
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(QUOTAS.insert().values(
+            user_id=1, subscription_id=7, metric_type="api_calls", quota_limit=100.0, current_usage=10.0,
+            usage_percentage=10.0, period_start=now - timedelta(days=1), period_end=now + timedelta(days=30),
+            is_active=True, is_exceeded=False
+        ))
+    return sessionmaker(bind=engine)
+
+
+def make_meter(session_factory):
+    return UsageMeter(flush_interval=60, max_pending=1000, reconcile_interval=60,
+                      session_factory=session_factory)
+
+
+def quota_row(session_factory):
+    db = session_factory()
+    try:
+        return db.execute(select(QUOTAS.c.current_usage, QUOTAS.c.usage_percentage)).one()
+    finally:
+        db.close()
+
+
+class TestUsageMeter:
+    """Buffered recording and flushing"""
+
+    @pytest.mark.asyncio
+    async def test_flush_coalesces_rows_and_updates_quota(self, session_factory):
+        meter = make_meter(session_factory)
+        for _ in range(5):
+            meter.record(1, "api_calls", 2.0, subscription_id=7, response_time_ms=10)
+        meter.record(1, "storage_mb", 3.0)
+
+        assert await meter.flush() == 2
+
+        db = session_factory()
+        try:
+            rows = db.execute(select(METRICS.c.metric_type, METRICS.c.metric_value)
+                              .order_by(METRICS.c.metric_type)).all()
+        finally:
+            db.close()
+        assert rows == [("api_calls", 10.0), ("storage_mb", 3.0)]
+        assert quota_row(session_factory) == (20.0, 20.0)
+        assert await meter.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_mirror_includes_unflushed_usage(self, session_factory):
+        meter = make_meter(session_factory)
+        meter.record(1, "api_calls", 5.0, subscription_id=7)
+        assert meter.quota_usage(1, 7, "api_calls") is None
+
+        await meter.reconcile()
+        assert meter.quota_usage(1, 7, "api_calls") == (15.0, 100.0)
+
+        meter.record(1, "api_calls", 5.0, subscription_id=7)
+        assert meter.quota_usage(1, 7, "api_calls") == (20.0, 100.0)
+
+        await meter.flush()
+        assert quota_row(session_factory)[0] == 20.0
+        assert meter.quota_usage(1, 7, "api_calls") == (20.0, 100.0)
+
+        await meter.reconcile()
+        assert meter.quota_usage(1, 7, "api_calls") == (20.0, 100.0)
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, session_factory):
+        meter = make_meter(session_factory)
+        meter.record(1, "api_calls", 4.0, subscription_id=7)
+        await meter.reconcile()
+
+        with patch.object(meter, "_write", side_effect=RuntimeError("db down")):
+            assert await meter.flush() == 0
+        assert meter.stats["flush_errors"] == 1
+
+        assert await meter.flush() == 1
+        assert quota_row(session_factory)[0] == 14.0
+
+
+class TestQuotaCheck:
+    """check_quota_before_processing reads the mirror"""
+
+    @pytest.mark.asyncio
+    async def test_mirrored_headroom_skips_database(self, session_factory):
+        meter = make_meter(session_factory)
+        meter.record(1, "api_calls", 1.0, subscription_id=7)
+        await meter.reconcile()
+
+        @usage_tracking.check_quota_before_processing("api_calls", required_quantity=50.0)
+        async def handler(user_id, subscription_id):
+            return "done"
+
+        with patch.object(usage_tracking, "get_usage_meter", return_value=meter), \
+                patch.object(usage_tracking, "get_db") as get_db:
+            assert await handler(user_id=1, subscription_id=7) == "done"
+        get_db.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_without_headroom_falls_back_to_database(self, session_factory):
+        meter = make_meter(session_factory)
+        meter.record(1, "api_calls", 1.0, subscription_id=7)
+        await meter.reconcile()
+
+        @usage_tracking.check_quota_before_processing("api_calls", required_quantity=95.0)
+        async def handler(user_id, subscription_id):
+            return "done"
+
+        def get_db():
+            yield session_factory()
+
+        with patch.object(usage_tracking, "get_usage_meter", return_value=meter), \
+                patch.object(usage_tracking, "get_db", side_effect=get_db), \
+                patch.object(usage_tracking.UsageTrackingService, "check_quota_available",
+                             return_value=(False, "Quota limit reached", None)) as check:
+            with pytest.raises(Exception, match="Quota exceeded"):
+                await handler(user_id=1, subscription_id=7)
+        check.assert_called_once_with(user_id=1, subscription_id=7, metric_type="api_calls",
+                                      required_quantity=95.0)